@@ -1,2 +1,3 @@
 # backend/__init__.py
 from .can_interface import CANInterface, CANFrame, Direction
+from .frame import BusType, format_timestamp
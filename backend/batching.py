@@ -0,0 +1,72 @@
+# backend/batching.py
+
+"""
+Description:
+Collects frames on a reader thread and hands them on in bounded batches so that
+one queued Qt signal carries many frames instead of one.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import time
+from typing import Callable, Iterable, List, Optional
+
+from .frame import CANFrame
+
+DEFAULT_BATCH_FRAMES = 256
+DEFAULT_BATCH_LATENCY = 0.010  # seconds
+
+# ----------------------------------------------------------------------------------
+# 2) FrameBatcher Class
+# ----------------------------------------------------------------------------------
+class FrameBatcher:
+    """
+    Accumulates frames and emits a list once it holds ``max_frames`` frames or the
+    oldest frame has waited ``max_latency`` seconds. Not thread-safe: it belongs to
+    the single reader thread that feeds it.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[List[CANFrame]], None],
+        max_frames: int = DEFAULT_BATCH_FRAMES,
+        max_latency: float = DEFAULT_BATCH_LATENCY,
+    ):
+        self._emit = emit
+        self.max_frames = max(1, max_frames)
+        self.max_latency = max(0.0, max_latency)
+        self._batch: List[CANFrame] = []
+        self._deadline = 0.0
+
+    def add(self, frame: CANFrame) -> None:
+        batch = self._batch
+        if not batch:
+            self._deadline = time.monotonic() + self.max_latency
+        batch.append(frame)
+        if len(batch) >= self.max_frames or time.monotonic() >= self._deadline:
+            self.flush()
+
+    def extend(self, frames: Iterable[CANFrame]) -> None:
+        for frame in frames:
+            self.add(frame)
+
+    def poll(self) -> None:
+        """Flush if the oldest pending frame has reached its latency bound."""
+        if self._batch and time.monotonic() >= self._deadline:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._batch:
+            batch = self._batch
+            self._batch = []
+            self._emit(batch)
+
+    def time_remaining(self) -> Optional[float]:
+        """Seconds until a pending batch must be flushed, or None when empty."""
+        if not self._batch:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._batch)
@@ -0,0 +1,230 @@
+# backend/bus_hub.py
+
+"""
+Description:
+One shared bus connection for the whole application.
+
+BusHub owns the active adapter (simulation or serial CANInterface) and the
+objects consumers hold on to: the frame dispatcher, the ring buffer, the
+bus statistics and the UDS client. Switching or reconnecting the adapter replaces only the
+adapter; subscriptions, ring readers and signal connections made against the
+hub stay valid, so no consumer ever re-wires itself or opens its own port.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+from typing import Callable, List, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .frame import CANFrame
+from .bus_stats import BusStatistics
+from .can_interface import CANInterface, LinkState, TxReplayPolicy
+from .slcan_interface import SLCANInterface
+from .dispatcher import FrameDispatcher
+from .ring_buffer import FrameRing
+from .uds_client import UDSClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIM_INTERVAL = 1.0
+DEFAULT_RECONNECT_ATTEMPTS = 3
+RECONNECT_RETRY_MS = 2000  # Hub-level retry after the adapter gave up
+
+# ----------------------------------------------------------------------------------
+# 2) BusHub Class
+# ----------------------------------------------------------------------------------
+class BusHub(QObject):
+    """Owns the adapter; fans its frames out to every consumer. GUI thread only."""
+    frames_received = pyqtSignal(list)     # Every batch, after statistics and dispatch
+    connection_changed = pyqtSignal(bool)  # True=connected, False=disconnected
+    connection_lost = pyqtSignal(str)      # Adapter gave up; the hub may still retry
+    link_state_changed = pyqtSignal(object)  # LinkState of the current adapter
+    adapter_changed = pyqtSignal(object)
+
+    def __init__(self, adapter: Optional[CANInterface] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.dispatcher = FrameDispatcher(self)
+        self.ring = FrameRing()           # Shared by every adapter; only one runs at a time
+        self.stats = BusStatistics()
+        self.frame_count = 0
+        self._adapter: Optional[CANInterface] = None
+        self._auto_reconnect = False
+        self._reconnect_attempts = DEFAULT_RECONNECT_ATTEMPTS
+        self._sim_interval = DEFAULT_SIM_INTERVAL
+        self._tx_replay_policy = TxReplayPolicy.DROP
+        self._frame_annotator: Optional[Callable[[List[CANFrame]], None]] = None
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._retry)
+        self.set_adapter(adapter or self._make_simulation())
+        self.uds = UDSClient(self, parent=self)  # Its ISO-TP links live on the dispatcher
+
+    @property
+    def adapter(self) -> CANInterface:
+        return self._adapter
+
+    # ------------------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------------------
+    def set_adapter(self, adapter: CANInterface) -> None:
+        """Stop the current adapter and route ``adapter`` through the hub instead."""
+        old = self._adapter
+        if old is adapter:
+            return
+        self._retry_timer.stop()
+        if old is not None:
+            old.frames_received.disconnect(self._on_frames)
+            old.connection_changed.disconnect(self._on_connection_changed)
+            old.connection_lost.disconnect(self._on_connection_lost)
+            old.link_state_changed.disconnect(self.link_state_changed)
+            old.stop()
+        adapter.ring = self.ring
+        adapter.auto_reconnect = self._auto_reconnect
+        adapter.tx_replay_policy = self._tx_replay_policy
+        adapter.frame_annotator = self._frame_annotator
+        adapter.set_reconnect_attempts(self._reconnect_attempts)
+        adapter.frames_received.connect(self._on_frames)
+        adapter.connection_changed.connect(self._on_connection_changed)
+        adapter.connection_lost.connect(self._on_connection_lost)
+        adapter.link_state_changed.connect(self.link_state_changed)
+        self._adapter = adapter
+        self.adapter_changed.emit(adapter)
+        logger.info(f"[BusHub] Adapter set: {'simulation' if adapter.simulate else adapter.serial_port}")
+
+    def use_simulation(self, sim_interval: Optional[float] = None) -> bool:
+        if sim_interval is not None:
+            self._sim_interval = sim_interval
+        self.set_adapter(self._make_simulation())
+        return self.start()
+
+    def use_serial(self, port: str, baudrate: int = 115200) -> bool:
+        self.set_adapter(CANInterface(simulate=False, serial_port=port, baudrate=baudrate,
+                                      reconnect_attempts=self._reconnect_attempts))
+        return self.start()
+
+    def use_slcan(self, port: str, can_bitrate: int = 500000, hardware_timestamps: bool = True,
+                  baudrate: int = 115200) -> bool:
+        """SLCAN adapter on ``port``; with hardware_timestamps frames carry adapter receive time."""
+        self.set_adapter(SLCANInterface(serial_port=port, baudrate=baudrate, can_bitrate=can_bitrate,
+                                        hardware_timestamps=hardware_timestamps,
+                                        reconnect_attempts=self._reconnect_attempts))
+        return self.start()
+
+    def start(self) -> bool:
+        return self._adapter.start()
+
+    def stop(self) -> None:
+        self._retry_timer.stop()
+        if self._adapter.is_running():
+            self._adapter.stop()
+
+    def is_running(self) -> bool:
+        return self._adapter.is_running()
+
+    @property
+    def link_state(self) -> LinkState:
+        return self._adapter.link_state
+
+    def send_frame(self, frame: CANFrame) -> bool:
+        return self._adapter.send_frame(frame)
+
+    def set_batching(self, max_frames: int, max_latency: float) -> None:
+        self._adapter.set_batching(max_frames, max_latency)
+
+    # ------------------------------------------------------------------------------
+    # Settings (kept by the hub and applied to every adapter)
+    # ------------------------------------------------------------------------------
+    @property
+    def auto_reconnect(self) -> bool:
+        return self._auto_reconnect
+
+    @auto_reconnect.setter
+    def auto_reconnect(self, enabled: bool) -> None:
+        self._auto_reconnect = enabled
+        self._adapter.auto_reconnect = enabled
+        if not enabled:
+            self._retry_timer.stop()
+
+    @property
+    def reconnect_attempts(self) -> int:
+        return self._reconnect_attempts
+
+    def set_reconnect_attempts(self, attempts: int) -> None:
+        self._reconnect_attempts = max(1, attempts)
+        self._adapter.set_reconnect_attempts(attempts)
+
+    @property
+    def tx_replay_policy(self) -> TxReplayPolicy:
+        return self._tx_replay_policy
+
+    @tx_replay_policy.setter
+    def tx_replay_policy(self, policy: TxReplayPolicy) -> None:
+        """What send_frame does while the link is down (see TxReplayPolicy)."""
+        self._tx_replay_policy = policy
+        self._adapter.tx_replay_policy = policy
+
+    @property
+    def frame_annotator(self) -> Optional[Callable[[List[CANFrame]], None]]:
+        return self._frame_annotator
+
+    @frame_annotator.setter
+    def frame_annotator(self, annotator: Optional[Callable[[List[CANFrame]], None]]) -> None:
+        """Called with every ingested batch on the reader thread, before the ring sees it."""
+        self._frame_annotator = annotator
+        self._adapter.frame_annotator = annotator
+
+    @property
+    def sim_interval(self) -> float:
+        return self._sim_interval
+
+    @sim_interval.setter
+    def sim_interval(self, interval: float) -> None:
+        self._sim_interval = interval
+        if self._adapter.simulate:
+            self._adapter.sim_interval = interval  # Running simulation picks it up
+
+    # ------------------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------------------
+    def get_frame_count(self) -> int:
+        return self.frame_count
+
+    def reset_statistics(self) -> None:
+        self.stats.clear()
+        self.frame_count = 0
+
+    # ------------------------------------------------------------------------------
+    # Adapter signals
+    # ------------------------------------------------------------------------------
+    def _on_frames(self, frames: List[CANFrame]) -> None:
+        self.frame_count += len(frames)
+        self.stats.update(f for f in frames if type(f) is CANFrame)
+        self.dispatcher.dispatch(frames)
+        self.frames_received.emit(frames)
+
+    def _on_connection_changed(self, connected: bool) -> None:
+        if connected:
+            self._retry_timer.stop()
+        self.connection_changed.emit(connected)
+
+    def _on_connection_lost(self, message: str) -> None:
+        logger.warning(f"[BusHub] {message}")
+        self.connection_lost.emit(message)
+        if self._auto_reconnect and not self._adapter.simulate:
+            self._retry_timer.start(RECONNECT_RETRY_MS)
+
+    def _retry(self) -> None:
+        """Reopen the same adapter; consumers keep their subscriptions and readers."""
+        adapter = self._adapter
+        if adapter.is_running():
+            adapter.stop()
+        logger.info(f"[BusHub] Retrying {adapter.serial_port}")
+        if not adapter.start() and self._auto_reconnect:
+            self._retry_timer.start(RECONNECT_RETRY_MS)
+
+    def _make_simulation(self) -> CANInterface:
+        return CANInterface(simulate=True, reconnect_attempts=self._reconnect_attempts,
+                            sim_interval=self._sim_interval)
@@ -0,0 +1,102 @@
+# backend/bus_stats.py
+
+"""
+Description:
+Per-ID timing statistics (period, jitter, rate) computed from frame timestamps.
+
+Accuracy follows the timestamp source: host receive times include serial
+buffering, adapter timestamps mapped through AdapterClock do not.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .frame import CANFrame, FLAG_EXTENDED
+
+DEFAULT_SMOOTHING = 1 / 16  # EWMA gain, as for RTP interarrival jitter (RFC 3550)
+
+# ----------------------------------------------------------------------------------
+# 2) IdStats Class
+# ----------------------------------------------------------------------------------
+class IdStats:
+    """Running timing statistics for one arbitration ID."""
+    __slots__ = ("count", "last_ns", "period_ns", "jitter_ns", "min_period_ns", "max_period_ns")
+
+    def __init__(self):
+        self.count = 0
+        self.last_ns = 0
+        self.period_ns = 0.0   # Smoothed interval between frames
+        self.jitter_ns = 0.0   # Smoothed absolute deviation from period_ns
+        self.min_period_ns = 0
+        self.max_period_ns = 0
+
+    def add(self, ts_ns: int, gain: float = DEFAULT_SMOOTHING) -> None:
+        count = self.count
+        if count:
+            interval = ts_ns - self.last_ns
+            if count == 1:
+                self.period_ns = float(interval)
+                self.min_period_ns = self.max_period_ns = interval
+            else:
+                self.jitter_ns += (abs(interval - self.period_ns) - self.jitter_ns) * gain
+                self.period_ns += (interval - self.period_ns) * gain
+                if interval < self.min_period_ns:
+                    self.min_period_ns = interval
+                elif interval > self.max_period_ns:
+                    self.max_period_ns = interval
+        self.last_ns = ts_ns
+        self.count = count + 1
+
+    @property
+    def frequency(self) -> float:
+        """Frames per second from the smoothed period (0 until two frames were seen)."""
+        return 1e9 / self.period_ns if self.period_ns > 0 else 0.0
+
+    def summary(self) -> str:
+        if self.count < 2:
+            return f"{self.count} frame(s)"
+        return (f"{self.frequency:.1f} Hz | period {self.period_ns / 1e6:.3f} ms | "
+                f"jitter {self.jitter_ns / 1e6:.3f} ms | "
+                f"min/max {self.min_period_ns / 1e6:.3f}/{self.max_period_ns / 1e6:.3f} ms")
+
+# ----------------------------------------------------------------------------------
+# 3) BusStatistics Class
+# ----------------------------------------------------------------------------------
+class BusStatistics:
+    """IdStats for every ID seen on the bus. Keys keep 11-bit and 29-bit IDs apart."""
+
+    def __init__(self, smoothing: float = DEFAULT_SMOOTHING):
+        self.smoothing = smoothing
+        self._stats: Dict[int, IdStats] = {}
+
+    @staticmethod
+    def key(frame: CANFrame) -> int:
+        # Bit 30 is above any 29-bit identifier
+        return frame.arb_id | ((frame.flags & FLAG_EXTENDED) << 29)
+
+    def add(self, frame: CANFrame) -> IdStats:
+        """Account one frame and return the statistics of its ID."""
+        key = frame.arb_id | ((frame.flags & FLAG_EXTENDED) << 29)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = IdStats()
+        stats.add(frame.ts_ns, self.smoothing)
+        return stats
+
+    def update(self, frames: Iterable[CANFrame]) -> None:
+        for frame in frames:
+            self.add(frame)
+
+    def get(self, frame: CANFrame) -> Optional[IdStats]:
+        return self._stats.get(self.key(frame))
+
+    def items(self) -> Iterator[Tuple[int, IdStats]]:
+        return iter(self._stats.items())
+
+    def clear(self) -> None:
+        self._stats.clear()
+
+    def __len__(self) -> int:
+        return len(self._stats)
@@ -10,44 +10,56 @@ Handles low-level CAN communication, including serial interface and simulation m
 # ----------------------------------------------------------------------------------
 from typing import List, Optional, Dict, Callable, Tuple
 import serial
+import serial.tools.list_ports
+import os
 import random
 import threading
 import time
 import logging
-from datetime import datetime
+import itertools
+from collections import deque, OrderedDict
 from enum import Enum
-from dataclasses import dataclass
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from .frame import CANFrame, Direction, FLAG_TX, FLAG_EXTENDED
+from .batching import FrameBatcher
+from .dispatcher import FrameDispatcher
+from .ring_buffer import FrameRing
+from .traffic_gen import PeriodicMessage, TrafficGenerator, interval_schedule
+
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# ----------------------------------------------------------------------------------
-# 2) Data Structures
-# ----------------------------------------------------------------------------------
-class Direction(Enum):
-    RX = "RX"
-    TX = "TX"
+SIM_MIN_SLEEP = 0.001  # Frames due sooner are generated together on the next wakeup
+SIM_DEFAULT_IDS = 8    # Messages in the default interval schedule
+
+SERIAL_READ_TIMEOUT = 0.05   # readline timeout; stop() also cancels a pending read
+RECONNECT_MIN_DELAY = 0.05   # Backoff after a failed open: 0.1, 0.2, 0.4 ... seconds
+RECONNECT_MAX_DELAY = 2.0
+RECONNECT_TIMEOUT = 30.0     # Give up when the port stays absent this long
+HOTPLUG_POLL_INTERVAL = 0.2  # Port presence check while it is unplugged
+TX_BACKLOG_LIMIT = 256       # Frames kept for replay while the link is down
 
-@dataclass
-class CANFrame:
-    timestamp: str
-    can_id: str
-    data: List[int]
-    direction: Direction
+class LinkState(Enum):
+    DISCONNECTED = "Disconnected"
+    CONNECTED = "Connected"
+    RECONNECTING = "Reconnecting"
 
-    def __str__(self) -> str:
-        data_hex = ' '.join(f"{byte:02X}" for byte in self.data)
-        return f"[{self.timestamp}] {self.direction.value} ID:{self.can_id} Data:{data_hex}"
+class TxReplayPolicy(Enum):
+    DROP = "Drop"                     # send_frame fails while the link is down
+    REPLAY_ALL = "Replay all"         # Queue every frame, send them in order on reconnect
+    LATEST_PER_ID = "Latest per ID"   # Queue only the newest frame of each ID
 
 # ----------------------------------------------------------------------------------
-# 3) CANInterface Class
+# 2) CANInterface Class
 # ----------------------------------------------------------------------------------
 class CANInterface(QObject):
     """Manages physical/simulated CAN interface with thread-safe operations."""
-    frame_received = pyqtSignal(object)
+    frame_received = pyqtSignal(object)   # Per-frame delivery, only when emit_single_frames is set
+    frames_received = pyqtSignal(list)    # Batched delivery (list of CANFrame)
     connection_changed = pyqtSignal(bool)  # True=connected, False=disconnected
-    connection_lost = pyqtSignal(str)
+    connection_lost = pyqtSignal(str)     # Reconnect gave up (or auto-reconnect is off)
+    link_state_changed = pyqtSignal(object)  # LinkState
 
     def __init__(
         self,
@@ -56,7 +68,9 @@ class CANInterface(QObject):
         baudrate: int = 115200,
         sim_interval: float = 5.0,  # Generate frame every 5 seconds - very slow to prevent freeze
         max_data_bytes: int = 8,
-        reconnect_attempts: int = 5
+        reconnect_attempts: int = 5,
+        schedule: Optional[List[PeriodicMessage]] = None,
+        seed: Optional[int] = None
     ):
         super().__init__()
         self.simulate = simulate
@@ -73,28 +87,58 @@ class CANInterface(QObject):
         self._can_id_range: Tuple[int, int] = (0x700, 0x7FF)  # OBD-II range only
         self._frame_parser: Callable[[str], Optional[CANFrame]] = self._default_frame_parser
         self._frame_count: int = 0
+        self.emit_single_frames = False
+        self._batcher = FrameBatcher(self._emit_batch)
+        self.ring = FrameRing()  # Written only by the reader thread
+        self.frame_annotator: Optional[Callable[[List[CANFrame]], None]] = None  # Runs on the reader thread
+        self._pending_echo: deque = deque()  # Frames injected from other threads
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()  # Cancels reconnect waits immediately
+        self.link_state = LinkState.DISCONNECTED
+        self.reconnect_timeout = RECONNECT_TIMEOUT
+        self._port_identity: Optional[Tuple] = None  # (vid, pid, serial_number) of the open port
+        self.tx_replay_policy = TxReplayPolicy.DROP
+        self._tx_backlog: OrderedDict = OrderedDict()  # Guarded by _serial_lock
+        self._tx_seq = itertools.count()
+        # Per-ID routing of frames_received batches to subscribers (GUI thread)
+        self.dispatcher = FrameDispatcher(self)
+        self.frames_received.connect(self.dispatcher.dispatch)
+        # Simulation traffic; None = light random traffic every sim_interval seconds
+        self._schedule: Optional[List[PeriodicMessage]] = schedule
+        self._sim_seed = seed
 
     def start(self) -> bool:
         if self._running.is_set():
             logger.warning("[CANInterface] Already running")
             return True
-        self._running.set()
+        self._stop_event.clear()
         target = self._simulate_frames if self.simulate else self._serial_read_loop
         if not self.simulate and not self._open_serial():
-            self._running.clear()
             return False
+        self._running.set()
         self._thread = threading.Thread(target=target, daemon=True)
         self._thread.start()
         logger.info(f"[CANInterface] Started in {'simulation' if self.simulate else 'serial'} mode")
-        self.connection_changed.emit(True)
+        if self.simulate:
+            self._set_state(LinkState.CONNECTED)
+            self.connection_changed.emit(True)
         return True
 
     def stop(self) -> None:
+        """Stop immediately: wakes any wait, cancels a blocked read, never joins itself."""
         self._running.clear()
-        if self._thread:
-            self._thread.join(timeout=2)
-            self._thread = None
-        self._close_serial()
+        self._stop_event.set()
+        self._wake.set()
+        self._cancel_read()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        self._thread = None
+        self._batcher.flush()
+        self._close_serial(emit=False)
+        with self._serial_lock:
+            self._tx_backlog.clear()
+        self._set_state(LinkState.DISCONNECTED)
         logger.info("[CANInterface] Stopped")
         self.connection_changed.emit(False)
 
@@ -104,110 +148,245 @@ class CANInterface(QObject):
     def get_frame_count(self) -> int:
         return self._frame_count
 
+    def set_batching(self, max_frames: int, max_latency: float) -> None:
+        """Bound batched delivery by frame count and seconds of latency (1 = per-frame)."""
+        self._batcher.max_frames = max(1, max_frames)
+        self._batcher.max_latency = max(0.0, max_latency)
+        logger.debug(f"[CANInterface] Batching set to {self._batcher.max_frames} frames / {self._batcher.max_latency * 1000:.1f} ms")
+
+    def _ingest(self, frame: CANFrame) -> None:
+        """Publish a frame to the ring and the batcher. Reader thread only."""
+        if self.frame_annotator is not None:
+            self.frame_annotator((frame,))
+        self.ring.push(frame)
+        self._batcher.add(frame)
+        self._frame_count += 1
+
+    def _ingest_many(self, frames: List[CANFrame]) -> None:
+        """Publish a list of frames. Reader thread only."""
+        if frames:
+            if self.frame_annotator is not None:
+                self.frame_annotator(frames)
+            self.ring.push_many(frames)
+            self._batcher.extend(frames)
+            self._frame_count += len(frames)
+
+    def _inject(self, frame: CANFrame) -> None:
+        """Queue a frame from any thread; the reader thread publishes it."""
+        self._pending_echo.append(frame)
+        self._wake.set()
+
+    def _drain_injected(self) -> None:
+        pending = self._pending_echo
+        while pending:
+            self._ingest(pending.popleft())
+
+    def _emit_batch(self, frames: List[CANFrame]) -> None:
+        self.frames_received.emit(frames)
+        if self.emit_single_frames:
+            for frame in frames:
+                self.frame_received.emit(frame)
+
     def set_reconnect_attempts(self, attempts: int) -> None:
         self._reconnect_attempts = max(1, attempts)
         logger.debug(f"[CANInterface] Reconnect attempts set to {self._reconnect_attempts}")
 
+    def _set_state(self, state: LinkState) -> None:
+        if state is not self.link_state:
+            self.link_state = state
+            self.link_state_changed.emit(state)
+
     def _open_serial(self) -> bool:
         try:
             with self._serial_lock:
                 self._serial = serial.Serial(
                     self.serial_port,
                     self.baudrate,
-                    timeout=1,
+                    timeout=SERIAL_READ_TIMEOUT,
                     parity=serial.PARITY_NONE,
                     stopbits=serial.STOPBITS_ONE,
                     bytesize=serial.EIGHTBITS
                 )
-            logger.info(f"[CANInterface] Connected to {self.serial_port} @ {self.baudrate}")
-            self.connection_changed.emit(True)
-            return True
-        except serial.SerialException as e:
+        except (serial.SerialException, OSError, ValueError) as e:
             logger.error(f"[CANInterface] Failed to open serial: {e}")
-            self.connection_changed.emit(False)
             return False
+        self._remember_port()
+        logger.info(f"[CANInterface] Connected to {self.serial_port} @ {self.baudrate}")
+        self._set_state(LinkState.CONNECTED)
+        self.connection_changed.emit(True)
+        return True
 
-    def _close_serial(self) -> None:
+    def _close_serial(self, emit: bool = True) -> None:
         with self._serial_lock:
-            if self._serial and self._serial.is_open:
-                self._serial.close()
-                self._serial = None
-                logger.debug("[CANInterface] Serial port closed")
-                self.connection_changed.emit(False)
+            ser, self._serial = self._serial, None
+        if ser is None:
+            return
+        try:
+            ser.close()
+        except (serial.SerialException, OSError):
+            pass  # Device already gone
+        logger.debug("[CANInterface] Serial port closed")
+        if emit:
+            self.connection_changed.emit(False)
 
-    def _simulate_frames(self) -> None:
-        """Generate simulated CAN frames - limited to prevent UI freeze."""
-        max_frames = 100  # Stop after 100 frames
-        generated = 0
-        
-        while self._running.is_set() and generated < max_frames:
+    def _cancel_read(self) -> None:
+        """Make a readline blocked in the reader thread return now."""
+        ser = self._serial
+        if ser is not None:
             try:
-                now = datetime.now()
-                timestamp = f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}.{now.microsecond // 1000:03d}"
-            except:
-                timestamp = "00:00:00.000"
-            
-            can_id = f"{random.randint(*self._can_id_range):03X}"
-            data = [random.randint(0x00, 0xFF) for _ in range(random.randint(1, self.max_data_bytes))]
-            direction = random.choice(list(Direction))
-            frame = CANFrame(timestamp, can_id, data, direction)
-            
+                ser.cancel_read()
+            except (AttributeError, serial.SerialException, OSError):
+                pass
+
+    def _remember_port(self) -> None:
+        """Record the USB identity of the open port so it is found again if re-enumerated."""
+        for port in serial.tools.list_ports.comports():
+            if port.device == self.serial_port and port.vid is not None:
+                self._port_identity = (port.vid, port.pid, port.serial_number)
+                return
+
+    def _find_port(self) -> Optional[str]:
+        """Device path of our adapter if it is plugged in (possibly under a new name)."""
+        try:
+            ports = serial.tools.list_ports.comports()
+        except Exception:
+            ports = []
+        for port in ports:
+            if port.device == self.serial_port:
+                return port.device
+            if self._port_identity and (port.vid, port.pid, port.serial_number) == self._port_identity:
+                return port.device
+        return self.serial_port if os.path.exists(self.serial_port) else None
+
+    def set_traffic_schedule(self, schedule: Optional[List[PeriodicMessage]], seed: Optional[int] = None) -> None:
+        """Replace the simulated traffic (None = default interval traffic); applies while running."""
+        self._schedule = schedule
+        self._sim_seed = seed
+        self._wake.set()
+        if schedule:
+            fps = sum(1.0 / msg.period for msg in schedule)
+            logger.info(f"[CANInterface] Traffic schedule set: {len(schedule)} messages, {fps:.0f} frames/s")
+
+    def _traffic_key(self) -> tuple:
+        return (id(self._schedule), self._sim_seed, self.sim_interval, self._can_id_range, self.max_data_bytes)
+
+    def _build_traffic(self) -> TrafficGenerator:
+        schedule = self._schedule
+        if not schedule:
+            low, high = self._can_id_range
+            ids = random.Random(self._sim_seed).sample(range(low, high + 1), min(SIM_DEFAULT_IDS, high - low + 1))
+            schedule = interval_schedule(sorted(ids), self.sim_interval, self.max_data_bytes, self._sim_seed)
+        traffic = TrafficGenerator(schedule, self._sim_seed)
+        traffic.start(time.monotonic_ns())
+        return traffic
+
+    def _simulate_frames(self) -> None:
+        """Generate scheduled traffic until stopped; settings changes restart the schedule."""
+        traffic, key = None, None
+        while self._running.is_set():
+            if key != self._traffic_key():
+                key = self._traffic_key()
+                traffic = self._build_traffic()
+            now = time.monotonic_ns()
+            self._ingest_many(traffic.due(now))
+            self._drain_injected()
+
+            # Flush now unless more frames are due before the batch latency bound
+            next_in = traffic.time_until_next(now)
             try:
-                self.frame_received.emit(frame)
-            except:
-                pass  # Ignore emit errors
-                
-            self._frame_count += 1
-            generated += 1
-            self._running.wait(timeout=self.sim_interval)
-        
-        logger.info(f"[CANInterface] Simulation stopped after {generated} frames")
+                if next_in is None or next_in >= self._batcher.max_latency:
+                    self._batcher.flush()
+                else:
+                    self._batcher.poll()
+            except RuntimeError:
+                pass  # Ignore emit errors during teardown
+
+            # Sleep until the next frame or batch is due, or a frame is injected
+            timeout = 0.5 if next_in is None else next_in
+            remaining = self._batcher.time_remaining()
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+            self._wake.wait(timeout=max(timeout, SIM_MIN_SLEEP))
+            self._wake.clear()
 
     def simulate_uds_frame(self, sid: int, data: List[int], direction: Direction = Direction.RX) -> None:
         """Simulate a specific UDS frame for testing."""
         if not self.simulate or not self._running.is_set():
             return
-        try:
-            now = datetime.now()
-            timestamp = f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}.{now.microsecond // 1000:03d}"
-        except:
-            timestamp = "00:00:00.000"
-        can_id = f"{random.randint(*self._can_id_range):03X}"
-        frame = CANFrame(timestamp, can_id, [sid] + data, direction)
-        self.frame_received.emit(frame)
-        self._frame_count += 1
+        can_id = random.randint(*self._can_id_range)
+        frame = CANFrame(can_id, bytes([sid] + data), None, FLAG_TX if direction == Direction.TX else 0)
+        self._inject(frame)
 
     def _serial_read_loop(self) -> None:
-        attempt = 0
         while self._running.is_set():
-            if not self._serial or not self._serial.is_open:
-                if not self.auto_reconnect or attempt >= self._reconnect_attempts:
-                    logger.error("[CANInterface] Max reconnect attempts reached or auto-reconnect disabled")
-                    self.connection_lost.emit(f"Failed to reconnect to {self.serial_port} after {attempt} attempts")
-                    self.stop()
+            ser = self._serial
+            if ser is None or not ser.is_open:
+                if not self._reconnect():
                     break
-                self._attempt_reconnect(attempt)
-                attempt += 1
                 continue
             try:
-                line = self._serial.readline().decode().strip()
+                line = ser.readline()
                 if line:
-                    frame = self._frame_parser(line)
+                    frame = self._frame_parser(line.decode().strip())
                     if frame:
-                        self.frame_received.emit(frame)
-                        self._frame_count += 1
-                    attempt = 0  # Reset on successful read
-            except (UnicodeDecodeError, serial.SerialException) as e:
+                        self._ingest(frame)
+                # Hand the batch over as soon as the adapter has nothing more queued
+                if not ser.in_waiting:
+                    self._batcher.flush()
+            except UnicodeDecodeError as e:
+                logger.warning(f"[CANInterface] Undecodable line skipped: {e}")
+            except (serial.SerialException, OSError, TypeError, AttributeError) as e:
+                if not self._running.is_set():
+                    break  # Port closed or read cancelled by stop()
                 logger.error(f"[CANInterface] Serial error: {e}")
+                self._batcher.flush()
                 self._close_serial()
             except Exception as e:
                 logger.error(f"[CANInterface] Unexpected error: {e}")
 
-    def _attempt_reconnect(self, attempt: int) -> None:
-        delay = min(2 ** attempt, 10)
-        logger.info(f"[CANInterface] Reconnect attempt {attempt + 1}/{self._reconnect_attempts} in {delay}s")
-        time.sleep(delay)
-        self._open_serial()
+    def _reconnect(self) -> bool:
+        """
+        Reader-thread reconnect: wait (cancellably) for the port to be present,
+        reopen it with backoff, then replay buffered TX. False = gave up or stopped.
+        """
+        if not self.auto_reconnect:
+            return self._give_up(f"Lost connection to {self.serial_port}")
+        self._set_state(LinkState.RECONNECTING)
+        deadline = time.monotonic() + self.reconnect_timeout
+        attempt = 0
+        while self._running.is_set():
+            port = self._find_port()
+            if port is None:
+                if time.monotonic() > deadline:
+                    return self._give_up(f"{self.serial_port} did not reappear within {self.reconnect_timeout:.0f}s")
+                self._stop_event.wait(HOTPLUG_POLL_INTERVAL)
+                continue
+            if port != self.serial_port:
+                logger.info(f"[CANInterface] Adapter re-enumerated as {port}")
+                self.serial_port = port
+            if self._open_serial():
+                self._replay_tx()
+                return True
+            attempt += 1
+            if attempt >= self._reconnect_attempts:
+                return self._give_up(f"Failed to reconnect to {self.serial_port} after {attempt} attempts")
+            delay = min(RECONNECT_MIN_DELAY * 2 ** attempt, RECONNECT_MAX_DELAY)
+            logger.info(f"[CANInterface] Reconnect attempt {attempt + 1}/{self._reconnect_attempts} in {delay:.2f}s")
+            self._stop_event.wait(delay)
+        return False
+
+    def _give_up(self, message: str) -> bool:
+        """End the reader thread after a lost link; the owner decides what happens next."""
+        logger.error(f"[CANInterface] {message}")
+        self._running.clear()
+        self._close_serial(emit=False)
+        with self._serial_lock:
+            self._tx_backlog.clear()
+        self._batcher.flush()
+        self._set_state(LinkState.DISCONNECTED)
+        self.connection_lost.emit(message)
+        self.connection_changed.emit(False)
+        return False
 
     def _default_frame_parser(self, line: str) -> Optional[CANFrame]:
         try:
@@ -215,19 +394,23 @@ class CANInterface(QObject):
             if len(parts) != 4:
                 logger.warning(f"[CANInterface] Invalid frame format: {line}")
                 return None
-            timestamp, can_id, data_hex, direction_str = parts
-            can_id = can_id.upper().strip()
+            _, can_id, data_hex, direction_str = parts
             can_id_int = int(can_id, 16)
-            if not (0 <= can_id_int <= 0x7FF):
-                logger.warning(f"[CANInterface] CAN ID out of range (0-0x7FF): {can_id}")
+            # More than 3 hex digits mark a 29-bit ID (CANFrame.can_id writes 8)
+            extended = len(can_id) > 3
+            limit = 0x1FFFFFFF if extended else 0x7FF
+            if not (0 <= can_id_int <= limit):
+                logger.warning(f"[CANInterface] CAN ID out of range (0-0x{limit:X}): {can_id}")
                 return None
             data_length = len(data_hex)
             if data_length % 2 != 0 or data_length > self.max_data_bytes * 2:
                 logger.warning(f"[CANInterface] Invalid data length: {data_hex}")
                 return None
-            data = [int(data_hex[i:i+2], 16) for i in range(0, data_length, 2)]
-            direction = Direction(direction_str)
-            return CANFrame(timestamp, can_id, data, direction)
+            # Adapter text timestamp is ignored; frames are stamped on the monotonic clock
+            if direction_str not in ("TX", "RX"):
+                raise ValueError(f"invalid direction {direction_str!r}")
+            flags = (FLAG_TX if direction_str == "TX" else 0) | (FLAG_EXTENDED if extended else 0)
+            return CANFrame(can_id_int, bytes.fromhex(data_hex), None, flags)
         except Exception as e:
             logger.error(f"[CANInterface] Parse error: {e} in line: {line}")
             return None
@@ -240,24 +423,58 @@ class CANInterface(QObject):
             logger.warning(f"[CANInterface] Data exceeds max bytes ({self.max_data_bytes}): {frame.data}")
             return False
         if self.simulate:
-            self.frame_received.emit(frame)
-            self._frame_count += 1
+            self._inject(frame)
             logger.debug(f"[CANInterface] Simulated frame sent: {frame}")
             return True
         with self._serial_lock:
             if not self._serial or not self._serial.is_open:
-                logger.error("[CANInterface] Serial not open for sending")
-                return False
+                return self._buffer_tx(frame)
             try:
-                data_hex = ''.join(f"{byte:02X}" for byte in frame.data)
-                frame_str = f"{frame.timestamp},{frame.can_id},{data_hex},{frame.direction.value}\n"
-                self._serial.write(frame_str.encode())
-                self._serial.flush()
-                logger.debug(f"[CANInterface] Sent frame: {frame_str.strip()}")
+                self._write_frame(frame)
                 return True
-            except serial.SerialException as e:
+            except (serial.SerialException, OSError) as e:
                 logger.error(f"[CANInterface] Send error: {e}")
-                return False
+                return self._buffer_tx(frame)
+
+    def _write_frame(self, frame: CANFrame) -> None:
+        """Write one frame to the open port. Caller holds _serial_lock."""
+        data_hex = frame.payload.hex().upper()
+        frame_str = f"{frame.timestamp},{frame.can_id},{data_hex},{frame.direction.value}\n"
+        self._serial.write(frame_str.encode())
+        self._serial.flush()
+        logger.debug(f"[CANInterface] Sent frame: {frame_str.strip()}")
+
+    def _buffer_tx(self, frame: CANFrame) -> bool:
+        """Keep a frame sent while the link is down, per tx_replay_policy. Caller holds _serial_lock."""
+        policy = self.tx_replay_policy
+        if policy is TxReplayPolicy.DROP:
+            logger.error("[CANInterface] Serial not open for sending")
+            return False
+        backlog = self._tx_backlog
+        if policy is TxReplayPolicy.LATEST_PER_ID:
+            key = frame.arb_id | ((frame.flags & FLAG_EXTENDED) << 29)
+            backlog.pop(key, None)  # Re-inserted at the end: replay follows send order
+        else:
+            key = next(self._tx_seq)
+        backlog[key] = frame
+        if len(backlog) > TX_BACKLOG_LIMIT:
+            backlog.popitem(last=False)
+        return True
+
+    def _replay_tx(self) -> None:
+        with self._serial_lock:
+            frames = list(self._tx_backlog.values())
+            self._tx_backlog.clear()
+            for i, frame in enumerate(frames):
+                try:
+                    self._write_frame(frame)
+                except (serial.SerialException, OSError) as e:
+                    logger.error(f"[CANInterface] Replay interrupted: {e}")
+                    for rest in frames[i:]:
+                        self._buffer_tx(rest)
+                    return
+        if frames:
+            logger.info(f"[CANInterface] Replayed {len(frames)} buffered frame(s)")
 
     def set_simulation_id_range(self, min_id: int, max_id: int) -> None:
         if 0 <= min_id <= max_id <= 0x7FF:
@@ -271,4 +488,15 @@ class CANInterface(QObject):
         logger.debug("[CANInterface] Custom frame parser set")
 
     def __del__(self) -> None:
-        self.stop()
\ No newline at end of file
+        # Qt may already have deleted the C++ object: stop the thread without emitting signals
+        try:
+            self._running.clear()
+            self._stop_event.set()
+            self._wake.set()
+            self._cancel_read()
+            thread = self._thread
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=1)
+            self._close_serial(emit=False)
+        except (AttributeError, RuntimeError):
+            pass
\ No newline at end of file
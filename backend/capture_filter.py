@@ -0,0 +1,177 @@
+# backend/capture_filter.py
+
+"""
+Description:
+Capture (acceptance) filters: which arbitration IDs the reader should keep.
+
+A CaptureFilter is a list of code/mask rules. It can be compiled into adapter
+acceptance registers (SLCAN/SJA1000 code and mask, MCP2515 masks and filters)
+to keep unwanted frames off the serial link. When the adapter cannot express
+the rules exactly, the reader thread also applies the filter to raw records
+before any frame object is built.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+STD_MASK = 0x7FF
+EXT_MASK = 0x1FFFFFFF
+
+MCP2515_MASKS = 2                  # RXM0 (RXB0), RXM1 (RXB1)
+MCP2515_FILTERS = (2, 4)           # RXF0-1 belong to RXB0, RXF2-5 to RXB1
+
+# ----------------------------------------------------------------------------------
+# 2) FilterRule
+# ----------------------------------------------------------------------------------
+@dataclass(frozen=True)
+class FilterRule:
+    """Accept IDs where ``arb_id & mask == code & mask`` (mask bit 1 = must match)."""
+    code: int
+    mask: int
+    extended: bool = False
+
+    def matches(self, arb_id: int, extended: bool) -> bool:
+        return extended == self.extended and (arb_id ^ self.code) & self.mask == 0
+
+# ----------------------------------------------------------------------------------
+# 3) CaptureFilter Class
+# ----------------------------------------------------------------------------------
+class CaptureFilter:
+    """Immutable set of acceptance rules with precomputed lookup structures."""
+
+    def __init__(self, rules: Iterable[FilterRule]):
+        normalized = []
+        for rule in rules:
+            width = EXT_MASK if rule.extended else STD_MASK
+            rule = FilterRule(rule.code & rule.mask & width, rule.mask & width, rule.extended)
+            if rule not in normalized:
+                normalized.append(rule)
+        self.rules: Tuple[FilterRule, ...] = tuple(normalized)
+        self._ext_rules = tuple((r.code, r.mask) for r in self.rules if r.extended)
+        # One byte per 11-bit ID: the standard-frame check is a single index
+        self.std_table = bytearray(STD_MASK + 1)
+        for rule in self.rules:
+            if not rule.extended:
+                for arb_id in range(STD_MASK + 1):
+                    if (arb_id ^ rule.code) & rule.mask == 0:
+                        self.std_table[arb_id] = 1
+
+    @classmethod
+    def ids(cls, arb_ids: Iterable[int], extended: bool = False) -> "CaptureFilter":
+        mask = EXT_MASK if extended else STD_MASK
+        return cls(FilterRule(arb_id, mask, extended) for arb_id in arb_ids)
+
+    @classmethod
+    def diagnostic(cls) -> "CaptureFilter":
+        """OBD/UDS traffic only: 0x7DF, 0x7E0-0x7EF and 29-bit 0x18DAxxxx."""
+        return cls([
+            FilterRule(0x7DF, STD_MASK),
+            FilterRule(0x7E0, 0x7F0),
+            FilterRule(0x18DA0000, 0x1FFF0000, True),
+        ])
+
+    def accepts(self, arb_id: int, extended: bool = False) -> bool:
+        if not extended:
+            return arb_id <= STD_MASK and self.std_table[arb_id] == 1
+        return self.accepts_ext(arb_id)
+
+    def accepts_ext(self, arb_id: int) -> bool:
+        for code, mask in self._ext_rules:
+            if (arb_id ^ code) & mask == 0:
+                return True
+        return False
+
+    # ------------------------------------------------------------------------------
+    # Adapter register compilation
+    # ------------------------------------------------------------------------------
+    def sja1000_registers(self) -> Tuple[int, int]:
+        """
+        Single-filter acceptance code/mask (ACR0-3, AMR0-3) for SLCAN M/m.
+        Standard IDs sit in bits 31-21, extended IDs in bits 31-3; an AMR bit
+        of 1 means "don't care". One code/mask pair is shared by both frame
+        formats, so the result is always a superset of the rules.
+        """
+        code = None
+        care = 0xFFFFFFFF
+        for rule in self.rules:
+            shift = 3 if rule.extended else 21
+            rule_code = rule.code << shift
+            care &= rule.mask << shift
+            if code is None:
+                code = rule_code
+            else:
+                care &= ~(code ^ rule_code)
+        if code is None:
+            return 0x00000000, 0xFFFFFFFF
+        care &= 0xFFFFFFFF
+        return code & care, ~care & 0xFFFFFFFF
+
+    def mcp2515_registers(self) -> Tuple[List[Tuple[int, bool]], List[Tuple[int, bool]], bool]:
+        """
+        Masks (RXM0, RXM1) and filters (RXF0-RXF5) as (value, extended) pairs,
+        plus whether they express the rules exactly. Each receive buffer holds
+        rules of one mask; when the rules need more masks or filters than the
+        chip has, they are merged per frame format into a superset.
+        An empty filter compiles to no registers (filtering off).
+        """
+        if not self.rules:
+            return [], [], True
+        groups = self._group_by_mask(self.rules)
+        plan = self._allocate(groups)
+        if plan is not None:
+            return plan[0], plan[1], True
+        merged = [_merge(rules) for rules in (
+            [r for r in self.rules if not r.extended],
+            [r for r in self.rules if r.extended],
+        ) if rules]
+        return (*self._allocate(self._group_by_mask(merged)), False)
+
+    @staticmethod
+    def _group_by_mask(rules: Iterable[FilterRule]) -> Dict[Tuple[int, bool], List[int]]:
+        groups: Dict[Tuple[int, bool], List[int]] = {}
+        for rule in rules:
+            groups.setdefault((rule.mask, rule.extended), []).append(rule.code)
+        return groups
+
+    @staticmethod
+    def _allocate(groups: Dict[Tuple[int, bool], List[int]]):
+        small, large = MCP2515_FILTERS
+        items = sorted(groups.items(), key=lambda item: len(item[1]))
+        if len(items) == 1:
+            (mask, ext), codes = items[0]
+            if len(codes) > small + large:
+                return None
+            buffers = [((mask, ext), codes[:small]), ((mask, ext), codes[small:] or codes[:1])]
+        elif len(items) == 2:
+            if len(items[0][1]) > small or len(items[1][1]) > large:
+                return None
+            buffers = items
+        else:
+            return None
+        masks, filters = [], []
+        for ((mask, ext), codes), slots in zip(buffers, MCP2515_FILTERS):
+            masks.append((mask, ext))
+            # Unused slots repeat a used filter so they accept nothing extra
+            filters.extend((codes[i] if i < len(codes) else codes[0], ext) for i in range(slots))
+        return masks, filters
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def __repr__(self) -> str:
+        parts = ', '.join(f"{'X' if r.extended else 'S'}:{r.code:X}/{r.mask:X}" for r in self.rules)
+        return f"CaptureFilter({parts})"
+
+# ----------------------------------------------------------------------------------
+# 4) Helpers
+# ----------------------------------------------------------------------------------
+def _merge(rules: List[FilterRule]) -> FilterRule:
+    """Smallest single code/mask rule that accepts everything the rules accept."""
+    code = rules[0].code
+    care = EXT_MASK if rules[0].extended else STD_MASK
+    for rule in rules:
+        care &= rule.mask & ~(code ^ rule.code)
+    return FilterRule(code & care, care, rules[0].extended)
@@ -0,0 +1,301 @@
+# backend/discovery.py
+
+"""
+Description:
+Functional-addressing discovery: every ECU on the bus answers one broadcast.
+
+Instead of probing request IDs one by one, FunctionalDiscovery sends a short
+sequence of functional requests (0x7DF and 0x18DB33F1): VIN (F190 and OBD mode
+09), part number (F187) and TesterPresent. Each physical responder is picked up
+from its own response ID within one timed window; multi-frame answers are
+reassembled on an ISO-TP channel opened for that responder. The result is the
+list of live ECUs with their identification, after ~150 ms. Results are cached
+per VIN: when the first VIN answer names a known vehicle its cached ECUs are
+reported at once, and the sweep still runs to the end so that ECUs which were
+asleep (or not fitted) last time are added to the cached list. start() with
+use_cache=False replaces the cached list with what answers now.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .frame import CANFrame, FLAG_TX, FLAG_EXTENDED
+from .isotp import IsoTpAddress, IsoTpChannel, PCI_SF, PCI_FF, NORMAL_FIXED_PHYSICAL
+
+logger = logging.getLogger(__name__)
+
+FUNCTIONAL_11BIT = 0x7DF
+FUNCTIONAL_29BIT = 0x18DB33F1
+TESTER_ADDRESS = 0xF1
+
+# Sent in this order, REQUEST_GAP apart; the VIN first so a cached vehicle is known at once
+DISCOVERY_REQUESTS = (
+    b"\x22\xF1\x90",   # VIN
+    b"\x09\x02",       # OBD mode 09: VIN (emissions ECUs without UDS)
+    b"\x22\xF1\x87",   # Spare part number
+    b"\x3E\x00",       # Tester present: everything else that is alive
+)
+RESPONSE_SIDS = frozenset((0x62, 0x49, 0x7E, 0x7F))
+REQUEST_GAP = 0.02
+DEFAULT_WINDOW = 0.08        # After the last request; extended while an answer is still arriving
+TICK_MS = 5
+DEFAULT_CACHE_FILE = os.path.expanduser("~/.canai_pro_discovery.json")
+
+@dataclass
+class DiscoveredEcu:
+    """A physical responder and what it told about itself."""
+    tx_id: int               # Physical request ID
+    rx_id: int               # Response ID
+    extended: bool = False
+    vin: str = ""
+    part_number: str = ""
+    services: List[int] = field(default_factory=list)  # Response SIDs seen
+    elapsed: float = 0.0     # Seconds from the sweep start to the first answer
+    cached: bool = False
+
+    @property
+    def address(self) -> IsoTpAddress:
+        if self.extended and self.tx_id & 0xFFFF0000 == NORMAL_FIXED_PHYSICAL:
+            return IsoTpAddress.normal_fixed((self.tx_id >> 8) & 0xFF, self.tx_id & 0xFF)
+        return IsoTpAddress.normal(self.tx_id, self.rx_id, self.extended)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["cached"]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DiscoveredEcu":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__}, cached=True)
+
+def physical_request_id(rx_id: int, extended: bool) -> int:
+    """Request ID of a responder: 0x18DAF1xx -> 0x18DAxxF1, 11-bit response ID - 8."""
+    if extended:
+        return NORMAL_FIXED_PHYSICAL | ((rx_id & 0xFF) << 8) | ((rx_id >> 8) & 0xFF)
+    return rx_id - 8
+
+def _ascii(data: bytes) -> str:
+    return ''.join(chr(b) if 32 <= b <= 126 else '.' for b in data).strip()
+
+# ----------------------------------------------------------------------------------
+# 2) DiscoveryCache Class
+# ----------------------------------------------------------------------------------
+class DiscoveryCache:
+    """ECU lists per VIN in a JSON file next to the settings."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE):
+        self.path = path
+        self._vehicles: Dict[str, dict] = {}
+        self._load()
+
+    def get(self, vin: str) -> Optional[List[DiscoveredEcu]]:
+        entry = self._vehicles.get(vin)
+        if not entry:
+            return None
+        return [DiscoveredEcu.from_dict(e) for e in entry.get("ecus", [])]
+
+    def put(self, vin: str, ecus: List[DiscoveredEcu]) -> None:
+        self._vehicles[vin] = {"updated": datetime.now().isoformat(timespec="seconds"),
+                               "ecus": [e.to_dict() for e in ecus]}
+        self._save()
+
+    def forget(self, vin: str) -> None:
+        if self._vehicles.pop(vin, None) is not None:
+            self._save()
+
+    def _load(self) -> None:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self._vehicles = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[DiscoveryCache] Ignoring {self.path}: {e}")
+
+    def _save(self) -> None:
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self._vehicles, f, indent=2)
+        except OSError as e:
+            logger.warning(f"[DiscoveryCache] Could not save {self.path}: {e}")
+
+# ----------------------------------------------------------------------------------
+# 3) FunctionalDiscovery Class
+# ----------------------------------------------------------------------------------
+class FunctionalDiscovery(QObject):
+    """One functional sweep over a BusHub. GUI thread only."""
+    ecu_found = pyqtSignal(object)     # DiscoveredEcu, first answer from a new responder
+    ecu_updated = pyqtSignal(object)   # DiscoveredEcu, identification arrived
+    finished = pyqtSignal(list)        # All DiscoveredEcus: responders plus the VIN's cached ones
+
+    def __init__(self, hub, cache: Optional[DiscoveryCache] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.cache = cache if cache is not None else DiscoveryCache()
+        self.window = DEFAULT_WINDOW
+        self.vin = ""
+        self.ecus: Dict[int, DiscoveredEcu] = {}      # By response ID key
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+        self._subscriptions = []
+        self._channels: Dict[int, IsoTpChannel] = {}
+        self._use_cache = True
+        self._use_29bit = True
+        self._next_request = 0
+        self._next_at = 0.0
+        self._started = 0.0
+        self._window_end = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._timer.isActive()
+
+    def start(self, use_29bit: bool = True, use_cache: bool = True) -> None:
+        self.stop(emit=False)
+        self.vin = ""
+        self.ecus = {}
+        self._channels = {}
+        self._use_cache = use_cache
+        self._use_29bit = use_29bit
+        self._next_request = 0
+        self._started = time.monotonic()
+        self._next_at = self._started
+        self._window_end = 0.0
+        dispatcher = self.hub.dispatcher
+        self._subscriptions = [dispatcher.subscribe(self._on_frames, ids=range(0x700, 0x800),
+                                                    extended=False, batched=True)]
+        if use_29bit:
+            responses = (NORMAL_FIXED_PHYSICAL | (TESTER_ADDRESS << 8) | ta for ta in range(0x100))
+            self._subscriptions.append(dispatcher.subscribe(self._on_frames, ids=responses,
+                                                            extended=True, batched=True))
+        logger.info("[FunctionalDiscovery] Sweep started")
+        self._timer.start(TICK_MS)
+        self._tick()
+
+    def stop(self, emit: bool = True) -> None:
+        was_running = self.running
+        self._timer.stop()
+        for sub in self._subscriptions:
+            sub.cancel()
+        self._subscriptions = []
+        self._channels = {}
+        if was_running and emit:
+            ecus = list(self.ecus.values())
+            cached = sum(ecu.cached for ecu in ecus)
+            if self.vin and cached < len(ecus):
+                self.cache.put(self.vin, ecus)
+            logger.info(f"[FunctionalDiscovery] {len(ecus)} ECUs ({cached} only cached), "
+                        f"VIN {self.vin or '?'}")
+            self.finished.emit(ecus)
+
+    # ------------------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------------------
+    def _tick(self) -> None:
+        now = time.monotonic()
+        if self._next_request < len(DISCOVERY_REQUESTS) and now >= self._next_at:
+            self._send_functional(DISCOVERY_REQUESTS[self._next_request])
+            self._next_request += 1
+            self._next_at = now + REQUEST_GAP
+            if self._next_request == len(DISCOVERY_REQUESTS):
+                self._window_end = now + self.window
+        now_ns = time.monotonic_ns()
+        for channel in list(self._channels.values()):
+            channel.poll(now_ns)
+        if (self._next_request == len(DISCOVERY_REQUESTS) and now >= self._window_end
+                and not any(c.receiving for c in self._channels.values())):
+            self.stop()
+
+    def _send_functional(self, request: bytes) -> None:
+        payload = bytes([PCI_SF << 4 | len(request)]) + request
+        payload += b"\xCC" * (8 - len(payload))
+        self.hub.send_frame(CANFrame(FUNCTIONAL_11BIT, payload, None, FLAG_TX))
+        if self._use_29bit:
+            self.hub.send_frame(CANFrame(FUNCTIONAL_29BIT, payload, None, FLAG_TX | FLAG_EXTENDED))
+
+    def _on_frames(self, frames: List[CANFrame]) -> None:
+        for frame in frames:
+            if not self.running:
+                return  # Stopped inside this batch
+            if frame.flags & FLAG_TX or not frame.payload:
+                continue
+            extended = bool(frame.flags & FLAG_EXTENDED)
+            key = frame.arb_id | (FLAG_EXTENDED << 29 if extended else 0)
+            channel = self._channels.get(key)
+            if channel is None:
+                data = frame.payload
+                kind = data[0] >> 4
+                # Open a channel only for what looks like an answer to us
+                if kind == PCI_SF and len(data) >= 2 and data[1] in RESPONSE_SIDS:
+                    pass
+                elif kind == PCI_FF and len(data) >= 3 and data[2] in RESPONSE_SIDS:
+                    pass
+                else:
+                    continue
+                channel = self._open_channel(key, frame.arb_id, extended)
+            channel.on_frame(frame)
+
+    def _open_channel(self, key: int, rx_id: int, extended: bool) -> IsoTpChannel:
+        tx_id = physical_request_id(rx_id, extended)
+        address = IsoTpAddress(tx_id, rx_id, extended)
+        channel = IsoTpChannel(address, self.hub.send_frame,
+                               on_message=lambda m, k=key: self._on_message(k, address, bytes(m)))
+        self._channels[key] = channel
+        return channel
+
+    def _on_message(self, key: int, address: IsoTpAddress, message: bytes) -> None:
+        if not self.running:
+            return
+        ecu = self.ecus.get(key)
+        if ecu is None:
+            ecu = DiscoveredEcu(address.tx_id, address.rx_id, address.extended_ids,
+                                elapsed=time.monotonic() - self._started)
+            self.ecus[key] = ecu
+            self.ecu_found.emit(ecu)
+        elif ecu.cached:
+            # Known from the cache and alive now
+            ecu.cached = False
+            ecu.elapsed = time.monotonic() - self._started
+            self.ecu_updated.emit(ecu)
+        sid = message[0]
+        if sid not in ecu.services:
+            ecu.services.append(sid)
+        updated = False
+        if sid == 0x62 and len(message) > 3:
+            did = (message[1] << 8) | message[2]
+            if did == 0xF190:
+                ecu.vin = _ascii(message[3:20])
+                updated = True
+            elif did == 0xF187:
+                ecu.part_number = _ascii(message[3:])
+                updated = True
+        elif sid == 0x49 and len(message) >= 19 and message[1] == 0x02:
+            # 49 02 [count] VIN; some ECUs omit the count byte
+            ecu.vin = ecu.vin or _ascii(message[-17:])
+            updated = True
+        if updated:
+            self.ecu_updated.emit(ecu)
+        if ecu.vin and not self.vin:
+            self.vin = ecu.vin
+            self._vin_known()
+
+    def _vin_known(self) -> None:
+        """First VIN of the sweep: report a known vehicle's cached ECUs now, keep sweeping for new ones."""
+        cached = self.cache.get(self.vin) if self._use_cache else None
+        if not cached:
+            return
+        logger.info(f"[FunctionalDiscovery] {self.vin} is cached: {len(cached)} known ECUs")
+        for ecu in cached:
+            key = ecu.rx_id | (FLAG_EXTENDED << 29 if ecu.extended else 0)
+            if key not in self.ecus:
+                self.ecus[key] = ecu
+                self.ecu_found.emit(ecu)
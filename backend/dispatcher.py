@@ -0,0 +1,184 @@
+# backend/dispatcher.py
+
+"""
+Description:
+Routes received frames to subscribers by arbitration ID.
+
+Consumers subscribe with the IDs they care about (or None for every ID) and,
+optionally, the UDS service IDs (first payload byte) they handle. Each frame
+costs one dict lookup to find its subscribers, however many consumers are
+registered, instead of every consumer inspecting every frame. Subscriptions can
+be added and cancelled at any time, including from inside a callback.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject
+
+from .frame import CANFrame, FLAG_EXTENDED
+
+logger = logging.getLogger(__name__)
+
+_EXT_KEY = FLAG_EXTENDED << 29  # Same ID keys as BusStatistics: bit 30 marks 29-bit IDs
+
+def id_key(arb_id: int, extended: Optional[bool] = None) -> int:
+    """Index key of an ID; ``extended`` defaults to "does not fit in 11 bits"."""
+    if extended is None:
+        extended = arb_id > 0x7FF
+    return arb_id | _EXT_KEY if extended else arb_id
+
+# ----------------------------------------------------------------------------------
+# 2) Subscription
+# ----------------------------------------------------------------------------------
+class Subscription:
+    """Handle returned by FrameDispatcher.subscribe; cancel() unsubscribes."""
+    __slots__ = ("dispatcher", "callback", "keys", "sids", "batched", "active")
+
+    def __init__(self, dispatcher: "FrameDispatcher", callback: Callable, keys: Optional[Tuple[int, ...]],
+                 sids: Optional[frozenset], batched: bool):
+        self.dispatcher = dispatcher
+        self.callback = callback
+        self.keys = keys          # None = every ID
+        self.sids = sids          # None = any payload, else first byte must be in the set
+        self.batched = batched    # callback(list) once per batch instead of callback(frame)
+        self.active = True
+
+    def cancel(self) -> None:
+        self.dispatcher.unsubscribe(self)
+
+    def __repr__(self) -> str:
+        ids = "*" if self.keys is None else ",".join(f"{k & 0x1FFFFFFF:X}" for k in self.keys)
+        sids = "" if self.sids is None else " sids=" + ",".join(f"{s:02X}" for s in sorted(self.sids))
+        return f"Subscription(ids={ids}{sids}{' batched' if self.batched else ''})"
+
+# ----------------------------------------------------------------------------------
+# 3) FrameDispatcher Class
+# ----------------------------------------------------------------------------------
+class FrameDispatcher(QObject):
+    """
+    ID -> subscriber index fed with frame batches (connect frames_received to
+    dispatch). Lives on the GUI thread, so callbacks may touch widgets.
+    Subscriber lists are replaced, never mutated, so a dispatch in progress
+    keeps iterating a consistent snapshot.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._by_id: Dict[int, Tuple[Subscription, ...]] = {}
+        self._wildcard: Tuple[Subscription, ...] = ()
+        self.frames_dispatched = 0
+
+    def subscribe(
+        self,
+        callback: Callable,
+        ids: Optional[Iterable[int]] = None,
+        sids: Optional[Iterable[int]] = None,
+        extended: Optional[bool] = None,
+        batched: bool = False,
+    ) -> Subscription:
+        """
+        Deliver frames with one of ``ids`` (None = all) whose first payload byte
+        is in ``sids`` (None = any). ``batched`` callbacks get one list per batch.
+        """
+        keys = None if ids is None else tuple(dict.fromkeys(id_key(i, extended) for i in ids))
+        sub = Subscription(self, callback, keys, None if sids is None else frozenset(sids), batched)
+        self._add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Optional[Subscription]) -> None:
+        """Stop delivery to ``sub``; cancelling twice is harmless."""
+        if sub is None or not sub.active:
+            return
+        sub.active = False
+        self._remove(sub)
+
+    def resubscribe(self, sub: Subscription, ids: Optional[Iterable[int]],
+                    extended: Optional[bool] = None) -> None:
+        """Move an active subscription to a new set of IDs."""
+        if not sub.active:
+            return
+        self._remove(sub)
+        sub.keys = None if ids is None else tuple(dict.fromkeys(id_key(i, extended) for i in ids))
+        self._add(sub)
+
+    def subscriber_count(self) -> int:
+        subs = set(self._wildcard)
+        for entries in self._by_id.values():
+            subs.update(entries)
+        return len(subs)
+
+    def clear(self) -> None:
+        for sub in list(self._wildcard) + [s for subs in self._by_id.values() for s in subs]:
+            sub.active = False
+        self._by_id.clear()
+        self._wildcard = ()
+
+    def dispatch(self, frames: List) -> None:
+        """Deliver one batch (slot for frames_received)."""
+        by_id = self._by_id
+        wildcard = self._wildcard
+        if not by_id and not wildcard:
+            return
+        batches: Dict[Subscription, List] = {}
+        for frame in frames:
+            if type(frame) is CANFrame:
+                subs = by_id.get(frame.arb_id | ((frame.flags & FLAG_EXTENDED) << 29))
+                if subs is not None:
+                    self._deliver(subs, frame, batches)
+            if wildcard:
+                self._deliver(wildcard, frame, batches)
+        self.frames_dispatched += len(frames)
+        for sub, batch in batches.items():
+            if sub.active:
+                self._call(sub, batch)
+
+    # ------------------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------------------
+    def _deliver(self, subs: Tuple[Subscription, ...], frame, batches: Dict[Subscription, List]) -> None:
+        for sub in subs:
+            sids = sub.sids
+            if sids is not None:
+                payload = getattr(frame, "payload", None)
+                if not payload or payload[0] not in sids:
+                    continue
+            if sub.batched:
+                batch = batches.get(sub)
+                if batch is None:
+                    batches[sub] = [frame]
+                else:
+                    batch.append(frame)
+            elif sub.active:
+                self._call(sub, frame)
+
+    @staticmethod
+    def _call(sub: Subscription, arg) -> None:
+        try:
+            sub.callback(arg)
+        except Exception:
+            # One failing consumer must not starve the others
+            logger.exception(f"[FrameDispatcher] Subscriber {sub!r} raised")
+
+    def _add(self, sub: Subscription) -> None:
+        if sub.keys is None:
+            self._wildcard = self._wildcard + (sub,)
+            return
+        by_id = self._by_id
+        for key in sub.keys:
+            by_id[key] = by_id.get(key, ()) + (sub,)
+
+    def _remove(self, sub: Subscription) -> None:
+        if sub.keys is None:
+            self._wildcard = tuple(s for s in self._wildcard if s is not sub)
+            return
+        by_id = self._by_id
+        for key in sub.keys:
+            remaining = tuple(s for s in by_id.get(key, ()) if s is not sub)
+            if remaining:
+                by_id[key] = remaining
+            else:
+                by_id.pop(key, None)
@@ -0,0 +1,143 @@
+# backend/dtc_engine.py
+
+"""
+Description:
+Whole-vehicle DTC collection over the UDS client.
+
+DTCCollector sends ReadDTCInformation (0x19 02) to every module at once; the
+client keeps one request in flight per ECU, so all modules answer within the
+same response window and multi-frame 0x59 answers are reassembled by each
+ECU's ISO-TP link. Every DTC is attributed to the module that sent it and the
+report records how long each module took (or why it did not answer).
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .uds_client import EcuRef, NegativeResponseError, ecu_address
+from .isotp import IsoTpAddress
+
+logger = logging.getLogger(__name__)
+
+DTC_TYPES = "PCBU"
+DTC_RECORD_SIZE = 4   # 3-byte DTC + status byte (ISO 14229 DTCAndStatusRecord)
+
+def dtc_to_text(code: int) -> str:
+    """24-bit UDS DTC as P0171 (plus -FT when a failure type byte is present)."""
+    hi, lo, failure_type = (code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF
+    text = f"{DTC_TYPES[hi >> 6]}{((hi & 0x3F) << 8) | lo:04X}"
+    return f"{text}-{failure_type:02X}" if failure_type else text
+
+def parse_dtc_records(response: bytes) -> List["DTCRecord"]:
+    """DTCAndStatusRecords of a 59 02 response: 59 02 [availability] (DTC DTC DTC status)*."""
+    records = []
+    for i in range(3, len(response) - DTC_RECORD_SIZE + 1, DTC_RECORD_SIZE):
+        code = (response[i] << 16) | (response[i + 1] << 8) | response[i + 2]
+        records.append(DTCRecord(code, response[i + 3]))
+    return records
+
+# ----------------------------------------------------------------------------------
+# 2) Report
+# ----------------------------------------------------------------------------------
+@dataclass
+class DTCRecord:
+    code: int        # 24-bit DTC
+    status: int      # Status byte (bit 0 test failed, 3 confirmed, ...)
+
+    @property
+    def text(self) -> str:
+        return dtc_to_text(self.code)
+
+    @property
+    def base_code(self) -> str:
+        """Code without the failure type, as listed in DTC databases."""
+        return dtc_to_text(self.code & 0xFFFF00)
+
+@dataclass
+class ModuleDTCs:
+    """Outcome of one module's DTC request."""
+    name: str
+    address: IsoTpAddress
+    dtcs: List[DTCRecord] = field(default_factory=list)
+    availability_mask: int = 0
+    elapsed: float = 0.0          # Seconds from the start of the sweep to the answer
+    error: Optional[str] = None   # Timeout / NRC text when the module gave no DTC list
+
+    @property
+    def responded(self) -> bool:
+        return self.error is None
+
+@dataclass
+class DTCReport:
+    modules: List[ModuleDTCs] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def dtc_count(self) -> int:
+        return sum(len(m.dtcs) for m in self.modules)
+
+    @property
+    def failures(self) -> List[ModuleDTCs]:
+        return [m for m in self.modules if not m.responded]
+
+# ----------------------------------------------------------------------------------
+# 3) DTCCollector Class
+# ----------------------------------------------------------------------------------
+class DTCCollector(QObject):
+    """Concurrent 0x19 02 sweep over a BusHub's UDS client. GUI thread only."""
+    module_done = pyqtSignal(object)   # ModuleDTCs, as each module answers or times out
+    finished = pyqtSignal(object)      # DTCReport, modules in request order
+
+    def __init__(self, hub, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.report: Optional[DTCReport] = None
+        self._remaining = 0
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._remaining > 0
+
+    def start(self, modules: Dict[str, EcuRef], status_mask: int = 0xFF) -> None:
+        """Ask every module at once; a running sweep is abandoned."""
+        report = DTCReport([ModuleDTCs(name, ecu_address(ecu)) for name, ecu in modules.items()])
+        self.report = report
+        self._remaining = len(report.modules)
+        self._started = time.monotonic()
+        if not report.modules:
+            self.finished.emit(report)
+            return
+        client = self.hub.uds
+        for module in report.modules:
+            future = client.read_dtcs(module.address, status_mask)
+            future.add_done_callback(lambda f, r=report, m=module: self._on_response(r, m, f))
+
+    def _on_response(self, report: DTCReport, module: ModuleDTCs, future: Future) -> None:
+        if report is not self.report:
+            return  # Answer to an abandoned sweep
+        module.elapsed = time.monotonic() - self._started
+        if future.cancelled():
+            module.error = "Cancelled"
+        elif future.exception() is not None:
+            error = future.exception()
+            module.error = error.description if isinstance(error, NegativeResponseError) else str(error)
+        else:
+            response = future.result().payload
+            module.availability_mask = response[2] if len(response) > 2 else 0
+            module.dtcs = parse_dtc_records(response)
+        self.module_done.emit(module)
+        self._remaining -= 1
+        if self._remaining == 0:
+            report.elapsed = module.elapsed
+            logger.info(f"[DTCCollector] {report.dtc_count} DTCs from {len(report.modules)} modules "
+                        f"in {report.elapsed * 1000:.0f} ms")
+            self.finished.emit(report)
@@ -0,0 +1,150 @@
+# backend/frame.py
+
+"""
+Description:
+Compact CAN frame representation shared by every backend.
+
+A frame holds only an integer arbitration ID, a monotonic nanosecond timestamp,
+an immutable ``bytes`` payload and a small integer of flag bits. Text (hex ID,
+wall-clock timestamp, direction) is derived on demand, so formatting cost is
+paid only when a frame is displayed or exported. ``decoded`` caches the display
+text (hex payload, UDS decode) once it has been computed; see
+utils.uds_decoder.frame_text.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, Optional, Union
+
+# Flag bits stored in CANFrame.flags
+FLAG_TX = 0x01        # Frame was transmitted by us (otherwise received)
+FLAG_EXTENDED = 0x02  # 29-bit identifier
+FLAG_RTR = 0x04       # Remote transmission request
+FLAG_ERROR = 0x08     # Error frame
+FLAG_FD = 0x10        # CAN-FD frame
+CHANNEL_SHIFT = 8     # Upper bits hold the adapter channel number
+
+# Offset between the monotonic clock and wall-clock time, captured once so that
+# frame timestamps stay monotonic while still displaying as time of day.
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+# ----------------------------------------------------------------------------------
+# 2) Enums
+# ----------------------------------------------------------------------------------
+class Direction(Enum):
+    RX = "RX"
+    TX = "TX"
+
+class BusType(Enum):
+    CAN = "CAN"
+    CAN_FD = "CAN-FD"
+    LIN = "LIN"
+
+# ----------------------------------------------------------------------------------
+# 3) CANFrame Class
+# ----------------------------------------------------------------------------------
+class CANFrame:
+    """Slotted CAN frame: integer ID, monotonic ns timestamp, bytes payload, int flags."""
+    __slots__ = ("arb_id", "ts_ns", "payload", "flags", "decoded")
+
+    def __init__(
+        self,
+        arb_id: int,
+        payload: Union[bytes, Iterable[int]] = b"",
+        ts_ns: Optional[int] = None,
+        flags: int = 0,
+    ):
+        self.arb_id = arb_id
+        self.payload = payload if type(payload) is bytes else bytes(payload)
+        self.ts_ns = time.monotonic_ns() if ts_ns is None else ts_ns
+        self.flags = flags
+        self.decoded = None   # (DID registry generation, hex text, UDS text)
+
+    @classmethod
+    def from_text(
+        cls,
+        can_id: str,
+        data: Iterable[int],
+        direction: Direction = Direction.RX,
+        extended: Optional[bool] = None,
+    ) -> "CANFrame":
+        """Build a frame from a hex ID string and byte list (UI / legacy callers)."""
+        arb_id = int(can_id, 16)
+        if extended is None:
+            extended = arb_id > 0x7FF or len(can_id.strip()) > 3
+        flags = (FLAG_TX if direction == Direction.TX else 0) | (FLAG_EXTENDED if extended else 0)
+        return cls(arb_id, bytes(data), None, flags)
+
+    # ------------------------------------------------------------------------------
+    # Compatibility properties (formatted lazily)
+    # ------------------------------------------------------------------------------
+    @property
+    def can_id(self) -> str:
+        """Hex ID text: 3 digits for standard, 8 for extended frames."""
+        if self.flags & FLAG_EXTENDED:
+            return f"{self.arb_id:08X}"
+        return f"{self.arb_id:03X}"
+
+    @property
+    def data(self) -> bytes:
+        return self.payload
+
+    @property
+    def direction(self) -> Direction:
+        return Direction.TX if self.flags & FLAG_TX else Direction.RX
+
+    @property
+    def is_extended(self) -> bool:
+        return bool(self.flags & FLAG_EXTENDED)
+
+    @property
+    def bus_type(self) -> BusType:
+        return BusType.CAN_FD if self.flags & FLAG_FD else BusType.CAN
+
+    @property
+    def channel(self) -> int:
+        return self.flags >> CHANNEL_SHIFT
+
+    @property
+    def timestamp(self) -> str:
+        """Wall-clock time of day (HH:MM:SS.mmm) for display and export."""
+        return format_timestamp(self.ts_ns)
+
+    @property
+    def data_hex(self) -> str:
+        return self.payload.hex(' ').upper()
+
+    def __len__(self) -> int:
+        return len(self.payload)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CANFrame):
+            return NotImplemented
+        return (self.arb_id == other.arb_id and self.payload == other.payload
+                and self.ts_ns == other.ts_ns and self.flags == other.flags)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"CANFrame(arb_id=0x{self.arb_id:X}, payload={self.payload!r}, ts_ns={self.ts_ns}, flags=0x{self.flags:X})"
+
+    def __str__(self) -> str:
+        channel = f" CH{self.channel}" if self.channel else ""
+        return f"[{self.timestamp}]{channel} {self.direction.value} ID:{self.can_id} Data:{self.data_hex}"
+
+# ----------------------------------------------------------------------------------
+# 4) Helpers
+# ----------------------------------------------------------------------------------
+def format_timestamp(ts_ns: int) -> str:
+    """Format a monotonic nanosecond timestamp as wall-clock HH:MM:SS.mmm."""
+    wall_ns = ts_ns + _WALL_OFFSET_NS
+    t = datetime.fromtimestamp(wall_ns // 1_000_000_000)
+    return f"{t.hour:02d}:{t.minute:02d}:{t.second:02d}.{(wall_ns // 1_000_000) % 1000:03d}"
+
+def wall_to_monotonic_ns(wall_ns: int) -> int:
+    """Convert a wall-clock (epoch) nanosecond timestamp to the frame clock."""
+    return wall_ns - _WALL_OFFSET_NS
@@ -0,0 +1,473 @@
+# backend/isotp.py
+
+"""
+Description:
+ISO-TP (ISO 15765-2) transport: carries UDS messages longer than one CAN frame.
+
+IsoTpChannel implements single/first/consecutive/flow-control frames for one
+tester <-> ECU address pair with normal (11/29-bit), extended (address byte in
+front of the PCI) and 29-bit normal fixed addressing. Received segments are
+copied straight into a buffer preallocated for the largest accepted message;
+the complete message is handed over as a memoryview of that buffer. The channel
+never reads a clock on its own schedule: the owner feeds frames to on_frame()
+and calls poll() at the returned deadline (STmin pacing and N_Bs/N_Cr
+timeouts). IsoTpLink does that on the Qt event loop for a BusHub.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .frame import CANFrame, FLAG_TX, FLAG_EXTENDED
+
+logger = logging.getLogger(__name__)
+
+# Protocol control information: high nibble of the PCI byte
+PCI_SF = 0x0   # Single frame
+PCI_FF = 0x1   # First frame
+PCI_CF = 0x2   # Consecutive frame
+PCI_FC = 0x3   # Flow control
+
+FC_CTS = 0x0     # Continue to send
+FC_WAIT = 0x1
+FC_OVERFLOW = 0x2
+
+MAX_FF_LENGTH = 0xFFF            # Larger messages use the 32-bit first frame escape
+NORMAL_FIXED_PHYSICAL = 0x18DA0000
+NORMAL_FIXED_FUNCTIONAL = 0x18DB0000
+
+class IsoTpError(Exception):
+    """Transfer aborted: timeout, wrong sequence number, overflow or busy channel."""
+
+class AddressingMode(Enum):
+    NORMAL = "Normal"
+    EXTENDED = "Extended"
+    NORMAL_FIXED = "Normal fixed (29-bit)"
+
+def encode_st_min(seconds: float) -> int:
+    """STmin byte for a separation time: 100-900 us steps below 1 ms, else whole ms."""
+    if seconds <= 0:
+        return 0
+    if seconds < 0.001:
+        return 0xF0 + max(1, min(9, round(seconds * 10_000)))
+    return min(0x7F, round(seconds * 1000))
+
+def decode_st_min(value: int) -> int:
+    """Separation time in ns; reserved values mean the maximum (127 ms)."""
+    if value <= 0x7F:
+        return value * 1_000_000
+    if 0xF1 <= value <= 0xF9:
+        return (value - 0xF0) * 100_000
+    return 127_000_000
+
+# ----------------------------------------------------------------------------------
+# 2) Addressing & Configuration
+# ----------------------------------------------------------------------------------
+@dataclass(frozen=True)
+class IsoTpAddress:
+    """CAN IDs (and extended-addressing bytes) of one tester <-> ECU link."""
+    tx_id: int
+    rx_id: int
+    extended_ids: bool = False         # 29-bit CAN identifiers
+    mode: AddressingMode = AddressingMode.NORMAL
+    tx_prefix: Optional[int] = None    # Extended addressing: N_TA put before every PCI we send
+    rx_prefix: Optional[int] = None    # Extended addressing: first byte of frames meant for us
+
+    @classmethod
+    def normal(cls, tx_id: int, rx_id: int, extended_ids: Optional[bool] = None) -> "IsoTpAddress":
+        if extended_ids is None:
+            extended_ids = max(tx_id, rx_id) > 0x7FF
+        return cls(tx_id, rx_id, extended_ids)
+
+    @classmethod
+    def extended(cls, tx_id: int, rx_id: int, target: int, source: int,
+                 extended_ids: bool = False) -> "IsoTpAddress":
+        """E.g. BMW: tester sends on 0x6F1 with the ECU address first, ECU answers on 0x600+addr."""
+        return cls(tx_id, rx_id, extended_ids, AddressingMode.EXTENDED, target, source)
+
+    @classmethod
+    def normal_fixed(cls, target: int, source: int = 0xF1, functional: bool = False) -> "IsoTpAddress":
+        """29-bit 0x18DA<TA><SA> (0x18DB for functional requests)."""
+        base = NORMAL_FIXED_FUNCTIONAL if functional else NORMAL_FIXED_PHYSICAL
+        tx_id = base | (target << 8) | source
+        rx_id = NORMAL_FIXED_PHYSICAL | (source << 8) | target
+        return cls(tx_id, rx_id, True, AddressingMode.NORMAL_FIXED)
+
+    @property
+    def pci_offset(self) -> int:
+        return 1 if self.mode is AddressingMode.EXTENDED else 0
+
+@dataclass
+class IsoTpConfig:
+    block_size: int = 0           # BS we grant the sender (0 = the whole message after one FC)
+    st_min: int = 0               # STmin byte we request (see encode_st_min)
+    padding: Optional[int] = 0xCC # Fill byte for short frames; None sends minimal DLCs
+    tx_dl: int = 8                # Frame payload size (8 = classic CAN)
+    max_message: int = 4095       # Receive buffer size; longer first frames get FC overflow
+    n_bs: float = 1.0             # Seconds to wait for a flow control frame
+    n_cr: float = 1.0             # Seconds to wait for the next consecutive frame
+    max_wait_frames: int = 10     # FC WAIT frames tolerated before giving up
+
+# ----------------------------------------------------------------------------------
+# 3) IsoTpChannel Class
+# ----------------------------------------------------------------------------------
+class IsoTpChannel:
+    """
+    One ISO-TP link: segmentation of outgoing and reassembly of incoming
+    messages. Not thread-safe; drive it from the thread that dispatches frames.
+    """
+
+    def __init__(
+        self,
+        address: IsoTpAddress,
+        send_frame: Callable[[CANFrame], object],
+        config: Optional[IsoTpConfig] = None,
+        on_message: Optional[Callable[[memoryview], None]] = None,
+        on_error: Optional[Callable[[IsoTpError], None]] = None,
+        on_sent: Optional[Callable[[], None]] = None,
+        clock: Callable[[], int] = time.monotonic_ns,
+    ):
+        self.address = address
+        self.config = config or IsoTpConfig()
+        self._send_frame = send_frame
+        self.on_message = on_message
+        self.on_error = on_error
+        self.on_sent = on_sent
+        self._clock = clock
+        self._offset = address.pci_offset
+        self._tx_flags = FLAG_TX | (FLAG_EXTENDED if address.extended_ids else 0)
+        self._prefix = bytes([address.tx_prefix]) if address.tx_prefix is not None else b""
+
+        # Receive state; the buffer is reused for every message
+        self._rx_buf = bytearray(self.config.max_message)
+        self._rx_view = memoryview(self._rx_buf)
+        self._rx_active = False
+        self._rx_len = 0
+        self._rx_pos = 0
+        self._rx_sn = 0
+        self._rx_block = 0
+        self._rx_deadline = 0
+
+        # Transmit state; the message is sent from a view, never re-sliced into copies
+        self._tx_data: Optional[memoryview] = None
+        self._tx_pos = 0
+        self._tx_sn = 0
+        self._tx_waiting_fc = False
+        self._tx_block_left = 0     # CFs left in the current block (-1 = unlimited)
+        self._tx_st_min = 0
+        self._tx_next = 0           # Earliest time for the next CF
+        self._tx_deadline = 0       # N_Bs while waiting for flow control
+        self._tx_waits = 0
+
+        self.messages_received = 0
+        self.messages_sent = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._tx_data is not None
+
+    @property
+    def receiving(self) -> bool:
+        return self._rx_active
+
+    # ------------------------------------------------------------------------------
+    # Transmit
+    # ------------------------------------------------------------------------------
+    def send(self, message: bytes) -> None:
+        """Start sending ``message``; longer ones continue as flow control arrives."""
+        if self._tx_data is not None:
+            raise IsoTpError("Transmission already in progress")
+        length = len(message)
+        if length == 0 or length > 0xFFFFFFFF:
+            raise IsoTpError(f"Invalid message length {length}")
+        data = memoryview(bytes(message))
+        room = self.config.tx_dl - self._offset
+        if length <= min(room - 1, 7):
+            self._emit(bytes([length]) + data)
+            self.messages_sent += 1
+            if self.on_sent:
+                self.on_sent()
+            return
+        if room > 8 and length <= room - 2:
+            self._emit(bytes([0x00, length]) + data)  # CAN FD single frame escape
+            self.messages_sent += 1
+            if self.on_sent:
+                self.on_sent()
+            return
+        if length <= MAX_FF_LENGTH:
+            header = bytes([0x10 | (length >> 8), length & 0xFF])
+        else:
+            header = b"\x10\x00" + length.to_bytes(4, "big")
+        first = room - len(header)
+        self._emit(header + data[:first])
+        self._tx_data = data
+        self._tx_pos = first
+        self._tx_sn = 1
+        self._tx_waits = 0
+        self._tx_next = 0  # STmin also spaces the first CF of a later block from the last one
+        self._await_flow_control()
+
+    def _await_flow_control(self) -> None:
+        self._tx_waiting_fc = True
+        self._tx_deadline = self._clock() + int(self.config.n_bs * 1e9)
+
+    def _on_flow_control(self, data: bytes, off: int) -> None:
+        if self._tx_data is None or not self._tx_waiting_fc or len(data) < off + 3:
+            return
+        status = data[off] & 0x0F
+        if status == FC_WAIT:
+            self._tx_waits += 1
+            if self._tx_waits > self.config.max_wait_frames:
+                self._abort_tx("Too many flow control WAIT frames")
+            else:
+                self._await_flow_control()
+            return
+        if status == FC_OVERFLOW:
+            self._abort_tx("Receiver reported buffer overflow")
+            return
+        if status != FC_CTS:
+            self._abort_tx(f"Invalid flow status {status}")
+            return
+        block_size = data[off + 1]
+        self._tx_waiting_fc = False
+        self._tx_block_left = block_size if block_size else -1
+        self._tx_st_min = decode_st_min(data[off + 2])
+        self._send_consecutive(self._clock())
+
+    def _send_consecutive(self, now: int) -> None:
+        data = self._tx_data
+        length = len(data)
+        room = self.config.tx_dl - self._offset - 1
+        st_min = self._tx_st_min
+        while self._tx_pos < length:
+            if st_min and now < self._tx_next:
+                return  # poll() resumes at _tx_next
+            pos = self._tx_pos
+            self._emit(bytes([0x20 | self._tx_sn]) + data[pos:pos + room])
+            self._tx_pos = pos + room
+            self._tx_sn = (self._tx_sn + 1) & 0x0F
+            if st_min:
+                self._tx_next = now + st_min
+            if self._tx_pos >= length:
+                break
+            if self._tx_block_left > 0:
+                self._tx_block_left -= 1
+                if self._tx_block_left == 0:
+                    self._await_flow_control()
+                    return
+        self._tx_data = None
+        self.messages_sent += 1
+        if self.on_sent:
+            self.on_sent()
+
+    def _abort_tx(self, reason: str) -> None:
+        self._tx_data = None
+        self._tx_waiting_fc = False
+        self._fail(reason)
+
+    def _emit(self, payload: bytes) -> None:
+        payload = self._prefix + payload
+        padding = self.config.padding
+        if padding is not None and len(payload) < 8:
+            payload += bytes([padding]) * (8 - len(payload))
+        self._send_frame(CANFrame(self.address.tx_id, payload, None, self._tx_flags))
+
+    # ------------------------------------------------------------------------------
+    # Receive
+    # ------------------------------------------------------------------------------
+    def on_frame(self, frame: CANFrame) -> None:
+        """Feed a frame received on the RX ID (others are ignored)."""
+        if frame.arb_id != self.address.rx_id or frame.flags & FLAG_TX:
+            return
+        data = frame.payload
+        off = self._offset
+        if off and (not data or data[0] != self.address.rx_prefix):
+            return
+        if len(data) <= off:
+            return
+        pci = data[off]
+        kind = pci >> 4
+        if kind == PCI_CF:
+            self._on_consecutive(data, off, pci)
+        elif kind == PCI_SF:
+            self._on_single(data, off, pci)
+        elif kind == PCI_FF:
+            self._on_first(data, off, pci)
+        elif kind == PCI_FC:
+            self._on_flow_control(data, off)
+
+    def _on_single(self, data: bytes, off: int, pci: int) -> None:
+        length = pci & 0x0F
+        start = off + 1
+        if length == 0 and len(data) > start:
+            length = data[start]  # CAN FD escape
+            start += 1
+        if length == 0 or start + length > len(data):
+            return
+        if self._rx_active:
+            self._rx_active = False
+            self._fail("Reception interrupted by a new single frame")
+        self._deliver(memoryview(data)[start:start + length])
+
+    def _on_first(self, data: bytes, off: int, pci: int) -> None:
+        if len(data) < off + 2:
+            return
+        length = ((pci & 0x0F) << 8) | data[off + 1]
+        start = off + 2
+        if length == 0:
+            if len(data) < off + 6:
+                return
+            length = int.from_bytes(data[off + 2:off + 6], "big")
+            start = off + 6
+        if length <= len(data) - start:
+            return  # Would have fit a single frame: not a valid first frame
+        if self._rx_active:
+            self._fail("Reception interrupted by a new first frame")
+        if length > len(self._rx_buf):
+            self._rx_active = False
+            self._send_flow_control(FC_OVERFLOW)
+            self._fail(f"Incoming message of {length} bytes exceeds the {len(self._rx_buf)} byte buffer")
+            return
+        count = len(data) - start
+        self._rx_view[0:count] = memoryview(data)[start:]
+        self._rx_len = length
+        self._rx_pos = count
+        self._rx_sn = 1
+        self._rx_block = 0
+        self._rx_active = True
+        self._send_flow_control(FC_CTS)
+        self._rx_deadline = self._clock() + int(self.config.n_cr * 1e9)
+
+    def _on_consecutive(self, data: bytes, off: int, pci: int) -> None:
+        if not self._rx_active:
+            return
+        if pci & 0x0F != self._rx_sn:
+            self._rx_active = False
+            self._fail(f"Wrong sequence number {pci & 0x0F} (expected {self._rx_sn})")
+            return
+        pos = self._rx_pos
+        count = min(len(data) - off - 1, self._rx_len - pos)
+        self._rx_view[pos:pos + count] = memoryview(data)[off + 1:off + 1 + count]
+        pos += count
+        self._rx_pos = pos
+        self._rx_sn = (self._rx_sn + 1) & 0x0F
+        if pos >= self._rx_len:
+            self._rx_active = False
+            self._deliver(self._rx_view[:self._rx_len])
+            return
+        block_size = self.config.block_size
+        if block_size:
+            self._rx_block += 1
+            if self._rx_block == block_size:
+                self._rx_block = 0
+                self._send_flow_control(FC_CTS)
+        self._rx_deadline = self._clock() + int(self.config.n_cr * 1e9)
+
+    def _send_flow_control(self, status: int) -> None:
+        self._emit(bytes([0x30 | status, self.config.block_size, self.config.st_min]))
+
+    def _deliver(self, message: memoryview) -> None:
+        """Hand over a complete message; the view is only valid during the callback."""
+        self.messages_received += 1
+        if self.on_message:
+            self.on_message(message)
+
+    # ------------------------------------------------------------------------------
+    # Timing
+    # ------------------------------------------------------------------------------
+    def poll(self, now: Optional[int] = None) -> Optional[int]:
+        """
+        Send CFs that STmin held back and expire N_Bs/N_Cr timeouts. Returns the
+        monotonic ns at which poll() needs to run next, or None when idle.
+        """
+        if now is None:
+            now = self._clock()
+        if self._rx_active and now >= self._rx_deadline:
+            self._rx_active = False
+            self._fail(f"Timeout waiting for consecutive frame ({self._rx_pos}/{self._rx_len} bytes)")
+        if self._tx_data is not None:
+            if self._tx_waiting_fc:
+                if now >= self._tx_deadline:
+                    self._abort_tx("Timeout waiting for flow control")
+            elif now >= self._tx_next:
+                self._send_consecutive(now)
+        deadlines = []
+        if self._rx_active:
+            deadlines.append(self._rx_deadline)
+        if self._tx_data is not None:
+            deadlines.append(self._tx_deadline if self._tx_waiting_fc else self._tx_next)
+        return min(deadlines) if deadlines else None
+
+    def reset(self) -> None:
+        """Drop any transfer in progress without reporting an error."""
+        self._rx_active = False
+        self._tx_data = None
+        self._tx_waiting_fc = False
+
+    def _fail(self, reason: str) -> None:
+        logger.warning(f"[IsoTp] 0x{self.address.rx_id:X}: {reason}")
+        if self.on_error:
+            self.on_error(IsoTpError(reason))
+
+# ----------------------------------------------------------------------------------
+# 4) IsoTpLink Class
+# ----------------------------------------------------------------------------------
+class IsoTpLink(QObject):
+    """IsoTpChannel on a BusHub: frames come from the dispatcher, timing from a QTimer."""
+    message_received = pyqtSignal(bytes)
+    message_sent = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, hub, address: IsoTpAddress, config: Optional[IsoTpConfig] = None,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.channel = IsoTpChannel(address, hub.send_frame, config,
+                                    self._on_message, self._on_error, self.message_sent.emit)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._service)
+        self._subscription = hub.dispatcher.subscribe(
+            self._on_frames, ids=[address.rx_id], extended=address.extended_ids, batched=True)
+
+    @property
+    def address(self) -> IsoTpAddress:
+        return self.channel.address
+
+    def send(self, message: bytes) -> None:
+        self.channel.send(message)
+        self._service()
+
+    def close(self) -> None:
+        self._timer.stop()
+        self.channel.reset()
+        if self._subscription is not None:
+            self._subscription.cancel()
+            self._subscription = None
+
+    def _on_frames(self, frames) -> None:
+        on_frame = self.channel.on_frame
+        for frame in frames:
+            on_frame(frame)
+        self._service()
+
+    def _service(self) -> None:
+        deadline = self.channel.poll()
+        if deadline is None:
+            self._timer.stop()
+        else:
+            delay_ms = (deadline - time.monotonic_ns()) / 1e6
+            self._timer.start(max(0, int(delay_ms + 0.999)))
+
+    def _on_message(self, message: memoryview) -> None:
+        self.message_received.emit(bytes(message))
+
+    def _on_error(self, error: IsoTpError) -> None:
+        self.error_occurred.emit(str(error))
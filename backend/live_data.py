@@ -0,0 +1,375 @@
+# backend/live_data.py
+
+"""
+Description:
+Live data polling: a scheduler for DIDs / OBD PIDs and a time-series store.
+
+LiveDataScheduler keeps at most one request outstanding per ECU and sends the
+next one as soon as the previous answer is in, packing every signal that is
+due on that ECU into one request (several DIDs per 0x22, up to six PIDs per
+OBD mode 01 request). Signals are served earliest-due first, so when an ECU
+cannot keep up with the wanted rates they all slow down evenly. The gap
+between requests adapts to the ECU: it grows on timeouts and decays while
+answers come back in time, which keeps polling at the highest rate the ECU
+sustains without tripping P2. Samples go into a TimeSeriesStore of
+preallocated per-signal rings.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .isotp import IsoTpAddress
+from .uds_client import EcuRef, NegativeResponseError, UDSTimeoutError, ecu_address
+
+logger = logging.getLogger(__name__)
+
+SERVICE_READ_DID = 0x22
+SERVICE_OBD_CURRENT = 0x01
+MAX_IDS_PER_REQUEST = {SERVICE_READ_DID: 8, SERVICE_OBD_CURRENT: 6}  # OBD allows six PIDs
+PACKING_NRCS = (0x12, 0x13, 0x14, 0x31)   # Answers to a packed request the ECU does not support
+
+DEFAULT_SERIES_CAPACITY = 4096
+TICK_MS = 5
+RTT_SMOOTHING = 1 / 8
+MAX_GAP = 1.0          # Longest pause between requests after repeated timeouts
+GAP_DECAY = 0.9        # Applied to the gap after every answer in time
+
+# ----------------------------------------------------------------------------------
+# 2) Time-Series Store
+# ----------------------------------------------------------------------------------
+class TimeSeries:
+    """Fixed-capacity ring of (time, value) samples; oldest samples are overwritten."""
+    __slots__ = ("times", "values", "capacity", "count", "minimum", "maximum")
+
+    def __init__(self, capacity: int = DEFAULT_SERIES_CAPACITY):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.count = 0               # Samples ever appended
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+
+    def append(self, t: float, value: float) -> None:
+        i = self.count % self.capacity
+        self.times[i] = t
+        self.values[i] = value
+        self.count += 1
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def extend(self, times: Sequence[float], values: Sequence[float]) -> None:
+        """Append a column of samples with slice copies instead of one call per sample."""
+        n = len(values)
+        if not n:
+            return
+        capacity = self.capacity
+        if n > capacity:   # Only the newest samples survive
+            self.count += n - capacity
+            times, values, n = times[-capacity:], values[-capacity:], capacity
+        i = self.count % capacity
+        head = min(n, capacity - i)
+        self.times[i:i + head] = array('d', times[:head])
+        self.values[i:i + head] = array('d', values[:head])
+        if head < n:
+            self.times[:n - head] = array('d', times[head:])
+            self.values[:n - head] = array('d', values[head:])
+        self.count += n
+        self.minimum = min(self.minimum, min(values))
+        self.maximum = max(self.maximum, max(values))
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        if not self.count:
+            return None
+        i = (self.count - 1) % self.capacity
+        return self.times[i], self.values[i]
+
+    def samples(self, since: float = float("-inf")) -> Tuple[List[float], List[float]]:
+        """Times and values (oldest first) newer than ``since``."""
+        n = len(self)
+        start = self.count - n
+        times, values = [], []
+        for k in range(start, self.count):
+            i = k % self.capacity
+            if self.times[i] > since:
+                times.append(self.times[i])
+                values.append(self.values[i])
+        return times, values
+
+    def rate(self, window: float = 1.0) -> float:
+        """Samples per second over the last ``window`` seconds of data."""
+        last = self.latest()
+        if last is None:
+            return 0.0
+        n = 0
+        for k in range(self.count - 1, self.count - len(self) - 1, -1):
+            if self.times[k % self.capacity] <= last[0] - window:
+                break
+            n += 1
+        return n / window
+
+class TimeSeriesStore:
+    """Named TimeSeries, created on first append."""
+
+    def __init__(self, capacity: int = DEFAULT_SERIES_CAPACITY):
+        self.capacity = capacity
+        self._series: Dict[str, TimeSeries] = {}
+        self.sample_count = 0
+
+    def append(self, key: str, t: float, value: float) -> None:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = TimeSeries(self.capacity)
+        series.append(t, value)
+        self.sample_count += 1
+
+    def extend(self, key: str, times: Sequence[float], values: Sequence[float]) -> None:
+        """Append a column of samples to one series (see DidRegistry.decode_column)."""
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = TimeSeries(self.capacity)
+        series.extend(times, values)
+        self.sample_count += len(values)
+
+    def series(self, key: str) -> Optional[TimeSeries]:
+        return self._series.get(key)
+
+    def latest(self, key: str) -> Optional[Tuple[float, float]]:
+        series = self._series.get(key)
+        return series.latest() if series else None
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._series)
+
+    def clear(self) -> None:
+        self._series.clear()
+        self.sample_count = 0
+
+# ----------------------------------------------------------------------------------
+# 3) Signals & Per-ECU State
+# ----------------------------------------------------------------------------------
+@dataclass(eq=False)
+class LiveSignal:
+    """One polled value; stored under ``key`` (defaults to the name)."""
+    name: str
+    ecu: EcuRef
+    service: int                      # 0x22 (DID) or 0x01 (OBD PID)
+    ident: int
+    length: Optional[int]             # Data bytes in the answer; None = never packed
+    decode: Callable[[bytes], float]
+    unit: str = ""
+    rate: float = 10.0                # Wanted samples/s; 0 = as fast as the ECU allows
+    key: str = ""
+
+    def __post_init__(self):
+        self.ecu = ecu_address(self.ecu)
+        self.key = self.key or self.name
+
+@dataclass
+class EcuPollStats:
+    """What one ECU achieves (see LiveDataScheduler.stats)."""
+    address: IsoTpAddress
+    rtt: float = 0.0              # Smoothed request -> response time
+    gap: float = 0.0              # Current pause between requests
+    max_per_request: int = 8
+    requests: int = 0
+    samples: int = 0
+    timeouts: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def samples_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.samples / elapsed if elapsed > 0 else 0.0
+
+class _Poller:
+    __slots__ = ("stats", "signals", "due", "busy", "not_before", "packing")
+
+    def __init__(self, address: IsoTpAddress):
+        self.stats = EcuPollStats(address)
+        self.signals: List[LiveSignal] = []
+        self.due: Dict[LiveSignal, float] = {}
+        self.busy = False
+        self.not_before = 0.0
+        self.packing: Dict[int, int] = dict(MAX_IDS_PER_REQUEST)
+
+# ----------------------------------------------------------------------------------
+# 4) LiveDataScheduler Class
+# ----------------------------------------------------------------------------------
+class LiveDataScheduler(QObject):
+    """Polls LiveSignals through a BusHub's UDS client. GUI thread only."""
+    samples_ready = pyqtSignal(list)   # Keys updated by one answer
+    signal_failed = pyqtSignal(str, str)  # Key, reason (signal dropped after an NRC)
+
+    def __init__(self, hub, store: Optional[TimeSeriesStore] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.store = store if store is not None else TimeSeriesStore()
+        self._pollers: Dict[IsoTpAddress, _Poller] = {}
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+        self._t0 = time.monotonic()
+        self._generation = 0
+
+    @property
+    def running(self) -> bool:
+        return self._timer.isActive()
+
+    def add_signal(self, signal: LiveSignal) -> None:
+        poller = self._pollers.get(signal.ecu)
+        if poller is None:
+            poller = self._pollers[signal.ecu] = _Poller(signal.ecu)
+        poller.signals.append(signal)
+        poller.due[signal] = 0.0
+
+    def remove_signal(self, signal: LiveSignal) -> None:
+        poller = self._pollers.get(signal.ecu)
+        if poller is not None and signal in poller.due:
+            poller.signals.remove(signal)
+            del poller.due[signal]
+
+    def clear(self) -> None:
+        self.stop()
+        self._pollers.clear()
+
+    def start(self) -> None:
+        self._generation += 1   # Answers to requests from an earlier run are dropped
+        self._t0 = time.monotonic()
+        for poller in self._pollers.values():
+            poller.busy = False
+            poller.not_before = 0.0
+            poller.stats = EcuPollStats(poller.stats.address, max_per_request=poller.stats.max_per_request)
+            for signal in poller.due:
+                poller.due[signal] = 0.0
+        self._timer.start(TICK_MS)
+        self._tick()
+
+    def stop(self) -> None:
+        self._timer.stop()
+        self._generation += 1
+
+    def stats(self) -> List[EcuPollStats]:
+        return [p.stats for p in self._pollers.values()]
+
+    # ------------------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------------------
+    def _tick(self) -> None:
+        now = time.monotonic()
+        for poller in self._pollers.values():
+            if not poller.busy and now >= poller.not_before:
+                self._poll(poller, now)
+
+    def _poll(self, poller: _Poller, now: float) -> None:
+        due = sorted((t, i, s) for i, (s, t) in enumerate(poller.due.items()) if t <= now)
+        if not due:
+            return
+        # Pack the most overdue signal with the others due for the same service
+        first = due[0][2]
+        batch = [first]
+        limit = poller.packing.get(first.service, 1) if first.length is not None else 1
+        for _, _, signal in due[1:]:
+            if len(batch) >= limit:
+                break
+            if signal.service == first.service and signal.length is not None:
+                batch.append(signal)
+        width = 2 if first.service == SERVICE_READ_DID else 1
+        request = bytearray([first.service])
+        for signal in batch:
+            request += signal.ident.to_bytes(width, "big")
+        poller.busy = True
+        poller.stats.requests += 1
+        generation = self._generation
+        future = self.hub.uds.request(poller.stats.address, request)
+        future.add_done_callback(
+            lambda f, p=poller, b=batch, g=generation, t=now: self._on_response(p, b, g, t, f))
+
+    def _on_response(self, poller: _Poller, batch: List[LiveSignal], generation: int,
+                     sent: float, future: Future) -> None:
+        if generation != self._generation:
+            return
+        poller.busy = False
+        now = time.monotonic()
+        stats = poller.stats
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            self._on_failure(poller, batch, error, now)
+        else:
+            response = future.result()
+            elapsed = response.elapsed or (now - sent)
+            stats.rtt = elapsed if not stats.rtt else stats.rtt + (elapsed - stats.rtt) * RTT_SMOOTHING
+            stats.gap *= GAP_DECAY
+            if stats.gap < 0.001:
+                stats.gap = 0.0
+            updated = self._store(poller, batch, response.payload, now)
+            if updated:
+                self.samples_ready.emit(updated)
+        poller.not_before = now + stats.gap
+        if self.running and now >= poller.not_before:
+            self._poll(poller, now)
+
+    def _on_failure(self, poller: _Poller, batch: List[LiveSignal], error: Optional[Exception],
+                    now: float) -> None:
+        stats = poller.stats
+        if isinstance(error, NegativeResponseError):
+            if len(batch) > 1 and error.nrc in PACKING_NRCS:
+                # The ECU refuses packed reads: one ID per request from now on
+                poller.packing[batch[0].service] = 1
+                stats.max_per_request = 1
+                logger.info(f"[LiveDataScheduler] 0x{stats.address.tx_id:X} does not accept packed "
+                            f"0x{batch[0].service:02X} requests")
+                return
+            for signal in batch:
+                self.remove_signal(signal)
+                self.signal_failed.emit(signal.key, error.description)
+            return
+        if isinstance(error, UDSTimeoutError):
+            stats.timeouts += 1
+            stats.gap = min(MAX_GAP, max(stats.gap * 2, stats.rtt, 0.01))
+        else:
+            stats.gap = min(MAX_GAP, max(stats.gap, 0.1))  # Bus down or transport error
+        for signal in batch:
+            poller.due[signal] = now + stats.gap
+
+    def _store(self, poller: _Poller, batch: List[LiveSignal], payload: bytes, now: float) -> List[str]:
+        """Split a (packed) answer into its signals and record each value."""
+        width = 2 if batch[0].service == SERVICE_READ_DID else 1
+        by_ident = {s.ident: s for s in batch}
+        t = now - self._t0
+        updated = []
+        pos = 1
+        while pos + width <= len(payload):
+            signal = by_ident.get(int.from_bytes(payload[pos:pos + width], "big"))
+            if signal is None:
+                break  # Unknown ID: the rest cannot be split reliably
+            pos += width
+            length = signal.length if signal.length is not None else len(payload) - pos
+            data = payload[pos:pos + length]
+            pos += length
+            try:
+                value = float(signal.decode(data))
+            except Exception as e:
+                logger.debug(f"[LiveDataScheduler] {signal.key}: cannot decode {data.hex(' ')}: {e}")
+                continue
+            self.store.append(signal.key, t, value)
+            updated.append(signal.key)
+        poller.stats.samples += len(updated)
+        due = poller.due
+        for signal in batch:
+            if signal in due:   # Not removed while the request was out
+                period = 1.0 / signal.rate if signal.rate > 0 else 0.0
+                due[signal] = max(due[signal] + period, now) if period else now
+        return updated
@@ -0,0 +1,225 @@
+# backend/module_scanner.py
+
+"""
+Description:
+Finds the ECUs on a bus by probing a range of physical request addresses.
+
+Probes (TesterPresent or DiagnosticSessionControl single frames) go out in
+bursts sized to a share of the bus bandwidth instead of one per fixed timer
+step, so 256 11-bit IDs or all 256 29-bit normal fixed targets (0x18DA__F1)
+take a fraction of a second at 500 kbps. Answers are matched through one
+dispatcher subscription indexed by response ID, whenever they arrive; after
+each round and its response window the targets that stayed silent are probed
+again. Every responder is reported as soon as it answers.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .dispatcher import id_key
+from .frame import CANFrame, FLAG_TX, FLAG_EXTENDED
+from .isotp import IsoTpAddress, PCI_SF
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BITRATE = 500_000
+DEFAULT_BUS_LOAD = 0.25      # Share of the bus the probes may use
+DEFAULT_WINDOW = 0.15        # Wait after the last probe of a round (P2 + adapter latency)
+DEFAULT_RETRIES = 1          # Extra rounds for targets that stayed silent
+SCAN_TICK_MS = 5
+PROBE_PADDING = 0xCC
+
+class ProbeKind(Enum):
+    TESTER_PRESENT = "Tester Present"
+    SESSION = "Session Control"
+
+PROBE_REQUESTS = {
+    ProbeKind.TESTER_PRESENT: b"\x3E\x00",
+    ProbeKind.SESSION: b"\x10\x01",      # Default session: harmless on a running vehicle
+}
+
+def frame_bits(dlc: int, extended: bool) -> int:
+    """Worst-case length of a classic CAN data frame, bit stuffing and IFS included."""
+    g = 54 if extended else 34
+    return g + 8 * dlc + 13 + (g + 8 * dlc - 1) // 4
+
+def range_targets(start: int, end: int) -> List[IsoTpAddress]:
+    """11-bit request IDs start..end, each answered on ID + 8 (so at most 0x7F7)."""
+    return [IsoTpAddress.normal(tx, tx + 8, False) for tx in range(start, min(end, 0x7FF - 8) + 1)]
+
+def normal_fixed_targets(first: int = 0x00, last: int = 0xFF, source: int = 0xF1) -> List[IsoTpAddress]:
+    """29-bit 0x18DA<TA><SA> for every target address first..last."""
+    return [IsoTpAddress.normal_fixed(target, source) for target in range(first, last + 1)
+            if target != source]
+
+@dataclass
+class ScanResult:
+    """One module that answered a probe."""
+    address: IsoTpAddress
+    response: bytes          # UDS response (SID first)
+    elapsed: float           # Seconds from the answered probe to its response
+    attempts: int            # Probes sent to this target
+
+    @property
+    def status(self) -> str:
+        if self.response[0] == 0x7F and len(self.response) >= 3:
+            return f"NRC 0x{self.response[2]:02X}"  # An NRC proves the module exists too
+        return "OK"
+
+# ----------------------------------------------------------------------------------
+# 2) ModuleScanner Class
+# ----------------------------------------------------------------------------------
+class ModuleScanner(QObject):
+    """Paced probe bursts over a BusHub with per-round response windows. GUI thread only."""
+    module_found = pyqtSignal(object)    # ScanResult, as soon as the module answers
+    progress = pyqtSignal(int, int)      # Probes sent, probes planned so far
+    finished = pyqtSignal(list)          # All ScanResults (also after stop())
+
+    def __init__(self, hub, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.bitrate = DEFAULT_BITRATE
+        self.bus_load = DEFAULT_BUS_LOAD
+        self.window = DEFAULT_WINDOW
+        self.retries = DEFAULT_RETRIES
+        self.results: List[ScanResult] = []
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+        self._subscriptions = []
+        self._index: Dict[Tuple[int, Optional[int]], IsoTpAddress] = {}
+        self._queue: Deque[IsoTpAddress] = deque()
+        self._silent: Dict[IsoTpAddress, int] = {}    # Not answered yet -> probes sent
+        self._sent_at: Dict[IsoTpAddress, float] = {}
+        self._request = b""
+        self._sid = 0
+        self._round = 0
+        self._sent = 0
+        self._planned = 0
+        self._credit = 0.0
+        self._last_tick = 0.0
+        self._round_end = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._timer.isActive()
+
+    def start(self, targets: Iterable[IsoTpAddress], probe: ProbeKind = ProbeKind.TESTER_PRESENT) -> None:
+        """Probe ``targets`` (normal, normal fixed or extended addresses)."""
+        self.stop(emit=False)
+        targets = list(dict.fromkeys(targets))
+        self.results = []
+        self._request = PROBE_REQUESTS[probe]
+        self._sid = self._request[0]
+        self._index = {(id_key(t.rx_id, t.extended_ids), t.rx_prefix): t for t in targets}
+        self._silent = {t: 0 for t in targets}
+        self._sent_at = {}
+        self._queue = deque(targets)
+        self._round = 0
+        self._sent = 0
+        self._planned = len(targets)
+        self._credit = 0.0
+        self._round_end = 0.0
+        for extended in (False, True):
+            ids = [t.rx_id for t in targets if t.extended_ids == extended]
+            if ids:
+                self._subscriptions.append(self.hub.dispatcher.subscribe(
+                    self._on_frames, ids=ids, extended=extended, batched=True))
+        logger.info(f"[ModuleScanner] Probing {len(targets)} targets ({probe.value})")
+        self._last_tick = time.monotonic()
+        self._timer.start(SCAN_TICK_MS)
+        self._tick()
+
+    def stop(self, emit: bool = True) -> None:
+        was_running = self.running
+        self._timer.stop()
+        for sub in self._subscriptions:
+            sub.cancel()
+        self._subscriptions = []
+        self._queue.clear()
+        if was_running and emit:
+            logger.info(f"[ModuleScanner] Done: {len(self.results)} modules, {self._sent} probes")
+            self.finished.emit(list(self.results))
+
+    # ------------------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------------------
+    def _tick(self) -> None:
+        now = time.monotonic()
+        budget = self.bitrate * self.bus_load
+        # Unused budget does not pile up into one oversized burst after a stall
+        self._credit = min(self._credit + (now - self._last_tick) * budget, budget * SCAN_TICK_MS * 2 / 1000)
+        self._last_tick = now
+        queue = self._queue
+        sent_before = self._sent
+        while queue:
+            target = queue[0]
+            cost = frame_bits(8, target.extended_ids)
+            if self._credit < cost:
+                break
+            queue.popleft()
+            if target not in self._silent:
+                continue  # Answered while waiting for its retry
+            self._credit -= cost
+            self._send_probe(target, now)
+        if self._sent != sent_before:
+            self.progress.emit(self._sent, self._planned)
+            if not queue:
+                self._round_end = now + self.window
+        if queue or now < self._round_end:
+            return
+        if self._silent and self._round < self.retries:
+            self._round += 1
+            self._queue.extend(self._silent)
+            self._planned += len(self._silent)
+            return
+        self.stop()
+
+    def _send_probe(self, target: IsoTpAddress, now: float) -> None:
+        payload = bytes([PCI_SF << 4 | len(self._request)]) + self._request
+        if target.tx_prefix is not None:
+            payload = bytes([target.tx_prefix]) + payload
+        payload += bytes([PROBE_PADDING]) * (8 - len(payload))
+        flags = FLAG_TX | (FLAG_EXTENDED if target.extended_ids else 0)
+        self.hub.send_frame(CANFrame(target.tx_id, payload, None, flags))
+        self._silent[target] += 1
+        self._sent_at[target] = now
+        self._sent += 1
+
+    # ------------------------------------------------------------------------------
+    # Receiving
+    # ------------------------------------------------------------------------------
+    def _on_frames(self, frames: List[CANFrame]) -> None:
+        index = self._index
+        for frame in frames:
+            if frame.flags & FLAG_TX:
+                continue
+            data = frame.payload
+            key = frame.arb_id | ((frame.flags & FLAG_EXTENDED) << 29)
+            target = index.get((key, None))
+            off = 0
+            if target is None and data:
+                target = index.get((key, data[0]))  # Extended addressing: source byte first
+                off = 1
+            if target is None or target not in self._silent or len(data) < off + 2:
+                continue
+            pci = data[off]
+            length = pci & 0x0F
+            if pci >> 4 != PCI_SF or length < 1 or len(data) < off + 1 + length:
+                continue
+            response = bytes(data[off + 1:off + 1 + length])
+            sid = response[0]
+            if sid != self._sid + 0x40 and not (sid == 0x7F and len(response) >= 3 and response[1] == self._sid):
+                continue
+            attempts = self._silent.pop(target)
+            result = ScanResult(target, response, time.monotonic() - self._sent_at.get(target, 0.0), attempts)
+            self.results.append(result)
+            self.module_found.emit(result)
@@ -13,28 +13,33 @@ import threading
 import time
 import logging
 import re
+from binascii import unhexlify
+from collections import deque
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Callable, Tuple
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from .frame import CANFrame, BusType, Direction, FLAG_TX, FLAG_EXTENDED
+from .batching import FrameBatcher
+from .dispatcher import FrameDispatcher
+from .ring_buffer import FrameRing
+from .timesync import AdapterClock, SLCAN_TIMESTAMP_MODULUS
+from .capture_filter import CaptureFilter
+from .socketcan import SocketCANBus
+from .traffic_gen import PeriodicMessage, TrafficGenerator, interval_schedule
+
 logger = logging.getLogger(__name__)
 
+# Upper-case 3-digit hex ID -> int for every 11-bit identifier (hot path of parse_frames)
+_SLCAN_STD_IDS = {b'%03X' % i: i for i in range(0x800)}
+
 
 # =============================================================================
 # Data Structures
 # =============================================================================
 
-class BusType(Enum):
-    CAN = "CAN"
-    CAN_FD = "CAN-FD"
-    LIN = "LIN"
-
-class Direction(Enum):
-    RX = "RX"
-    TX = "TX"
-
 class InterfaceType(Enum):
     SIMULATION = "Simulation"
     SLCAN = "SLCAN (SavvyCAN/CANtact)"
@@ -42,19 +47,6 @@ class InterfaceType(Enum):
     LIN = "LIN Bus"
     SOCKETCAN = "SocketCAN (Linux)"
 
-@dataclass
-class CANFrame:
-    timestamp: str
-    can_id: str
-    data: List[int]
-    direction: Direction
-    bus_type: BusType = BusType.CAN
-    channel: int = 0  # For dual-channel adapters
-    
-    def __str__(self) -> str:
-        data_hex = ' '.join(f"{byte:02X}" for byte in self.data)
-        return f"[{self.timestamp}] CH{self.channel} {self.direction.value} ID:{self.can_id} Data:{data_hex}"
-
 @dataclass 
 class LINFrame:
     timestamp: str
@@ -84,6 +76,9 @@ class SLCANProtocol:
         tiiildd..  - Transmit standard frame (iii=ID, l=len, dd=data)
         Tiiiiiiiildd.. - Transmit extended frame
         riiil  - Transmit RTR frame
+        Zn    - Timestamps off/on (Z1 appends tttt, ms 0-59999, to received frames)
+        Mxxxxxxxx - Acceptance code (SJA1000 ACR0-3)
+        mxxxxxxxx - Acceptance mask (SJA1000 AMR0-3, 1 = don't care)
         F     - Read status flags
         V     - Get version
         N     - Get serial number
@@ -124,6 +119,16 @@ class SLCANProtocol:
     def close_channel() -> bytes:
         return b'C\r'
     
+    @staticmethod
+    def set_timestamps(enabled: bool) -> bytes:
+        """Only accepted while the channel is closed; some adapters persist it."""
+        return b'Z1\r' if enabled else b'Z0\r'
+    
+    @staticmethod
+    def set_acceptance(code: int, mask: int) -> bytes:
+        """Only accepted while the channel is closed."""
+        return f'M{code:08X}\rm{mask:08X}\r'.encode()
+    
     @staticmethod
     def set_bitrate(bitrate: int) -> bytes:
         cmd = SLCANProtocol.BITRATES.get(bitrate, 'S6')  # Default 500k
@@ -148,32 +153,113 @@ class SLCANProtocol:
         line = line.strip()
         if not line:
             return None
-            
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
         
         # Standard frame: tiiildd...
         if line.startswith('t') and len(line) >= 5:
             try:
-                can_id = line[1:4]
+                can_id = int(line[1:4], 16)
                 dlc = int(line[4], 16)
-                data_hex = line[5:5 + dlc * 2]
-                data = [int(data_hex[i:i+2], 16) for i in range(0, len(data_hex), 2)]
-                return CANFrame(timestamp, can_id, data, Direction.RX)
+                data = bytes.fromhex(line[5:5 + dlc * 2])
+                return CANFrame(can_id, data)
             except (ValueError, IndexError):
                 return None
         
         # Extended frame: Tiiiiiiiildd...
         elif line.startswith('T') and len(line) >= 10:
             try:
-                can_id = line[1:9]
+                can_id = int(line[1:9], 16)
                 dlc = int(line[9], 16)
-                data_hex = line[10:10 + dlc * 2]
-                data = [int(data_hex[i:i+2], 16) for i in range(0, len(data_hex), 2)]
-                return CANFrame(timestamp, can_id, data, Direction.RX)
+                data = bytes.fromhex(line[10:10 + dlc * 2])
+                return CANFrame(can_id, data, None, FLAG_EXTENDED)
             except (ValueError, IndexError):
                 return None
         
         return None
+    
+    @staticmethod
+    def parse_frames(lines: bytes, ts_ns: Optional[int] = None,
+                     clock: Optional[AdapterClock] = None,
+                     accept: Optional[CaptureFilter] = None) -> List[CANFrame]:
+        """
+        Parse a chunk of SLCAN records (CR or LF separated) in one pass.
+        
+        Without a clock all frames in the chunk share one receive timestamp.
+        With a clock, the trailing adapter timestamp of each record (Z1) is
+        mapped to host time; records without one keep the receive time.
+        Records that are not t/T data frames (acks, bells, status replies),
+        that are truncated, or whose ID ``accept`` rejects are skipped; the
+        ID is checked before the payload or frame object is created.
+        """
+        if ts_ns is None:
+            ts_ns = time.monotonic_ns()
+        if clock is not None:
+            return SLCANProtocol._parse_timestamped(lines, ts_ns, clock, accept)
+        frames = []
+        append = frames.append
+        std_ids = _SLCAN_STD_IDS
+        std_table = accept.std_table if accept is not None else None
+        if b'\n' in lines:
+            lines = lines.replace(b'\n', b'\r')
+        
+        for rec in lines.split(b'\r'):
+            if not rec:
+                continue
+            kind = rec[0]
+            try:
+                if kind == 0x74:  # 't'
+                    dlc = rec[4] - 0x30
+                    if 0 <= dlc <= 8 and len(rec) >= 5 + 2 * dlc:
+                        arb_id = std_ids.get(rec[1:4])
+                        if arb_id is None:
+                            arb_id = int(rec[1:4], 16)
+                        if std_table is not None and not std_table[arb_id]:
+                            continue
+                        append(CANFrame(arb_id, unhexlify(rec[5:5 + 2 * dlc]), ts_ns, 0))
+                elif kind == 0x54:  # 'T'
+                    dlc = rec[9] - 0x30
+                    if 0 <= dlc <= 8 and len(rec) >= 10 + 2 * dlc:
+                        arb_id = int(rec[1:9], 16)
+                        if accept is not None and not accept.accepts_ext(arb_id):
+                            continue
+                        append(CANFrame(arb_id, unhexlify(rec[10:10 + 2 * dlc]), ts_ns, FLAG_EXTENDED))
+            except (ValueError, IndexError):
+                continue
+        
+        return frames
+    
+    @staticmethod
+    def _parse_timestamped(lines: bytes, host_ns: int, clock: AdapterClock,
+                           accept: Optional[CaptureFilter]) -> List[CANFrame]:
+        frames = []
+        append = frames.append
+        to_host_ns = clock.to_host_ns
+        if b'\n' in lines:
+            lines = lines.replace(b'\n', b'\r')
+        
+        for rec in lines.split(b'\r'):
+            if not rec:
+                continue
+            kind = rec[0]
+            try:
+                if kind == 0x74:  # 't'
+                    start, flags = 5, 0
+                elif kind == 0x54:  # 'T'
+                    start, flags = 10, FLAG_EXTENDED
+                else:
+                    continue
+                dlc = rec[start - 1] - 0x30
+                end = start + 2 * dlc
+                if not 0 <= dlc <= 8 or len(rec) < end:
+                    continue
+                arb_id = int(rec[1:start - 1], 16)
+                if accept is not None and not accept.accepts(arb_id, flags != 0):
+                    continue
+                ts_ns = to_host_ns(int(rec[end:end + 4], 16), host_ns) if len(rec) >= end + 4 else host_ns
+                append(CANFrame(arb_id, unhexlify(rec[start:end]), ts_ns, flags))
+            except (ValueError, IndexError):
+                continue
+        
+        return frames
 
 
 # =============================================================================
@@ -189,8 +275,16 @@ class MCP2515Protocol:
     Or raw hex format depending on sketch.
     
     This handler supports multiple common formats.
+    
+    Acceptance filtering (sketch maps these onto init_Mask/init_Filt):
+        MASK:n,e,xxxxxxxx - Mask n (0 = RXB0, 1 = RXB1), e = 1 for 29-bit
+        FILT:n,e,xxxxxxxx - Filter n (0-1 = RXB0, 2-5 = RXB1)
+        FILT:OFF          - Receive everything (RXM = 11)
     """
     
+    # ID token at the start of any supported receive format
+    _ID_PREFIX = re.compile(rb'(?:ID:)?([0-9A-Fa-f]+)[,# ]')
+    
     # Standard MCP2515 speeds
     CAN_SPEEDS = {
         '5 kbps': 5000,
@@ -217,42 +311,61 @@ class MCP2515Protocol:
         line = line.strip()
         if not line:
             return None
-            
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
         
         # Format 1: ID:xxx,LEN:n,DATA:xx,xx,xx
         match = re.match(r'ID:([0-9A-Fa-f]+),LEN:(\d+),DATA:([\dA-Fa-f,\s]+)', line)
         if match:
-            can_id = match.group(1).upper()
             data_str = match.group(3).replace(' ', '').replace(',', '')
-            data = [int(data_str[i:i+2], 16) for i in range(0, len(data_str), 2)]
-            return CANFrame(timestamp, can_id, data, Direction.RX)
+            return MCP2515Protocol._make_frame(match.group(1), bytes.fromhex(data_str))
         
         # Format 2: xxx#xx.xx.xx.xx (candump style)
         match = re.match(r'([0-9A-Fa-f]+)#([\dA-Fa-f.]+)', line)
         if match:
-            can_id = match.group(1).upper()
             data_str = match.group(2).replace('.', '')
-            data = [int(data_str[i:i+2], 16) for i in range(0, len(data_str), 2)]
-            return CANFrame(timestamp, can_id, data, Direction.RX)
+            return MCP2515Protocol._make_frame(match.group(1), bytes.fromhex(data_str))
         
         # Format 3: Raw hex line (ID DLC D0 D1 D2...)
         parts = line.split()
         if len(parts) >= 3:
             try:
-                can_id = parts[0].upper()
                 # Check if second part is DLC or data
                 if len(parts[1]) == 1:
                     dlc = int(parts[1])
-                    data = [int(p, 16) for p in parts[2:2+dlc]]
+                    data = bytes(int(p, 16) for p in parts[2:2+dlc])
                 else:
-                    data = [int(p, 16) for p in parts[1:]]
-                return CANFrame(timestamp, can_id, data, Direction.RX)
+                    data = bytes(int(p, 16) for p in parts[1:])
+                return MCP2515Protocol._make_frame(parts[0], data)
             except (ValueError, IndexError):
                 pass
         
         return None
     
+    @staticmethod
+    def peek_id(line: bytes) -> Optional[Tuple[int, bool]]:
+        """(arb_id, extended) of a raw receive line, without parsing the rest."""
+        match = MCP2515Protocol._ID_PREFIX.match(line)
+        if not match:
+            return None
+        token = match.group(1)
+        arb_id = int(token, 16)
+        return arb_id, arb_id > 0x7FF or len(token) > 3
+    
+    @staticmethod
+    def build_filter_commands(capture_filter: Optional[CaptureFilter]) -> Tuple[bytes, bool]:
+        """Sketch commands for a capture filter and whether they are exact."""
+        if not capture_filter:
+            return b'FILT:OFF\r\n', True
+        masks, filters, exact = capture_filter.mcp2515_registers()
+        cmds = [f'MASK:{n},{int(ext)},{value:08X}\r\n' for n, (value, ext) in enumerate(masks)]
+        cmds += [f'FILT:{n},{int(ext)},{value:08X}\r\n' for n, (value, ext) in enumerate(filters)]
+        return ''.join(cmds).encode(), exact
+    
+    @staticmethod
+    def _make_frame(can_id: str, data: bytes) -> CANFrame:
+        arb_id = int(can_id, 16)
+        extended = arb_id > 0x7FF or len(can_id) > 3
+        return CANFrame(arb_id, data, None, FLAG_EXTENDED if extended else 0)
+    
     @staticmethod
     def build_frame(can_id: int, data: List[int]) -> bytes:
         """Build frame for sending (Arduino format)."""
@@ -357,7 +470,13 @@ class MultiProtocolInterface(QObject):
     Supports multiple adapter types and protocols.
     """
     
-    frame_received = pyqtSignal(object)  # CANFrame or LINFrame
+    # Blocking read timeout; bounds shutdown latency of the reader thread
+    READ_TIMEOUT = 0.02
+    # Discard a partial line that grows past this without a terminator
+    MAX_LINE_BUFFER = 65536
+    
+    frame_received = pyqtSignal(object)  # CANFrame or LINFrame, only when emit_single_frames is set
+    frames_received = pyqtSignal(list)   # Batched delivery (list of CANFrame/LINFrame)
     connection_changed = pyqtSignal(bool, str)  # connected, message
     error_occurred = pyqtSignal(str)
     
@@ -371,14 +490,36 @@ class MultiProtocolInterface(QObject):
         self.can_bitrate = 500000  # CAN bus bitrate
         
         self._serial: Optional[serial.Serial] = None
+        self._bus: Optional[SocketCANBus] = None  # SocketCAN socket (port = interface name)
         self._running = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
         self._frame_count = 0
+        self.emit_single_frames = False
+        self._batcher = FrameBatcher(self._emit_batch)
+        self.ring = FrameRing()  # Written only by the reader thread
+        self.frame_annotator: Optional[Callable[[List[CANFrame]], None]] = None  # Runs on the reader thread
+        self._pending_echo: deque = deque()  # Frames injected from other threads
+        self._wake = threading.Event()
         
-        # Simulation settings
+        # Per-ID routing of frames_received batches to subscribers (GUI thread)
+        self.dispatcher = FrameDispatcher(self)
+        self.frames_received.connect(self.dispatcher.dispatch)
+        
+        # Adapter (SLCAN Z1) timestamps, mapped to the host clock when enabled
+        self.hardware_timestamps = False
+        self.timestamp_modulus = SLCAN_TIMESTAMP_MODULUS
+        self.adapter_clock = AdapterClock(self.timestamp_modulus)
+        
+        # Capture filter; _software_filter is set when the adapter cannot apply it exactly
+        self.capture_filter: Optional[CaptureFilter] = None
+        self._software_filter: Optional[CaptureFilter] = None
+        
+        # Simulation settings (a schedule replaces the default interval traffic)
         self.sim_interval = 2.0
-        self._sim_ids = ['7E8', '7E0', '18DAF110', '18DA10F1']
+        self._sim_ids = [0x7E8, 0x7E0, 0x18DAF110, 0x18DA10F1]
+        self._schedule: Optional[List[PeriodicMessage]] = None
+        self._sim_seed: Optional[int] = None
     
     @staticmethod
     def list_ports() -> List[Dict]:
@@ -392,16 +533,28 @@ class MultiProtocolInterface(QObject):
                 'vid': port.vid,
                 'pid': port.pid,
             })
+        for name in SocketCANBus.list_interfaces():
+            ports.append({
+                'device': name,
+                'description': 'SocketCAN network interface',
+                'hwid': '',
+                'vid': None,
+                'pid': None,
+            })
         return ports
     
     def connect(self, port: str, interface_type: InterfaceType, 
-                can_bitrate: int = 500000, serial_baud: int = 115200) -> bool:
+                can_bitrate: int = 500000, serial_baud: int = 115200,
+                hardware_timestamps: bool = False) -> bool:
         """Connect to the specified interface."""
         
         self.interface_type = interface_type
         self.can_bitrate = can_bitrate
         self.serial_baudrate = serial_baud
         self.serial_port = port
+        self.hardware_timestamps = hardware_timestamps
+        self.adapter_clock = AdapterClock(self.timestamp_modulus)
+        self._filter_commands()  # Pick the software fallback for this adapter type
         
         if interface_type == InterfaceType.SIMULATION:
             self._running.set()
@@ -411,12 +564,15 @@ class MultiProtocolInterface(QObject):
             logger.info("Started simulation mode")
             return True
         
+        if interface_type == InterfaceType.SOCKETCAN:
+            return self._connect_socketcan(port)
+        
         try:
             with self._lock:
                 self._serial = serial.Serial(
                     port=port,
                     baudrate=serial_baud,
-                    timeout=0.1,
+                    timeout=self.READ_TIMEOUT,
                     bytesize=serial.EIGHTBITS,
                     parity=serial.PARITY_NONE,
                     stopbits=serial.STOPBITS_ONE
@@ -443,13 +599,36 @@ class MultiProtocolInterface(QObject):
             logger.error(f"Connection failed: {e}")
             return False
     
+    def _connect_socketcan(self, channel: str) -> bool:
+        """Open a raw CAN socket; bitrate is configured on the link (ip link set ...)."""
+        bus = SocketCANBus(channel)
+        try:
+            bus.open()
+            bus.set_filter(self.capture_filter)
+        except OSError as e:
+            bus.close()
+            self.error_occurred.emit(f"Connection failed: {e}")
+            logger.error(f"Connection failed: {e}")
+            return False
+        
+        self._bus = bus
+        self._running.set()
+        self._thread = threading.Thread(target=self._socketcan_loop, daemon=True)
+        self._thread.start()
+        
+        self.connection_changed.emit(True, f"Connected to {channel}")
+        logger.info(f"Connected to {channel} as {InterfaceType.SOCKETCAN.value}")
+        return True
+    
     def disconnect(self):
         """Disconnect from current interface."""
         self._running.clear()
+        self._wake.set()
         
         if self._thread:
             self._thread.join(timeout=2.0)
             self._thread = None
+        self._batcher.flush()
         
         with self._lock:
             if self._serial and self._serial.is_open:
@@ -457,10 +636,95 @@ class MultiProtocolInterface(QObject):
                     self._serial.write(SLCANProtocol.close_channel())
                 self._serial.close()
                 self._serial = None
+            if self._bus:
+                self._bus.close()
+                self._bus = None
         
         self.connection_changed.emit(False, "Disconnected")
         logger.info("Disconnected")
     
+    def set_capture_filter(self, capture_filter: Optional[CaptureFilter]) -> bool:
+        """
+        Keep only frames the filter accepts (None or an empty filter = everything).
+        
+        Programs the adapter's acceptance registers when connected (and on every
+        later connect). Whatever the hardware cannot express exactly is
+        filtered on raw records in the reader thread. Returns True when the
+        adapter alone applies the filter exactly.
+        """
+        self.capture_filter = capture_filter or None
+        cmds = self._filter_commands()
+        try:
+            with self._lock:
+                if cmds and self._serial and self._serial.is_open:
+                    if self.interface_type == InterfaceType.SLCAN:
+                        # M/m are only accepted while the channel is closed
+                        cmds = SLCANProtocol.close_channel() + cmds + SLCANProtocol.open_channel()
+                    self._serial.write(cmds)
+                elif self._bus:
+                    self._bus.set_filter(self.capture_filter)
+        except (serial.SerialException, OSError) as e:
+            self.error_occurred.emit(f"Filter setup failed: {e}")
+            logger.error(f"Filter setup failed: {e}")
+            self._software_filter = self.capture_filter
+            return False
+        return self._software_filter is None
+    
+    def _filter_commands(self) -> bytes:
+        """Adapter commands for the capture filter; selects the software fallback."""
+        flt = self.capture_filter
+        if self.interface_type == InterfaceType.SLCAN:
+            registers = flt.sja1000_registers() if flt else (0x00000000, 0xFFFFFFFF)
+            cmds = SLCANProtocol.set_acceptance(*registers)
+            # The single SJA1000 filter is shared by both ID formats: never exact
+            exact = flt is None
+        elif self.interface_type == InterfaceType.MCP2515:
+            cmds, exact = MCP2515Protocol.build_filter_commands(flt)
+        elif self.interface_type == InterfaceType.SOCKETCAN:
+            cmds, exact = b'', True  # CAN_RAW_FILTER matches rules exactly in the kernel
+        else:
+            cmds, exact = b'', flt is None
+        self._software_filter = None if exact else flt
+        return cmds
+    
+    def set_batching(self, max_frames: int, max_latency: float):
+        """Bound batched delivery by frame count and seconds of latency (1 = per-frame)."""
+        self._batcher.max_frames = max(1, max_frames)
+        self._batcher.max_latency = max(0.0, max_latency)
+    
+    def _ingest(self, frame):
+        """Publish a frame to the ring and the batcher. Reader thread only."""
+        if self.frame_annotator is not None:
+            self.frame_annotator((frame,))
+        self.ring.push(frame)
+        self._batcher.add(frame)
+        self._frame_count += 1
+    
+    def _ingest_many(self, frames: List[CANFrame]):
+        """Publish a parsed chunk. Reader thread only."""
+        if frames:
+            if self.frame_annotator is not None:
+                self.frame_annotator(frames)
+            self.ring.push_many(frames)
+            self._batcher.extend(frames)
+            self._frame_count += len(frames)
+    
+    def _inject(self, frame: CANFrame):
+        """Queue a frame from any thread; the reader thread publishes it."""
+        self._pending_echo.append(frame)
+        self._wake.set()
+    
+    def _drain_injected(self):
+        pending = self._pending_echo
+        while pending:
+            self._ingest(pending.popleft())
+    
+    def _emit_batch(self, frames: list):
+        self.frames_received.emit(frames)
+        if self.emit_single_frames:
+            for frame in frames:
+                self.frame_received.emit(frame)
+    
     def _init_slcan(self):
         """Initialize SLCAN adapter."""
         # Close any existing channel
@@ -471,6 +735,14 @@ class MultiProtocolInterface(QObject):
         self._serial.write(SLCANProtocol.set_bitrate(self.can_bitrate))
         time.sleep(0.1)
         
+        # Timestamps (sent either way: some adapters keep Z in EEPROM)
+        self._serial.write(SLCANProtocol.set_timestamps(self.hardware_timestamps))
+        time.sleep(0.1)
+        
+        # Acceptance filter
+        self._serial.write(self._filter_commands())
+        time.sleep(0.1)
+        
         # Open channel
         self._serial.write(SLCANProtocol.open_channel())
         time.sleep(0.1)
@@ -484,6 +756,8 @@ class MultiProtocolInterface(QObject):
         # Send init command (depends on Arduino sketch)
         self._serial.write(b'INIT\r\n')
         time.sleep(0.5)
+        self._serial.write(self._filter_commands())
+        time.sleep(0.1)
         self._serial.reset_input_buffer()
         logger.info("MCP2515 initialized")
     
@@ -505,13 +779,14 @@ class MultiProtocolInterface(QObject):
                 elif self.interface_type == InterfaceType.MCP2515:
                     cmd = MCP2515Protocol.build_frame(can_id, data)
                     self._serial.write(cmd)
+                elif self.interface_type == InterfaceType.SOCKETCAN:
+                    # The kernel echoes it back as TX (CAN_RAW_RECV_OWN_MSGS)
+                    self._bus.send(can_id, bytes(data), extended)
                 elif self.interface_type == InterfaceType.SIMULATION:
                     # Echo back in simulation
-                    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                    frame = CANFrame(timestamp, f"{can_id:03X}", data, Direction.TX)
-                    self.frame_received.emit(frame)
+                    flags = FLAG_TX | (FLAG_EXTENDED if extended else 0)
+                    self._inject(CANFrame(can_id, bytes(data), None, flags))
                     
-            self._frame_count += 1
             return True
         except Exception as e:
             self.error_occurred.emit(f"Send failed: {e}")
@@ -533,30 +808,38 @@ class MultiProtocolInterface(QObject):
             return False
     
     def _read_loop(self):
-        """Main read loop for serial data."""
-        buffer = ""
+        """
+        Bulk reader for serial data.
+        
+        Blocks in read() for the first byte (up to READ_TIMEOUT) and then takes
+        everything already queued, so the thread sleeps in the driver while the
+        bus is idle. Complete lines are cut from a bytearray in one step and
+        handed to the parser as a batch. Reads do not take self._lock; only
+        writers serialize on it.
+        """
+        ser = self._serial
+        buffer = bytearray()
         
         while self._running.is_set():
             try:
-                with self._lock:
-                    if self._serial and self._serial.in_waiting:
-                        data = self._serial.read(self._serial.in_waiting)
-                        buffer += data.decode('utf-8', errors='ignore')
+                chunk = ser.read(ser.in_waiting or 1)
+                if chunk:
+                    buffer += chunk
+                    end = max(buffer.rfind(b'\r'), buffer.rfind(b'\n'))
+                    if end >= 0:
+                        with memoryview(buffer) as view:
+                            block = view[:end].tobytes()
+                        del buffer[:end + 1]
+                        self._process_block(block)
+                    elif len(buffer) > self.MAX_LINE_BUFFER:
+                        logger.warning(f"Discarding {len(buffer)} bytes without line terminator")
+                        buffer.clear()
                 
-                # Process complete lines
-                while '\r' in buffer or '\n' in buffer:
-                    # Find line ending
-                    idx = min(
-                        buffer.find('\r') if '\r' in buffer else len(buffer),
-                        buffer.find('\n') if '\n' in buffer else len(buffer)
-                    )
-                    line = buffer[:idx].strip()
-                    buffer = buffer[idx+1:].lstrip('\r\n')
-                    
-                    if line:
-                        self._process_line(line)
-                
-                time.sleep(0.001)  # Small delay to prevent CPU spin
+                # Hand the batch over once the adapter has nothing more queued
+                if ser.in_waiting:
+                    self._batcher.poll()
+                else:
+                    self._batcher.flush()
                 
             except Exception as e:
                 if self._running.is_set():
@@ -564,6 +847,43 @@ class MultiProtocolInterface(QObject):
                     logger.error(f"Read error: {e}")
                 time.sleep(0.1)
     
+    def _socketcan_loop(self):
+        """Receive loop for SocketCAN: one batch per wakeup, already binary and filtered."""
+        bus = self._bus
+        while self._running.is_set():
+            try:
+                frames = bus.recv_batch(self.READ_TIMEOUT)
+                if frames:
+                    self._ingest_many(frames)
+                self._batcher.flush()
+            except OSError as e:
+                if self._running.is_set():
+                    self.error_occurred.emit(f"Read error: {e}")
+                    logger.error(f"Read error: {e}")
+                time.sleep(0.1)
+    
+    def _process_block(self, block: bytes):
+        """Parse a block of complete lines (without the final terminator)."""
+        accept = self._software_filter
+        if self.interface_type == InterfaceType.SLCAN:
+            clock = self.adapter_clock if self.hardware_timestamps else None
+            self._ingest_many(SLCANProtocol.parse_frames(block, None, clock, accept))
+        else:
+            self._process_lines(block.replace(b'\n', b'\r').split(b'\r'), accept)
+    
+    def _process_lines(self, lines: List[bytes], accept: Optional[CaptureFilter] = None):
+        """Parse a batch of raw lines (terminators already removed)."""
+        peek = accept is not None and self.interface_type == InterfaceType.MCP2515
+        for raw in lines:
+            if raw:
+                if peek:
+                    ident = MCP2515Protocol.peek_id(raw.strip())
+                    if ident is not None and not accept.accepts(*ident):
+                        continue
+                line = raw.decode('ascii', errors='replace').strip()
+                if line:
+                    self._process_line(line)
+    
     def _process_line(self, line: str):
         """Process a received line based on interface type."""
         frame = None
@@ -576,28 +896,50 @@ class MultiProtocolInterface(QObject):
             frame = LINProtocol.parse_frame(line)
         
         if frame:
-            self._frame_count += 1
-            self.frame_received.emit(frame)
+            self._ingest(frame)
+    
+    def set_traffic_schedule(self, schedule: Optional[List[PeriodicMessage]], seed: Optional[int] = None):
+        """Replace the simulated traffic (None = default interval traffic); applies while running."""
+        self._schedule = schedule
+        self._sim_seed = seed
+        self._wake.set()
+    
+    def _build_traffic(self) -> TrafficGenerator:
+        schedule = self._schedule or interval_schedule(self._sim_ids, self.sim_interval, 8, self._sim_seed)
+        traffic = TrafficGenerator(schedule, self._sim_seed)
+        traffic.start(time.monotonic_ns())
+        return traffic
     
     def _simulation_loop(self):
-        """Generate simulated CAN frames."""
-        import random
+        """Generate scheduled CAN traffic; settings changes restart the schedule."""
+        traffic, key = None, None
         
         while self._running.is_set():
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            can_id = random.choice(self._sim_ids)
-            
-            # Generate realistic UDS-like data
-            service = random.choice([0x01, 0x03, 0x09, 0x22, 0x27, 0x2E, 0x3E])
-            data = [service] + [random.randint(0, 255) for _ in range(random.randint(1, 7))]
-            
-            direction = random.choice([Direction.RX, Direction.TX])
-            frame = CANFrame(timestamp, can_id, data, direction)
+            if key != (id(self._schedule), self._sim_seed, self.sim_interval):
+                key = (id(self._schedule), self._sim_seed, self.sim_interval)
+                traffic = self._build_traffic()
+            now = time.monotonic_ns()
+            frames = traffic.due(now)
+            accept = self._software_filter
+            if accept is not None:
+                frames = [f for f in frames if accept.accepts(f.arb_id, f.is_extended)]
+            self._ingest_many(frames)
+            self._drain_injected()
             
-            self.frame_received.emit(frame)
-            self._frame_count += 1
+            # Flush now unless more frames are due before the batch latency bound
+            next_in = traffic.time_until_next(now)
+            if next_in is None or next_in >= self._batcher.max_latency:
+                self._batcher.flush()
+            else:
+                self._batcher.poll()
             
-            self._running.wait(timeout=self.sim_interval)
+            # Sleep until the next frame or batch is due, or a frame is injected
+            timeout = 0.5 if next_in is None else next_in
+            remaining = self._batcher.time_remaining()
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+            self._wake.wait(timeout=max(timeout, 0.001))
+            self._wake.clear()
     
     def get_frame_count(self) -> int:
         return self._frame_count
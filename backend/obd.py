@@ -0,0 +1,236 @@
+# backend/obd.py
+
+"""
+Description:
+OBD-II mode 01 (current data) for generic vehicles.
+
+OBD_PIDS is the PID table: length and a linear formula (raw * scale + offset)
+per PID, so one decode path serves all of them. ObdEngine finds the PIDs an
+ECU supports from the 0x00/0x20/0x40... bitmaps (all of them in one packed
+request where the ECU allows it) and turns them into LiveSignals, which the
+LiveDataScheduler polls up to six PIDs per request into the same
+TimeSeriesStore as the UDS live data.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .isotp import IsoTpAddress
+from .live_data import LiveSignal, MAX_IDS_PER_REQUEST, SERVICE_OBD_CURRENT
+from .uds_client import EcuRef, NegativeResponseError, ecu_address
+
+logger = logging.getLogger(__name__)
+
+SUPPORT_PIDS = tuple(range(0x00, 0x100, 0x20))    # 00, 20, ... E0: bitmaps of the next 32 PIDs
+MAX_PIDS_PER_REQUEST = MAX_IDS_PER_REQUEST[SERVICE_OBD_CURRENT]
+
+@dataclass(frozen=True)
+class ObdPid:
+    """One mode 01 PID: value = first ``span`` bytes (big-endian) * scale + offset."""
+    pid: int
+    name: str
+    length: int                     # Data bytes in the response
+    unit: str = ""
+    scale: Optional[float] = None   # None: no single value (bitmaps, status words)
+    offset: float = 0.0
+    span: int = 0                   # Bytes the value uses; 0 = all of them
+
+    @property
+    def numeric(self) -> bool:
+        return self.scale is not None
+
+    def decode(self, data: bytes) -> float:
+        span = self.span or self.length
+        if len(data) < span:
+            raise ValueError(f"PID 0x{self.pid:02X}: {len(data)} of {span} bytes")
+        return int.from_bytes(data[:span], "big") * self.scale + self.offset
+
+    @property
+    def range_text(self) -> str:
+        if not self.numeric:
+            return ""
+        top = self.offset + self.scale * ((1 << (8 * (self.span or self.length))) - 1)
+        return f"{self.offset:g}/{top:g}"
+
+def _pct(pid: int, name: str, length: int = 1) -> ObdPid:
+    return ObdPid(pid, name, length, "%", 100 / 255)
+
+def _temp(pid: int, name: str) -> ObdPid:
+    return ObdPid(pid, name, 1, "°C", 1, -40)
+
+# ----------------------------------------------------------------------------------
+# 2) PID Table (SAE J1979 / ISO 15031-5)
+# ----------------------------------------------------------------------------------
+_TABLE = [
+    ObdPid(0x01, "Monitor Status", 4),
+    ObdPid(0x02, "Freeze DTC", 2),
+    ObdPid(0x03, "Fuel System Status", 2),
+    _pct(0x04, "Engine Load"),
+    _temp(0x05, "Coolant Temp"),
+    ObdPid(0x06, "Short Term Fuel Trim B1", 1, "%", 100 / 128, -100),
+    ObdPid(0x07, "Long Term Fuel Trim B1", 1, "%", 100 / 128, -100),
+    ObdPid(0x08, "Short Term Fuel Trim B2", 1, "%", 100 / 128, -100),
+    ObdPid(0x09, "Long Term Fuel Trim B2", 1, "%", 100 / 128, -100),
+    ObdPid(0x0A, "Fuel Pressure", 1, "kPa", 3),
+    ObdPid(0x0B, "Intake Manifold Pressure", 1, "kPa", 1),
+    ObdPid(0x0C, "Engine RPM", 2, "rpm", 0.25),
+    ObdPid(0x0D, "Vehicle Speed", 1, "km/h", 1),
+    ObdPid(0x0E, "Timing Advance", 1, "°", 0.5, -64),
+    _temp(0x0F, "Intake Air Temp"),
+    ObdPid(0x10, "MAF Air Flow", 2, "g/s", 0.01),
+    _pct(0x11, "Throttle Position"),
+    ObdPid(0x12, "Secondary Air Status", 1),
+    ObdPid(0x13, "O2 Sensors Present", 1),
+    *(ObdPid(0x14 + i, f"O2 Sensor {i + 1} Voltage", 2, "V", 0.005, span=1) for i in range(8)),
+    ObdPid(0x1C, "OBD Standard", 1),
+    ObdPid(0x1D, "O2 Sensors Present (4 Banks)", 1),
+    ObdPid(0x1E, "Auxiliary Input Status", 1),
+    ObdPid(0x1F, "Run Time Since Start", 2, "s", 1),
+    ObdPid(0x21, "Distance With MIL On", 2, "km", 1),
+    ObdPid(0x22, "Fuel Rail Pressure (Vacuum)", 2, "kPa", 0.079),
+    ObdPid(0x23, "Fuel Rail Gauge Pressure", 2, "kPa", 10),
+    *(ObdPid(0x24 + i, f"O2 Sensor {i + 1} Lambda", 4, "λ", 2 / 65536, span=2) for i in range(8)),
+    _pct(0x2C, "Commanded EGR"),
+    ObdPid(0x2D, "EGR Error", 1, "%", 100 / 128, -100),
+    _pct(0x2E, "Commanded Evap Purge"),
+    _pct(0x2F, "Fuel Level"),
+    ObdPid(0x30, "Warm-ups Since Clear", 1, "", 1),
+    ObdPid(0x31, "Distance Since Clear", 2, "km", 1),
+    ObdPid(0x32, "Evap Vapor Pressure", 2),
+    ObdPid(0x33, "Barometric Pressure", 1, "kPa", 1),
+    *(ObdPid(0x34 + i, f"O2 Sensor {i + 1} Lambda (Wide)", 4, "λ", 2 / 65536, span=2) for i in range(8)),
+    ObdPid(0x3C, "Catalyst Temp B1S1", 2, "°C", 0.1, -40),
+    ObdPid(0x3D, "Catalyst Temp B2S1", 2, "°C", 0.1, -40),
+    ObdPid(0x3E, "Catalyst Temp B1S2", 2, "°C", 0.1, -40),
+    ObdPid(0x3F, "Catalyst Temp B2S2", 2, "°C", 0.1, -40),
+    ObdPid(0x41, "Monitor Status This Cycle", 4),
+    ObdPid(0x42, "Battery Voltage", 2, "V", 0.001),
+    _pct(0x43, "Absolute Load", 2),
+    ObdPid(0x44, "Commanded Lambda", 2, "λ", 2 / 65536),
+    _pct(0x45, "Relative Throttle Position"),
+    _temp(0x46, "Ambient Air Temp"),
+    _pct(0x47, "Absolute Throttle Position B"),
+    _pct(0x48, "Absolute Throttle Position C"),
+    _pct(0x49, "Accelerator Pedal Position D"),
+    _pct(0x4A, "Accelerator Pedal Position E"),
+    _pct(0x4B, "Accelerator Pedal Position F"),
+    _pct(0x4C, "Commanded Throttle Actuator"),
+    ObdPid(0x4D, "Time With MIL On", 2, "min", 1),
+    ObdPid(0x4E, "Time Since Clear", 2, "min", 1),
+    ObdPid(0x51, "Fuel Type", 1),
+    _pct(0x52, "Ethanol Fuel"),
+    ObdPid(0x59, "Fuel Rail Absolute Pressure", 2, "kPa", 10),
+    _pct(0x5A, "Relative Accelerator Pedal"),
+    _pct(0x5B, "Hybrid Battery Remaining"),
+    _temp(0x5C, "Engine Oil Temp"),
+    ObdPid(0x5D, "Fuel Injection Timing", 2, "°", 1 / 128, -210),
+    ObdPid(0x5E, "Engine Fuel Rate", 2, "L/h", 0.05),
+    ObdPid(0x61, "Driver Demand Torque", 1, "%", 1, -125),
+    ObdPid(0x62, "Actual Engine Torque", 1, "%", 1, -125),
+    ObdPid(0x63, "Reference Engine Torque", 2, "Nm", 1),
+    ObdPid(0xA6, "Odometer", 4, "km", 0.1),
+]
+OBD_PIDS: Dict[int, ObdPid] = {p.pid: p for p in _TABLE}
+OBD_PIDS.update({pid: ObdPid(pid, f"PIDs Supported {pid + 1:02X}-{pid + 0x20:02X}", 4)
+                 for pid in SUPPORT_PIDS})
+
+def parse_supported(response: bytes) -> Dict[int, List[int]]:
+    """
+    Support bitmaps of a (packed) 41 response: {bitmap PID: supported PIDs}.
+    Bit 7 of the first byte is PID base + 1, the last bit is the next bitmap PID.
+    """
+    bitmaps = {}
+    pos = 1
+    while pos + 5 <= len(response) and response[pos] in SUPPORT_PIDS:
+        base = response[pos]
+        bits = int.from_bytes(response[pos + 1:pos + 5], "big")
+        bitmaps[base] = [base + i + 1 for i in range(32) if bits & (1 << (31 - i))]
+        pos += 5
+    return bitmaps
+
+def obd_signal(ecu: EcuRef, pid: int, rate: float = 10.0) -> LiveSignal:
+    """LiveSignal polling a numeric PID of the table."""
+    entry = OBD_PIDS[pid]
+    if not entry.numeric:
+        raise ValueError(f"PID 0x{pid:02X} ({entry.name}) has no single value")
+    return LiveSignal(entry.name, ecu, SERVICE_OBD_CURRENT, pid, entry.length, entry.decode, entry.unit, rate)
+
+# ----------------------------------------------------------------------------------
+# 3) ObdEngine Class
+# ----------------------------------------------------------------------------------
+class ObdEngine(QObject):
+    """Supported-PID discovery per ECU over a BusHub's UDS client. GUI thread only."""
+    discovered = pyqtSignal(object, list)    # IsoTpAddress, supported PIDs (ascending)
+    failed = pyqtSignal(object, str)         # IsoTpAddress, reason
+
+    def __init__(self, hub, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.supported: Dict[IsoTpAddress, List[int]] = {}
+        self._bitmaps: Dict[IsoTpAddress, Dict[int, List[int]]] = {}
+
+    def discover(self, ecu: EcuRef) -> None:
+        """
+        Read the support bitmaps of ``ecu``: the first six in one packed
+        request, then one request per further range the ECU announces.
+        """
+        address = ecu_address(ecu)
+        self._bitmaps[address] = {}
+        self._request(address, SUPPORT_PIDS[:MAX_PIDS_PER_REQUEST], packed=True)
+
+    def numeric_pids(self, ecu: EcuRef) -> List[int]:
+        """Supported PIDs the table can decode to a value."""
+        return [pid for pid in self.supported.get(ecu_address(ecu), [])
+                if pid in OBD_PIDS and OBD_PIDS[pid].numeric]
+
+    def signals(self, ecu: EcuRef, pids: Optional[Iterable[int]] = None, rate: float = 10.0) -> List[LiveSignal]:
+        """LiveSignals for ``pids`` (default: every supported numeric PID)."""
+        address = ecu_address(ecu)
+        pids = self.numeric_pids(address) if pids is None else pids
+        return [obd_signal(address, pid, rate) for pid in pids]
+
+    # ------------------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------------------
+    def _request(self, address: IsoTpAddress, pids: Iterable[int], packed: bool = False) -> None:
+        future = self.hub.uds.request(address, bytes((SERVICE_OBD_CURRENT, *pids)))
+        future.add_done_callback(lambda f, a=address, p=packed: self._on_bitmaps(a, p, f))
+
+    def _on_bitmaps(self, address: IsoTpAddress, packed: bool, future: Future) -> None:
+        bitmaps = self._bitmaps.get(address)
+        if bitmaps is None:
+            return
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            if packed and isinstance(error, NegativeResponseError):
+                # No packed requests on this ECU: one bitmap at a time
+                self._request(address, (SUPPORT_PIDS[0],))
+                return
+            del self._bitmaps[address]
+            reason = error.description if isinstance(error, NegativeResponseError) else str(error or "Cancelled")
+            logger.info(f"[ObdEngine] 0x{address.tx_id:X}: PID discovery failed: {reason}")
+            self.failed.emit(address, reason)
+            return
+        received = parse_supported(future.result().payload)
+        bitmaps.update(received)
+        # Follow the chain: each bitmap's last bit announces the next range
+        next_pid = None
+        for base in SUPPORT_PIDS:
+            if base not in bitmaps:
+                next_pid = base if base == 0 or base in bitmaps.get(base - 0x20, ()) else None
+                break
+        if next_pid is not None and (packed or received):
+            self._request(address, (next_pid,))
+            return
+        del self._bitmaps[address]
+        supported = sorted(pid for pids in bitmaps.values() for pid in pids if pid not in SUPPORT_PIDS)
+        self.supported[address] = supported
+        logger.info(f"[ObdEngine] 0x{address.tx_id:X}: {len(supported)} PIDs supported")
+        self.discovered.emit(address, supported)
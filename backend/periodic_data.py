@@ -0,0 +1,248 @@
+# backend/periodic_data.py
+
+"""
+Description:
+ECU-pushed live data: DynamicallyDefineDataIdentifier (0x2C) bundles DIDs and
+ReadDataByPeriodicIdentifier (0x2A) makes the ECU stream them.
+
+PeriodicStream packs the wanted DIDs into as few dynamically defined DIDs
+(F2xx, so they are also periodic identifiers) as fit the 7 data bytes of a
+periodic CAN frame, asks the ECU to send them at the slow, medium or fast
+rate and decodes every periodic frame through the DID registry of
+utils/did_registry.py into a TimeSeriesStore, one column decode per DID and
+batch of frames. There is no request per sample,
+so throughput is bound by the ECU's schedule rather than the round trip.
+A TesterPresent keeps the diagnostic session (and with it the stream) alive.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from utils.did_registry import DID_REGISTRY
+from .frame import CANFrame, FLAG_TX
+from .isotp import IsoTpAddress
+from .live_data import TimeSeriesStore
+from .uds_client import EcuRef, NegativeResponseError, ecu_address
+
+logger = logging.getLogger(__name__)
+
+class PeriodicRate(Enum):
+    SLOW = 0x01
+    MEDIUM = 0x02
+    FAST = 0x03
+
+STOP_SENDING = 0x04
+PERIODIC_DID_BASE = 0xF200      # Periodic identifiers are F2xx; requests carry the low byte
+# The low byte leads every periodic frame; F0..FF is no ISO-TP PCI, so when the
+# ECU streams on its response ID (type 1) the UDS link there ignores the frames
+DYNAMIC_DID_FIRST = 0xF2F0
+DYNAMIC_DID_LAST = 0xF2FF
+MAX_PERIODIC_DATA = 7           # Classic CAN periodic frame: PDID + 7 data bytes
+EXTENDED_SESSION = 0x03
+TESTER_PRESENT_MS = 2000        # Well inside S3 (5 s)
+
+@dataclass
+class PeriodicBundle:
+    """One dynamically defined DID and the source DIDs it is made of, in order."""
+    ddid: int
+    sources: List[Tuple[int, int]] = field(default_factory=list)   # (DID, data bytes)
+    frames: int = 0
+
+    @property
+    def pdid(self) -> int:
+        return self.ddid & 0xFF
+
+    @property
+    def size(self) -> int:
+        return sum(length for _, length in self.sources)
+
+def plan_bundles(dids: Iterable[int], lengths: Optional[Dict[int, int]] = None,
+                 first: int = DYNAMIC_DID_FIRST) -> List[PeriodicBundle]:
+    """
+    Pack ``dids`` first-fit into dynamic DIDs of at most MAX_PERIODIC_DATA
+    bytes. Lengths come from ``lengths`` or the DID registry.
+    """
+    bundles: List[PeriodicBundle] = []
+    for did in dict.fromkeys(dids):
+        length = (lengths or {}).get(did) or DID_REGISTRY.length(did)
+        if not length:
+            raise ValueError(f"Length of DID 0x{did:04X} is unknown")
+        if length > MAX_PERIODIC_DATA:
+            raise ValueError(f"DID 0x{did:04X} ({length} bytes) does not fit a periodic frame")
+        bundle = next((b for b in bundles if b.size + length <= MAX_PERIODIC_DATA), None)
+        if bundle is None:
+            ddid = first + len(bundles)
+            if ddid > DYNAMIC_DID_LAST:
+                raise ValueError("Too many DIDs for the periodic identifiers available")
+            bundle = PeriodicBundle(ddid)
+            bundles.append(bundle)
+        bundle.sources.append((did, length))
+    return bundles
+
+# ----------------------------------------------------------------------------------
+# 2) PeriodicStream Class
+# ----------------------------------------------------------------------------------
+class PeriodicStream(QObject):
+    """Sets up and decodes one ECU's periodic transmission. GUI thread only."""
+    started = pyqtSignal()               # The ECU accepted the 0x2A request
+    samples_ready = pyqtSignal(list)     # Keys updated by one periodic frame
+    failed = pyqtSignal(str)             # Set-up refused; the stream is stopped
+
+    def __init__(self, hub, store: Optional[TimeSeriesStore] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.store = store if store is not None else TimeSeriesStore()
+        self.session: Optional[int] = EXTENDED_SESSION
+        self.address: Optional[IsoTpAddress] = None
+        self.bundles: List[PeriodicBundle] = []
+        self.values: Dict[str, str] = {}     # Key -> latest decoded text
+        self.samples = 0
+        self._by_pdid: Dict[int, PeriodicBundle] = {}
+        self._steps: List[Future] = []
+        self._subscription = None
+        self._keepalive = QTimer(self)
+        self._keepalive.timeout.connect(self._tester_present)
+        self._generation = 0
+        self._active = False
+        self._t0 = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._subscription is not None
+
+    @property
+    def samples_per_second(self) -> float:
+        elapsed = time.monotonic() - self._t0
+        return self.samples / elapsed if self._active and elapsed > 0 else 0.0
+
+    def start(self, ecu: EcuRef, dids: Iterable[int], rate: PeriodicRate = PeriodicRate.FAST,
+              lengths: Optional[Dict[int, int]] = None, periodic_id: Optional[int] = None) -> None:
+        """
+        Stream ``dids`` of ``ecu``. Periodic frames are expected on
+        ``periodic_id`` (default: the ECU's response ID). Raises ValueError
+        when the DIDs cannot be bundled.
+        """
+        self.stop()
+        address = ecu_address(ecu)
+        self.bundles = plan_bundles(dids, lengths)
+        self.address = address
+        self._by_pdid = {b.pdid: b for b in self.bundles}
+        self.values = {}
+        self.samples = 0
+        self._generation += 1
+        generation = self._generation
+        rx_id = address.rx_id if periodic_id is None else periodic_id
+        self._subscription = self.hub.dispatcher.subscribe(
+            self._on_frames, ids=[rx_id], extended=address.extended_ids, batched=True)
+
+        client = self.hub.uds
+        steps: List[Future] = []
+        if self.session is not None:
+            steps.append(client.diagnostic_session(address, self.session))
+        for bundle in self.bundles:
+            steps.append(client.define_dynamic_did(
+                address, bundle.ddid, [(did, 1, length) for did, length in bundle.sources]))
+        steps.append(client.read_periodic(address, rate.value, self._by_pdid))
+        self._steps = steps
+        # Requests to one ECU run in order, so the last one answers after all others
+        for step in steps[:-1]:
+            step.add_done_callback(lambda f, g=generation: self._on_step(g, f))
+        steps[-1].add_done_callback(lambda f, g=generation: self._on_started(g, f))
+        logger.info(f"[PeriodicStream] 0x{address.tx_id:X}: {sum(len(b.sources) for b in self.bundles)} DIDs "
+                    f"in {len(self.bundles)} periodic IDs, {rate.name.lower()} rate")
+
+    def stop(self) -> None:
+        """Stop the transmission and clear the dynamic DIDs on the ECU."""
+        if self._subscription is None:
+            return
+        self._subscription.cancel()
+        self._subscription = None
+        self._keepalive.stop()
+        self._generation += 1
+        for step in self._steps:
+            step.cancel()   # Set-up requests still queued behind a refused one
+        self._steps = []
+        if self._active and self.hub.is_running():
+            client = self.hub.uds
+            client.read_periodic(self.address, STOP_SENDING, self._by_pdid)
+            for bundle in self.bundles:
+                client.clear_dynamic_did(self.address, bundle.ddid)
+        self._active = False
+
+    # ------------------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------------------
+    def _on_step(self, generation: int, future: Future) -> None:
+        if generation == self._generation and not future.cancelled() and future.exception() is not None:
+            self._fail(future.exception())
+
+    def _on_started(self, generation: int, future: Future) -> None:
+        if generation != self._generation:
+            return
+        if future.cancelled() or future.exception() is not None:
+            self._fail(future.exception())
+            return
+        self._active = True
+        self._t0 = time.monotonic()
+        self._keepalive.start(TESTER_PRESENT_MS)
+        self.started.emit()
+
+    def _fail(self, error: Optional[Exception]) -> None:
+        reason = error.description if isinstance(error, NegativeResponseError) else str(error or "Cancelled")
+        logger.info(f"[PeriodicStream] Set-up failed: {error}")
+        self._active = True   # Undo whatever the ECU accepted before refusing
+        self.stop()
+        self.failed.emit(reason)
+
+    def _tester_present(self) -> None:
+        if self.hub.is_running():
+            self.hub.uds.tester_present(self.address, suppress=True)
+
+    def _on_frames(self, frames: List[CANFrame]) -> None:
+        if not self._active:
+            return
+        prefix = self.address.rx_prefix
+        by_pdid = self._by_pdid
+        store = self.store
+        t = time.monotonic() - self._t0
+        matched: Dict[int, List[bytes]] = {}   # PDID -> data of its frames, PDID byte first
+        for frame in frames:
+            if frame.flags & FLAG_TX:
+                continue
+            data = frame.payload
+            off = 0
+            if prefix is not None:
+                if not data or data[0] != prefix:
+                    continue
+                off = 1
+            bundle = by_pdid.get(data[off]) if len(data) > off else None
+            if bundle is None or len(data) < off + 1 + bundle.size:
+                continue
+            bundle.frames += 1
+            matched.setdefault(bundle.pdid, []).append(data[off:])
+        updated = []
+        for pdid, rows in matched.items():
+            pos = 1
+            for did, length in by_pdid[pdid].sources:
+                column = [data[pos:pos + length] for data in rows]
+                pos += length
+                spec = DID_REGISTRY.get(did)
+                if spec is not None and spec.numeric and spec.length == length:
+                    store.extend(spec.name, [t] * len(column), spec.column(column))
+                    name, text = spec.name, spec.text(column[-1])
+                else:
+                    name, text = DID_REGISTRY.decode(did, column[-1])   # Text only
+                self.values[name] = text
+                self.samples += len(column)
+                updated.append(name)
+        if updated:
+            self.samples_ready.emit(updated)
@@ -0,0 +1,131 @@
+# backend/ring_buffer.py
+
+"""
+Description:
+Preallocated single-producer ring buffer for received frames.
+
+The reader thread is the only writer and never takes a lock. Every consumer owns
+a RingReader with its own cursor and drains at its own pace; a consumer that
+falls more than one ring behind loses the oldest frames, and that loss is
+counted on its reader instead of happening silently.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+from typing import Iterable, List, Optional
+
+from .frame import CANFrame
+
+DEFAULT_RING_CAPACITY = 1 << 16  # ~8 s of a fully loaded 1 Mbps bus
+
+# ----------------------------------------------------------------------------------
+# 2) FrameRing Class
+# ----------------------------------------------------------------------------------
+class FrameRing:
+    """
+    Fixed-size ring of frame slots addressed by a monotonically increasing sequence
+    number. ``head`` is the sequence number of the next write; slot ``seq & mask``
+    holds frame ``seq`` until it is overwritten ``capacity`` writes later.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY):
+        if capacity < 2 or capacity & (capacity - 1):
+            raise ValueError(f"Ring capacity must be a power of two, got {capacity}")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._slots: List[Optional[CANFrame]] = [None] * capacity
+        self._head = 0
+
+    @property
+    def head(self) -> int:
+        return self._head
+
+    def push(self, frame: CANFrame) -> None:
+        """Append one frame. Producer thread only."""
+        head = self._head
+        self._slots[head & self._mask] = frame
+        # Publish after the slot is written so readers never see an empty slot
+        self._head = head + 1
+
+    def push_many(self, frames: Iterable[CANFrame]) -> None:
+        """Append a batch of frames. Producer thread only."""
+        slots = self._slots
+        mask = self._mask
+        head = self._head
+        for frame in frames:
+            slots[head & mask] = frame
+            head += 1
+        self._head = head
+
+    def reader(self, from_oldest: bool = False) -> "RingReader":
+        """Create an independent consumer cursor (at the head, or the oldest retained frame)."""
+        return RingReader(self, from_oldest)
+
+    def clear(self) -> None:
+        """Drop references to stored frames. Only safe while the producer is stopped."""
+        self._slots = [None] * self.capacity
+
+# ----------------------------------------------------------------------------------
+# 3) RingReader Class
+# ----------------------------------------------------------------------------------
+class RingReader:
+    """Consumer cursor with explicit overrun accounting."""
+
+    def __init__(self, ring: FrameRing, from_oldest: bool = False):
+        self.ring = ring
+        head = ring.head
+        self._cursor = max(0, head - ring.capacity) if from_oldest else head
+        self.frames_read = 0
+        self.overruns = 0     # Number of times this reader was lapped
+        self.frames_lost = 0  # Frames overwritten before this reader got to them
+
+    def available(self) -> int:
+        return min(self.ring.head - self._cursor, self.ring.capacity)
+
+    def read(self, max_frames: Optional[int] = None) -> List[CANFrame]:
+        """Return up to ``max_frames`` unread frames, oldest first."""
+        ring = self.ring
+        capacity = ring.capacity
+        head = ring.head
+        cursor = self._account_overrun(head, self._cursor)
+        count = head - cursor
+        if max_frames is not None:
+            count = min(count, max_frames)
+        if count <= 0:
+            self._cursor = cursor
+            return []
+
+        # A list slice is copied in one step while the GIL is held
+        start = cursor & ring._mask
+        end = start + count
+        slots = ring._slots
+        frames = slots[start:end] if end <= capacity else slots[start:] + slots[:end - capacity]
+
+        # The producer may have lapped us while we copied: drop the stale prefix
+        overwritten = ring.head - capacity - cursor
+        if overwritten > 0:
+            overwritten = min(overwritten, count)
+            frames = frames[overwritten:]
+            self.overruns += 1
+            self.frames_lost += overwritten
+
+        self._cursor = cursor + count
+        self.frames_read += len(frames)
+        return frames
+
+    def skip(self) -> int:
+        """Discard everything unread (e.g. while a view is paused). Returns frames skipped."""
+        head = self.ring.head
+        skipped = head - self._cursor
+        self._cursor = head
+        return skipped
+
+    def _account_overrun(self, head: int, cursor: int) -> int:
+        behind = head - cursor
+        if behind > self.ring.capacity:
+            lost = behind - self.ring.capacity
+            self.overruns += 1
+            self.frames_lost += lost
+            return cursor + lost
+        return cursor
@@ -0,0 +1,132 @@
+# backend/slcan_interface.py
+
+"""
+Description:
+SLCAN serial adapter for BusHub (SavvyCAN, CANtact, USBtin, Lawicel CANUSB).
+
+SLCANInterface is a CANInterface, so the hub keeps its ring, dispatcher,
+reconnect and TX replay handling. Only the wire format changes: the adapter is
+initialised on every open (also after a reconnect), records are read in bulk
+and parsed with SLCANProtocol.parse_frames, and with hardware timestamps (Z1)
+the adapter's millisecond counter is mapped to host time by an AdapterClock.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+
+import serial
+
+from .can_interface import CANInterface
+from .frame import CANFrame, FLAG_EXTENDED
+from .multi_interface import SLCANProtocol
+from .timesync import AdapterClock, SLCAN_TIMESTAMP_MODULUS
+
+logger = logging.getLogger(__name__)
+
+INIT_COMMAND_DELAY = 0.1   # Adapters drop commands sent back to back
+MAX_LINE_BUFFER = 4096     # Bytes kept without a record terminator before giving up on them
+
+# ----------------------------------------------------------------------------------
+# 2) SLCANInterface Class
+# ----------------------------------------------------------------------------------
+class SLCANInterface(CANInterface):
+    """CANInterface speaking SLCAN; frames carry adapter time when hardware_timestamps is set."""
+
+    def __init__(
+        self,
+        serial_port: str = "/dev/ttyUSB0",
+        baudrate: int = 115200,
+        can_bitrate: int = 500000,
+        hardware_timestamps: bool = True,
+        reconnect_attempts: int = 5
+    ):
+        super().__init__(simulate=False, serial_port=serial_port, baudrate=baudrate,
+                         reconnect_attempts=reconnect_attempts)
+        self.can_bitrate = can_bitrate
+        self.hardware_timestamps = hardware_timestamps
+        self.adapter_clock = AdapterClock(SLCAN_TIMESTAMP_MODULUS)  # Reader thread only
+
+    def _open_serial(self) -> bool:
+        if not super()._open_serial():
+            return False
+        try:
+            with self._serial_lock:
+                self._init_adapter()
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"[SLCANInterface] Adapter init failed: {e}")
+            self._close_serial()
+            return False
+        return True
+
+    def _init_adapter(self) -> None:
+        """Close, configure and reopen the CAN channel. Caller holds _serial_lock."""
+        ser = self._serial
+        for command in (SLCANProtocol.close_channel(),
+                        SLCANProtocol.set_bitrate(self.can_bitrate),
+                        # Sent either way: some adapters keep Z in EEPROM
+                        SLCANProtocol.set_timestamps(self.hardware_timestamps),
+                        SLCANProtocol.open_channel()):
+            ser.write(command)
+            time.sleep(INIT_COMMAND_DELAY)
+        ser.reset_input_buffer()  # Command acks and frames from before the reopen
+        self.adapter_clock.reset()  # The adapter counter may have restarted
+        logger.info(f"[SLCANInterface] Channel open at {self.can_bitrate} bps, "
+                    f"timestamps {'on' if self.hardware_timestamps else 'off'}")
+
+    def _close_serial(self, emit: bool = True) -> None:
+        with self._serial_lock:
+            ser = self._serial
+            if ser is not None:
+                try:
+                    ser.write(SLCANProtocol.close_channel())
+                except (serial.SerialException, OSError):
+                    pass  # Device already gone
+        super()._close_serial(emit)
+
+    def _serial_read_loop(self) -> None:
+        """
+        Block in read() for the first byte, then take everything queued; complete
+        records are parsed as one block, a partial record waits for the next read.
+        """
+        buffer = bytearray()
+        while self._running.is_set():
+            ser = self._serial
+            if ser is None or not ser.is_open:
+                buffer.clear()
+                if not self._reconnect():
+                    break
+                continue
+            try:
+                chunk = ser.read(ser.in_waiting or 1)
+                if chunk:
+                    buffer += chunk
+                    end = max(buffer.rfind(b'\r'), buffer.rfind(b'\n'))
+                    if end >= 0:
+                        block = bytes(buffer[:end])
+                        del buffer[:end + 1]
+                        clock = self.adapter_clock if self.hardware_timestamps else None
+                        self._ingest_many(SLCANProtocol.parse_frames(block, None, clock))
+                    elif len(buffer) > MAX_LINE_BUFFER:
+                        logger.warning(f"[SLCANInterface] Discarding {len(buffer)} bytes without record terminator")
+                        buffer.clear()
+                # Hand the batch over as soon as the adapter has nothing more queued
+                if not ser.in_waiting:
+                    self._batcher.flush()
+            except (serial.SerialException, OSError, TypeError, AttributeError) as e:
+                if not self._running.is_set():
+                    break  # Port closed or read cancelled by stop()
+                logger.error(f"[SLCANInterface] Serial error: {e}")
+                self._batcher.flush()
+                self._close_serial()
+            except Exception as e:
+                logger.error(f"[SLCANInterface] Unexpected error: {e}")
+
+    def _write_frame(self, frame: CANFrame) -> None:
+        """Write one frame as an SLCAN transmit command. Caller holds _serial_lock."""
+        command = SLCANProtocol.build_frame(frame.arb_id, frame.payload, bool(frame.flags & FLAG_EXTENDED))
+        self._serial.write(command)
+        self._serial.flush()
+        logger.debug(f"[SLCANInterface] Sent frame: {command.decode().strip()}")
@@ -0,0 +1,205 @@
+# backend/socketcan.py
+
+"""
+Description:
+Native Linux SocketCAN backend using a raw AF_CAN socket from the stdlib.
+
+Frames arrive as binary ``struct can_frame`` / ``struct canfd_frame`` records,
+so there is no ASCII framing to parse. The kernel applies the capture filter
+(CAN_RAW_FILTER) and stamps every frame on arrival (SO_TIMESTAMP). Each wakeup
+drains every queued datagram before returning, so one batch carries many
+frames. The socket stays non-blocking: select() does the waiting, so the drain
+never sleeps on an empty queue. Test against a virtual bus:
+
+    sudo modprobe vcan
+    sudo ip link add dev vcan0 type vcan && sudo ip link set up vcan0
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import select
+import socket
+import struct
+import time
+from typing import List, Optional
+
+from .frame import CANFrame, FLAG_TX, FLAG_EXTENDED, FLAG_RTR, FLAG_ERROR, FLAG_FD, wall_to_monotonic_ns
+from .capture_filter import CaptureFilter
+
+# linux/can.h, linux/can/raw.h, asm-generic/socket.h (constants missing from older Pythons)
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+CAN_SFF_MASK = 0x000007FF
+CAN_MTU = 16
+CANFD_MTU = 72
+SOL_CAN_RAW = getattr(socket, "SOL_CAN_RAW", 101)
+CAN_RAW_FILTER = getattr(socket, "CAN_RAW_FILTER", 1)
+CAN_RAW_RECV_OWN_MSGS = getattr(socket, "CAN_RAW_RECV_OWN_MSGS", 4)
+CAN_RAW_FD_FRAMES = getattr(socket, "CAN_RAW_FD_FRAMES", 5)
+SO_TIMESTAMP = getattr(socket, "SO_TIMESTAMP", 29)
+MSG_CONFIRM = getattr(socket, "MSG_CONFIRM", 0x800)  # Set on our own frames echoed back
+ARPHRD_CAN = 280
+
+_FRAME_HEAD = struct.Struct("=IB3x")   # can_id, len (+ flags/res0/len8_dlc)
+_FILTER = struct.Struct("=II")         # struct can_filter: can_id, can_mask
+_TIMEVAL = struct.Struct("@ll")        # struct timeval: tv_sec, tv_usec
+_ANC_SPACE = socket.CMSG_SPACE(_TIMEVAL.size) if hasattr(socket, "CMSG_SPACE") else 64
+
+DEFAULT_RCVBUF = 1 << 20  # Room for bursts while the reader thread is busy
+SEND_TIMEOUT = 0.1        # Wait for TX queue room before giving up on a frame
+
+# ----------------------------------------------------------------------------------
+# 2) Frame Encoding
+# ----------------------------------------------------------------------------------
+def decode_frame(record: bytes, ts_ns: int, own: bool = False) -> CANFrame:
+    """Build a CANFrame from a raw can_frame/canfd_frame record."""
+    can_id, length = _FRAME_HEAD.unpack_from(record)
+    flags = FLAG_TX if own else 0
+    if can_id & CAN_EFF_FLAG:
+        flags |= FLAG_EXTENDED
+        arb_id = can_id & CAN_EFF_MASK
+    else:
+        arb_id = can_id & CAN_SFF_MASK
+    if can_id & CAN_RTR_FLAG:
+        flags |= FLAG_RTR
+    if can_id & CAN_ERR_FLAG:
+        flags |= FLAG_ERROR
+    if len(record) == CANFD_MTU:
+        flags |= FLAG_FD
+    return CANFrame(arb_id, record[8:8 + length], ts_ns, flags)
+
+def encode_frame(arb_id: int, data: bytes, extended: bool = False) -> bytes:
+    """Raw can_frame (or canfd_frame for more than 8 data bytes)."""
+    can_id = (arb_id & CAN_EFF_MASK) | CAN_EFF_FLAG if extended else arb_id & CAN_SFF_MASK
+    size = CAN_MTU if len(data) <= 8 else CANFD_MTU
+    return _FRAME_HEAD.pack(can_id, len(data)) + data.ljust(size - 8, b"\x00")
+
+def build_filters(capture_filter: Optional[CaptureFilter]) -> bytes:
+    """CAN_RAW_FILTER option value; the frame format bit is always compared."""
+    if not capture_filter:
+        return _FILTER.pack(0, 0)  # Accept everything
+    filters = []
+    for rule in capture_filter.rules:
+        if rule.extended:
+            filters.append(_FILTER.pack(rule.code | CAN_EFF_FLAG, rule.mask | CAN_EFF_FLAG))
+        else:
+            filters.append(_FILTER.pack(rule.code, rule.mask | CAN_EFF_FLAG))
+    return b"".join(filters)
+
+# ----------------------------------------------------------------------------------
+# 3) SocketCANBus Class
+# ----------------------------------------------------------------------------------
+class SocketCANBus:
+    """Raw CAN socket bound to one interface (e.g. can0, vcan0)."""
+
+    def __init__(self, channel: str, fd: bool = True, receive_own: bool = True,
+                 rcvbuf: int = DEFAULT_RCVBUF):
+        self.channel = channel
+        self.fd = fd
+        self.receive_own = receive_own
+        self.rcvbuf = rcvbuf
+        self._sock: Optional[socket.socket] = None
+
+    @staticmethod
+    def available() -> bool:
+        return hasattr(socket, "AF_CAN") and hasattr(socket.socket, "recvmsg")
+
+    @staticmethod
+    def list_interfaces() -> List[str]:
+        """Network interfaces of type CAN (real and virtual)."""
+        names = []
+        for _, name in socket.if_nameindex() if hasattr(socket, "if_nameindex") else []:
+            try:
+                with open(f"/sys/class/net/{name}/type") as f:
+                    if int(f.read()) == ARPHRD_CAN:
+                        names.append(name)
+            except (OSError, ValueError):
+                continue
+        return names
+
+    @property
+    def is_open(self) -> bool:
+        return self._sock is not None
+
+    def open(self) -> None:
+        if not self.available():
+            raise OSError("SocketCAN is not supported on this platform")
+        sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMP, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+            if self.receive_own:
+                sock.setsockopt(SOL_CAN_RAW, CAN_RAW_RECV_OWN_MSGS, 1)
+            if self.fd:
+                try:
+                    sock.setsockopt(SOL_CAN_RAW, CAN_RAW_FD_FRAMES, 1)
+                except OSError:
+                    self.fd = False  # Kernel or interface without CAN FD
+            sock.bind((self.channel,))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def set_filter(self, capture_filter: Optional[CaptureFilter]) -> None:
+        """Install the filter in the kernel; frames it rejects never reach userspace."""
+        self._sock.setsockopt(SOL_CAN_RAW, CAN_RAW_FILTER, build_filters(capture_filter))
+
+    def send(self, arb_id: int, data: bytes, extended: bool = False) -> None:
+        record = encode_frame(arb_id, bytes(data), extended)
+        try:
+            self._sock.send(record)
+        except BlockingIOError:
+            select.select((), (self._sock,), (), SEND_TIMEOUT)
+            self._sock.send(record)
+
+    def recv_batch(self, timeout: float, max_frames: int = 4096) -> List[CANFrame]:
+        """
+        Wait up to ``timeout`` seconds for a frame, then drain every frame already
+        queued (up to ``max_frames``) without blocking again.
+        """
+        sock = self._sock
+        frames: List[CANFrame] = []
+        try:
+            record, ancdata, msg_flags, _ = sock.recvmsg(CANFD_MTU, _ANC_SPACE)
+        except (BlockingIOError, InterruptedError):
+            try:
+                if not select.select((sock,), (), (), timeout)[0]:
+                    return frames
+                record, ancdata, msg_flags, _ = sock.recvmsg(CANFD_MTU, _ANC_SPACE)
+            except (BlockingIOError, InterruptedError):
+                return frames
+        append = frames.append
+        recvmsg = sock.recvmsg
+        while True:
+            append(decode_frame(record, _timestamp(ancdata), bool(msg_flags & MSG_CONFIRM)))
+            if len(frames) >= max_frames:
+                break
+            try:
+                record, ancdata, msg_flags, _ = recvmsg(CANFD_MTU, _ANC_SPACE)
+            except (BlockingIOError, InterruptedError):
+                break
+        return frames
+
+    def fileno(self) -> int:
+        return self._sock.fileno() if self._sock is not None else -1
+
+# ----------------------------------------------------------------------------------
+# 4) Helpers
+# ----------------------------------------------------------------------------------
+def _timestamp(ancdata) -> int:
+    """Kernel receive time (SO_TIMESTAMP) on the frame clock, or now if absent."""
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMP and len(data) >= _TIMEVAL.size:
+            sec, usec = _TIMEVAL.unpack_from(data)
+            return wall_to_monotonic_ns(sec * 1_000_000_000 + usec * 1000)
+    return time.monotonic_ns()
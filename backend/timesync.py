@@ -0,0 +1,158 @@
+# backend/timesync.py
+
+"""
+Description:
+Maps adapter hardware timestamps onto the host monotonic frame clock.
+
+SLCAN adapters with timestamps enabled (``Z1``) append a millisecond counter
+that wraps at 60000. AdapterClock unwraps that counter, then estimates the
+offset between adapter time and host time from the smallest observed
+host-minus-adapter difference in each window (the sample with the least
+USB/serial buffering delay). A least-squares line through the recent minima
+compensates for crystal drift between the two clocks.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+from collections import deque
+from typing import Optional
+
+SLCAN_TIMESTAMP_MODULUS = 60000    # Lawicel/CANtact ms counter wraps at 60 s
+DEFAULT_TICK_NS = 1_000_000        # One adapter tick = 1 ms
+DEFAULT_WINDOW_NS = 1_000_000_000  # Length of one min-offset window
+DEFAULT_HISTORY = 32               # Windows kept for the drift fit
+RESYNC_THRESHOLD_NS = 2_000_000_000  # Larger disagreement => adapter was reset
+
+# ----------------------------------------------------------------------------------
+# 2) AdapterClock Class
+# ----------------------------------------------------------------------------------
+class AdapterClock:
+    """
+    Converts wrapping adapter tick counts to host monotonic nanoseconds.
+    Single-threaded: owned by the reader thread that parses frames.
+    """
+
+    def __init__(
+        self,
+        modulus: int = SLCAN_TIMESTAMP_MODULUS,
+        tick_ns: int = DEFAULT_TICK_NS,
+        window_ns: int = DEFAULT_WINDOW_NS,
+        history: int = DEFAULT_HISTORY,
+    ):
+        if modulus <= 0 or tick_ns <= 0:
+            raise ValueError("Timestamp modulus and tick length must be positive")
+        self.modulus = modulus
+        self.tick_ns = tick_ns
+        self.window_ns = window_ns
+        self._minima = deque(maxlen=max(2, history))
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state; the next sample starts a new correlation."""
+        self._last_ticks: Optional[int] = None
+        self._last_host_ns = 0
+        self._adapter_ns = 0       # Unwrapped adapter time since the first sample
+        self._window_start = 0
+        self._window_min: Optional[int] = None
+        self._window_min_at = 0
+        self._minima.clear()
+        self._base_x = 0           # Fit: offset = intercept + slope * (adapter_ns - base_x)
+        self._intercept = 0.0
+        self._slope = 0.0
+        self._last_out = 0
+        self.resyncs = 0
+
+    @property
+    def drift_ppm(self) -> float:
+        """Estimated host-minus-adapter clock rate difference in parts per million."""
+        return self._slope * 1e6
+
+    def to_host_ns(self, ticks: int, host_ns: int) -> int:
+        """Return the host monotonic time at which the adapter stamped ``ticks``."""
+        if self._last_ticks is None:
+            self._start(ticks, host_ns)
+        else:
+            delta = (ticks - self._last_ticks) % self.modulus
+            # Silent gaps longer than one wrap period are recovered from host time
+            period_ns = self.modulus * self.tick_ns
+            elapsed = host_ns - self._last_host_ns
+            if elapsed > period_ns // 2:
+                wraps = round((elapsed - delta * self.tick_ns) / period_ns)
+                if wraps > 0:
+                    delta += wraps * self.modulus
+            self._adapter_ns += delta * self.tick_ns
+            self._last_ticks = ticks
+            self._last_host_ns = host_ns
+
+        offset = host_ns - self._adapter_ns
+        if abs(offset - self._offset_at(self._adapter_ns)) > RESYNC_THRESHOLD_NS:
+            # Adapter counter jumped (power cycle, Z toggled): start over
+            self.resyncs += 1
+            self._start(ticks, host_ns)
+            offset = host_ns
+
+        adapter_ns = self._adapter_ns
+        self._track_minimum(adapter_ns, offset)
+        estimate = adapter_ns + self._offset_at(adapter_ns)
+
+        # A frame cannot arrive before it was stamped, and time never runs backwards
+        if estimate > host_ns:
+            estimate = host_ns
+        if estimate < self._last_out:
+            estimate = self._last_out
+        self._last_out = estimate
+        return estimate
+
+    # ------------------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------------------
+    def _start(self, ticks: int, host_ns: int) -> None:
+        self._last_ticks = ticks
+        self._last_host_ns = host_ns
+        self._adapter_ns = 0
+        self._window_start = 0
+        self._window_min = None
+        self._minima.clear()
+        self._base_x = 0
+        self._intercept = float(host_ns)
+        self._slope = 0.0
+
+    def _track_minimum(self, adapter_ns: int, offset: int) -> None:
+        if self._window_min is None or offset < self._window_min:
+            self._window_min = offset
+            self._window_min_at = adapter_ns
+        # The estimate is a lower envelope: a faster sample pulls the line down
+        below = offset - self._offset_at(adapter_ns)
+        if below < 0:
+            self._intercept += below
+        if adapter_ns - self._window_start >= self.window_ns:
+            self._minima.append((self._window_min_at, self._window_min))
+            self._window_start = adapter_ns
+            self._window_min = None
+            self._fit()
+
+    def _fit(self) -> None:
+        points = self._minima
+        if len(points) < 2:
+            x, y = points[0]
+            self._base_x, self._intercept, self._slope = x, float(y), 0.0
+            return
+        base_x = points[0][0]
+        n = len(points)
+        mean_x = sum(x - base_x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        sxx = sum((x - base_x - mean_x) ** 2 for x, _ in points)
+        if sxx <= 0:
+            return
+        sxy = sum((x - base_x - mean_x) * (y - mean_y) for x, y in points)
+        slope = sxy / sxx
+        intercept = mean_y - slope * mean_x
+        # Shift the fitted line down onto the lowest minimum
+        intercept += min(0.0, min(y - (intercept + slope * (x - base_x)) for x, y in points))
+        self._base_x = base_x
+        self._slope = slope
+        self._intercept = intercept
+
+    def _offset_at(self, adapter_ns: int) -> int:
+        return int(self._intercept + self._slope * (adapter_ns - self._base_x))
@@ -0,0 +1,264 @@
+# backend/traffic_gen.py
+
+"""
+Description:
+Schedule-driven CAN traffic generator for simulation and load testing.
+
+A schedule is a list of PeriodicMessage entries (ID, period, DLC, payload
+generator). TrafficGenerator keeps the messages in a heap ordered by due time
+and, when polled, returns every frame that has come due, stamped with its
+scheduled time rather than the time of the poll. All randomness comes from one
+seeded ``random.Random``, so a seed reproduces the same frame sequence.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import heapq
+import json
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .frame import CANFrame, FLAG_TX, FLAG_EXTENDED
+
+MAX_LAG_NS = 500_000_000  # A message further behind than this skips ahead instead of bursting
+STD_FRAME_BITS = 47       # Data frame overhead incl. interframe space, without stuff bits
+EXT_FRAME_BITS = 67
+
+# ----------------------------------------------------------------------------------
+# 2) Payload Generators
+# ----------------------------------------------------------------------------------
+# A generator is called as gen(count, t, rng) -> bytes, where count is the
+# message's frame number and t the scheduled send time in seconds from start.
+
+class ConstantPayload:
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+
+    def __call__(self, count: int, t: float, rng: random.Random) -> bytes:
+        return self.data
+
+class CounterPayload:
+    """Rolling counter (big-endian, ``width`` bytes) at ``byte_index`` of a template."""
+
+    def __init__(self, dlc: int = 8, byte_index: int = 0, width: int = 1, step: int = 1,
+                 template: Optional[bytes] = None):
+        self.template = bytearray(template if template is not None else bytes(dlc))
+        self.byte_index = byte_index
+        self.width = width
+        self.step = step
+        self._modulus = 1 << (8 * width)
+
+    def __call__(self, count: int, t: float, rng: random.Random) -> bytes:
+        data = self.template
+        data[self.byte_index:self.byte_index + self.width] = \
+            ((count * self.step) % self._modulus).to_bytes(self.width, "big")
+        return bytes(data)
+
+class RandomPayload:
+    def __init__(self, dlc: int = 8):
+        self.dlc = dlc
+
+    def __call__(self, count: int, t: float, rng: random.Random) -> bytes:
+        return rng.getrandbits(8 * self.dlc).to_bytes(self.dlc, "big") if self.dlc else b""
+
+class SinePayload:
+    """
+    Signal ``bias + amplitude * sin(2*pi*t / period)`` encoded as an unsigned
+    big-endian raw value ``(physical - offset) / scale`` at ``byte_index``.
+    """
+
+    def __init__(self, dlc: int = 8, byte_index: int = 0, width: int = 2, period: float = 1.0,
+                 amplitude: float = 1000.0, bias: float = 1000.0, scale: float = 1.0,
+                 offset: float = 0.0, template: Optional[bytes] = None):
+        self.template = bytearray(template if template is not None else bytes(dlc))
+        self.byte_index = byte_index
+        self.width = width
+        self.period = period
+        self.amplitude = amplitude
+        self.bias = bias
+        self.scale = scale
+        self.offset = offset
+        self._max_raw = (1 << (8 * width)) - 1
+
+    def __call__(self, count: int, t: float, rng: random.Random) -> bytes:
+        physical = self.bias + self.amplitude * math.sin(2 * math.pi * t / self.period)
+        raw = min(max(int(round((physical - self.offset) / self.scale)), 0), self._max_raw)
+        data = self.template
+        data[self.byte_index:self.byte_index + self.width] = raw.to_bytes(self.width, "big")
+        return bytes(data)
+
+GENERATORS: Dict[str, Callable[..., Callable]] = {
+    "constant": ConstantPayload,
+    "counter": CounterPayload,
+    "random": RandomPayload,
+    "sine": SinePayload,
+}
+
+# ----------------------------------------------------------------------------------
+# 3) PeriodicMessage
+# ----------------------------------------------------------------------------------
+@dataclass
+class PeriodicMessage:
+    arb_id: int
+    period: float                       # Seconds between frames
+    dlc: int = 8
+    generator: Optional[Callable] = None  # gen(count, t, rng) -> bytes; random when None
+    extended: bool = False
+    tx: bool = False                    # Mark frames as transmitted by us
+    phase: float = 0.0                  # Seconds after start of the first frame
+    count: int = field(default=0, repr=False)
+
+    def __post_init__(self):
+        if self.period <= 0:
+            raise ValueError(f"Period must be positive for ID 0x{self.arb_id:X}")
+        if self.generator is None:
+            self.generator = RandomPayload(self.dlc)
+
+    @property
+    def flags(self) -> int:
+        return (FLAG_TX if self.tx else 0) | (FLAG_EXTENDED if self.extended else 0)
+
+    @property
+    def frame_bits(self) -> int:
+        return (EXT_FRAME_BITS if self.extended else STD_FRAME_BITS) + 8 * self.dlc
+
+# ----------------------------------------------------------------------------------
+# 4) TrafficGenerator Class
+# ----------------------------------------------------------------------------------
+class TrafficGenerator:
+    """Heap scheduler over a list of periodic messages. Not thread-safe."""
+
+    def __init__(self, schedule: Iterable[PeriodicMessage], seed: Optional[int] = None):
+        self.schedule: List[PeriodicMessage] = list(schedule)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._heap: List[Tuple[int, int]] = []
+        self._start_ns = 0
+
+    def start(self, now_ns: int) -> None:
+        """(Re)start the schedule at ``now_ns``; reseeds so runs are reproducible."""
+        self.rng.seed(self.seed)
+        self._start_ns = now_ns
+        self._heap = []
+        for index, msg in enumerate(self.schedule):
+            msg.count = 0
+            self._heap.append((now_ns + int(msg.phase * 1e9), index))
+        heapq.heapify(self._heap)
+
+    def due(self, now_ns: int) -> List[CANFrame]:
+        """Every frame scheduled at or before ``now_ns``, in time order."""
+        heap = self._heap
+        frames: List[CANFrame] = []
+        schedule = self.schedule
+        rng = self.rng
+        start_ns = self._start_ns
+        while heap and heap[0][0] <= now_ns:
+            due_ns, index = heap[0]
+            msg = schedule[index]
+            payload = msg.generator(msg.count, (due_ns - start_ns) / 1e9, rng)
+            frames.append(CANFrame(msg.arb_id, payload, due_ns, msg.flags))
+            msg.count += 1
+            next_ns = due_ns + int(msg.period * 1e9)
+            if now_ns - next_ns > MAX_LAG_NS:
+                next_ns = now_ns  # Stalled (debugger, suspend): resume instead of replaying
+            heapq.heapreplace(heap, (next_ns, index))
+        return frames
+
+    def time_until_next(self, now_ns: int) -> Optional[float]:
+        """Seconds until the next frame is due, or None for an empty schedule."""
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now_ns) / 1e9)
+
+    @property
+    def frames_per_second(self) -> float:
+        return sum(1.0 / msg.period for msg in self.schedule)
+
+    def bus_load(self, bitrate: int) -> float:
+        """Approximate bus load (0-1) at ``bitrate``, ignoring stuff bits."""
+        return sum(msg.frame_bits / msg.period for msg in self.schedule) / bitrate
+
+# ----------------------------------------------------------------------------------
+# 5) Schedules
+# ----------------------------------------------------------------------------------
+def interval_schedule(ids: Iterable[int], interval: float, max_dlc: int = 8,
+                      seed: Optional[int] = None, tx_every: int = 2) -> List[PeriodicMessage]:
+    """
+    Light background traffic: one frame every ``interval`` seconds overall,
+    spread round-robin over ``ids`` with random payloads of a fixed random DLC.
+    """
+    ids = list(ids)
+    rng = random.Random(seed)
+    period = interval * len(ids)
+    return [
+        PeriodicMessage(arb_id, period, rng.randint(1, max_dlc), extended=arb_id > 0x7FF,
+                        tx=tx_every > 0 and i % tx_every == 1, phase=i * interval)
+        for i, arb_id in enumerate(ids)
+    ]
+
+def load_schedule(target_fps: float = 8000.0, seed: Optional[int] = 0,
+                  first_id: int = 0x100) -> List[PeriodicMessage]:
+    """
+    Field-like schedule reaching ``target_fps`` (~8000 fps is a fully loaded
+    1 Mbps bus): fast control messages carry counters and sine signals, slow
+    status messages carry random or constant data. Lower IDs get the shorter
+    periods, as priorities are usually assigned on a real vehicle bus.
+    """
+    rng = random.Random(seed)
+    periods = (0.010, 0.010, 0.020, 0.020, 0.050, 0.100, 0.100, 0.200, 0.500, 1.000)
+    messages: List[PeriodicMessage] = []
+    fps = 0.0
+    while fps < target_fps:
+        period = rng.choice(periods)
+        messages.append(PeriodicMessage(0, period, 8, phase=rng.uniform(0, period)))
+        fps += 1.0 / period
+    messages.sort(key=lambda m: m.period)
+    for i, msg in enumerate(messages):
+        msg.arb_id = first_id + i
+        if msg.period <= 0.010:
+            msg.generator = CounterPayload(8, byte_index=7)
+        elif msg.period <= 0.050:
+            msg.generator = SinePayload(8, byte_index=0, period=rng.uniform(0.5, 5.0),
+                                        amplitude=rng.uniform(100, 3000), bias=3000)
+        elif msg.period <= 0.200:
+            msg.generator = RandomPayload(8)
+        else:
+            msg.generator = ConstantPayload(rng.getrandbits(64).to_bytes(8, "big"))
+    return messages
+
+def schedule_from_dicts(entries: Iterable[Dict]) -> List[PeriodicMessage]:
+    """
+    Build a schedule from plain dicts, e.g. from JSON:
+        {"id": "0C9", "period_ms": 10, "dlc": 8, "generator": "counter",
+         "args": {"byte_index": 7}, "extended": false, "tx": false}
+    """
+    messages = []
+    for entry in entries:
+        arb_id = entry["id"]
+        arb_id = int(arb_id, 16) if isinstance(arb_id, str) else int(arb_id)
+        dlc = int(entry.get("dlc", 8))
+        kind = entry.get("generator", "random")
+        args = dict(entry.get("args", {}))
+        if kind not in GENERATORS:
+            raise ValueError(f"Unknown payload generator '{kind}' for ID 0x{arb_id:X}")
+        if kind == "constant":
+            generator = ConstantPayload(bytes.fromhex(args.get("data", "00" * dlc)))
+        else:
+            if "template" in args:
+                args["template"] = bytes.fromhex(args["template"])
+            generator = GENERATORS[kind](dlc, **args)
+        messages.append(PeriodicMessage(
+            arb_id, float(entry["period_ms"]) / 1000.0, dlc, generator,
+            extended=bool(entry.get("extended", arb_id > 0x7FF)),
+            tx=bool(entry.get("tx", False)),
+            phase=float(entry.get("phase_ms", 0)) / 1000.0,
+        ))
+    return messages
+
+def load_schedule_file(path: str) -> List[PeriodicMessage]:
+    """Read a JSON list of schedule entries (see schedule_from_dicts)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return schedule_from_dicts(json.load(f))
@@ -0,0 +1,438 @@
+# backend/uds_client.py
+
+"""
+Description:
+Asynchronous UDS (ISO 14229) client on top of the ISO-TP links of a BusHub.
+
+Every request returns a concurrent.futures.Future that resolves (on the GUI
+thread) with the UDSResponse matching it by ECU address, service and data
+identifier, or fails with NegativeResponseError / UDSTimeoutError. Requests to
+one ECU are sent one at a time, as the protocol requires; requests to
+different ECUs are in flight together, so asking N modules costs one response
+window instead of N. NRC 0x78 (response pending) switches the request from the
+P2 to the P2* timeout, as often as the ECU repeats it.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from PyQt5.QtCore import QObject, QTimer
+
+from .isotp import IsoTpAddress, IsoTpConfig, IsoTpLink, NORMAL_FIXED_PHYSICAL
+
+logger = logging.getLogger(__name__)
+
+P2_SERVER = 0.050        # Default P2server_max: first response within 50 ms
+P2_STAR_SERVER = 5.0     # Default P2*server_max after NRC 0x78
+P2_MARGIN = 0.100        # Adapter and bus latency added on the tester side
+
+NEGATIVE_RESPONSE = 0x7F
+NRC_RESPONSE_PENDING = 0x78
+SUPPRESS_POSITIVE = 0x80  # Sub-function bit: the ECU answers only with an NRC
+
+NRC_DESCRIPTIONS = {
+    0x10: "General Reject",
+    0x11: "Service Not Supported",
+    0x12: "Sub-Function Not Supported",
+    0x13: "Invalid Format",
+    0x14: "Response Too Long",
+    0x21: "Busy - Repeat Request",
+    0x22: "Conditions Not Correct",
+    0x24: "Request Sequence Error",
+    0x25: "No Response From Subnet",
+    0x26: "Failure Prevents Execution",
+    0x31: "Request Out Of Range",
+    0x33: "Security Access Denied",
+    0x34: "Authentication Required",
+    0x35: "Invalid Key",
+    0x36: "Exceeded Number Of Attempts",
+    0x37: "Required Time Delay Not Expired",
+    0x50: "Certificate Verification Failed - Invalid Time Period",
+    0x51: "Certificate Verification Failed - Invalid Signature",
+    0x52: "Certificate Verification Failed - Invalid Chain Of Trust",
+    0x53: "Certificate Verification Failed - Invalid Type",
+    0x54: "Certificate Verification Failed - Invalid Format",
+    0x55: "Certificate Verification Failed - Invalid Content",
+    0x56: "Certificate Verification Failed - Invalid Scope",
+    0x57: "Certificate Verification Failed - Invalid Certificate (Revoked)",
+    0x58: "Ownership Verification Failed",
+    0x59: "Challenge Calculation Failed",
+    0x5A: "Setting Access Rights Failed",
+    0x5B: "Session Key Creation/Derivation Failed",
+    0x5C: "Configuration Data Usage Failed",
+    0x5D: "DeAuthentication Failed",
+    0x70: "Upload/Download Not Accepted",
+    0x71: "Transfer Data Suspended",
+    0x72: "General Programming Failure",
+    0x73: "Wrong Block Sequence Counter",
+    0x78: "Request Correctly Received - Response Pending",
+    0x7E: "Sub-Function Not Supported In Active Session",
+    0x7F: "Service Not Supported In Active Session",
+    0x81: "RPM Too High",
+    0x82: "RPM Too Low",
+    0x83: "Engine Is Running",
+    0x84: "Engine Is Not Running",
+    0x85: "Engine Run Time Too Low",
+    0x86: "Temperature Too High",
+    0x87: "Temperature Too Low",
+    0x88: "Vehicle Speed Too High",
+    0x89: "Vehicle Speed Too Low",
+    0x8A: "Throttle/Pedal Too High",
+    0x8B: "Throttle/Pedal Too Low",
+    0x8C: "Transmission Range Not In Neutral",
+    0x8D: "Transmission Range Not In Gear",
+    0x8F: "Brake Switch Not Closed",
+    0x90: "Shifter Lever Not In Park",
+    0x91: "Torque Converter Clutch Locked",
+    0x92: "Voltage Too High",
+    0x93: "Voltage Too Low",
+    0x94: "Resource Temporarily Not Available",
+}
+
+# Request bytes after the SID that a positive response repeats (sub-function, DID, ...)
+RESPONSE_ECHO = {
+    0x10: 1, 0x11: 1, 0x19: 1, 0x22: 2, 0x27: 1, 0x28: 1, 0x2C: 3, 0x2E: 2, 0x2F: 2,
+    0x31: 3, 0x3E: 1, 0x85: 1,
+}
+# Services whose sub-function may carry the suppress-positive-response bit
+SUBFUNCTION_SERVICES = frozenset((0x10, 0x11, 0x27, 0x28, 0x2C, 0x31, 0x3E, 0x85))
+# Services keyed by a data identifier at request bytes 1-2 (routine control: 2-3)
+DID_SERVICES = frozenset((0x22, 0x2E, 0x2F))
+
+EcuRef = Union[int, IsoTpAddress]
+RequestKey = Tuple[IsoTpAddress, int, Optional[int]]
+
+def ecu_address(ecu: EcuRef) -> IsoTpAddress:
+    """
+    Address of an ECU given as an IsoTpAddress or its physical request ID:
+    0x18DA<TA><SA> is normal fixed, anything else answers on request ID + 8.
+    """
+    if isinstance(ecu, IsoTpAddress):
+        return ecu
+    if ecu & 0xFFFF0000 == NORMAL_FIXED_PHYSICAL:
+        return IsoTpAddress.normal_fixed((ecu >> 8) & 0xFF, ecu & 0xFF)
+    return IsoTpAddress.normal(ecu, ecu + 8, ecu > 0x7FF)
+
+def request_did(payload: bytes) -> Optional[int]:
+    """The data (or routine) identifier a request is about, if its service has one."""
+    sid = payload[0]
+    if sid in DID_SERVICES and len(payload) >= 3:
+        return (payload[1] << 8) | payload[2]
+    if sid == 0x31 and len(payload) >= 4:
+        return (payload[2] << 8) | payload[3]
+    return None
+
+# ----------------------------------------------------------------------------------
+# 2) Results & Errors
+# ----------------------------------------------------------------------------------
+class UDSError(Exception):
+    """Request failed without an answer from the ECU (transport error, bus down)."""
+
+class UDSTimeoutError(UDSError):
+    """No response within P2 (or P2* after response pending)."""
+
+class NegativeResponseError(UDSError):
+    """The ECU rejected the request with a negative response code."""
+
+    def __init__(self, sid: int, nrc: int):
+        self.sid = sid
+        self.nrc = nrc
+        super().__init__(f"Service 0x{sid:02X}: {self.description} (NRC 0x{nrc:02X})")
+
+    @property
+    def description(self) -> str:
+        return NRC_DESCRIPTIONS.get(self.nrc, "Unknown")
+
+@dataclass
+class UDSResponse:
+    """Positive response to one request."""
+    ecu: IsoTpAddress
+    sid: int                 # Request service ID (the response starts with sid + 0x40)
+    did: Optional[int]
+    payload: bytes           # Complete response message, SID included
+    elapsed: float = 0.0     # Seconds from request sent to response received
+    pending_count: int = 0   # NRC 0x78 frames the ECU sent first
+
+    @property
+    def data(self) -> bytes:
+        """Response after the SID and the echoed sub-function/DID bytes."""
+        return self.payload[1 + RESPONSE_ECHO.get(self.sid, 0):]
+
+# ----------------------------------------------------------------------------------
+# 3) Per-ECU state
+# ----------------------------------------------------------------------------------
+class _Request:
+    __slots__ = ("key", "payload", "future", "suppress", "sent_at", "pending_count")
+
+    def __init__(self, key: RequestKey, payload: bytes, future: Future, suppress: bool):
+        self.key = key
+        self.payload = payload
+        self.future = future
+        self.suppress = suppress
+        self.sent_at = 0.0
+        self.pending_count = 0
+
+class _Endpoint:
+    """ISO-TP link, request queue and response timer of one ECU."""
+    __slots__ = ("address", "link", "timer", "queue", "active", "p2", "p2_star")
+
+    def __init__(self, address: IsoTpAddress, link: IsoTpLink, timer: QTimer, p2: float, p2_star: float):
+        self.address = address
+        self.link = link
+        self.timer = timer
+        self.queue: Deque[_Request] = deque()
+        self.active: Optional[_Request] = None
+        self.p2 = p2
+        self.p2_star = p2_star
+
+# ----------------------------------------------------------------------------------
+# 4) UDSClient Class
+# ----------------------------------------------------------------------------------
+class UDSClient(QObject):
+    """Futures-based UDS requests over a BusHub. GUI thread only."""
+
+    def __init__(self, hub, config: Optional[IsoTpConfig] = None, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.hub = hub
+        self.config = config
+        self.p2 = P2_SERVER + P2_MARGIN
+        self.p2_star = P2_STAR_SERVER + P2_MARGIN
+        self._endpoints: Dict[IsoTpAddress, _Endpoint] = {}
+        self._pending: Dict[RequestKey, _Request] = {}
+
+    # ------------------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------------------
+    def request(self, ecu: EcuRef, payload: Union[bytes, Iterable[int]]) -> Future:
+        """
+        Queue ``payload`` for ``ecu``. An identical request still outstanding
+        for the same (ECU, SID, DID) returns that request's future.
+        """
+        payload = bytes(payload)
+        if not payload:
+            raise ValueError("Empty UDS request")
+        endpoint = self._endpoint(ecu_address(ecu))
+        key = (endpoint.address, payload[0], request_did(payload))
+        pending = self._pending.get(key)
+        if pending is not None and pending.payload == payload and not pending.future.done():
+            return pending.future
+        suppress = (payload[0] in SUBFUNCTION_SERVICES and len(payload) > 1
+                    and bool(payload[1] & SUPPRESS_POSITIVE))
+        req = _Request(key, payload, Future(), suppress)
+        self._pending[key] = req
+        endpoint.queue.append(req)
+        self._start_next(endpoint)
+        return req.future
+
+    def read_did(self, ecu: EcuRef, did: int) -> Future:
+        return self.request(ecu, (0x22, did >> 8, did & 0xFF))
+
+    def read_dids(self, ecu: EcuRef, dids: Iterable[int]) -> List[Future]:
+        """One request per DID, queued back to back on the ECU."""
+        return [self.read_did(ecu, did) for did in dids]
+
+    def write_did(self, ecu: EcuRef, did: int, data: bytes) -> Future:
+        return self.request(ecu, bytes((0x2E, did >> 8, did & 0xFF)) + bytes(data))
+
+    def read_dtcs(self, ecu: EcuRef, status_mask: int = 0xFF) -> Future:
+        """ReadDTCInformation / reportDTCByStatusMask."""
+        return self.request(ecu, (0x19, 0x02, status_mask))
+
+    def clear_dtcs(self, ecu: EcuRef, group: int = 0xFFFFFF) -> Future:
+        return self.request(ecu, (0x14, (group >> 16) & 0xFF, (group >> 8) & 0xFF, group & 0xFF))
+
+    def tester_present(self, ecu: EcuRef, suppress: bool = False) -> Future:
+        return self.request(ecu, (0x3E, SUPPRESS_POSITIVE if suppress else 0x00))
+
+    def diagnostic_session(self, ecu: EcuRef, session: int) -> Future:
+        """DiagnosticSessionControl; the ECU's P2/P2* from the response are adopted."""
+        return self.request(ecu, (0x10, session))
+
+    def ecu_reset(self, ecu: EcuRef, reset_type: int) -> Future:
+        return self.request(ecu, (0x11, reset_type))
+
+    def security_access(self, ecu: EcuRef, level: int, key: bytes = b"") -> Future:
+        """Odd ``level`` requests a seed, even sends ``key``."""
+        return self.request(ecu, bytes((0x27, level)) + bytes(key))
+
+    def define_dynamic_did(self, ecu: EcuRef, ddid: int, sources: Iterable[Tuple[int, int, int]]) -> Future:
+        """DynamicallyDefineDataIdentifier / defineByIdentifier: (source DID, position, size) each."""
+        payload = bytearray((0x2C, 0x01, ddid >> 8, ddid & 0xFF))
+        for did, position, size in sources:
+            payload += bytes((did >> 8, did & 0xFF, position, size))
+        return self.request(ecu, payload)
+
+    def clear_dynamic_did(self, ecu: EcuRef, ddid: Optional[int] = None) -> Future:
+        """Clear one dynamically defined DID, or all of them."""
+        payload = bytes((0x2C, 0x03)) + (b"" if ddid is None else bytes((ddid >> 8, ddid & 0xFF)))
+        return self.request(ecu, payload)
+
+    def read_periodic(self, ecu: EcuRef, mode: int, pdids: Iterable[int]) -> Future:
+        """ReadDataByPeriodicIdentifier: transmission mode (1 slow .. 4 stop) and PDID low bytes."""
+        return self.request(ecu, bytes((0x2A, mode)) + bytes(p & 0xFF for p in pdids))
+
+    # ------------------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------------------
+    def pending_count(self, ecu: Optional[EcuRef] = None) -> int:
+        endpoints = self._endpoints.values() if ecu is None else filter(
+            None, [self._endpoints.get(ecu_address(ecu))])
+        return sum(len(e.queue) + (e.active is not None) for e in endpoints)
+
+    def set_timing(self, ecu: EcuRef, p2: float, p2_star: float) -> None:
+        """Response timeouts (seconds, margin included) for one ECU."""
+        endpoint = self._endpoint(ecu_address(ecu))
+        endpoint.p2 = p2
+        endpoint.p2_star = p2_star
+
+    def release(self, ecu: EcuRef) -> None:
+        """Close the link of an idle ECU (e.g. after a scan found nothing there)."""
+        address = ecu_address(ecu)
+        endpoint = self._endpoints.get(address)
+        if endpoint is not None and endpoint.active is None and not endpoint.queue:
+            self._close_endpoint(endpoint)
+            del self._endpoints[address]
+
+    def cancel_all(self) -> None:
+        """Fail every outstanding request and drop every queued one."""
+        for endpoint in list(self._endpoints.values()):
+            self._abort_endpoint(endpoint, UDSError("Cancelled"))
+
+    def close(self) -> None:
+        self.cancel_all()
+        for endpoint in self._endpoints.values():
+            self._close_endpoint(endpoint)
+        self._endpoints.clear()
+
+    # ------------------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------------------
+    def _endpoint(self, address: IsoTpAddress) -> _Endpoint:
+        endpoint = self._endpoints.get(address)
+        if endpoint is None:
+            link = IsoTpLink(self.hub, address, self.config, parent=self)
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            endpoint = _Endpoint(address, link, timer, self.p2, self.p2_star)
+            link.message_received.connect(lambda message, e=endpoint: self._on_message(e, message))
+            link.message_sent.connect(lambda e=endpoint: self._on_sent(e))
+            link.error_occurred.connect(lambda reason, e=endpoint: self._finish(e, exc=UDSError(reason)))
+            timer.timeout.connect(lambda e=endpoint: self._on_timeout(e))
+            self._endpoints[address] = endpoint
+        return endpoint
+
+    def _close_endpoint(self, endpoint: _Endpoint) -> None:
+        endpoint.timer.stop()
+        endpoint.link.close()
+        endpoint.link.deleteLater()
+        endpoint.timer.deleteLater()
+
+    def _start_next(self, endpoint: _Endpoint) -> None:
+        while endpoint.active is None and endpoint.queue:
+            req = endpoint.queue.popleft()
+            if not req.future.set_running_or_notify_cancel():
+                self._forget(req)  # Cancelled by the caller while queued
+                continue
+            if not self.hub.is_running():
+                self._resolve(req, exc=UDSError("Bus not connected"))
+                continue
+            endpoint.active = req
+            req.sent_at = time.monotonic()
+            try:
+                endpoint.link.send(req.payload)  # message_sent starts P2
+            except Exception as e:
+                self._finish(endpoint, exc=UDSError(str(e)))
+
+    def _on_sent(self, endpoint: _Endpoint) -> None:
+        req = endpoint.active
+        if req is None:
+            return
+        if req.suppress:
+            self._finish(endpoint, result=None)
+        else:
+            endpoint.timer.start(int(endpoint.p2 * 1000))
+
+    def _on_message(self, endpoint: _Endpoint, message: bytes) -> None:
+        req = endpoint.active
+        if req is None or endpoint.link.channel.busy:
+            logger.debug(f"[UDSClient] Unsolicited response from 0x{endpoint.address.rx_id:X}: "
+                         f"{message[:8].hex(' ')}")
+            return
+        sid = req.payload[0]
+        if message[0] == NEGATIVE_RESPONSE:
+            if len(message) < 3 or message[1] != sid:
+                return  # Answer to someone else's request
+            if message[2] == NRC_RESPONSE_PENDING:
+                req.pending_count += 1
+                endpoint.timer.start(int(endpoint.p2_star * 1000))
+                return
+            self._finish(endpoint, exc=NegativeResponseError(sid, message[2]))
+            return
+        if message[0] != sid + 0x40:
+            return
+        echo = RESPONSE_ECHO.get(sid, 0)
+        expected = bytearray(req.payload[1:1 + echo])
+        if expected and sid in SUBFUNCTION_SERVICES:
+            expected[0] &= ~SUPPRESS_POSITIVE & 0xFF
+        if message[1:1 + echo] != expected:
+            return  # Late answer to an earlier request for another DID/sub-function
+        if sid == 0x10 and len(message) >= 6:
+            # Session response carries P2server_max (ms) and P2*server_max (10 ms)
+            endpoint.p2 = ((message[2] << 8) | message[3]) / 1000 + P2_MARGIN
+            endpoint.p2_star = ((message[4] << 8) | message[5]) / 100 + P2_MARGIN
+        self._finish(endpoint, result=UDSResponse(
+            endpoint.address, sid, req.key[2], message,
+            time.monotonic() - req.sent_at, req.pending_count))
+
+    def _on_timeout(self, endpoint: _Endpoint) -> None:
+        req = endpoint.active
+        if req is None:
+            return
+        if endpoint.link.channel.receiving:
+            # The response started (first frame) within P2; ISO-TP N_Cr guards the rest
+            endpoint.timer.start(int(endpoint.link.channel.config.n_cr * 1000))
+            return
+        self._finish(endpoint, exc=UDSTimeoutError(
+            f"No response from 0x{endpoint.address.rx_id:X} to service 0x{req.payload[0]:02X}"))
+
+    def _finish(self, endpoint: _Endpoint, result: Optional[UDSResponse] = None,
+                exc: Optional[Exception] = None) -> None:
+        """Complete the active request, then send the next queued one."""
+        req = endpoint.active
+        if req is None:
+            return
+        endpoint.active = None
+        endpoint.timer.stop()
+        self._resolve(req, result, exc)
+        self._start_next(endpoint)
+
+    def _abort_endpoint(self, endpoint: _Endpoint, exc: Exception) -> None:
+        queued = list(endpoint.queue)
+        endpoint.queue.clear()
+        for req in queued:
+            if req.future.cancel():
+                self._forget(req)
+            else:
+                self._resolve(req, exc=exc)
+        if endpoint.active is not None:
+            endpoint.link.channel.reset()
+            self._finish(endpoint, exc=exc)
+
+    def _resolve(self, req: _Request, result: Optional[UDSResponse] = None,
+                 exc: Optional[Exception] = None) -> None:
+        self._forget(req)
+        if exc is not None:
+            req.future.set_exception(exc)
+        else:
+            req.future.set_result(result)
+
+    def _forget(self, req: _Request) -> None:
+        if self._pending.get(req.key) is req:
+            del self._pending[req.key]
@@ -0,0 +1,112 @@
+# benchmarks/bench_dbc_decode.py
+
+"""
+Description:
+DBC signal decode rate of utils/dbc.py: compiled shift/mask extractors per
+frame, and DbcDatabase.decode_capture over a whole capture (NumPy columns
+when NumPy is installed, per-frame decoding otherwise). The baseline walks
+every signal bit by bit, as a straightforward DBC decoder would.
+
+The database mixes Intel and Motorola, signed and multiplexed signals.
+
+Run from the project root:
+    python benchmarks/bench_dbc_decode.py [frames]
+"""
+
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import logging
+logging.disable(logging.WARNING)
+
+from backend.frame import CANFrame
+from utils.dbc import parse_dbc
+
+DBC = '''
+BO_ 256 EngineData: 8 ECU
+ SG_ RPM : 0|16@1+ (0.25,0) [0|16383.75] "rpm" GW
+ SG_ Coolant : 16|8@1- (1,-40) [-40|215] "degC" GW
+ SG_ Torque : 31|12@0- (0.5,0) [-1024|1023.5] "Nm" GW
+ SG_ Flags : 35|3@0+ (1,0) [0|7] "" GW
+ SG_ Gear : 40|4@1+ (1,0) [0|15] "" GW
+ SG_ Odo : 55|16@0+ (0.1,0) [0|6553.5] "km" GW
+
+BO_ 512 MuxMsg: 8 ECU
+ SG_ Page M : 0|8@1+ (1,0) [0|255] "" GW
+ SG_ A m0 : 8|16@1+ (0.1,0) [0|0] "V" GW
+ SG_ B m1 : 8|16@1- (1,0) [0|0] "" GW
+ SG_ C m1 : 31|10@0+ (1,5) [0|0] "" GW
+
+BO_ 768 Wheels: 8 ABS
+ SG_ FL : 7|16@0+ (0.01,0) [0|655.35] "km/h" GW
+ SG_ FR : 23|16@0+ (0.01,0) [0|655.35] "km/h" GW
+ SG_ RL : 32|16@1+ (0.01,0) [0|655.35] "km/h" GW
+ SG_ RR : 48|16@1+ (0.01,0) [0|655.35] "km/h" GW
+'''
+
+
+def bitwise_decode(message, data):
+    """Baseline: gather each signal's bits one at a time."""
+    mux = None
+    values = {}
+    for signal in sorted(message.signals, key=lambda s: not s.is_multiplexer):
+        if signal.mux_value is not None and signal.mux_value != mux:
+            continue
+        raw = 0
+        if signal.little_endian:
+            for i in range(signal.length):
+                bit = signal.start_bit + i
+                raw |= ((data[bit // 8] >> (bit % 8)) & 1) << i
+        else:
+            bit = signal.start_bit
+            for _ in range(signal.length):
+                raw = (raw << 1) | ((data[bit // 8] >> (bit % 8)) & 1)
+                bit = bit - 1 if bit % 8 else bit + 15
+        if signal.signed and raw & (1 << (signal.length - 1)):
+            raw -= 1 << signal.length
+        if signal.is_multiplexer:
+            mux = raw
+        values[signal.name] = raw * signal.scale + signal.offset
+    return values
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    db = parse_dbc(DBC)
+    rng = random.Random(0)
+    ids = [0x100, 0x200, 0x300]
+    frames = []
+    for i in range(count):
+        arb_id = rng.choice(ids)
+        data = bytearray(rng.randrange(256) for _ in range(8))
+        if arb_id == 0x200:
+            data[0] &= 1
+        frames.append(CANFrame(arb_id, bytes(data), i * 1000))
+    for frame in frames[:1000]:
+        message = db.message(frame)
+        assert bitwise_decode(message, frame.payload) == message.decode(frame.payload)
+
+    t0 = time.perf_counter()
+    for frame in frames:
+        bitwise_decode(db.message(frame), frame.payload)
+    baseline = count / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for frame in frames:
+        db.decode(frame)
+    compiled = count / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    columns = db.decode_capture(frames)
+    bulk = count / (time.perf_counter() - t0)
+    kind = type(columns["EngineData"]["RPM"]).__name__
+    print(f"{count} frames, {sum(len(m.signals) for m in db.messages.values())} signals in {len(db)} messages")
+    print(f"  bit-by-bit baseline     {baseline / 1e3:8.0f} k frames/s")
+    print(f"  compiled per frame      {compiled / 1e3:8.0f} k frames/s  ({compiled / baseline:.1f}x)")
+    print(f"  decode_capture ({kind}) {bulk / 1e3:8.0f} k frames/s  ({bulk / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_did_cache.py
+
+"""
+Description:
+Startup cost of a large manufacturer DID sheet: the previous import-time
+load_did_config (copied below as legacy_load_did_config, json.load plus one
+closure per DID) against the compiled DID cache of utils/did_registry.py.
+
+"Cold" compiles the JSON and writes the cache (once per edit of the sheet);
+"warm" is every later start: hash the sheet, open the cache and decode the
+DIDs a session actually touches.
+
+Run from the project root:
+    python benchmarks/bench_did_cache.py [dids] [lookups]
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import logging
+logging.disable(logging.WARNING)
+
+from utils.did_registry import DidRegistry
+
+
+# Previous loader, verbatim apart from names
+def legacy_decode_ascii(data):
+    return ''.join(chr(b) if 32 <= b <= 126 else '.' for b in data)
+
+def legacy_decode_uint(data, byte_count=4):
+    if len(data) < byte_count:
+        return f"Invalid ({len(data)} bytes)"
+    value = 0
+    for b in data[:byte_count]:
+        value = (value << 8) | b
+    return str(value)
+
+LEGACY_DECODERS = {"ascii": legacy_decode_ascii, "uint": lambda d: legacy_decode_uint(d, 4)}
+
+def legacy_load_did_config(file_path):
+    with open(file_path, "r") as f:
+        raw_data = json.load(f)
+    did_lookup = {}
+    for did_hex, info in raw_data.items():
+        did = int(did_hex, 16)
+        decoder_name = info.get("decoder", "ascii")
+        if decoder_name == "uint":
+            byte_count = info.get("byte_count", 4)
+            decoder = lambda d, bc=byte_count: legacy_decode_uint(d, bc)
+        else:
+            decoder = LEGACY_DECODERS.get(decoder_name, lambda x: ' '.join(f"{b:02X}" for b in x))
+        did_lookup[did] = (info["name"], decoder)
+    return did_lookup
+
+
+def make_sheet(path: str, count: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    kinds = [("uint", 2, 0.1, "kPa"), ("int", 2, 0.1, "°C"), ("uint", 4, 1.0, "km"),
+             ("float", 4, 1.0, "V"), ("ascii", 17, 1.0, ""), ("uint", 1, 0.5, "%")]
+    sheet = {}
+    for did in rng.sample(range(0x0100, 0xFF00), count):
+        decoder, length, scale, unit = rng.choice(kinds)
+        sheet[f"0x{did:04X}"] = {"name": f"Measurement {did:04X}", "decoder": decoder,
+                                 "byte_count": length, "scale": scale, "unit": unit}
+    with open(path, "w") as f:
+        json.dump(sheet, f, indent=2)
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    work = tempfile.mkdtemp()
+    try:
+        sheet = os.path.join(work, "oem.json")
+        cache = os.path.join(work, "cache")
+        make_sheet(sheet, count)
+        dids = [int(k, 16) for k in json.load(open(sheet))][:lookups]
+
+        def start():
+            registry = DidRegistry.from_file(sheet, cache_dir=cache)
+            for did in dids:
+                registry.decode(did, b"\x01\x02\x03\x04")
+
+        legacy = timed(lambda: legacy_load_did_config(sheet))
+        lazy = timed(lambda: DidRegistry.from_file(sheet, cache_dir=cache))
+        cold = timed(start)
+        warm = min(timed(start) for _ in range(5))
+        size = os.path.getsize(sheet) / 1e6
+        print(f"{count} DIDs ({size:.1f} MB JSON), {lookups} DIDs decoded per session")
+        print(f"  legacy load_did_config   {legacy * 1e3:8.1f} ms")
+        print(f"  registry import          {lazy * 1e3:8.1f} ms  (nothing read until first lookup)")
+        print(f"  cold: compile + cache    {cold * 1e3:8.1f} ms  (once per sheet edit)")
+        print(f"  warm: cached start       {warm * 1e3:8.1f} ms  ({legacy / warm:.0f}x)")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
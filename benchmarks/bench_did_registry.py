@@ -0,0 +1,73 @@
+# benchmarks/bench_did_registry.py
+
+"""
+Description:
+Live-value decode rate of the typed DID registry against the previous
+closure-based lookup (copied below as legacy_decode), which folded bytes into
+an int in Python, returned text and left the caller to float() it, ignoring
+scale (and falling back to hex for int / float DIDs).
+
+Three paths over the same 2-byte scaled DID: the legacy closure, one
+DidSpec.value call per sample, and DidSpec.column over all samples at once
+(what PeriodicStream does per batch of periodic frames).
+
+Run from the project root:
+    python benchmarks/bench_did_registry.py [samples]
+"""
+
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import logging
+logging.disable(logging.WARNING)
+
+from utils.did_registry import DID_REGISTRY
+
+DID = 0xF1E0   # Tire Pressure Front Left: uint, 2 bytes, scale 0.1
+
+
+# Previous decoder, verbatim apart from names
+def legacy_decode_uint(data, byte_count=4):
+    if len(data) < byte_count:
+        return f"Invalid ({len(data)} bytes)"
+    value = 0
+    for b in data[:byte_count]:
+        value = (value << 8) | b
+    return str(value)
+
+LEGACY_LOOKUP = {DID: ("Tire Pressure Front Left", lambda d, bc=2: legacy_decode_uint(d, bc))}
+
+def legacy_decode(did, data):
+    info = LEGACY_LOOKUP.get(did)
+    return info[0], info[1](data)
+
+
+def rate(fn, payloads, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(payloads)
+        best = min(best, time.perf_counter() - t0)
+    return len(payloads) / best
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    payloads = [rng.randrange(2000, 3000).to_bytes(2, "big") for _ in range(count)]
+    spec = DID_REGISTRY.get(DID)
+    legacy = rate(lambda ps: [float(legacy_decode(DID, list(p))[1]) for p in ps], payloads)
+    single = rate(lambda ps: [spec.value(p) for p in ps], payloads)
+    column = rate(spec.column, payloads)
+    print(f"{count} samples of DID 0x{DID:04X}")
+    print(f"  legacy closure      {legacy / 1e3:8.0f} k values/s")
+    print(f"  DidSpec.value       {single / 1e3:8.0f} k values/s  ({single / legacy:.1f}x)")
+    print(f"  DidSpec.column      {column / 1e3:8.0f} k values/s  ({column / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
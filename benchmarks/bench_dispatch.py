@@ -0,0 +1,76 @@
+# benchmarks/bench_dispatch.py
+
+"""
+Description:
+Per-frame cost of FrameDispatcher as the number of per-ID subscribers grows.
+
+Feeds batches of 256 frames drawn from 1000 IDs to a dispatcher holding N
+subscribers (each on one ID) and compares with the old pattern, where every
+consumer scans every frame of every batch.
+
+Run from the project root:
+    python benchmarks/bench_dispatch.py
+"""
+
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.dispatcher import FrameDispatcher
+from backend.frame import CANFrame
+
+BATCHES = 200
+BATCH_SIZE = 256
+
+
+def make_batches(seed: int = 0):
+    rng = random.Random(seed)
+    return [[CANFrame(0x100 + rng.randrange(1000), bytes([0x62, 0xF1, 0x90]))
+             for _ in range(BATCH_SIZE)] for _ in range(BATCHES)]
+
+
+def bench_dispatcher(batches, subscribers: int) -> float:
+    dispatcher = FrameDispatcher()
+    hits = [0]
+
+    def on_frame(frame):
+        hits[0] += 1
+
+    for i in range(subscribers):
+        dispatcher.subscribe(on_frame, ids=[0x100 + i], sids=[0x62])
+    t0 = time.perf_counter()
+    for batch in batches:
+        dispatcher.dispatch(batch)
+    return (time.perf_counter() - t0) / (BATCHES * BATCH_SIZE) * 1e9
+
+
+def bench_scan(batches, subscribers: int) -> float:
+    hits = [0]
+
+    def make_consumer(rx_id):
+        def on_frames(frames):
+            for frame in frames:
+                if frame.arb_id == rx_id and frame.payload and frame.payload[0] == 0x62:
+                    hits[0] += 1
+        return on_frames
+
+    consumers = [make_consumer(0x100 + i) for i in range(subscribers)]
+    t0 = time.perf_counter()
+    for batch in batches:
+        for consumer in consumers:
+            consumer(batch)
+    return (time.perf_counter() - t0) / (BATCHES * BATCH_SIZE) * 1e9
+
+
+def main() -> None:
+    batches = make_batches()
+    print(f"{'subscribers':>11}  {'dispatcher':>12}  {'scan all':>12}")
+    for n in (1, 4, 16, 64, 256):
+        print(f"{n:>11}  {bench_dispatcher(batches, n):9.0f} ns  {bench_scan(batches, n):9.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_frames.py
+
+"""
+Description:
+Measures memory per frame and parse cost for the CAN ingest path.
+
+Run from the project root:
+    python benchmarks/bench_frames.py [frame_count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.can_interface import CANInterface
+from backend.multi_interface import SLCANProtocol
+
+
+def _csv_lines(count: int):
+    return [f"12:00:00.{i % 1000:03d},7E8,0{i % 10}62F190{i % 256:02X}AA55,RX" for i in range(count)]
+
+
+def _slcan_lines(count: int):
+    return [f"t7E88{i % 10:02X}62F190{i % 256:02X}AA5500" for i in range(count)]
+
+
+def measure_parse(label: str, parse, lines) -> None:
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    elapsed = time.perf_counter() - start
+    per_frame_us = elapsed / len(lines) * 1e6
+    print(f"{label:<28} {per_frame_us:8.2f} us/frame  {len(lines) / elapsed:12,.0f} frames/s")
+
+
+def measure_chunks(label: str, parse, lines, chunk: int = 256) -> None:
+    blocks = [('\r'.join(lines[i:i + chunk])).encode() for i in range(0, len(lines), chunk)]
+    start = time.perf_counter()
+    for block in blocks:
+        parse(block)
+    elapsed = time.perf_counter() - start
+    per_frame_us = elapsed / len(lines) * 1e6
+    print(f"{label:<28} {per_frame_us:8.2f} us/frame  {len(lines) / elapsed:12,.0f} frames/s")
+
+
+def measure_memory(label: str, parse, lines) -> None:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    frames = [parse(line) for line in lines]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    # Exclude the list holding the frames
+    allocated -= sys.getsizeof(frames)
+    print(f"{label:<28} {allocated / len(frames):8.1f} bytes/frame")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    iface = CANInterface(simulate=True)
+    csv_lines = _csv_lines(count)
+    slcan_lines = _slcan_lines(count)
+
+    print(f"== Parse cost ({count:,} frames) ==")
+    measure_parse("CANInterface CSV parser", iface._default_frame_parser, csv_lines)
+    measure_parse("SLCAN parse_frame", SLCANProtocol.parse_frame, slcan_lines)
+    measure_chunks("SLCAN parse_frames (x256)", SLCANProtocol.parse_frames, slcan_lines)
+
+    print(f"== Memory per retained frame ({count:,} frames) ==")
+    measure_memory("CANInterface CSV parser", iface._default_frame_parser, csv_lines)
+    measure_memory("SLCAN parse_frame", SLCANProtocol.parse_frame, slcan_lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_isotp.py
+
+"""
+Description:
+ISO-TP segmentation/reassembly throughput against the CAN bus frame rate.
+
+Two IsoTpChannels are wired back to back (tester <-> ECU) and exchange large
+messages with BS=0 and STmin=0, the fastest a real ECU allows. Frames/s is
+compared with a fully loaded bus: ~4000 8-byte frames/s at 500 kbps, ~8000 at
+1 Mbps. Every message is checked byte for byte, for each addressing mode.
+
+Run from the project root:
+    python benchmarks/bench_isotp.py [messages] [size]
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import logging
+logging.disable(logging.WARNING)
+
+from backend.frame import CANFrame, FLAG_TX
+from backend.isotp import IsoTpAddress, IsoTpChannel, IsoTpConfig
+
+
+def mirror(address: IsoTpAddress) -> IsoTpAddress:
+    """The ECU side of a tester address."""
+    return IsoTpAddress(address.rx_id, address.tx_id, address.extended_ids, address.mode,
+                        address.rx_prefix, address.tx_prefix)
+
+
+def run(label: str, address: IsoTpAddress, messages: int, size: int) -> None:
+    wire = deque()
+    received = []
+    config = IsoTpConfig(max_message=max(size, 4095))
+    tester = IsoTpChannel(address, wire.append, config)
+    ecu = IsoTpChannel(mirror(address), wire.append, config,
+                       on_message=lambda view: received.append(bytes(view)))
+    payloads = [bytes((i + j) & 0xFF for j in range(size)) for i in range(4)]
+    frames = 0
+    t0 = time.perf_counter()
+    for i in range(messages):
+        tester.send(payloads[i % 4])
+        while wire:
+            frame = wire.popleft()
+            # Echo the frame as received (TX flag cleared), like the other node would see it
+            rx = CANFrame(frame.arb_id, frame.payload, frame.ts_ns, frame.flags & ~FLAG_TX)
+            tester.on_frame(rx)
+            ecu.on_frame(rx)
+            frames += 1
+    elapsed = time.perf_counter() - t0
+    ok = len(received) == messages and all(r == payloads[i % 4] for i, r in enumerate(received))
+    print(f"{label:<26} {frames / elapsed:10,.0f} frames/s  {messages * size / elapsed / 1e6:6.2f} MB/s  "
+          f"{'OK' if ok else 'MISMATCH'}")
+
+
+def main() -> None:
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 4095
+    print(f"{messages} messages of {size} bytes (bus at 1 Mbps: ~8,000 frames/s)")
+    run("normal 11-bit", IsoTpAddress.normal(0x7E0, 0x7E8), messages, size)
+    run("extended addressing", IsoTpAddress.extended(0x6F1, 0x612, target=0x12, source=0xF1),
+        messages, size)
+    run("normal fixed 29-bit", IsoTpAddress.normal_fixed(0x10, 0xF1), messages, size)
+    run("32-bit FF (64 KiB)", IsoTpAddress.normal(0x7E0, 0x7E8), max(1, messages // 16), 65536)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_read_loop.py
+
+"""
+Description:
+Throughput benchmark for MultiProtocolInterface._read_loop.
+
+A pseudo-terminal stands in for the USB-serial adapter. A writer thread feeds
+SLCAN records into the master side, paced to the byte rate of the chosen serial
+baud (10 bits per byte), while the interface reads the slave side. A final
+unpaced run writes as fast as the reader drains, which measures the loop's
+ceiling. Reports frames/s delivered, frames missing, and process CPU while
+busy and while idle. POSIX only.
+
+Run from the project root:
+    python benchmarks/bench_read_loop.py [seconds]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import logging
+logging.disable(logging.INFO)
+
+from backend.multi_interface import MultiProtocolInterface, InterfaceType
+
+BAUDS = (1_000_000, 2_000_000, 3_000_000)
+
+
+def _records(count: int) -> bytes:
+    return b''.join(b't7E88%02X62F190%02X0000AA\r' % (i % 256, (i * 7) % 256) for i in range(count))
+
+
+def _writer(fd: int, payload: bytes, baud: int, stop: threading.Event) -> None:
+    if not baud:
+        os.set_blocking(fd, True)
+        view = memoryview(payload)
+        sent = 0
+        while sent < len(payload) and not stop.is_set():
+            sent += os.write(fd, view[sent:sent + 65536])
+        return
+    bytes_per_sec = baud / 10
+    chunk = max(1, int(bytes_per_sec / 1000))  # ~1 ms of line time per write
+    start = time.perf_counter()
+    sent = 0
+    view = memoryview(payload)
+    while sent < len(payload) and not stop.is_set():
+        due = start + sent / bytes_per_sec
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent += os.write(fd, view[sent:sent + chunk])
+
+
+def run(baud: int, seconds: float) -> None:
+    master, slave = os.openpty()
+    iface = MultiProtocolInterface()
+    if not iface.connect(os.ttyname(slave), InterfaceType.SLCAN, serial_baud=baud or 3_000_000):
+        print(f"{_label(baud)}: could not open pty")
+        return
+    reader = iface.ring.reader()
+
+    record_len = len(_records(1))
+    count = int((baud or 10_000_000) / 10 * seconds / record_len)
+    payload = _records(count)
+
+    # Swallow the SLCAN init commands echoed back on the master side
+    os.set_blocking(master, False)
+    try:
+        os.read(master, 4096)
+    except BlockingIOError:
+        pass
+
+    stop = threading.Event()
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    writer = threading.Thread(target=_writer, args=(master, payload, baud, stop), daemon=True)
+    writer.start()
+    while writer.is_alive():
+        reader.read()
+        time.sleep(0.005)
+    deadline = time.perf_counter() + 5.0
+    while reader.available() + reader.frames_read < count and time.perf_counter() < deadline:
+        reader.read()
+        time.sleep(0.005)
+    reader.read()
+    elapsed = time.perf_counter() - t0
+    busy_cpu = (time.process_time() - cpu0) / elapsed * 100
+
+    cpu1, t1 = time.process_time(), time.perf_counter()
+    time.sleep(1.0)
+    idle_cpu = (time.process_time() - cpu1) / (time.perf_counter() - t1) * 100
+
+    iface.disconnect()
+    os.close(master)
+    os.close(slave)
+    received = reader.frames_read
+    print(f"{_label(baud)}: {received / elapsed:10,.0f} frames/s  "
+          f"missing {count - received:6,}/{count:,}  busy CPU {busy_cpu:5.1f}%  idle CPU {idle_cpu:5.1f}%")
+
+
+def _label(baud: int) -> str:
+    return f"{baud:>9,} baud" if baud else "  unpaced     "
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    for baud in BAUDS + (0,):
+        run(baud, seconds)
+
+
+if __name__ == "__main__":
+    main()
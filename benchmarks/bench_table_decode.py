@@ -0,0 +1,86 @@
+# benchmarks/bench_table_decode.py
+
+"""
+Description:
+Repaint cost of the CAN monitor table's text columns (Data Bytes, UDS Decode).
+
+The previous CANTableModel.data() (copied below as LegacyTableModel) joined
+hex per byte and ran decode_uds on every DisplayRole call, so each repaint
+re-decoded every visible row. Now the interface's frame annotator computes
+both once per frame on the reader thread and data() only reads the cache.
+The annotation pass is timed separately, as it moves off the GUI thread.
+
+Run from the project root:
+    python benchmarks/bench_table_decode.py [rows] [repaints]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import logging
+logging.disable(logging.WARNING)
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication
+
+from gui.tabs.can_monitor_tab import CANTableModel
+from utils.uds_decoder import annotate_frames, decode_uds
+from bench_uds_decode import make_frames
+
+
+class LegacyTableModel(CANTableModel):
+    """Previous text columns, verbatim apart from the other roles."""
+    def data(self, index, role=Qt.DisplayRole):
+        frame, frequency, color = self.frames[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            if col == 4:
+                return decode_uds(frame) or ""
+            if col == 2:
+                return ' '.join(f'{b:02X}' for b in frame.data)
+            return [frame.timestamp, frame.can_id, frame.data, frame.direction.value, ""][col]
+        return None
+
+
+def repaint_rate(model, repaints: int) -> float:
+    """Visible-cell text fetches per second over ``repaints`` full repaints."""
+    cells = [model.index(row, col) for row in range(model.rowCount()) for col in (2, 4)]
+    data = model.data
+    t0 = time.perf_counter()
+    for _ in range(repaints):
+        for index in cells:
+            data(index, Qt.DisplayRole)
+    return len(cells) * repaints / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repaints = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    app = QApplication.instance() or QApplication(sys.argv)
+    color = QColor("#1a1a3a")
+
+    legacy = LegacyTableModel(max_rows=rows)
+    legacy.frames = [(f, 0.0, color) for f in make_frames(rows)]
+
+    frames = make_frames(rows)
+    t0 = time.perf_counter()
+    annotate_frames(frames)
+    annotate = rows / (time.perf_counter() - t0)
+    cached = CANTableModel(max_rows=rows)
+    cached.frames = [(f, 0.0, color) for f in frames]
+
+    old = repaint_rate(legacy, repaints)
+    new = repaint_rate(cached, repaints)
+    print(f"{rows} rows x {repaints} repaints (Data Bytes + UDS Decode)")
+    print(f"  legacy data()       {old / 1e3:8.0f} k cells/s")
+    print(f"  cached data()       {new / 1e3:8.0f} k cells/s  ({new / old:.1f}x)")
+    print(f"  annotate_frames     {annotate / 1e3:8.0f} k frames/s  (reader thread, once per frame)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_uds_decode.py
+
+"""
+Description:
+UDS decode rate of the table-driven decode_uds / decode_many against the
+previous implementation (copied below as legacy_decode_uds), which rebuilt
+the NRC dict and an unknown-DID lambda per call and joined hex per byte.
+
+The capture mixes requests, positive and negative responses, known and
+unknown DIDs and non-UDS frames, as a diagnostic session on the bus would.
+
+Run from the project root:
+    python benchmarks/bench_uds_decode.py [frames]
+"""
+
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import logging
+logging.disable(logging.WARNING)
+
+from backend.frame import CANFrame
+from utils.did_registry import DID_REGISTRY
+from utils.uds_decoder import decode_many, decode_uds
+
+DID_LOOKUP = {spec.did: (spec.name, spec.text) for spec in DID_REGISTRY}   # Previous registry shape
+
+
+# Previous decoder, verbatim apart from names
+def _legacy_decode_did(data, start_idx=1, include_payload=False):
+    if len(data) < start_idx + 2:
+        return "Invalid DID"
+    did = (data[start_idx] << 8) | data[start_idx + 1]
+    did_info = DID_LOOKUP.get(did, (f"0x{did:04X}", lambda x: ' '.join(f"{b:02X}" for b in x)))
+    did_str = did_info[0]
+    if include_payload and len(data) > start_idx + 2:
+        payload = did_info[1](data[start_idx + 2:])
+        return f"DID: {did_str}, Data: {payload}"
+    return f"DID: {did_str}"
+
+LEGACY_SERVICES = {
+    0x10: ("DiagnosticSessionControl", lambda f: f"Session: {f.data[1]:02X}" if len(f.data) > 1 else ""),
+    0x11: ("ECUReset", lambda f: f"Reset Type: {f.data[1]:02X}" if len(f.data) > 1 else ""),
+    0x14: ("ClearDiagnosticInformation", lambda f: f"DTC: {(f.data[1] << 16) | (f.data[2] << 8) | f.data[3]:06X}" if len(f.data) >= 4 else ""),
+    0x19: ("ReadDTCInformation", lambda f: f"Sub-Function: {f.data[1]:02X}" if len(f.data) > 1 else ""),
+    0x22: ("ReadDataByIdentifier", lambda f: _legacy_decode_did(f.data) if len(f.data) >= 3 else ""),
+    0x27: ("SecurityAccess", lambda f: f"Level: {f.data[1]:02X}" if len(f.data) > 1 else ""),
+    0x2E: ("WriteDataByIdentifier", lambda f: _legacy_decode_did(f.data, include_payload=True) if len(f.data) >= 4 else ""),
+    0x31: ("RoutineControl", lambda f: f"Type: {f.data[1]:02X}, Routine: {(f.data[2] << 8) | f.data[3]:04X}" if len(f.data) >= 4 else ""),
+    0x36: ("TransferData", lambda f: f"Block: {f.data[1]:02X}, Data: {' '.join(f'{b:02X}' for b in f.data[2:])}" if len(f.data) >= 3 else ""),
+    0x3E: ("TesterPresent", lambda f: "TesterPresent"),
+}
+
+def legacy_decode_uds(frame):
+    if not frame.data or len(frame.data) < 1:
+        return None
+    sid = frame.data[0]
+    is_response = sid >= 0x40
+    if is_response:
+        request_sid = sid - 0x40
+        if request_sid in LEGACY_SERVICES:
+            name, _ = LEGACY_SERVICES[request_sid]
+            if request_sid == 0x22 and len(frame.data) >= 3:
+                did = (frame.data[1] << 8) | frame.data[2]
+                did_info = DID_LOOKUP.get(did, (f"0x{did:04X}", lambda x: ' '.join(f"{b:02X}" for b in x)))
+                payload = did_info[1](frame.data[3:]) if len(frame.data) > 3 else "No Data"
+                return f"{name} Response → DID: {did_info[0]}, {payload}"
+            if len(frame.data) > 1:
+                return f"{name} Response → Data: {' '.join(f'{b:02X}' for b in frame.data[1:])}"
+            return f"{name} Response"
+    if sid == 0x7F and len(frame.data) >= 3:
+        request_sid = frame.data[1]
+        nrc = frame.data[2]
+        nrc_desc = {
+            0x10: "General Reject",
+            0x11: "Service Not Supported",
+            0x12: "Sub-Function Not Supported",
+            0x22: "Conditions Not Correct",
+            0x31: "Request Out Of Range",
+        }.get(nrc, f"Unknown NRC: {nrc:02X}")
+        return f"Negative Response → SID: {request_sid:02X}, {nrc_desc}"
+    if sid in LEGACY_SERVICES:
+        name, decode_func = LEGACY_SERVICES[sid]
+        details = decode_func(frame)
+        return f"{name}{f' → {details}' if details else ''}"
+    return None
+
+
+MESSAGES = [
+    "22F190", "62F190575657", "22F1A0", "62F1A0000102", "221234", "6212340102030405",
+    "7F2231", "7F2778", "7F3133", "1003", "5003003201F4", "3E00", "7E00",
+    "2701", "6701AABBCCDD", "3101FF00", "7101FF0001", "1902FF", "5902FF0171002F",
+    "2EF1A001020304", "6EF1A0", "360112345678", "14FFFFFF", "54",
+]
+
+
+def make_frames(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            data = bytes(rng.randrange(256) for _ in range(8))   # Non-diagnostic traffic
+        else:
+            data = bytes.fromhex(rng.choice(MESSAGES))
+        frames.append(CANFrame(0x7E8, data))
+    return frames
+
+
+def rate(fn, frames, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(frames)
+        best = min(best, time.perf_counter() - t0)
+    return len(frames) / best
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    frames = make_frames(count)
+    legacy = rate(lambda fs: [legacy_decode_uds(f) for f in fs], frames)
+    single = rate(lambda fs: [decode_uds(f) for f in fs], frames)
+    batch = rate(decode_many, frames)
+    print(f"{count} frames")
+    print(f"  legacy decode_uds   {legacy / 1e3:8.0f} k decodes/s")
+    print(f"  decode_uds          {single / 1e3:8.0f} k decodes/s  ({single / legacy:.1f}x)")
+    print(f"  decode_many         {batch / 1e3:8.0f} k decodes/s  ({batch / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,8 +31,13 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QSortFilterProxyModel, QAbstractTableModel, QModelIndex, pyqtSignal, QTimer, QObject
 from PyQt5.QtGui import QKeySequence, QColor, QBrush, QFont, QValidator
 
-from backend.can_interface import CANInterface, CANFrame, Direction
-from utils.uds_decoder import decode_uds, DID_LOOKUP, load_did_config
+from backend.can_interface import CANFrame, Direction, TxReplayPolicy
+from backend.bus_hub import BusHub
+from backend.ring_buffer import RingReader
+from backend.bus_stats import BusStatistics
+from utils.dbc import DbcDatabase, load_dbc
+from utils.did_registry import DID_REGISTRY
+from utils.uds_decoder import annotate_frames, frame_text
 from utils.hex_validator import HexValidator, HexBytesValidator
 
 
@@ -53,12 +58,14 @@ class HexDelegate(QStyledItemDelegate):
 
 class CANTableModel(QAbstractTableModel):
     """Data model for storing and formatting CAN frames."""
-    _headers = ["Timestamp", "CAN ID", "Data Bytes", "Direction", "UDS Decode"]
+    _headers = ["Timestamp", "CAN ID", "Data Bytes", "Direction", "UDS Decode", "Signals"]
     
-    def __init__(self, max_rows=1000):
+    def __init__(self, max_rows=1000, bus_stats: Optional[BusStatistics] = None):
         super().__init__()
         self.frames: List[Tuple[CANFrame, float, QColor]] = []
         self.max_rows = max_rows
+        self.bus_stats = bus_stats
+        self.dbc: Optional[DbcDatabase] = None  # Signals column; empty without a DBC
 
     def rowCount(self, parent=QModelIndex()) -> int:
         return len(self.frames)
@@ -72,13 +79,16 @@ class CANTableModel(QAbstractTableModel):
         frame, frequency, color = self.frames[index.row()]
         col = index.column()
         if role == Qt.DisplayRole:
-            if col == 4:
-                return decode_uds(frame) or ""
-            if col == 2:  # Data Bytes - format nicely
-                return ' '.join(f'{b:02X}' for b in frame.data)
+            if col == 2 or col == 4:  # Hex and UDS text are computed once per frame
+                return frame_text(frame)[col // 2 - 1]
+            if col == 5:
+                return self.dbc.text(frame) if self.dbc is not None else ""
             return [frame.timestamp, frame.can_id, frame.data, frame.direction.value, ""][col]
         if role == Qt.UserRole:
             return frame
+        if role == Qt.ToolTipRole and col == 1 and self.bus_stats is not None:
+            stats = self.bus_stats.get(frame)
+            return stats.summary() if stats else None
         if role == Qt.BackgroundRole:
             if frequency > CANMonitorTab.NOISY_THRESHOLD:
                 return QBrush(QColor("#3a2a00"))  # Dark orange for noisy
@@ -127,8 +137,7 @@ class CANFilterProxyModel(QSortFilterProxyModel):
         if self.dir_filter and frame.direction != self.dir_filter:
             return False
         if self.search_text:
-            data_str = ' '.join(f"{b:02X}" for b in frame.data)
-            return self.search_text.lower() in data_str.lower()
+            return self.search_text.lower() in frame_text(frame)[0].lower()
         return True
 
     def set_id_filter(self, text: str) -> None:
@@ -152,7 +161,7 @@ class CANFilterProxyModel(QSortFilterProxyModel):
 # 4) Dialog Classes
 # ----------------------------------------------------------------------------------
 class SettingsDialog(QDialog):
-    def __init__(self, can_interface: CANInterface, parent=None):
+    def __init__(self, can_interface: BusHub, parent=None):
         super().__init__(parent)
         self.can_interface = can_interface
         self.setWindowTitle("CAN Interface Settings")
@@ -162,16 +171,21 @@ class SettingsDialog(QDialog):
         layout = QFormLayout()
         self.reconnect_spin = QSpinBox()
         self.reconnect_spin.setRange(1, 20)
-        self.reconnect_spin.setValue(self.can_interface._reconnect_attempts)
+        self.reconnect_spin.setValue(self.can_interface.reconnect_attempts)
         self.sim_interval_spin = QDoubleSpinBox()
         self.sim_interval_spin.setRange(0.01, 10.0)
         self.sim_interval_spin.setSingleStep(0.1)
         self.sim_interval_spin.setValue(self.can_interface.sim_interval)
         self.auto_reconnect_check = QCheckBox("Auto-Reconnect on Disconnect")
-        self.auto_reconnect_check.setChecked(getattr(self.can_interface, 'auto_reconnect', False))
+        self.auto_reconnect_check.setChecked(self.can_interface.auto_reconnect)
+        self.tx_policy_combo = QComboBox()
+        for policy in TxReplayPolicy:
+            self.tx_policy_combo.addItem(policy.value, policy)
+        self.tx_policy_combo.setCurrentIndex(self.tx_policy_combo.findData(self.can_interface.tx_replay_policy))
         layout.addRow("Reconnect Attempts:", self.reconnect_spin)
         layout.addRow("Simulation Interval (s):", self.sim_interval_spin)
         layout.addRow("", self.auto_reconnect_check)
+        layout.addRow("TX While Reconnecting:", self.tx_policy_combo)
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(self.accept)
         buttons.rejected.connect(self.reject)
@@ -182,6 +196,7 @@ class SettingsDialog(QDialog):
         self.can_interface.set_reconnect_attempts(self.reconnect_spin.value())
         self.can_interface.sim_interval = self.sim_interval_spin.value()
         self.can_interface.auto_reconnect = self.auto_reconnect_check.isChecked()
+        self.can_interface.tx_replay_policy = self.tx_policy_combo.currentData()
         super().accept()
 
 class ExportDialog(QDialog):
@@ -272,6 +287,7 @@ class CANMonitorTab(QWidget):
     connection_reconnect_success = pyqtSignal(str)
     status_updated = pyqtSignal(str, str)
     log_message_received = pyqtSignal(str)
+    did_set_loaded = pyqtSignal()  # Emitted from the DID preload thread
 
     NOISY_THRESHOLD = 10
     # Dark row colors with good text contrast - cyberpunk theme
@@ -284,15 +300,15 @@ class CANMonitorTab(QWidget):
         QColor("#3a1a2a"),  # Dark magenta
     ]
 
-    def __init__(self):
+    def __init__(self, can_interface: Optional[BusHub] = None):
         super().__init__()
-        # Create interface but DON'T start simulation automatically
-        self.can_interface = CANInterface(simulate=True, reconnect_attempts=3, sim_interval=2.0)
-        self.can_interface.auto_reconnect = False
+        # Shared bus hub from the main window; DON'T start simulation automatically
+        self.can_interface = can_interface or BusHub()
         self.paused = True  # Start paused
-        self.frame_buffer: List[Tuple[CANFrame, float, QColor]] = []
-        self.frame_times: List[float] = []
-        self.id_timestamps: Dict[str, List[float]] = defaultdict(list)
+        self._ring_reader: Optional[RingReader] = None
+        self._frames_lost = 0
+        self._last_frames_read = 0
+        self.bus_stats = self.can_interface.stats  # Per-ID period/jitter for noisy-ID coloring
         self.id_colors: Dict[str, QColor] = {}
         self.unique_ids: Set[str] = set()
         self.rx_count = 0
@@ -309,10 +325,10 @@ class CANMonitorTab(QWidget):
         self.status_indicator: QLabel = None
         self.frame_count_label: QLabel = None
 
-        # Slower update timer
+        # Display samples the interface ring buffer at its own pace
         self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self._flush_frame_buffer)
-        self.update_timer.start(500)
+        self.update_timer.timeout.connect(self._drain_ring)
+        self.update_timer.start(100)
 
         self.stats_timer = QTimer(self)
         self.stats_timer.timeout.connect(self._update_stats)
@@ -526,7 +542,7 @@ class CANMonitorTab(QWidget):
 
     def _init_main_ui(self):
         splitter = QSplitter(Qt.Vertical)
-        self.table_model = CANTableModel()
+        self.table_model = CANTableModel(bus_stats=self.bus_stats)
         self.proxy_model = CANFilterProxyModel()
         self.proxy_model.setSourceModel(self.table_model)
         self.table_view = QTableView()
@@ -575,6 +591,7 @@ class CANMonitorTab(QWidget):
             (self.pause_btn, self.toggle_pause, "Pause/resume frame updates (Ctrl+P)"),
             (self.settings_btn, self._open_settings_dialog, "Configure CAN interface"),
             (self.load_did_btn, self._load_did_config, "Load DID configuration file"),
+            ("[Load DBC]", self._load_dbc, "Load a DBC file to decode frames into signals"),
             ("[Clear]", self.clear_table, "Clear all frames"),
             ("🔁 Replay", self.replay_frame, "Replay selected frame"),
             ("[Export]", self.export_table_to_csv, "Export table to CSV (Ctrl+S)"),
@@ -585,6 +602,13 @@ class CANMonitorTab(QWidget):
             btn.clicked.connect(handler)
             btn.setToolTip(tooltip)
             layout.addWidget(btn)
+        self.did_set_combo = QComboBox()
+        self.did_set_combo.addItem("Generic DIDs", "")
+        for manufacturer in DID_REGISTRY.manufacturers():  # Partitions load on first lookup
+            self.did_set_combo.addItem(manufacturer, manufacturer)
+        self.did_set_combo.setToolTip("Manufacturer DID set used for UDS decoding")
+        self.did_set_combo.currentIndexChanged.connect(self._select_did_set)
+        layout.addWidget(self.did_set_combo)
         self.layout.addLayout(layout)
 
     def _init_stats_ui(self):
@@ -609,7 +633,8 @@ class CANMonitorTab(QWidget):
         self.layout.addWidget(self.status_bar)
 
     def _connect_signals(self):
-        self.can_interface.frame_received.connect(self.handle_frame)
+        self.can_interface.frame_annotator = annotate_frames  # Decode on the reader thread
+        self._attach_ring_reader()
         self.can_interface.connection_lost.connect(self.handle_connection_lost)
         self.can_interface.connection_changed.connect(self._handle_connection_changed)
         self.filter_id.textChanged.connect(self.proxy_model.set_id_filter)
@@ -620,45 +645,56 @@ class CANMonitorTab(QWidget):
         self.send_btn.clicked.connect(self.send_frame)
         self.template_btn.clicked.connect(self._open_template_dialog)
         self.status_updated.connect(self._handle_status_update)
+        self.did_set_loaded.connect(lambda: self._refresh_column(4))
+        DID_REGISTRY.preload(self.did_set_loaded.emit)  # Compile off the reader thread before traffic arrives
+
+    def _attach_ring_reader(self) -> None:
+        """Start consuming the current interface's ring buffer from its head."""
+        if self._ring_reader is not None:
+            self._frames_lost += self._ring_reader.frames_lost
+        self._ring_reader = self.can_interface.ring.reader()
+        self._last_frames_read = 0
+
+    def _drain_ring(self) -> None:
+        """Pull everything received since the last tick from the ring buffer."""
+        if self._ring_reader is None:
+            return
+        if self.paused:
+            self._ring_reader.skip()
+            return
+        frames = self._ring_reader.read()
+        if frames:
+            self.handle_frames(frames)
 
     def handle_frame(self, frame: CANFrame) -> None:
-        if not self.paused:
-            # Strict buffer limit to prevent UI freeze
-            if len(self.frame_buffer) > 20:
-                return  # Skip frames if buffer is getting full
-            
-            current_time = time.time()
-            self.id_timestamps[frame.can_id].append(current_time)
-            self.id_timestamps[frame.can_id] = [t for t in self.id_timestamps[frame.can_id] if current_time - t < 1.0]
-            frequency = len(self.id_timestamps[frame.can_id])
-            if frame.can_id not in self.id_colors:
-                self.id_colors[frame.can_id] = self.COLORS[len(self.id_colors) % len(self.COLORS)]
-            color = self.id_colors[frame.can_id]
-            self.frame_buffer.append((frame, frequency, color))
-            self.unique_ids.add(frame.can_id)
+        self.handle_frames([frame])
+
+    def handle_frames(self, frames: List[CANFrame]) -> None:
+        """Update statistics for a batch of frames and show the newest ones."""
+        rows = []
+        for frame in frames:
+            can_id = frame.can_id
+            stats = self.bus_stats.get(frame)  # Kept by the hub; None until its batch arrives
+            if can_id not in self.id_colors:
+                self.id_colors[can_id] = self.COLORS[len(self.id_colors) % len(self.COLORS)]
+            rows.append((frame, stats.frequency if stats else 0.0, self.id_colors[can_id]))
+            self.unique_ids.add(can_id)
             if frame.direction == Direction.RX:
                 self.rx_count += 1
             else:
                 self.tx_count += 1
             self.data_length_counts[len(frame.data)] += 1
-
-    def _flush_frame_buffer(self) -> None:
-        if self.frame_buffer:
-            # Only add up to 10 frames at a time to keep UI responsive
-            frames_to_add = self.frame_buffer[:10]
-            self.table_model.add_frames(frames_to_add)
-            self.frame_buffer = self.frame_buffer[10:]
+        # Only the newest max_rows frames can remain visible; newest on top
+        rows = rows[-self.table_model.max_rows:]
+        rows.reverse()
+        self.table_model.add_frames(rows)
 
     def handle_connection_lost(self, message: str) -> None:
         self.status_updated.emit(f"[!] {message}", "error")
         self.connect_btn.setText("🔌 Connect")
         self.status_indicator.setStyleSheet("background-color: red; border-radius: 10px;")
         if self.can_interface.auto_reconnect:
-            self.connect_serial()
-        else:
-            self.can_interface = CANInterface(simulate=True)
-            self._connect_signals()
-            self.can_interface.start()
+            self.status_updated.emit(f"[!] {message} - retrying", "warning")  # The hub reconnects
 
     def _handle_connection_changed(self, connected: bool) -> None:
         if connected:
@@ -697,12 +733,7 @@ class CANMonitorTab(QWidget):
                 raise ValueError("Data must be 1-8 bytes")
         except ValueError as e:
             raise ValueError(f"Invalid hex data: {str(e)}")
-        return CANFrame(
-            timestamp=datetime.now().strftime("%H:%M:%S.%f")[:-3],
-            can_id=can_id,
-            data=data,
-            direction=direction
-        )
+        return CANFrame.from_text(can_id, data, direction)
 
     def toggle_connection(self) -> None:
         """Toggle connection based on current state."""
@@ -736,11 +767,8 @@ class CANMonitorTab(QWidget):
         
         # Handle simulation mode
         if "Simulation" in interface_type:
-            self.can_interface.stop()
-            self.can_interface = CANInterface(simulate=True, sim_interval=3.0)  # 3 sec between frames
-            self._connect_signals()
             self.paused = False  # UNPAUSE to receive frames!
-            self.can_interface.start()
+            self.can_interface.use_simulation(sim_interval=3.0)  # 3 sec between frames
             self.connect_btn.setText("Disconnect")
             self.status_indicator.setStyleSheet("background-color: #00ff66; border-radius: 10px;")
             self.status_updated.emit("Simulation mode started - frames incoming", "success")
@@ -751,67 +779,26 @@ class CANMonitorTab(QWidget):
             self.status_updated.emit("[!] No port selected", "warning")
             return
         
-        # Stop existing connection
-        self.can_interface.stop()
-        
-        # Create new interface with selected settings
-        self.can_interface = CANInterface(
-            simulate=False, 
-            serial_port=port,
-            baudrate=115200  # Serial baud rate
-        )
-        self.can_interface.auto_reconnect = False
-        
         # Store interface type for protocol handling
         self._current_interface_type = interface_type
         self._current_can_bitrate = bitrate
         
-        self._connect_signals()
-        
-        if self.can_interface.start():
+        # The hub replaces its adapter; subscriptions and the ring reader stay attached.
+        # SLCAN adapters are initialised by the adapter and stamp frames with their own clock.
+        if "SLCAN" in interface_type:
+            connected = self.can_interface.use_slcan(port, can_bitrate=bitrate, hardware_timestamps=True)
+        else:
+            connected = self.can_interface.use_serial(port, baudrate=115200)  # Serial baud rate
+        if connected:
             self.connect_btn.setText("Disconnect")
             self.status_indicator.setStyleSheet("background-color: #00ff66; border-radius: 10px;")
             self.status_updated.emit(f"Connected to {port} ({interface_type}) @ {bitrate_text}", "success")
-            
-            # Send SLCAN init commands if applicable
-            if "SLCAN" in interface_type:
-                self._init_slcan(bitrate)
         else:
             self.status_indicator.setStyleSheet("background-color: #ff3366; border-radius: 10px;")
             self.status_updated.emit("[X] Connection failed", "error")
     
-    def _init_slcan(self, bitrate: int):
-        """Initialize SLCAN adapter with proper commands."""
-        try:
-            # Map bitrate to SLCAN command
-            slcan_cmds = {
-                10000: 'S0', 20000: 'S1', 50000: 'S2', 100000: 'S3',
-                125000: 'S4', 250000: 'S5', 500000: 'S6', 800000: 'S7', 1000000: 'S8'
-            }
-            cmd = slcan_cmds.get(bitrate, 'S6')
-            
-            if hasattr(self.can_interface, '_serial') and self.can_interface._serial:
-                import time
-                self.can_interface._serial.write(b'C\r')  # Close first
-                time.sleep(0.1)
-                self.can_interface._serial.write(f'{cmd}\r'.encode())  # Set bitrate
-                time.sleep(0.1)
-                self.can_interface._serial.write(b'O\r')  # Open channel
-                time.sleep(0.1)
-                logger.info(f"SLCAN initialized with {cmd}")
-        except Exception as e:
-            logger.error(f"SLCAN init error: {e}")
-
     def disconnect_serial(self) -> None:
-        """Disconnect from current interface."""
-        # Send SLCAN close if applicable
-        if hasattr(self, '_current_interface_type') and "SLCAN" in self._current_interface_type:
-            try:
-                if hasattr(self.can_interface, '_serial') and self.can_interface._serial:
-                    self.can_interface._serial.write(b'C\r')
-            except:
-                pass
-        
+        """Disconnect from current interface (an SLCAN adapter closes its channel itself)."""
         self.can_interface.stop()
         self.connect_btn.setText("Connect")
         self.status_indicator.setStyleSheet("background-color: gray; border-radius: 10px;")
@@ -824,6 +811,7 @@ class CANMonitorTab(QWidget):
 
     def clear_table(self) -> None:
         self.table_model.clear()
+        self.can_interface.reset_statistics()
         self.unique_ids.clear()
         self.rx_count = 0
         self.tx_count = 0
@@ -855,17 +843,20 @@ class CANMonitorTab(QWidget):
                 writer = csv.writer(f, delimiter=delimiter)
                 writer.writerow(columns)
                 for frame, _, _ in self.table_model.frames:
+                    hex_text, uds_text = frame_text(frame)
                     row = []
                     if "Timestamp" in columns:
                         row.append(frame.timestamp)
                     if "CAN ID" in columns:
                         row.append(frame.can_id)
                     if "Data Bytes" in columns:
-                        row.append(' '.join(f"{b:02X}" for b in frame.data))
+                        row.append(hex_text)
                     if "Direction" in columns:
                         row.append(frame.direction.value)
                     if "UDS Decode" in columns:
-                        row.append(decode_uds(frame) or "")
+                        row.append(uds_text)
+                    if "Signals" in columns:
+                        row.append(self.table_model.dbc.text(frame) if self.table_model.dbc is not None else "")
                     writer.writerow(row)
             self.status_updated.emit(f"[OK] Exported {len(self.table_model.frames)} frames", "success")
         except Exception as e:
@@ -895,11 +886,40 @@ class CANMonitorTab(QWidget):
 
     def _load_did_config(self) -> None:
         path, _ = QFileDialog.getOpenFileName(self, "Load DID Config", "", "JSON Files (*.json)")
-        if path:
-            global DID_LOOKUP
-            DID_LOOKUP = load_did_config(path)
-            self.table_model.dataChanged.emit(QModelIndex(), QModelIndex())  # Refresh table
-            self.status_updated.emit(f"[Loaded] DID config from {path}", "success")
+        if not path:
+            return
+        try:
+            count = DID_REGISTRY.load(path)  # Atomic swap; invalidates every cached decode
+        except (OSError, ValueError) as e:
+            logger.error(f"DID config error: {e}")
+            self.status_updated.emit(f"[X] Cannot load DID config: {e}", "error")
+            return
+        self._refresh_column(4)
+        self.status_updated.emit(f"[Loaded] {count} DIDs from {path}", "success")
+
+    def _load_dbc(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(self, "Load DBC", "", "DBC Files (*.dbc);;All Files (*)")
+        if not path:
+            return
+        try:
+            dbc = load_dbc(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"DBC error: {e}")
+            self.status_updated.emit(f"[X] Cannot load DBC: {e}", "error")
+            return
+        self.table_model.dbc = dbc
+        self._refresh_column(5)
+        self.status_updated.emit(f"[Loaded] {len(dbc)} messages from {path}", "success")
+
+    def _select_did_set(self) -> None:
+        DID_REGISTRY.select(self.did_set_combo.currentData())  # Invalidates every cached decode
+        DID_REGISTRY.preload(self.did_set_loaded.emit)
+        self._refresh_column(4)
+
+    def _refresh_column(self, col: int) -> None:
+        rows = self.table_model.rowCount()
+        if rows:
+            self.table_model.dataChanged.emit(self.table_model.index(0, col), self.table_model.index(rows - 1, col))
 
     def toggle_theme(self) -> None:
         self.dark_mode = not self.dark_mode
@@ -927,6 +947,13 @@ class CANMonitorTab(QWidget):
         self.status_updated.emit(f"Found {len(ports)} ports", "info")
 
     def _update_stats(self) -> None:
+        if self._ring_reader is not None:
+            frames_read = self._ring_reader.frames_read
+            fps = frames_read - self._last_frames_read  # Timer runs once per second
+            self._last_frames_read = frames_read
+            lost = self._frames_lost + self._ring_reader.frames_lost
+            self.frame_count_label.setText(
+                f"Frames: {self.can_interface.get_frame_count():,} | FPS: {fps:.1f} | Lost: {lost:,}")
         self.unique_ids_label.setText(str(len(self.unique_ids)))
         total = self.rx_count + self.tx_count
         if total > 0:
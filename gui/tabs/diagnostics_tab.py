@@ -10,8 +10,10 @@ and general diagnostic functions for locksmiths.
 # 1) Imports
 # ----------------------------------------------------------------------------------
 import logging
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Optional, Dict, List
+from functools import partial
+from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass
 
 from PyQt5.QtWidgets import (
@@ -23,7 +25,17 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QColor
 
-from backend.can_interface import CANInterface, CANFrame, Direction
+from backend.bus_hub import BusHub
+from backend.discovery import DiscoveredEcu, FunctionalDiscovery
+from backend.dtc_engine import DTCCollector, DTCReport, ModuleDTCs
+from backend.isotp import IsoTpAddress
+from backend.live_data import LiveDataScheduler, LiveSignal, SERVICE_READ_DID
+from backend.obd import OBD_PIDS, ObdEngine
+from backend.periodic_data import (DYNAMIC_DID_FIRST, DYNAMIC_DID_LAST, MAX_PERIODIC_DATA,
+                                   PeriodicRate, PeriodicStream)
+from backend.module_scanner import ModuleScanner, ProbeKind, ScanResult, normal_fixed_targets, range_targets
+from backend.uds_client import UDSError, UDSResponse
+from utils.did_registry import DID_REGISTRY
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +101,15 @@ DTC_DATABASE = {
     "U1000": "CAN Bus Off",
 }
 
+# Live data PIDs (OBD mode 01) shown until the ECU's supported PIDs are known
+DEFAULT_LIVE_PIDS = (0x05, 0x0C, 0x0D, 0x0F, 0x11, 0x2F, 0x42)
+LIVE_DATA_ECU = (0x7E0, 0x7E8)
+LIVE_SOURCES = ["OBD PIDs (polling)", "ECU DIDs (periodic)"]
+# One dynamic DID each at worst, so a selection this size always fits the periodic plan
+MAX_LIVE_DIDS = DYNAMIC_DID_LAST - DYNAMIC_DID_FIRST + 1
+PERIODIC_RATES = {"Max": PeriodicRate.FAST, "100ms": PeriodicRate.FAST, "250ms": PeriodicRate.MEDIUM,
+                  "500ms": PeriodicRate.MEDIUM, "1000ms": PeriodicRate.SLOW}
+
 # Common ECU addresses
 ECU_ADDRESSES = {
     "Engine (PCM/ECM)": (0x7E0, 0x7E8),
@@ -101,6 +122,13 @@ ECU_ADDRESSES = {
     "Steering (EPS)": (0x7E7, 0x7EF),
 }
 
+def _outcome(future: Future) -> Tuple[Optional[UDSResponse], Optional[Exception]]:
+    """(response, error) of a finished UDS request."""
+    if future.cancelled():
+        return None, UDSError("Cancelled")
+    error = future.exception()
+    return (None, error) if error is not None else (future.result(), None)
+
 # ----------------------------------------------------------------------------------
 # 3) DiagnosticsTab Class
 # ----------------------------------------------------------------------------------
@@ -121,18 +149,40 @@ class DiagnosticsTab(QWidget):
         "text": "#e0e0e0",
     }
     
-    def __init__(self, can_interface: Optional[CANInterface] = None):
+    def __init__(self, can_interface: Optional[BusHub] = None):
         super().__init__()
-        self.can_interface = can_interface or CANInterface(simulate=True)
+        self.can_interface = can_interface or BusHub()
         self.discovered_modules: Dict[str, dict] = {}
         self.stored_dtcs: List[dict] = []
         self.scan_in_progress = False
-        self.current_scan_index = 0
-        self.scan_timer = QTimer()
-        self.scan_timer.timeout.connect(self._scan_next_module)
+        self.scanner = ModuleScanner(self.can_interface, parent=self)
+        self.scanner.module_found.connect(self._handle_module_response)
+        self.scanner.progress.connect(self._on_scan_progress)
+        self.scanner.finished.connect(self._on_scan_finished)
+        self.discovery = FunctionalDiscovery(self.can_interface, parent=self)
+        self.discovery.ecu_found.connect(self._handle_discovered_ecu)
+        self.discovery.ecu_updated.connect(self._handle_discovered_ecu)
+        self.discovery.finished.connect(self._on_discovery_finished)
+        self._module_items: Dict[int, QTreeWidgetItem] = {}  # Tree rows by TX ID
+        self.dtc_collector = DTCCollector(self.can_interface, parent=self)
+        self.dtc_collector.module_done.connect(self._on_module_dtcs)
+        self.dtc_collector.finished.connect(self._on_dtc_report)
+        self.live_scheduler = LiveDataScheduler(self.can_interface, parent=self)
+        self.live_scheduler.samples_ready.connect(self._on_live_samples)
+        self.live_scheduler.signal_failed.connect(self._on_live_signal_failed)
+        self.live_stats_timer = QTimer(self)
+        self.live_stats_timer.timeout.connect(self._update_live_stats)
+        self._live_rows: Dict[str, int] = {}  # Signal key -> table row
+        self._live_selection: Optional[List[int]] = None  # Checked DIDs; None until first shown
+        self.obd_engine = ObdEngine(self.can_interface, parent=self)
+        self.obd_engine.discovered.connect(self._on_pids_discovered)
+        self.obd_engine.failed.connect(self._on_pid_discovery_failed)
+        self.periodic_stream = PeriodicStream(self.can_interface, self.live_scheduler.store, parent=self)
+        self.periodic_stream.started.connect(lambda: self._update_status("Periodic data running"))
+        self.periodic_stream.samples_ready.connect(self._on_periodic_samples)
+        self.periodic_stream.failed.connect(self._on_periodic_failed)
         
         self._init_ui()
-        self._connect_signals()
         self._apply_theme()
         
         logger.info("DiagnosticsTab initialized")
@@ -253,6 +303,16 @@ class DiagnosticsTab(QWidget):
         self.quick_scan_btn.clicked.connect(self._quick_scan)
         scan_layout.addWidget(self.quick_scan_btn)
         
+        self.discover_btn = QPushButton("[Radar] Discover (Functional)")
+        self.discover_btn.clicked.connect(self._start_discovery)
+        scan_layout.addWidget(self.discover_btn)
+        
+        self.discovery_cache_check = QCheckBox("Use cache")
+        self.discovery_cache_check.setChecked(True)
+        self.discovery_cache_check.setToolTip("Show the ECUs cached for the VIN at once; "
+                                              "unchecked, the cached list is replaced by what answers now")
+        scan_layout.addWidget(self.discovery_cache_check)
+        
         self.stop_scan_btn = QPushButton("[Stop] Stop")
         self.stop_scan_btn.clicked.connect(self._stop_scan)
         self.stop_scan_btn.setEnabled(False)
@@ -272,6 +332,15 @@ class DiagnosticsTab(QWidget):
         self.scan_end = QLineEdit("7FF")
         self.scan_end.setMaximumWidth(80)
         range_layout.addWidget(self.scan_end)
+        range_layout.addWidget(QLabel("Addressing:"))
+        self.scan_addressing = QComboBox()
+        self.scan_addressing.addItems(["11-bit (ID + 8)", "29-bit normal fixed (18DA__F1)"])
+        self.scan_addressing.currentIndexChanged.connect(self._on_scan_addressing_changed)
+        range_layout.addWidget(self.scan_addressing)
+        range_layout.addWidget(QLabel("Probe:"))
+        self.scan_probe = QComboBox()
+        self.scan_probe.addItems([kind.value for kind in ProbeKind])
+        range_layout.addWidget(self.scan_probe)
         range_layout.addStretch()
         layout.addLayout(range_layout)
         
@@ -375,12 +444,21 @@ class DiagnosticsTab(QWidget):
         self.start_live_btn.clicked.connect(self._toggle_live_data)
         control_layout.addWidget(self.start_live_btn)
         
+        control_layout.addWidget(QLabel("Source:"))
+        self.live_source = QComboBox()
+        self.live_source.addItems(LIVE_SOURCES)
+        self.live_source.currentIndexChanged.connect(self._populate_live_table)
+        control_layout.addWidget(self.live_source)
+        
         control_layout.addWidget(QLabel("Refresh Rate:"))
         self.refresh_rate = QComboBox()
-        self.refresh_rate.addItems(["100ms", "250ms", "500ms", "1000ms"])
-        self.refresh_rate.setCurrentIndex(2)
+        self.refresh_rate.addItems(["Max", "100ms", "250ms", "500ms", "1000ms"])
+        self.refresh_rate.setCurrentIndex(3)
         control_layout.addWidget(self.refresh_rate)
         
+        self.live_stats_label = QLabel("")
+        control_layout.addWidget(self.live_stats_label)
+        
         control_layout.addStretch()
         control_group.setLayout(control_layout)
         layout.addWidget(control_group)
@@ -390,35 +468,14 @@ class DiagnosticsTab(QWidget):
         self.live_table.setColumnCount(5)
         self.live_table.setHorizontalHeaderLabels(["PID", "Name", "Value", "Unit", "Min/Max"])
         self.live_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.live_table.itemChanged.connect(self._on_live_item_changed)
         layout.addWidget(self.live_table)
         
-        # Add some common PIDs
-        pids = [
-            ("0x05", "Coolant Temp", "--", "°C", "-40/215"),
-            ("0x0C", "Engine RPM", "--", "rpm", "0/16383"),
-            ("0x0D", "Vehicle Speed", "--", "km/h", "0/255"),
-            ("0x0F", "Intake Air Temp", "--", "°C", "-40/215"),
-            ("0x11", "Throttle Position", "--", "%", "0/100"),
-            ("0x2F", "Fuel Level", "--", "%", "0/100"),
-            ("0x42", "Battery Voltage", "--", "V", "0/65.535"),
-        ]
-        
-        self.live_table.setRowCount(len(pids))
-        for i, (pid, name, value, unit, range_str) in enumerate(pids):
-            self.live_table.setItem(i, 0, QTableWidgetItem(pid))
-            self.live_table.setItem(i, 1, QTableWidgetItem(name))
-            self.live_table.setItem(i, 2, QTableWidgetItem(value))
-            self.live_table.setItem(i, 3, QTableWidgetItem(unit))
-            self.live_table.setItem(i, 4, QTableWidgetItem(range_str))
+        self._populate_live_table()
         
         widget.setLayout(layout)
         return widget
     
-    def _connect_signals(self):
-        """Connect CAN interface signals."""
-        if self.can_interface:
-            self.can_interface.frame_received.connect(self._handle_frame)
-    
     def _apply_theme(self):
         """Apply dark theme."""
         self.setStyleSheet(f"""
@@ -506,54 +563,19 @@ class DiagnosticsTab(QWidget):
     # -------------------------------------------------------------------------
     # Event Handlers
     # -------------------------------------------------------------------------
-    def _handle_frame(self, frame: CANFrame):
-        """Handle incoming CAN frame."""
-        if not frame.data:
-            return
-        
-        sid = frame.data[0]
-        
-        # DTC response (0x59 = positive response to 0x19)
-        if sid == 0x59 and len(frame.data) >= 4:
-            self._parse_dtc_response(frame)
-        
-        # Read data response (0x62)
-        elif sid == 0x62 and len(frame.data) >= 4:
-            self._parse_read_response(frame)
-        
-        # Tester present response (module alive)
-        elif sid == 0x7E:
-            self._handle_module_response(frame)
-        
-        # Session response
-        elif sid == 0x50:
-            self._handle_module_response(frame)
-    
-    def _parse_dtc_response(self, frame: CANFrame):
-        """Parse DTC response frame."""
-        data = frame.data
-        # Format: 59 02 FF [DTC1_HI] [DTC1_LO] [STATUS] ...
-        if len(data) < 6:
-            return
-        
-        # Parse DTCs (3 bytes each: 2 bytes code + 1 byte status)
-        for i in range(3, len(data) - 2, 3):
-            dtc_hi = data[i]
-            dtc_lo = data[i + 1]
-            status = data[i + 2]
-            
-            # Convert to standard DTC format
-            dtc_code = self._decode_dtc(dtc_hi, dtc_lo)
-            description = DTC_DATABASE.get(dtc_code, "Unknown")
-            status_text = self._decode_dtc_status(status)
+    def _on_module_dtcs(self, module: ModuleDTCs):
+        """One module answered the DTC sweep (or gave up); add its DTCs."""
+        for record in module.dtcs:
+            status_text = self._decode_dtc_status(record.status)
             
             row = self.dtc_table.rowCount()
             self.dtc_table.insertRow(row)
-            self.dtc_table.setItem(row, 0, QTableWidgetItem(self.module_combo.currentText()))
-            self.dtc_table.setItem(row, 1, QTableWidgetItem(dtc_code))
-            self.dtc_table.setItem(row, 2, QTableWidgetItem(description))
+            self.dtc_table.setItem(row, 0, QTableWidgetItem(module.name))
+            self.dtc_table.setItem(row, 1, QTableWidgetItem(record.text))
+            self.dtc_table.setItem(row, 2, QTableWidgetItem(DTC_DATABASE.get(record.base_code, "Unknown")))
             self.dtc_table.setItem(row, 3, QTableWidgetItem(status_text))
             self.dtc_table.setItem(row, 4, QTableWidgetItem("--"))
+            self.dtc_table.item(row, 0).setToolTip(f"Answered after {module.elapsed * 1000:.0f} ms")
             
             # Color code by status
             if "Active" in status_text:
@@ -563,16 +585,22 @@ class DiagnosticsTab(QWidget):
                         item.setBackground(QColor(self.COLORS['red'] + "40"))
         
         self.dtc_count_label.setText(f"Total DTCs: {self.dtc_table.rowCount()}")
+        self.dtc_progress.setValue(self.dtc_progress.value() + 1)
     
-    def _decode_dtc(self, hi: int, lo: int) -> str:
-        """Decode DTC bytes to standard format."""
-        # First nibble determines type
-        type_map = {0: 'P', 1: 'C', 2: 'B', 3: 'U'}
-        dtc_type = type_map.get((hi >> 6) & 0x03, 'P')
-        
-        # Remaining is the number
-        num = ((hi & 0x3F) << 8) | lo
-        return f"{dtc_type}{num:04X}"
+    def _on_dtc_report(self, report: DTCReport):
+        """Sweep complete: summary with per-module timing."""
+        self.dtc_progress.setVisible(False)
+        timing = ", ".join(f"{m.name} {m.elapsed * 1000:.0f} ms" if m.responded else f"{m.name}: {m.error}"
+                           for m in report.modules)
+        logger.info(f"[DiagnosticsTab] DTC sweep: {timing}")
+        failures = report.failures
+        if len(report.modules) == 1 and failures:
+            self._update_status(f"{failures[0].name}: {failures[0].error}")
+            return
+        summary = f"DTC scan complete: {report.dtc_count} DTCs in {report.elapsed * 1000:.0f} ms"
+        if failures:
+            summary += f", {len(failures)} modules without answer"
+        self._update_status(summary)
     
     def _decode_dtc_status(self, status: int) -> str:
         """Decode DTC status byte."""
@@ -587,11 +615,16 @@ class DiagnosticsTab(QWidget):
             flags.append("Active")
         return ", ".join(flags) if flags else "Inactive"
     
-    def _parse_read_response(self, frame: CANFrame):
+    def _on_vehicle_info(self, did: int, future: Future):
+        """One vehicle info DID answered (or failed)."""
+        response, error = _outcome(future)
+        if response is not None:
+            self._parse_read_response(did, response.data)
+        else:
+            self.raw_display.append(f"DID 0x{did:04X}: {error}")
+    
+    def _parse_read_response(self, did: int, payload: bytes):
         """Parse read data response."""
-        data = frame.data
-        did = (data[1] << 8) | data[2]
-        payload = data[3:]
         
         # VIN
         if did == 0xF190 and len(payload) >= 17:
@@ -612,26 +645,46 @@ class DiagnosticsTab(QWidget):
         hex_data = ' '.join(f'{b:02X}' for b in payload)
         self.raw_display.append(f"DID 0x{did:04X}: {hex_data}")
     
-    def _handle_module_response(self, frame: CANFrame):
-        """Handle module response during scanning."""
-        tx_id = int(frame.can_id, 16) - 8  # Response ID is usually TX + 8
-        
-        if self.scan_in_progress:
-            # Module responded
-            module_name = f"Module 0x{tx_id:03X}"
-            for name, (tx, rx) in ECU_ADDRESSES.items():
-                if tx == tx_id:
-                    module_name = name
-                    break
-            
-            item = QTreeWidgetItem([
-                module_name,
-                f"0x{tx_id:03X}",
-                frame.can_id,
-                "OK",
-                ""
-            ])
+    def _handle_module_response(self, result: ScanResult):
+        """A module answered a scan probe; add it to the tree right away."""
+        attempts = f", attempt {result.attempts}" if result.attempts > 1 else ""
+        self._set_module_item(result.address.tx_id, result.address.rx_id, result.address.extended_ids,
+                              result.status, f"{result.elapsed * 1000:.0f} ms{attempts}")
+        self._update_status(f"Scanning... {self.module_tree.topLevelItemCount()} modules found")
+    
+    def _handle_discovered_ecu(self, ecu: DiscoveredEcu):
+        """A responder to the functional sweep (or its identification) arrived."""
+        info = [f"VIN {ecu.vin}"] if ecu.vin else []
+        if ecu.part_number:
+            info.append(f"P/N {ecu.part_number}")
+        if not info:
+            info.append(f"{ecu.elapsed * 1000:.0f} ms")
+        self._set_module_item(ecu.tx_id, ecu.rx_id, ecu.extended,
+                              "Cached" if ecu.cached else "OK", ", ".join(info))
+        if ecu.vin and not self.info_fields['vin'].text():
+            self.info_fields['vin'].setText(ecu.vin)
+    
+    def _set_module_item(self, tx_id: int, rx_id: int, extended: bool, status: str, info: str):
+        """Add or update the tree row of one module."""
+        item = self._module_items.get(tx_id)
+        if item is None:
+            width = 8 if extended else 3
+            item = QTreeWidgetItem([self._module_name(tx_id), f"0x{tx_id:0{width}X}",
+                                    f"0x{rx_id:0{width}X}", "", ""])
+            self._module_items[tx_id] = item
             self.module_tree.addTopLevelItem(item)
+        item.setText(3, status)
+        item.setText(4, info)
+    
+    def _clear_modules(self):
+        self.module_tree.clear()
+        self._module_items.clear()
+    
+    def _module_name(self, tx_id: int) -> str:
+        for name, (tx, rx) in ECU_ADDRESSES.items():
+            if tx == tx_id:
+                return name
+        return f"Module 0x{tx_id:03X}"
     
     def _on_module_selected(self, item: QTreeWidgetItem, column: int):
         """Handle module selection in tree."""
@@ -644,28 +697,24 @@ class DiagnosticsTab(QWidget):
     # -------------------------------------------------------------------------
     def _read_dtcs(self):
         """Read DTCs from selected module."""
-        self.dtc_table.setRowCount(0)
-        module_name = self.module_combo.currentText()
-        tx_id, rx_id = ECU_ADDRESSES.get(module_name, (0x7E0, 0x7E8))
-        
-        # Send Read DTC Information request
-        # Service 0x19, Sub-function 0x02 = reportDTCByStatusMask
-        self._send_frame(tx_id, [0x19, 0x02, 0xFF])  # 0xFF = all DTCs
-        self._update_status(f"Reading DTCs from {module_name}...")
+        self._request_dtcs([self.module_combo.currentText()])
     
     def _read_all_dtcs(self):
         """Read DTCs from all modules."""
+        self._request_dtcs(list(ECU_ADDRESSES))
+    
+    def _request_dtcs(self, module_names: List[str]):
+        """Ask every module at once; each answer is labelled with the module it came from."""
         self.dtc_table.setRowCount(0)
+        self.dtc_count_label.setText("Total DTCs: 0")
         self.dtc_progress.setVisible(True)
-        self.dtc_progress.setMaximum(len(ECU_ADDRESSES))
+        self.dtc_progress.setMaximum(len(module_names))
         self.dtc_progress.setValue(0)
+        self._update_status(f"Reading DTCs from {', '.join(module_names) if len(module_names) == 1 else 'all modules'}...")
         
-        for i, (name, (tx_id, rx_id)) in enumerate(ECU_ADDRESSES.items()):
-            self._send_frame(tx_id, [0x19, 0x02, 0xFF])
-            self.dtc_progress.setValue(i + 1)
-        
-        self.dtc_progress.setVisible(False)
-        self._update_status("DTC scan complete")
+        # Service 0x19, Sub-function 0x02 = reportDTCByStatusMask, 0xFF = all DTCs
+        modules = {name: IsoTpAddress.normal(*ECU_ADDRESSES.get(name, (0x7E0, 0x7E8))) for name in module_names}
+        self.dtc_collector.start(modules, 0xFF)
     
     def _clear_dtcs(self):
         """Clear DTCs from selected module."""
@@ -676,9 +725,17 @@ class DiagnosticsTab(QWidget):
         tx_id, rx_id = ECU_ADDRESSES.get(module_name, (0x7E0, 0x7E8))
         
         # Service 0x14 = Clear Diagnostic Information
-        self._send_frame(tx_id, [0x14, 0xFF, 0xFF, 0xFF])
+        future = self.can_interface.uds.clear_dtcs(IsoTpAddress.normal(tx_id, rx_id))
+        future.add_done_callback(partial(self._on_dtcs_cleared, module_name))
         self._update_status(f"Clearing DTCs from {module_name}...")
     
+    def _on_dtcs_cleared(self, module_name: str, future: Future):
+        response, error = _outcome(future)
+        if response is not None:
+            self._update_status(f"DTCs cleared on {module_name}")
+        else:
+            self._update_status(f"Clear DTCs failed on {module_name}: {error}")
+    
     def _export_dtcs(self):
         """Export DTC list to file."""
         from PyQt5.QtWidgets import QFileDialog
@@ -699,62 +756,84 @@ class DiagnosticsTab(QWidget):
     # -------------------------------------------------------------------------
     def _start_module_scan(self):
         """Start full module scan."""
-        self.module_tree.clear()
-        self.scan_in_progress = True
-        self.scan_btn.setEnabled(False)
-        self.stop_scan_btn.setEnabled(True)
-        
         try:
             start = int(self.scan_start.text(), 16)
             end = int(self.scan_end.text(), 16)
         except ValueError:
-            start, end = 0x700, 0x7FF
-        
-        self.scan_range = list(range(start, end + 1))
-        self.current_scan_index = 0
-        
-        self.scan_progress.setVisible(True)
-        self.scan_progress.setMaximum(len(self.scan_range))
-        self.scan_progress.setValue(0)
-        
-        self.scan_timer.start(50)  # 50ms between requests
-    
-    def _scan_next_module(self):
-        """Scan next module in range."""
-        if self.current_scan_index >= len(self.scan_range) or not self.scan_in_progress:
-            self._stop_scan()
-            return
-        
-        tx_id = self.scan_range[self.current_scan_index]
-        self._send_frame(tx_id, [0x3E, 0x00])  # Tester Present
-        
-        self.scan_progress.setValue(self.current_scan_index + 1)
-        self.current_scan_index += 1
+            start, end = None, None
+        if self.scan_addressing.currentIndex() == 1:
+            targets = normal_fixed_targets(*((start, end) if start is not None else (0x00, 0xFF)))
+        else:
+            targets = range_targets(*((start, end) if start is not None else (0x700, 0x7FF)))
+        self._run_scan(targets, ProbeKind(self.scan_probe.currentText()))
     
     def _quick_scan(self):
         """Scan common ECU addresses only."""
-        self.module_tree.clear()
+        targets = [IsoTpAddress.normal(tx_id, rx_id) for tx_id, rx_id in ECU_ADDRESSES.values()]
+        self._run_scan(targets, ProbeKind(self.scan_probe.currentText()))
+    
+    def _run_scan(self, targets: List[IsoTpAddress], probe: ProbeKind):
+        """Probe all targets in paced bursts; responders stream in via _handle_module_response."""
+        self.discovery.stop()
+        self._clear_modules()
+        self.scan_in_progress = True
+        self.scan_btn.setEnabled(False)
+        self.quick_scan_btn.setEnabled(False)
+        self.stop_scan_btn.setEnabled(True)
         
-        for name, (tx_id, rx_id) in ECU_ADDRESSES.items():
-            self._send_frame(tx_id, [0x3E, 0x00])
+        self.scan_progress.setVisible(True)
+        self.scan_progress.setMaximum(len(targets))
+        self.scan_progress.setValue(0)
+        self._update_status(f"Scanning {len(targets)} addresses...")
         
-        self._update_status("Quick scan complete")
+        self.scanner.start(targets, probe)
     
-    def _stop_scan(self):
-        """Stop module scanning."""
-        self.scan_timer.stop()
+    def _on_scan_progress(self, sent: int, planned: int):
+        self.scan_progress.setMaximum(planned)
+        self.scan_progress.setValue(sent)
+    
+    def _on_scan_finished(self, results: list):
+        """Scan ended (complete or stopped)."""
         self.scan_in_progress = False
         self.scan_btn.setEnabled(True)
+        self.quick_scan_btn.setEnabled(True)
         self.stop_scan_btn.setEnabled(False)
         self.scan_progress.setVisible(False)
+        self._update_status(f"Scan complete: {len(results)} modules")
+    
+    def _start_discovery(self):
+        """One functional request round; every live ECU answers within one window."""
+        self.scanner.stop()
+        self._clear_modules()
+        self.discover_btn.setEnabled(False)
+        self._update_status("Functional discovery...")
+        self.discovery.start(use_29bit=self.scan_addressing.currentIndex() == 1,
+                             use_cache=self.discovery_cache_check.isChecked())
+    
+    def _on_discovery_finished(self, ecus: list):
+        self.discover_btn.setEnabled(True)
+        silent = sum(ecu.cached for ecu in ecus)
+        cached = f" ({silent} from cache, not answering now)" if silent else ""
+        vin = f", VIN {self.discovery.vin}" if self.discovery.vin else ""
+        self._update_status(f"Discovery complete: {len(ecus)} ECUs{cached}{vin}")
+    
+    def _stop_scan(self):
+        """Stop module scanning."""
+        self.scanner.stop()
         self._update_status("Scan stopped")
     
+    def _on_scan_addressing_changed(self, index: int):
+        """Default range for the chosen addressing: request IDs or target addresses."""
+        start, end = ("00", "FF") if index == 1 else ("700", "7FF")
+        self.scan_start.setText(start)
+        self.scan_end.setText(end)
+    
     # -------------------------------------------------------------------------
     # Vehicle Info Functions
     # -------------------------------------------------------------------------
     def _read_vehicle_info(self):
         """Read vehicle information DIDs."""
-        tx_id = 0x7E0  # Engine ECU
+        ecu = IsoTpAddress.normal(0x7E0, 0x7E8)  # Engine ECU
         
         dids = [
             0xF190,  # VIN
@@ -765,36 +844,210 @@ class DiagnosticsTab(QWidget):
             0xF191,  # Hardware Version
         ]
         
-        for did in dids:
-            self._send_frame(tx_id, [0x22, (did >> 8) & 0xFF, did & 0xFF])
+        # Queued back to back on the ECU; each answer is matched to its DID
+        for did, future in zip(dids, self.can_interface.uds.read_dids(ecu, dids)):
+            future.add_done_callback(partial(self._on_vehicle_info, did))
         
         self._update_status("Reading vehicle info...")
     
     # -------------------------------------------------------------------------
     # Live Data Functions
     # -------------------------------------------------------------------------
+    def _live_candidates(self) -> List[int]:
+        """Registry DIDs small enough for a periodic frame."""
+        return [spec.did for spec in DID_REGISTRY
+                if spec.length and spec.length <= MAX_PERIODIC_DATA]
+    
+    def _live_dids(self) -> List[int]:
+        """The checked DIDs, at most MAX_LIVE_DIDS (the first ones by default)."""
+        candidates = self._live_candidates()
+        if self._live_selection is None:
+            self._live_selection = candidates[:MAX_LIVE_DIDS]
+        available = set(candidates)   # The registry may have been swapped since
+        self._live_selection = [did for did in self._live_selection if did in available][:MAX_LIVE_DIDS]
+        return list(self._live_selection)
+    
+    def _live_obd_pids(self) -> List[int]:
+        """The ECU's supported numeric PIDs once discovered, else the defaults."""
+        return self.obd_engine.numeric_pids(IsoTpAddress.normal(*LIVE_DATA_ECU)) or list(DEFAULT_LIVE_PIDS)
+    
+    def _populate_live_table(self):
+        """Rows for the selected source: OBD PIDs or registry DIDs."""
+        dids = self.live_source.currentIndex() == 1
+        if dids:
+            selected = set(self._live_dids())
+            rows = [(f"0x{did:04X}", DID_REGISTRY.name(did), DID_REGISTRY.unit(did), "")
+                    for did in self._live_candidates()]
+        else:
+            rows = [(f"0x{pid:02X}", OBD_PIDS[pid].name, OBD_PIDS[pid].unit, OBD_PIDS[pid].range_text)
+                    for pid in self._live_obd_pids()]
+        self._live_rows = {}
+        self.live_table.blockSignals(True)
+        self.live_table.setRowCount(len(rows))
+        for i, (ident, name, unit, range_str) in enumerate(rows):
+            ident_item = QTableWidgetItem(ident)
+            if dids:
+                ident_item.setFlags(ident_item.flags() | Qt.ItemIsUserCheckable)
+                ident_item.setCheckState(Qt.Checked if int(ident, 16) in selected else Qt.Unchecked)
+            self.live_table.setItem(i, 0, ident_item)
+            self.live_table.setItem(i, 1, QTableWidgetItem(name))
+            self.live_table.setItem(i, 2, QTableWidgetItem("--"))
+            self.live_table.setItem(i, 3, QTableWidgetItem(unit))
+            self.live_table.setItem(i, 4, QTableWidgetItem(range_str))
+            self._live_rows[name] = i
+        self.live_table.blockSignals(False)
+    
+    def _on_live_item_changed(self, item: QTableWidgetItem):
+        """A DID row was (un)checked: update the selection, capped at MAX_LIVE_DIDS."""
+        if item.column() != 0 or self.live_source.currentIndex() != 1:
+            return
+        did = int(item.text(), 16)
+        selection = self._live_dids()
+        checked = item.checkState() == Qt.Checked
+        if self.live_stats_timer.isActive() or (checked and len(selection) >= MAX_LIVE_DIDS):
+            self.live_table.blockSignals(True)
+            item.setCheckState(Qt.Checked if did in selection else Qt.Unchecked)
+            self.live_table.blockSignals(False)
+            self._update_status("Stop monitoring to change the DIDs" if self.live_stats_timer.isActive()
+                                else f"At most {MAX_LIVE_DIDS} DIDs can be monitored at once")
+            return
+        if checked and did not in selection:
+            selection.append(did)
+        elif not checked and did in selection:
+            selection.remove(did)
+        self._live_selection = selection
+    
     def _toggle_live_data(self):
         """Toggle live data monitoring."""
-        # Placeholder - would need continuous polling
-        self._update_status("Live data monitoring not yet implemented")
+        if self.live_stats_timer.isActive():
+            self.live_scheduler.stop()
+            self.periodic_stream.stop()
+            self.live_stats_timer.stop()
+            self.live_source.setEnabled(True)
+            self.start_live_btn.setText("> Start Monitoring")
+            self._update_status("Live data stopped")
+            return
+        
+        self.live_scheduler.clear()
+        self.live_scheduler.store.clear()
+        self._populate_live_table()
+        if self.live_source.currentIndex() == 1:
+            # The ECU pushes the DIDs; polling is the fallback when it refuses
+            try:
+                self.periodic_stream.start(IsoTpAddress.normal(*LIVE_DATA_ECU), self._live_dids(),
+                                           PERIODIC_RATES[self.refresh_rate.currentText()])
+            except ValueError as e:
+                # Not plannable as periodic data: poll the same DIDs, as when the ECU refuses
+                self._start_polling()
+                self._update_status(f"Periodic data: {e}, polling instead")
+            else:
+                self._update_status("Setting up periodic data...")
+        elif IsoTpAddress.normal(*LIVE_DATA_ECU) not in self.obd_engine.supported:
+            self.obd_engine.discover(IsoTpAddress.normal(*LIVE_DATA_ECU))
+            self._update_status("Reading supported PIDs...")
+        else:
+            self._start_polling()
+        self.live_stats_timer.start(1000)
+        self.live_source.setEnabled(False)
+        self.start_live_btn.setText("[Stop] Stop Monitoring")
+    
+    def _start_polling(self):
+        """Poll the table's PIDs (mode 01) or DIDs (0x22) with the live scheduler."""
+        text = self.refresh_rate.currentText()
+        rate = 0.0 if text == "Max" else 1000 / int(text.rstrip("ms"))
+        ecu = IsoTpAddress.normal(*LIVE_DATA_ECU)
+        if self.live_source.currentIndex() == 1:
+            for did in self._live_dids():
+                spec = DID_REGISTRY.get(did)
+                if spec is not None and spec.numeric:   # Text DIDs only come with periodic data
+                    self.live_scheduler.add_signal(LiveSignal(spec.name, ecu, SERVICE_READ_DID, did, spec.length,
+                                                              spec.value, spec.unit, rate))
+        else:
+            for signal in self.obd_engine.signals(ecu, self._live_obd_pids(), rate):
+                self.live_scheduler.add_signal(signal)
+        self.live_scheduler.start()
+        self._update_status("Live data running")
+    
+    def _on_pids_discovered(self, address: IsoTpAddress, pids: list):
+        logger.info(f"[DiagnosticsTab] OBD PIDs supported by 0x{address.tx_id:03X}: "
+                    f"{' '.join(f'{p:02X}' for p in pids)}")
+        if not self.live_stats_timer.isActive():
+            return  # Stopped by the user meanwhile
+        self._populate_live_table()
+        self._start_polling()
+    
+    def _on_pid_discovery_failed(self, address: IsoTpAddress, reason: str):
+        if self.live_stats_timer.isActive():
+            self._toggle_live_data()
+        self._update_status(f"No OBD data from 0x{address.tx_id:03X}: {reason}")
+    
+    def _on_periodic_samples(self, keys: list):
+        """Periodic frames decoded: the registry's text, plus min/max when numeric."""
+        store = self.live_scheduler.store
+        values = self.periodic_stream.values
+        for key in dict.fromkeys(keys):
+            row = self._live_rows.get(key)
+            if row is None:
+                continue
+            self.live_table.item(row, 2).setText(values.get(key, "--"))
+            series = store.series(key)
+            if series is not None:
+                self.live_table.item(row, 4).setText(f"{series.minimum:.1f}/{series.maximum:.1f}")
+    
+    def _on_periodic_failed(self, reason: str):
+        """ECU refused periodic transmission: poll the same DIDs instead."""
+        if not self.live_stats_timer.isActive():
+            return  # Stopped by the user meanwhile
+        self._start_polling()
+        self._update_status(f"Periodic data refused ({reason}), polling instead")
+    
+    def _on_live_samples(self, keys: list):
+        """New values arrived: show the latest value and the observed min/max."""
+        store = self.live_scheduler.store
+        for key in keys:
+            row = self._live_rows.get(key)
+            series = store.series(key)
+            if row is None or series is None:
+                continue
+            self.live_table.item(row, 2).setText(f"{series.latest()[1]:.1f}")
+            self.live_table.item(row, 4).setText(f"{series.minimum:.1f}/{series.maximum:.1f}")
+    
+    def _on_live_signal_failed(self, key: str, reason: str):
+        row = self._live_rows.get(key)
+        if row is not None:
+            self.live_table.item(row, 2).setText(reason)
+    
+    def _update_live_stats(self):
+        """Achieved rate per ECU."""
+        parts = []
+        stream = self.periodic_stream
+        if stream.running and stream.samples:
+            parts.append(f"0x{stream.address.tx_id:03X}: {stream.samples_per_second:.0f} samples/s (periodic)")
+        for stats in self.live_scheduler.stats():
+            parts.append(f"0x{stats.address.tx_id:03X}: {stats.samples_per_second:.0f} samples/s, "
+                         f"RTT {stats.rtt * 1000:.1f} ms"
+                         f"{f', {stats.timeouts} timeouts' if stats.timeouts else ''}")
+        self.live_stats_label.setText(" | ".join(parts))
     
     # -------------------------------------------------------------------------
     # Helper Functions
     # -------------------------------------------------------------------------
-    def _send_frame(self, tx_id: int, data: list):
-        """Send a CAN frame."""
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        frame = CANFrame(timestamp, f"{tx_id:03X}", data, Direction.TX)
-        self.can_interface.send_frame(frame)
-    
     def _update_status(self, message: str):
         """Update status bar."""
         self.status_bar.setText(message)
     
-    def set_can_interface(self, interface: CANInterface):
+    def set_can_interface(self, interface: BusHub):
         """Set CAN interface from main window."""
+        self.scanner.stop()
+        self.discovery.stop()
         self.can_interface = interface
-        self._connect_signals()
+        self.scanner.hub = interface
+        self.discovery.hub = interface
+        self.dtc_collector.hub = interface
+        self.live_scheduler.hub = interface
+        self.obd_engine.hub = interface
+        self.periodic_stream.stop()
+        self.periodic_stream.hub = interface
 
 
 # ----------------------------------------------------------------------------------
@@ -29,7 +29,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread
 from PyQt5.QtGui import QFont, QColor
 
-from backend.can_interface import CANInterface, CANFrame, Direction
+from backend.bus_hub import BusHub
+from backend.uds_client import NegativeResponseError
 
 logger = logging.getLogger(__name__)
 
@@ -139,9 +140,9 @@ class ECUFlashTab(QWidget):
         "border": "#00f0ff33",
     }
     
-    def __init__(self, can_interface: Optional[CANInterface] = None):
+    def __init__(self, can_interface: Optional[BusHub] = None):
         super().__init__()
-        self.can_interface = can_interface or CANInterface(simulate=True)
+        self.can_interface = can_interface or BusHub()
         self.current_chip: Optional[ChipProfile] = None
         self.read_buffer: bytearray = bytearray()
         self.write_buffer: bytearray = bytearray()
@@ -610,9 +611,6 @@ class ECUFlashTab(QWidget):
         """Connect signals."""
         self.read_start.textChanged.connect(self._update_read_length)
         self.read_end.textChanged.connect(self._update_read_length)
-        
-        if self.can_interface:
-            self.can_interface.frame_received.connect(self._handle_frame)
     
     def _apply_cyberninja_theme(self):
         """Apply CyberNinja dark theme."""
@@ -802,24 +800,6 @@ class ECUFlashTab(QWidget):
             self.read_start.setText("0x0000")
             self.read_end.setText(f"0x{self.current_chip.eeprom_size - 1:04X}")
     
-    def _handle_frame(self, frame: CANFrame):
-        """Handle incoming CAN frame during read/write operations."""
-        # Process UDS responses for read/write operations
-        if frame.data and len(frame.data) > 0:
-            sid = frame.data[0]
-            
-            # Read Memory response (0x63 = positive response to 0x23)
-            if sid == 0x63 and self.operation_in_progress:
-                self._process_read_response(frame.data[1:])
-            
-            # Write Memory response (0x7D = positive response to 0x3D)
-            elif sid == 0x7D and self.operation_in_progress:
-                self._process_write_response(frame.data)
-            
-            # Negative response
-            elif sid == 0x7F:
-                self._handle_negative_response(frame.data)
-    
     # =========================================================================
     # Read Operations
     # =========================================================================
@@ -886,13 +866,30 @@ class ECUFlashTab(QWidget):
         chunk_size = min(self.current_chip.page_size if self.current_chip else 256,
                         self.end_address - self.current_address + 1)
         
-        # Send read memory request: 0x23 + address (3 bytes) + length (1 byte)
-        addr_hi = (self.current_address >> 16) & 0xFF
-        addr_mid = (self.current_address >> 8) & 0xFF
-        addr_lo = self.current_address & 0xFF
-        
-        data = [0x23, addr_hi, addr_mid, addr_lo, chunk_size]
-        self._send_frame(data)
+        # ReadMemoryByAddress: addressAndLengthFormatIdentifier 0x23 = 2-byte size, 3-byte address
+        # (a 256-byte page does not fit a one-byte size)
+        data = (bytes([0x23, 0x23]) + (self.current_address & 0xFFFFFF).to_bytes(3, "big")
+                + chunk_size.to_bytes(2, "big"))
+        future = self.can_interface.uds.request(0x7E0, data)
+        future.add_done_callback(self._on_chunk_response)
+    
+    def _on_chunk_response(self, future):
+        """Read memory response (0x63) for the chunk just requested."""
+        if not self.operation_in_progress or future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._process_read_response(list(future.result().data))
+            return
+        if isinstance(error, NegativeResponseError):
+            self._handle_negative_response([0x7F, error.sid, error.nrc])
+        else:
+            self._log(f"Read failed at 0x{self.current_address:04X}: {error}", "error")
+        self.operation_in_progress = False
+        self.read_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self._update_status(" READ FAILED ")
     
     def _read_complete(self):
         """Handle read completion."""
@@ -1169,12 +1166,6 @@ class ECUFlashTab(QWidget):
         else:
             return f"{size} bytes"
     
-    def _send_frame(self, data: List[int]):
-        """Send CAN frame."""
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        frame = CANFrame(timestamp, "7E0", data, Direction.TX)
-        self.can_interface.send_frame(frame)
-    
     def _handle_negative_response(self, data: List[int]):
         """Handle negative UDS response."""
         if len(data) >= 3:
@@ -1213,11 +1204,9 @@ class ECUFlashTab(QWidget):
                 f.write(self.log_display.toPlainText())
             self._log(f"Log exported to {path}", "success")
     
-    def set_can_interface(self, interface: CANInterface):
+    def set_can_interface(self, interface: BusHub):
         """Set CAN interface from main window."""
         self.can_interface = interface
-        self._connect_signals()
-
 
 # ----------------------------------------------------------------------------------
 # Test
@@ -24,7 +24,10 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread
 from PyQt5.QtGui import QFont, QColor
 
-from backend.can_interface import CANInterface, CANFrame, Direction
+from backend.can_interface import CANFrame
+from backend.bus_hub import BusHub
+from backend.isotp import IsoTpAddress
+from backend.uds_client import NRC_DESCRIPTIONS, NegativeResponseError, UDSTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -129,27 +132,6 @@ class UDS:
     TESTER_PRESENT = 0x3E
     NEGATIVE_RESPONSE = 0x7F
 
-# NRC (Negative Response Codes)
-NRC_DESCRIPTIONS = {
-    0x10: "General Reject",
-    0x11: "Service Not Supported",
-    0x12: "Sub-Function Not Supported",
-    0x13: "Invalid Format",
-    0x14: "Response Too Long",
-    0x22: "Conditions Not Correct",
-    0x24: "Request Sequence Error",
-    0x25: "No Response From Subnet",
-    0x31: "Request Out Of Range",
-    0x33: "Security Access Denied",
-    0x35: "Invalid Key",
-    0x36: "Exceeded Number Of Attempts",
-    0x37: "Required Time Delay Not Expired",
-    0x70: "Upload/Download Not Accepted",
-    0x71: "Transfer Data Suspended",
-    0x72: "General Programming Failure",
-    0x78: "Request Correctly Received - Response Pending",
-}
-
 # ----------------------------------------------------------------------------------
 # 3) KeyToolsTab Class
 # ----------------------------------------------------------------------------------
@@ -171,18 +153,16 @@ class KeyToolsTab(QWidget):
         "text": "#e0e0e0",
     }
     
-    def __init__(self, can_interface: Optional[CANInterface] = None):
+    def __init__(self, can_interface: Optional[BusHub] = None):
         super().__init__()
-        self.can_interface = can_interface or CANInterface(simulate=True)
+        self.can_interface = can_interface or BusHub()
         self.current_profile: Optional[VehicleProfile] = None
         self.current_seed: List[int] = []
         self.session_active = False
         self.security_unlocked = False
-        self.pending_response = False
-        self.response_timeout = QTimer()
-        self.response_timeout.timeout.connect(self._handle_timeout)
         self.tester_present_timer = QTimer()
         self.tester_present_timer.timeout.connect(self._send_tester_present)
+        self._rx_subscription = None  # Dispatcher subscription for the RX ID
         
         self._init_ui()
         self._connect_signals()
@@ -235,6 +215,7 @@ class KeyToolsTab(QWidget):
         layout.addWidget(QLabel("RX:"))
         self.rx_id_edit = QLineEdit("7E8")
         self.rx_id_edit.setMaximumWidth(80)
+        self.rx_id_edit.textChanged.connect(self._on_rx_id_changed)
         layout.addWidget(self.rx_id_edit)
         
         # Connection status
@@ -536,9 +517,28 @@ class KeyToolsTab(QWidget):
     def _connect_signals(self):
         """Connect signals to slots."""
         if self.can_interface:
-            self.can_interface.frame_received.connect(self._handle_frame)
+            self._rx_subscription = self.can_interface.dispatcher.subscribe(
+                self._handle_frame, ids=self._rx_ids())
             self.can_interface.connection_changed.connect(self._update_connection_status)
     
+    def _disconnect_signals(self):
+        """Detach from the current CAN interface."""
+        if self._rx_subscription:
+            self._rx_subscription.cancel()
+            self._rx_subscription = None
+        if self.can_interface:
+            try:
+                self.can_interface.connection_changed.disconnect(self._update_connection_status)
+            except TypeError:
+                pass
+    
+    def _rx_ids(self) -> List[int]:
+        """RX ID from the edit box (no IDs while the text is not valid hex)."""
+        try:
+            return [int(self.rx_id_edit.text(), 16)]
+        except ValueError:
+            return []
+    
     def _apply_theme(self):
         """Apply CyberNinja dark theme."""
         self.setStyleSheet(f"""
@@ -640,28 +640,42 @@ class KeyToolsTab(QWidget):
             self.rx_id_edit.setText(f"{self.current_profile.rx_id:03X}")
             self._log(f"Profile changed: {profile_name}")
     
+    def _on_rx_id_changed(self, text: str):
+        """Route the new RX ID to this tab."""
+        if self._rx_subscription:
+            self.can_interface.dispatcher.resubscribe(self._rx_subscription, self._rx_ids())
+    
     def _handle_frame(self, frame: CANFrame):
-        """Handle incoming CAN frame."""
-        rx_id = self.rx_id_edit.text().upper()
-        if frame.can_id.upper() != rx_id:
-            return
-        
+        """Log incoming CAN frames addressed to the configured RX ID."""
         self._log(f"RX: {frame.can_id} [{' '.join(f'{b:02X}' for b in frame.data)}]", "rx")
-        
-        if not frame.data:
+    
+    def _on_uds_response(self, future):
+        """Route the outcome of a request to its handler (the client matched it)."""
+        if future.cancelled():
             return
-        
-        sid = frame.data[0]
+        error = future.exception()
+        if isinstance(error, NegativeResponseError):
+            self._handle_negative_response([UDS.NEGATIVE_RESPONSE, error.sid, error.nrc])
+            return
+        if isinstance(error, UDSTimeoutError):
+            self._handle_timeout()
+            return
+        if error is not None:
+            self._log(f"Request failed: {error}", "error")
+            return
+        response = future.result()
+        if response is None:
+            return  # Positive response suppressed
+        data = list(response.payload)
+        sid = data[0]
         
         # Handle positive responses
         if sid == UDS.SECURITY_ACCESS + 0x40:  # 0x67
-            self._handle_security_response(frame.data)
+            self._handle_security_response(data)
         elif sid == UDS.DIAGNOSTIC_SESSION + 0x40:  # 0x50
-            self._handle_session_response(frame.data)
+            self._handle_session_response(data)
         elif sid == UDS.READ_DATA + 0x40:  # 0x62
-            self._handle_read_response(frame.data)
-        elif sid == UDS.NEGATIVE_RESPONSE:  # 0x7F
-            self._handle_negative_response(frame.data)
+            self._handle_read_response(data)
     
     def _handle_security_response(self, data: List[int]):
         """Handle security access response."""
@@ -744,8 +758,6 @@ class KeyToolsTab(QWidget):
     
     def _handle_timeout(self):
         """Handle response timeout."""
-        self.response_timeout.stop()
-        self.pending_response = False
         self._log("Response timeout", "warning")
     
     def _update_connection_status(self, connected: bool):
@@ -761,19 +773,14 @@ class KeyToolsTab(QWidget):
     # UDS Command Functions
     # -------------------------------------------------------------------------
     def _send_uds_frame(self, data: List[int]):
-        """Send a UDS frame."""
+        """Send a UDS request; _on_uds_response gets its matched response."""
         try:
-            tx_id = self.tx_id_edit.text().upper()
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            frame = CANFrame(timestamp, tx_id, data, Direction.TX)
+            address = IsoTpAddress.normal(int(self.tx_id_edit.text(), 16), int(self.rx_id_edit.text(), 16))
             
-            self._log(f"TX: {tx_id} [{' '.join(f'{b:02X}' for b in data)}]", "tx")
+            self._log(f"TX: {address.tx_id:03X} [{' '.join(f'{b:02X}' for b in data)}]", "tx")
             
-            if self.can_interface.send_frame(frame):
-                self.response_timeout.start(3000)  # 3 second timeout
-                self.pending_response = True
-            else:
-                self._log("Failed to send frame", "error")
+            future = self.can_interface.uds.request(address, data)
+            future.add_done_callback(self._on_uds_response)
         except Exception as e:
             self._log(f"Error sending frame: {e}", "error")
     
@@ -942,8 +949,9 @@ class KeyToolsTab(QWidget):
         else:
             self.auto_scroll_check.setText("📜 Auto-Scroll: OFF")
     
-    def set_can_interface(self, interface: CANInterface):
+    def set_can_interface(self, interface: BusHub):
         """Set the CAN interface (called from main window)."""
+        self._disconnect_signals()
         self.can_interface = interface
         self._connect_signals()
 
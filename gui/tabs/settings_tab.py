@@ -21,7 +21,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 
-from backend.can_interface import CANInterface
+from backend.bus_hub import BusHub
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +55,7 @@ class SettingsTab(QWidget):
                "tester_present_interval": 2000, "response_timeout": 3000}
     }
     
-    def __init__(self, can_interface: Optional[CANInterface] = None):
+    def __init__(self, can_interface: Optional[BusHub] = None):
         super().__init__()
         self.can_interface = can_interface
         self.settings = self.DEFAULT_SETTINGS.copy()
@@ -239,7 +239,7 @@ class SettingsTab(QWidget):
             self._populate_fields()
             self.status_label.setText("[Refresh] Settings reset to defaults")
     
-    def set_can_interface(self, interface: CANInterface):
+    def set_can_interface(self, interface: BusHub):
         self.can_interface = interface
 
 
@@ -92,8 +92,8 @@ except Exception as e:
     SettingsTab = None
 
 # Import backend
-from backend.can_interface import CANInterface
-print("[DEBUG] CANInterface imported OK")
+from backend.bus_hub import BusHub
+print("[DEBUG] BusHub imported OK")
 
 # Configure logging
 logging.basicConfig(
@@ -130,8 +130,9 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("CANAI PRO - CyberNinja Edition")
         
-        # Create shared CAN interface - slow simulation for stability
-        self.can_interface = CANInterface(simulate=True, reconnect_attempts=3, sim_interval=1.0)
+        # One bus hub shared by every tab - slow simulation for stability
+        self.bus_hub = BusHub(parent=self)
+        self.bus_hub.set_reconnect_attempts(3)
         
         # Tab references
         self.can_monitor_tab = None
@@ -147,7 +148,7 @@ class MainWindow(QMainWindow):
         self._apply_theme()
         
         # DON'T auto-start simulation - prevents UI freeze
-        # self.can_interface.start()
+        # self.bus_hub.start()
         
         logger.info("[MainWindow] CyberNinja CanAI Pro initialized")
     
@@ -175,7 +176,7 @@ class MainWindow(QMainWindow):
         # Create tabs with error handling
         print("[DEBUG] Creating CAN Monitor tab...")
         try:
-            self.can_monitor_tab = CANMonitorTab()
+            self.can_monitor_tab = CANMonitorTab(self.bus_hub)
             print("[DEBUG] CAN Monitor tab OK")
         except Exception as e:
             print(f"[ERROR] CAN Monitor tab failed: {e}")
@@ -184,7 +185,7 @@ class MainWindow(QMainWindow):
         
         print("[DEBUG] Creating Key Tools tab...")
         try:
-            self.key_tools_tab = KeyToolsTab(self.can_interface)
+            self.key_tools_tab = KeyToolsTab(self.bus_hub)
             print("[DEBUG] Key Tools tab OK")
         except Exception as e:
             print(f"[ERROR] Key Tools tab failed: {e}")
@@ -193,7 +194,7 @@ class MainWindow(QMainWindow):
         
         print("[DEBUG] Creating Diagnostics tab...")
         try:
-            self.diagnostics_tab = DiagnosticsTab(self.can_interface)
+            self.diagnostics_tab = DiagnosticsTab(self.bus_hub)
             print("[DEBUG] Diagnostics tab OK")
         except Exception as e:
             print(f"[ERROR] Diagnostics tab failed: {e}")
@@ -202,7 +203,7 @@ class MainWindow(QMainWindow):
         
         print("[DEBUG] Creating ECU Flash tab...")
         try:
-            self.ecu_flash_tab = ECUFlashTab(self.can_interface)
+            self.ecu_flash_tab = ECUFlashTab(self.bus_hub)
             print("[DEBUG] ECU Flash tab OK")
         except Exception as e:
             print(f"[ERROR] ECU Flash tab failed: {e}")
@@ -220,7 +221,7 @@ class MainWindow(QMainWindow):
         
         print("[DEBUG] Creating Settings tab...")
         try:
-            self.settings_tab = SettingsTab(self.can_interface)
+            self.settings_tab = SettingsTab(self.bus_hub)
             print("[DEBUG] Settings tab OK")
         except Exception as e:
             print(f"[ERROR] Settings tab failed: {e}")
@@ -418,8 +419,8 @@ class MainWindow(QMainWindow):
     
     def _update_status(self):
         """Update status bar info."""
-        if self.can_interface:
-            count = self.can_interface.get_frame_count()
+        if self.bus_hub:
+            count = self.bus_hub.get_frame_count()
             self.frame_count_label.setText(f"Frames: {count:,}")
     
     def _new_session(self):
@@ -432,9 +433,7 @@ class MainWindow(QMainWindow):
     
     def _toggle_simulation(self):
         """Toggle simulation mode."""
-        self.can_interface.stop()
-        self.can_interface = CANInterface(simulate=True)
-        self.can_interface.start()
+        self.bus_hub.use_simulation()
         self.conn_indicator.setText("SIMULATION")
         self.interface_label.setText("Interface: Simulation")
         logger.info("Simulation mode activated")
@@ -451,11 +450,8 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close."""
-        if self.can_interface:
-            self.can_interface.stop()
-        
-        if self.can_monitor_tab and hasattr(self.can_monitor_tab, 'can_interface'):
-            self.can_monitor_tab.can_interface.stop()
+        if self.bus_hub:
+            self.bus_hub.stop()
         
         logger.info("[MainWindow] CanAI Pro closed")
         event.accept()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# test_dbc.py - Regression checks for utils/dbc.py against a bit-by-bit reference decoder
+
+import logging
+import math
+import random
+import struct
+import sys
+
+from backend.frame import CANFrame, FLAG_EXTENDED
+from utils.dbc import parse_dbc
+
+logging.disable(logging.WARNING)   # The skipped-signal checks log on purpose
+
+DBC = '''
+BO_ 256 Engine: 8 ECU
+ SG_ RPM : 0|16@1+ (0.25,0) [0|16383.75] "rpm" GW
+ SG_ Coolant : 16|8@1- (1,-40) [-40|215] "degC" GW
+ SG_ Torque : 31|12@0- (0.5,0) [-1024|1023.5] "Nm" GW
+ SG_ Flags : 35|3@0+ (1,0) [0|7] "" GW
+ SG_ Gear : 40|4@1+ (1,0) [0|15] "" GW
+ SG_ Odo : 55|16@0+ (0.1,0) [0|6553.5] "km" GW
+
+BO_ 2566844913 Trailer: 8 TCU
+ SG_ Load : 3|13@1- (0.5,100) [0|0] "kg" GW
+ SG_ Axle : 22|7@0+ (1,0) [0|127] "" GW
+
+BO_ 512 Floats: 8 ECU
+ SG_ SingleIntel : 0|32@1- (1,0) [0|0] "" GW
+ SG_ SingleMotorola : 39|32@0- (2,1) [0|0] "" GW
+
+BO_ 513 Double: 8 ECU
+ SG_ Value : 0|64@1- (1,0) [0|0] "" GW
+
+BO_ 514 Wide: 8 ECU
+ SG_ Signed64 : 0|64@1- (1,0) [0|0] "" GW
+
+BO_ 515 WideMotorola: 8 ECU
+ SG_ Unsigned64 : 7|64@0+ (1,0) [0|0] "" GW
+
+BO_ 768 Mux: 8 ECU
+ SG_ Page M : 0|4@1+ (1,0) [0|15] "" GW
+ SG_ A m0 : 8|16@1+ (0.1,0) [0|0] "V" GW
+ SG_ B m1 : 15|16@0- (1,0) [0|0] "" GW
+ SG_ C m2 : 16|12@1- (0.5,-10) [0|0] "" GW
+ SG_ Common : 56|8@1+ (1,0) [0|255] "" GW
+
+SIG_VALTYPE_ 512 SingleIntel : 1;
+SIG_VALTYPE_ 512 SingleMotorola : 1;
+SIG_VALTYPE_ 513 Value : 2;
+'''
+
+FLOAT_FORMATS = {32: "<f", 64: "<d"}
+
+
+def reference_decode(message, data: bytes) -> dict:
+    """Gather each signal's bits one at a time; signals not wholly inside ``data`` are absent."""
+    mux = None
+    values = {}
+    for signal in sorted(message.signals, key=lambda s: not s.is_multiplexer):
+        if signal.mux_value is not None and signal.mux_value != mux:
+            continue
+        bits = []
+        bit = signal.start_bit
+        for _ in range(signal.length):
+            bits.append(bit)
+            if signal.little_endian:
+                bit += 1
+            else:
+                bit = bit - 1 if bit % 8 else bit + 15
+        if max(b // 8 for b in bits) >= len(data):
+            continue
+        raw = 0
+        if signal.little_endian:
+            for i, b in enumerate(bits):
+                raw |= ((data[b // 8] >> (b % 8)) & 1) << i
+        else:
+            for b in bits:
+                raw = (raw << 1) | ((data[b // 8] >> (b % 8)) & 1)
+        if signal.float_format:
+            raw = struct.unpack(FLOAT_FORMATS[signal.length], raw.to_bytes(signal.length // 8, "little"))[0]
+        elif signal.signed and raw & (1 << (signal.length - 1)):
+            raw -= 1 << signal.length
+        if signal.is_multiplexer:
+            mux = raw
+        values[signal.name] = raw * signal.scale + signal.offset
+    return values
+
+
+def same(a, b) -> bool:
+    """Equal values, with NaN (random float bits) equal to NaN."""
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def same_values(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+
+
+def capture(db, count: int = 600, seed: int = 1):
+    """Random frames of every message, mux pages 0-3 (3 selects no signal)."""
+    rng = random.Random(seed)
+    messages = list(db.messages.values())
+    frames = []
+    for i in range(count):
+        message = messages[i % len(messages)]
+        data = bytearray(rng.randrange(256) for _ in range(message.size))
+        if message.name == "Mux":
+            data[0] = (data[0] & 0xF0) | rng.randrange(4)
+        flags = FLAG_EXTENDED if message.extended else 0
+        frames.append(CANFrame(message.frame_id, bytes(data), i * 1_000_000, flags))
+    return frames
+
+
+def test_parse():
+    db = parse_dbc(DBC)
+    assert len(db) == 7
+    trailer = db.message(CANFrame(0x18FEF1F1, bytes(8), 0, FLAG_EXTENDED))
+    assert trailer is not None and trailer.name == "Trailer" and trailer.extended
+    assert db.message(CANFrame(0x18FEF1F1 & 0x7FF, bytes(8))) is None
+    assert [s.float_format for s in db.by_name("Floats").signals] == ["<f", "<f"]
+    assert db.by_name("Double").signal("Value").float_format == "<d"
+    mux = db.by_name("Mux")
+    assert mux.multiplexer.name == "Page" and [s.mux_value for s in mux.signals] == [None, 0, 1, 2, None]
+
+
+def test_per_frame_matches_reference():
+    db = parse_dbc(DBC)
+    for frame in capture(db, 3000):
+        message = db.message(frame)
+        expected = reference_decode(message, frame.payload)
+        assert same_values(db.decode(frame), expected), (message.name, frame.payload.hex(), expected)
+
+
+def test_known_values():
+    db = parse_dbc(DBC)
+    engine = db.by_name("Engine")
+    # RPM 0x1F40 * 0.25, Coolant -1 - 40, Torque 0x800 (signed -2048) * 0.5 from byte 3-4
+    values = engine.decode(bytes([0x40, 0x1F, 0xFF, 0x80, 0x00, 0x03, 0x01, 0x02]))
+    assert values["RPM"] == 2000.0 and values["Coolant"] == -41.0 and values["Torque"] == -1024.0
+    assert values["Gear"] == 3 and values["Odo"] == 25.8
+    floats = db.by_name("Floats")
+    data = struct.pack("<f", -1.5) + struct.pack(">f", 2.25)
+    assert floats.decode(data) == {"SingleIntel": -1.5, "SingleMotorola": 2.25 * 2 + 1}
+    assert db.by_name("Double").decode(struct.pack("<d", math.pi)) == {"Value": math.pi}
+    assert db.by_name("Wide").decode(b"\xff" * 8) == {"Signed64": -1}
+    assert db.by_name("WideMotorola").decode(b"\x80" + bytes(7)) == {"Unsigned64": 1 << 63}
+    mux = db.by_name("Mux")
+    assert mux.decode(bytes([0x01, 0xFF, 0xFE] + [0] * 4 + [9])) == {"Page": 1, "B": -2, "Common": 9}
+    assert mux.decode(bytes([0x03] + [0xFF] * 6 + [9])) == {"Page": 3, "Common": 9}
+
+
+def test_short_frames_decode_what_they_hold():
+    db = parse_dbc(DBC)
+    rng = random.Random(2)
+    for message in db.messages.values():
+        for size in range(message.size):
+            data = bytes(rng.randrange(256) for _ in range(size))
+            expected = reference_decode(message, data)
+            assert same_values(message.decode(data), expected), (message.name, size)
+    assert db.by_name("Engine").decode(b"\x40\x1F") == {"RPM": 2000.0}
+
+
+def test_signals_that_do_not_fit_are_skipped():
+    db = parse_dbc('''
+BO_ 100 Small: 2 ECU
+ SG_ Fits : 0|16@1+ (1,0) [0|0] "" GW
+ SG_ TooLong : 8|16@1+ (1,0) [0|0] "" GW
+ SG_ BadFloat : 0|16@1- (1,0) [0|0] "" GW
+
+SIG_VALTYPE_ 100 BadFloat : 1;
+''')
+    assert [s.name for s in db.by_name("Small").signals] == ["Fits"]
+
+
+def test_decode_capture_matches_per_frame():
+    """Columns from decode_capture (NumPy or per-frame path) against per-frame decoding."""
+    db = parse_dbc(DBC)
+    frames = capture(db)
+    frames.append(CANFrame(0x100, b"\x40\x1F", 10**12))   # A short frame sends Engine down the per-frame path
+    columns = db.decode_capture(frames)
+    assert set(columns) == {m.name for m in db.messages.values()}
+    for name, message_columns in columns.items():
+        message = db.by_name(name)
+        group = [f for f in frames if db.message(f) is message]
+        assert list(message_columns["time"]) == [f.ts_ns / 1e9 for f in group]
+        for signal in message.signals:
+            column = list(message_columns[signal.name])
+            assert len(column) == len(group)
+            for frame, value in zip(group, column):
+                expected = reference_decode(message, frame.payload).get(signal.name)
+                if expected is None:
+                    assert value is None or math.isnan(value), (name, signal.name)
+                else:
+                    assert same(float(value), float(expected)), (name, signal.name, frame.payload.hex())
+
+
+def test_decode_array_matches_per_frame():
+    try:
+        import numpy as np
+    except ImportError:
+        print("        (numpy not installed, skipped)")
+        return
+    db = parse_dbc(DBC)
+    frames = capture(db, 2000, seed=3)
+    for message in db.messages.values():
+        group = [f for f in frames if db.message(f) is message]
+        payloads = np.frombuffer(b"".join(f.payload for f in group), dtype=np.uint8).reshape(len(group), message.size)
+        columns = message.decode_array(payloads)
+        for signal in message.signals:
+            for frame, value in zip(group, columns[signal.name]):
+                expected = reference_decode(message, frame.payload).get(signal.name)
+                if expected is None:
+                    assert math.isnan(value), (message.name, signal.name)
+                else:
+                    # Signals wider than 53 bits are rounded once by the float64 column, as per frame
+                    assert same(float(value), float(expected)), (message.name, signal.name, frame.payload.hex())
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok      {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAILED  {name} {e!r}")
+    print(f"{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
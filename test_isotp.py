@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# test_isotp.py - Regression checks for backend/isotp.py (plain asserts; pytest collects them too)
+
+import logging
+import sys
+from collections import deque
+
+from backend.frame import CANFrame, FLAG_TX
+from backend.isotp import (FC_OVERFLOW, FC_WAIT, IsoTpAddress, IsoTpChannel, IsoTpConfig,
+                           IsoTpError)
+
+logging.disable(logging.WARNING)   # Failures are asserted through on_error
+
+TESTER = IsoTpAddress.normal(0x7E0, 0x7E8)
+ECU = IsoTpAddress.normal(0x7E8, 0x7E0)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self) -> int:
+        return self.now
+
+
+def received(frame: CANFrame) -> CANFrame:
+    """What the other end sees of a frame we sent."""
+    return CANFrame(frame.arb_id, frame.payload, frame.ts_ns, frame.flags & ~FLAG_TX)
+
+
+class Bus:
+    """
+    A tester and an ECU channel wired back to back. Frames are queued and
+    delivered by pump() once the sending call has returned, as on a real bus.
+    """
+
+    def __init__(self, tester=TESTER, ecu=ECU, max_message=4095):
+        self.wire, self.messages, self.errors = [], [], []
+        self._pending = deque()
+        clock = Clock()
+        self.ecu = IsoTpChannel(ecu, lambda f: self._queue(f, self.tester), IsoTpConfig(max_message=max_message),
+                                on_message=lambda m: self.messages.append(bytes(m)),
+                                on_error=self.errors.append, clock=clock)
+        self.tester = IsoTpChannel(tester, lambda f: self._queue(f, self.ecu),
+                                   on_error=self.errors.append, clock=clock)
+
+    def _queue(self, frame: CANFrame, to: IsoTpChannel) -> None:
+        self.wire.append(frame)
+        self._pending.append((to, received(frame)))
+
+    def pump(self) -> None:
+        while self._pending:
+            to, frame = self._pending.popleft()
+            to.on_frame(frame)
+
+    def send(self, message: bytes) -> None:
+        self.tester.send(message)
+        self.pump()
+
+
+def test_single_first_consecutive_round_trip():
+    for size in (7, 8, 62, 4095, 4096, 70000):
+        bus = Bus(max_message=70000)
+        message = bytes(i * 7 & 0xFF for i in range(size))
+        bus.send(message)
+        assert bus.messages == [message] and not bus.errors and not bus.tester.busy, size
+        first = bus.wire[0].payload
+        if size <= 7:
+            assert first[0] == size and len(bus.wire) == 1
+        elif size <= 4095:
+            assert first[0] >> 4 == 1 and ((first[0] & 0x0F) << 8 | first[1]) == size
+        else:
+            assert first[:2] == b"\x10\x00" and int.from_bytes(first[2:6], "big") == size
+
+
+def test_sequence_number_wraps():
+    bus = Bus()
+    bus.send(bytes(200))
+    cfs = [f.payload[0] for f in bus.wire if f.arb_id == TESTER.tx_id and f.payload[0] >> 4 == 2]
+    assert [pci & 0x0F for pci in cfs[:18]] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 0, 1, 2]
+    assert bus.messages == [bytes(200)] and not bus.errors
+
+
+def test_wrong_sequence_number_fails():
+    bus = Bus()
+    for payload in (b"\x10\x14" + bytes(6), b"\x21" + bytes(7), b"\x23" + bytes(7)):
+        bus.ecu.on_frame(CANFrame(ECU.rx_id, payload))
+    assert not bus.messages and len(bus.errors) == 1 and "sequence" in str(bus.errors[0])
+    assert not bus.ecu.receiving
+
+
+def test_flow_control_wait_then_continue():
+    wire, errors = [], []
+    tester = IsoTpChannel(TESTER, wire.append, on_error=errors.append, clock=Clock())
+    tester.send(bytes(20))
+    for _ in range(3):
+        tester.on_frame(CANFrame(TESTER.rx_id, bytes([0x30 | FC_WAIT, 0, 0])))
+    assert tester.busy and len(wire) == 1
+    tester.on_frame(CANFrame(TESTER.rx_id, b"\x30\x00\x00"))
+    assert not tester.busy and len(wire) == 3 and not errors
+
+
+def test_flow_control_too_many_waits():
+    errors = []
+    tester = IsoTpChannel(TESTER, lambda f: None, IsoTpConfig(max_wait_frames=2),
+                          on_error=errors.append, clock=Clock())
+    tester.send(bytes(20))
+    for _ in range(3):
+        tester.on_frame(CANFrame(TESTER.rx_id, bytes([0x30 | FC_WAIT, 0, 0])))
+    assert not tester.busy and len(errors) == 1 and "WAIT" in str(errors[0])
+
+
+def test_flow_control_overflow():
+    errors = []
+    tester = IsoTpChannel(TESTER, lambda f: None, on_error=errors.append, clock=Clock())
+    tester.send(bytes(20))
+    tester.on_frame(CANFrame(TESTER.rx_id, bytes([0x30 | FC_OVERFLOW, 0, 0])))
+    assert not tester.busy and isinstance(errors[0], IsoTpError) and "overflow" in str(errors[0])
+
+    # Receiving side: a first frame longer than the buffer is answered with FC OVFLW
+    bus = Bus(max_message=100)
+    bus.send(bytes(101))
+    assert bus.wire[1].arb_id == ECU.tx_id and bus.wire[1].payload[0] == 0x30 | FC_OVERFLOW
+    assert not bus.messages and not bus.tester.busy and len(bus.errors) == 2
+
+
+def test_extended_address_prefix():
+    tester_address = IsoTpAddress.extended(0x6F1, 0x612, target=0x12, source=0xF1)
+    ecu_address = IsoTpAddress.extended(0x612, 0x6F1, target=0xF1, source=0x12)
+    bus = Bus(tester_address, ecu_address)
+    bus.send(bytes(range(30)))
+    assert bus.messages == [bytes(range(30))] and not bus.errors
+    assert all(f.payload[0] == (0x12 if f.arb_id == 0x6F1 else 0xF1) for f in bus.wire)
+    assert bus.wire[0].payload[1] >> 4 == 1 and bus.wire[1].payload[1] >> 4 == 3   # PCI after the prefix
+
+    # A single frame for another ECU on the same CAN ID is ignored
+    bus.ecu.on_frame(CANFrame(0x6F1, b"\x40\x02\x3E\x00" + bytes(4)))
+    bus.ecu.on_frame(CANFrame(0x6F1, b"\x12\x02\x3E\x00" + bytes(4)))
+    assert bus.messages[1:] == [b"\x3E\x00"]
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok      {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAILED  {name} {e!r}")
+    print(f"{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
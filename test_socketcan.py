@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# test_socketcan.py - Regression checks for backend/socketcan.py (the vcan check needs vcan0, see its docstring)
+
+import socket
+import sys
+import threading
+import time
+
+from backend.capture_filter import CaptureFilter
+from backend.frame import FLAG_EXTENDED, FLAG_TX
+from backend.socketcan import SocketCANBus, decode_frame, encode_frame
+
+VCAN = "vcan0"
+
+
+def datagram_bus():
+    """A SocketCANBus on one end of a datagram socketpair (the receive path without AF_CAN)."""
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    ours.setblocking(False)   # As SocketCANBus.open() leaves a CAN socket
+    bus = SocketCANBus("pair")
+    bus._sock = ours
+    return bus, theirs
+
+
+def test_frame_records_round_trip():
+    for arb_id, data, extended in ((0x7E8, b"\x02\x10\x03", False), (0x18DAF110, bytes(8), True),
+                                   (0x123, bytes(range(64)), False)):
+        frame = decode_frame(encode_frame(arb_id, data, extended), 1)
+        assert (frame.arb_id, bytes(frame.payload)) == (arb_id, data)
+        assert bool(frame.flags & FLAG_EXTENDED) == extended
+
+
+def test_drain_does_not_wait_for_more_frames():
+    bus, peer = datagram_bus()
+    count, gap = 50, 0.010
+
+    def trickle():
+        for i in range(count):
+            peer.send(encode_frame(0x100 + i, bytes([i])))
+            time.sleep(gap)
+
+    sender = threading.Thread(target=trickle)
+    sender.start()
+    frames, slowest = [], 0.0
+    deadline = time.monotonic() + 5
+    while len(frames) < count and time.monotonic() < deadline:
+        t0 = time.monotonic()
+        frames += bus.recv_batch(0.5)
+        slowest = max(slowest, time.monotonic() - t0)
+    sender.join()
+    assert [f.arb_id for f in frames] == [0x100 + i for i in range(count)]
+    # A call returns once the queue is empty: at most one gap of waiting, never the full timeout
+    assert slowest < 5 * gap, f"recv_batch took {slowest * 1000:.0f} ms"
+
+    # A backlog comes back in one batch, capped at max_frames
+    for i in range(20):
+        peer.send(encode_frame(0x200, bytes([i])))
+    assert len(bus.recv_batch(0.5, max_frames=15)) == 15
+    assert len(bus.recv_batch(0.5)) == 5
+    t0 = time.monotonic()
+    assert bus.recv_batch(0.05) == [] and time.monotonic() - t0 >= 0.04
+    bus.close()
+    peer.close()
+
+
+def test_vcan_filter_and_latency():
+    if VCAN not in SocketCANBus.list_interfaces():
+        print(f"        ({VCAN} not present, skipped)")
+        return
+    rx = SocketCANBus(VCAN)
+    tx = SocketCANBus(VCAN, fd=False)
+    rx.open()
+    tx.open()
+    try:
+        rx.set_filter(CaptureFilter.diagnostic())
+        tx.send(0x123, b"\x00")                 # Outside the filter
+        tx.send(0x7E8, b"\x02\x50\x03")
+        tx.send(0x18DAF110, b"\x01\x02", extended=True)
+        frames = []
+        deadline = time.monotonic() + 1
+        while len(frames) < 2 and time.monotonic() < deadline:
+            frames += rx.recv_batch(0.1)
+        assert [(f.arb_id, bool(f.flags & FLAG_EXTENDED)) for f in frames] == [(0x7E8, False), (0x18DAF110, True)]
+        assert not any(f.flags & FLAG_TX for f in frames)
+        assert bytes(frames[0].payload) == b"\x02\x50\x03"
+
+        # Frames trickling in are handed over as they come, not after the timeout
+        t0 = time.monotonic()
+        for _ in range(5):
+            tx.send(0x7E8, bytes(8))
+            time.sleep(0.010)
+            rx.recv_batch(0.5)
+        assert time.monotonic() - t0 < 0.25
+        own = tx.recv_batch(0.1)   # The sender gets its own frames back, marked TX
+        assert own and all(f.flags & FLAG_TX for f in own)
+    finally:
+        rx.close()
+        tx.close()
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok      {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAILED  {name} {e!r}")
+    print(f"{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# test_uds_client.py - Regression checks for backend/uds_client.py against simulated ECUs
+
+import logging
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from backend.dispatcher import FrameDispatcher
+from backend.frame import CANFrame, FLAG_TX
+from backend.isotp import IsoTpAddress, IsoTpChannel
+from backend.uds_client import UDSClient, UDSResponse, UDSTimeoutError
+
+logging.disable(logging.WARNING)
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+
+def received(frame: CANFrame) -> CANFrame:
+    return CANFrame(frame.arb_id, frame.payload, time.monotonic_ns(), frame.flags & ~FLAG_TX)
+
+
+class FakeHub:
+    """What UDSClient uses of a BusHub; frames reach the other side on the next event loop pass."""
+
+    def __init__(self):
+        self.dispatcher = FrameDispatcher()
+        self.ecus = {}       # Request ID -> FakeEcu
+        self.log = []        # (monotonic s, "tx"/"rx", request or response ID, first payload bytes)
+
+    def is_running(self) -> bool:
+        return True
+
+    def send_frame(self, frame: CANFrame) -> bool:
+        self.log.append((time.monotonic(), "tx", frame.arb_id, bytes(frame.payload[:4])))
+        ecu = self.ecus.get(frame.arb_id)
+        if ecu is not None:
+            QTimer.singleShot(0, lambda: ecu.channel.on_frame(received(frame)))
+        return True
+
+    def deliver(self, frame: CANFrame) -> None:
+        self.log.append((time.monotonic(), "rx", frame.arb_id, bytes(frame.payload[:4])))
+        QTimer.singleShot(0, lambda: self.dispatcher.dispatch([received(frame)]))
+
+
+class FakeEcu:
+    """Answers requests on ``tx_id`` through ``handler(request) -> [(delay ms, response), ...]``."""
+
+    def __init__(self, hub: FakeHub, tx_id: int, handler):
+        self.requests = []
+        self.handler = handler
+        self.channel = IsoTpChannel(IsoTpAddress.normal(tx_id + 8, tx_id), hub.deliver,
+                                    on_message=self._on_request)
+        hub.ecus[tx_id] = self
+
+    def _on_request(self, message) -> None:
+        request = bytes(message)
+        self.requests.append(request)
+        for delay_ms, response in self.handler(request):
+            QTimer.singleShot(delay_ms, lambda r=response: self.channel.send(r))
+
+
+def positive(request: bytes) -> bytes:
+    return bytes([request[0] + 0x40]) + request[1:3] + b"\x01\x02"
+
+
+def wait(*futures, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not all(f.done() for f in futures) and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    assert all(f.done() for f in futures), "Futures still pending"
+
+
+def test_response_pending_extends_p2():
+    hub = FakeHub()
+    FakeEcu(hub, 0x7E0, lambda r: [(0, b"\x7F" + r[:1] + b"\x78"), (300, positive(r))])
+    client = UDSClient(hub)
+    client.set_timing(0x7E0, 0.1, 2.0)
+    future = client.read_did(0x7E0, 0xF190)
+    wait(future)
+    response = future.result()
+    assert isinstance(response, UDSResponse) and response.pending_count == 1
+    assert response.data == b"\x01\x02" and response.elapsed >= 0.25
+
+    # Without NRC 0x78 the same delay is a P2 timeout
+    hub = FakeHub()
+    FakeEcu(hub, 0x7E0, lambda r: [(300, positive(r))])
+    client = UDSClient(hub)
+    client.set_timing(0x7E0, 0.1, 2.0)
+    future = client.read_did(0x7E0, 0xF190)
+    wait(future)
+    assert isinstance(future.exception(), UDSTimeoutError)
+
+
+def test_duplicate_requests_coalesce():
+    hub = FakeHub()
+    ecu = FakeEcu(hub, 0x7E0, lambda r: [(20, positive(r))])
+    client = UDSClient(hub)
+    first = client.read_did(0x7E0, 0xF190)
+    assert client.read_did(0x7E0, 0xF190) is first
+    assert client.request(IsoTpAddress.normal(0x7E0, 0x7E8), b"\x22\xF1\x90") is first
+    other = client.read_did(0x7E0, 0xF18C)
+    assert other is not first
+    wait(first, other)
+    assert ecu.requests == [b"\x22\xF1\x90", b"\x22\xF1\x8C"]
+    assert first.result().did == 0xF190 and other.result().did == 0xF18C
+    # Once answered, the same request goes to the ECU again
+    again = client.read_did(0x7E0, 0xF190)
+    assert again is not first
+    wait(again)
+    assert len(ecu.requests) == 3
+
+
+def test_suppressed_positive_response_resolves_none():
+    hub = FakeHub()
+    ecu = FakeEcu(hub, 0x7E0, lambda r: [])
+    client = UDSClient(hub)
+    future = client.tester_present(0x7E0, suppress=True)
+    wait(future, timeout=0.5)
+    assert future.result() is None and client.pending_count() == 0
+    follow_up = client.read_did(0x7E0, 0xF190)   # The ECU is free for the next request at once
+    ecu.handler = lambda r: [(0, positive(r))]
+    wait(follow_up)
+    assert ecu.requests == [b"\x3E\x80", b"\x22\xF1\x90"]
+
+
+def test_requests_to_different_ecus_overlap():
+    hub = FakeHub()
+    delay_ms = 200
+    ecus = [FakeEcu(hub, tx_id, lambda r: [(delay_ms, positive(r))]) for tx_id in (0x7E0, 0x7E1, 0x7E2)]
+    client = UDSClient(hub)
+    for ecu in ecus:
+        client.set_timing(ecu.channel.address.rx_id, 1.0, 5.0)
+    t0 = time.monotonic()
+    futures = [client.read_did(tx_id, 0xF190) for tx_id in (0x7E0, 0x7E1, 0x7E2)]
+    wait(*futures)
+    elapsed = time.monotonic() - t0
+    assert all(f.result().payload[:3] == b"\x62\xF1\x90" for f in futures)
+    assert [f.result().ecu.tx_id for f in futures] == [0x7E0, 0x7E1, 0x7E2]
+    assert all(len(ecu.requests) == 1 for ecu in ecus)
+    # All three requests were on the bus before the first answer came back
+    first_rx = next(i for i, entry in enumerate(hub.log) if entry[1] == "rx")
+    assert sorted(entry[2] for entry in hub.log[:first_rx]) == [0x7E0, 0x7E1, 0x7E2]
+    assert elapsed < 2 * delay_ms / 1000
+
+    # Two requests to one ECU still go one at a time
+    hub.log.clear()
+    futures = [client.read_did(0x7E0, 0xF190), client.read_did(0x7E0, 0xF18C)]
+    wait(*futures)
+    assert [entry[1] for entry in hub.log] == ["tx", "rx", "tx", "rx"]
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok      {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAILED  {name} {e!r}")
+    print(f"{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
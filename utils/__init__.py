@@ -1,3 +1,5 @@
 # utils/__init__.py
-from .uds_decoder import decode_uds, DID_LOOKUP, load_did_config
+from .uds_decoder import decode_uds, decode_many, annotate_frames, frame_text
+from .did_registry import DID_REGISTRY, DidRegistry, DidSpec, load_did_config
+from .dbc import DbcDatabase, DbcMessage, DbcSignal, load_dbc, parse_dbc
 from .hex_validator import HexValidator, HexBytesValidator
@@ -0,0 +1,348 @@
+# utils/dbc.py
+
+"""
+Description:
+DBC signal databases: import and decode CAN frames into named signals.
+
+load_dbc parses the BO_ / SG_ / VAL_ / SIG_VALTYPE_ sections of a DBC file and
+compiles every signal into one shift, one mask and a scale/offset: the payload
+is read as a little-endian integer (Intel signals) and a big-endian integer
+(Motorola signals) once per frame, and each signal is then a shift-and-mask of
+one of them. Multiplexed messages decode their multiplexer first and keep
+only the signals of that multiplexer value (simple multiplexing; extended
+SG_MUL_VAL_ multiplexing is not supported).
+
+DbcMessage.decode serves per-frame decoding (CAN monitor table, with text
+cached per payload); DbcDatabase.decode_capture decodes a whole capture into
+per-signal columns, over NumPy arrays when NumPy is installed.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import logging
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.frame import CANFrame, FLAG_EXTENDED
+from utils.did_registry import scale_decimals
+
+logger = logging.getLogger(__name__)
+
+DBC_EXTENDED_BIT = 0x80000000    # Set on extended (29-bit) IDs in BO_ lines
+TEXT_CACHE_SIZE = 65536          # Distinct (ID, payload) texts kept per database
+NUMPY_MAX_BYTES = 8              # Messages up to 8 bytes decode through one uint64 per frame
+
+_MESSAGE_RE = re.compile(r'^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\S+)', re.M)
+_SIGNAL_RE = re.compile(
+    r'^\s*SG_\s+(\w+)\s*(M|m\d+M?)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*'
+    r'\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)\s*\[\s*([^|\s]*)\s*\|\s*([^\]\s]*)\s*\]\s*"([^"]*)"\s*(.*)$')
+_VALUES_RE = re.compile(r'^VAL_\s+(\d+)\s+(\w+)\s+((?:-?\d+\s+"[^"]*"\s*)*);', re.M)
+_VALUE_PAIR_RE = re.compile(r'(-?\d+)\s+"([^"]*)"')
+_VALTYPE_RE = re.compile(r'^SIG_VALTYPE_\s+(\d+)\s+(\w+)\s*:?\s*([12])\s*;', re.M)
+_FLOAT_FORMATS = {(1, 32): "<f", (2, 64): "<d"}   # SIG_VALTYPE_ 1 = IEEE single, 2 = double
+
+# ----------------------------------------------------------------------------------
+# 2) DbcSignal & DbcMessage Classes
+# ----------------------------------------------------------------------------------
+@dataclass
+class DbcSignal:
+    """One SG_ line. ``start_bit`` is the LSB (Intel) or MSB (Motorola) in DBC numbering."""
+    name: str
+    start_bit: int
+    length: int
+    little_endian: bool = True
+    signed: bool = False
+    scale: float = 1.0
+    offset: float = 0.0
+    minimum: float = 0.0
+    maximum: float = 0.0
+    unit: str = ""
+    is_multiplexer: bool = False
+    mux_value: Optional[int] = None    # Only present when the multiplexer has this value
+    float_format: str = ""             # struct format of IEEE float signals
+    choices: Dict[int, str] = field(default_factory=dict)   # VAL_ table
+
+    def lsb(self, size: int) -> int:
+        """Bit position of the LSB in the message read as an integer of ``size`` bytes."""
+        if self.little_endian:
+            return self.start_bit
+        msb = (size - 1 - self.start_bit // 8) * 8 + self.start_bit % 8
+        return msb - self.length + 1
+
+    def end_byte(self, size: int) -> int:
+        """Payload bytes needed to hold the signal."""
+        lsb = self.lsb(size)
+        if self.little_endian:
+            return (lsb + self.length - 1) // 8 + 1
+        return size - lsb // 8
+
+    def format(self, value: float) -> str:
+        text = self.choices.get(int(value)) if self.choices and value == int(value) else None
+        if text is None:
+            if self.float_format:
+                text = f"{value:g}"
+            elif self.scale == int(self.scale) and self.offset == int(self.offset):
+                text = f"{value:.0f}"
+            else:
+                text = f"{value:.{max(scale_decimals(self.scale), scale_decimals(self.offset))}f}"
+            if self.unit:
+                text += f" {self.unit}"
+        return f"{self.name}={text}"
+
+class DbcMessage:
+    """One BO_ message with its signals compiled into shift/mask extractors."""
+
+    def __init__(self, frame_id: int, name: str, size: int, extended: bool = False,
+                 sender: str = "", signals: Iterable[DbcSignal] = ()):
+        self.frame_id = frame_id
+        self.name = name
+        self.size = size
+        self.extended = extended
+        self.sender = sender
+        self.signals: List[DbcSignal] = []
+        self.multiplexer: Optional[DbcSignal] = None
+        self._extractors: List[tuple] = []
+        self._mux: Optional[tuple] = None
+        self._big = self._little = False
+        for signal in signals:
+            self.add_signal(signal)
+
+    def add_signal(self, signal: DbcSignal) -> None:
+        """Compile and add ``signal``. Raises ValueError when it does not fit the message."""
+        lsb = signal.lsb(self.size)
+        if signal.length < 1 or lsb < 0 or lsb + signal.length > self.size * 8:
+            raise ValueError(f"{self.name}.{signal.name} does not fit {self.size} bytes")
+        if signal.float_format and (signal.length, signal.float_format) not in ((32, "<f"), (64, "<d")):
+            raise ValueError(f"{self.name}.{signal.name}: {signal.length}-bit float")
+        extractor = (signal.name, not signal.little_endian, lsb, (1 << signal.length) - 1,
+                     1 << (signal.length - 1) if signal.signed else 0, signal.scale, signal.offset,
+                     signal.end_byte(self.size), signal.mux_value, signal.float_format, signal.length // 8)
+        self.signals.append(signal)
+        self._extractors.append(extractor)
+        if signal.is_multiplexer:
+            self.multiplexer = signal
+            self._mux = extractor
+        self._big = self._big or not signal.little_endian
+        self._little = self._little or signal.little_endian
+
+    def signal(self, name: str) -> Optional[DbcSignal]:
+        return next((s for s in self.signals if s.name == name), None)
+
+    # ------------------------------------------------------------------------------
+    # Per-frame decoding
+    # ------------------------------------------------------------------------------
+    def decode(self, data: bytes) -> Dict[str, float]:
+        """Physical values of the signals present in ``data`` (short frames decode what they hold)."""
+        n = len(data)
+        if n != self.size:
+            data = data[:self.size] if n > self.size else data + bytes(self.size - n)
+        little = int.from_bytes(data, "little") if self._little else 0
+        big = int.from_bytes(data, "big") if self._big else 0
+        mux = None
+        if self._mux is not None:
+            _, is_big, shift, mask, _, _, _, end, _, _, _ = self._mux
+            if end <= n:
+                mux = ((big if is_big else little) >> shift) & mask
+        values = {}
+        for name, is_big, shift, mask, sign, scale, offset, end, mux_value, float_format, width in self._extractors:
+            if end > n or (mux_value is not None and mux_value != mux):
+                continue
+            raw = ((big if is_big else little) >> shift) & mask
+            if float_format:
+                raw = struct.unpack(float_format, raw.to_bytes(width, "little"))[0]
+            elif raw & sign:
+                raw -= sign << 1
+            values[name] = raw * scale + offset
+        return values
+
+    def text(self, data: bytes) -> str:
+        """'Name: Signal=value unit, ...' for display."""
+        values = self.decode(data)
+        by_name = {s.name: s for s in self.signals}
+        return f"{self.name}: " + ", ".join(by_name[k].format(v) for k, v in values.items())
+
+    # ------------------------------------------------------------------------------
+    # Bulk decoding (NumPy)
+    # ------------------------------------------------------------------------------
+    def decode_array(self, payloads) -> Dict[str, "numpy.ndarray"]:
+        """
+        Columns of physical values from an (n, bytes) uint8 array of this
+        message's payloads; signals multiplexed out of a frame are NaN.
+        Requires NumPy; messages over 8 bytes are decoded per frame instead.
+        """
+        import numpy as np
+        if self.size > NUMPY_MAX_BYTES:
+            raise ValueError(f"{self.name}: {self.size}-byte messages are decoded per frame")
+        payloads = np.asarray(payloads, dtype=np.uint8)
+        rows = payloads.shape[0]
+        padded = np.zeros((rows, 8), dtype=np.uint8)
+        width = min(payloads.shape[1], self.size)
+        padded[:, :width] = payloads[:, :width]
+        little = padded.view("<u8")[:, 0] if self._little else None
+        # The message fills the top of the big-endian word: shift the padding out
+        big = padded.view(">u8")[:, 0].astype(np.uint64) if self._big else None
+        pad_bits = np.uint64(8 * (8 - self.size))
+
+        def raw_column(extractor):
+            _, is_big, shift, mask, _, _, _, _, _, _, _ = extractor
+            word = (big >> pad_bits) if is_big else little
+            return (word >> np.uint64(shift)) & np.uint64(mask)
+
+        mux = raw_column(self._mux) if self._mux is not None else None
+        columns = {}
+        for extractor in self._extractors:
+            name, _, _, _, sign, scale, offset, _, mux_value, float_format, width = extractor
+            raw = raw_column(extractor)
+            if float_format == "<f":
+                values = raw.astype(np.uint32).view(np.float32).astype(np.float64)
+            elif float_format == "<d":
+                values = raw.view(np.float64).copy()
+            elif sign:
+                signed = raw.astype(np.int64)   # Already two's complement for 64-bit signals
+                if sign < 1 << 63:
+                    signed = np.where(raw & np.uint64(sign), signed - np.int64(sign << 1), signed)
+                values = signed.astype(np.float64)
+            else:
+                values = raw.astype(np.float64)
+            values = values * scale + offset
+            if mux_value is not None:
+                values[mux != mux_value] = np.nan
+            columns[name] = values
+        return columns
+
+# ----------------------------------------------------------------------------------
+# 3) DbcDatabase Class
+# ----------------------------------------------------------------------------------
+class DbcDatabase:
+    """Messages of a DBC file, looked up by (arbitration ID, extended)."""
+
+    def __init__(self, messages: Iterable[DbcMessage] = (), source: str = ""):
+        self.messages: Dict[Tuple[int, bool], DbcMessage] = {}
+        self.source = source
+        self._text_cache: Dict[Tuple[int, int, bytes], str] = {}
+        for message in messages:
+            self.messages[(message.frame_id, message.extended)] = message
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def message(self, frame: CANFrame) -> Optional[DbcMessage]:
+        return self.messages.get((frame.arb_id, bool(frame.flags & FLAG_EXTENDED)))
+
+    def by_name(self, name: str) -> Optional[DbcMessage]:
+        return next((m for m in self.messages.values() if m.name == name), None)
+
+    def decode(self, frame: CANFrame) -> Optional[Dict[str, float]]:
+        message = self.message(frame)
+        return message.decode(frame.payload) if message is not None else None
+
+    def text(self, frame: CANFrame) -> str:
+        """Signal text of a frame ("" for unknown IDs), cached per ID and payload."""
+        key = (frame.arb_id, frame.flags & FLAG_EXTENDED, frame.payload)
+        text = self._text_cache.get(key)
+        if text is None:
+            message = self.messages.get((frame.arb_id, bool(frame.flags & FLAG_EXTENDED)))
+            text = message.text(frame.payload) if message is not None else ""
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                self._text_cache.clear()
+            self._text_cache[key] = text
+        return text
+
+    def decode_capture(self, frames: Iterable[CANFrame]) -> Dict[str, Dict[str, object]]:
+        """
+        Decode a capture into per-message columns: {message: {"time": ...,
+        signal: ...}}, time in seconds on the frame clock. NumPy arrays when
+        NumPy is installed (NaN where a signal is multiplexed out), lists
+        otherwise (None there).
+        """
+        grouped: Dict[DbcMessage, List[CANFrame]] = {}
+        lookup = self.messages.get
+        for frame in frames:
+            message = lookup((frame.arb_id, bool(frame.flags & FLAG_EXTENDED)))
+            if message is not None:
+                grouped.setdefault(message, []).append(frame)
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        result = {}
+        for message, group in grouped.items():
+            if np is not None and message.size <= NUMPY_MAX_BYTES and all(len(f.payload) >= message.size for f in group):
+                blob = b"".join(f.payload[:message.size] for f in group)
+                columns = message.decode_array(np.frombuffer(blob, dtype=np.uint8).reshape(len(group), message.size))
+                columns["time"] = np.array([f.ts_ns for f in group], dtype=np.float64) / 1e9
+            else:
+                decoded = [message.decode(f.payload) for f in group]
+                columns = {s.name: [d.get(s.name) for d in decoded] for s in message.signals}
+                columns["time"] = [f.ts_ns / 1e9 for f in group]
+                if np is not None:
+                    columns = {k: np.array([np.nan if v is None else v for v in c], dtype=np.float64)
+                               for k, c in columns.items()}
+            result[message.name] = columns
+        return result
+
+# ----------------------------------------------------------------------------------
+# 4) Import
+# ----------------------------------------------------------------------------------
+def parse_dbc(text: str, source: str = "") -> DbcDatabase:
+    """Build a database from DBC text. Signals that cannot be compiled are logged and skipped."""
+    messages: Dict[int, DbcMessage] = {}
+    pending: List[Tuple[DbcMessage, DbcSignal]] = []
+    by_key: Dict[Tuple[int, str], DbcSignal] = {}   # (BO_ ID, signal name), for VAL_ / SIG_VALTYPE_
+    current: Optional[DbcMessage] = None
+    current_id = 0
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("BO_ "):
+            match = _MESSAGE_RE.match(stripped)
+            current = None
+            if match:
+                raw_id = current_id = int(match.group(1))
+                current = DbcMessage(raw_id & 0x1FFFFFFF, match.group(2), int(match.group(3)),
+                                     bool(raw_id & DBC_EXTENDED_BIT), match.group(4))
+                messages[raw_id] = current
+        elif stripped.startswith("SG_ ") and current is not None:
+            match = _SIGNAL_RE.match(stripped)
+            if not match:
+                logger.warning(f"[DBC] Cannot parse signal line in {current.name}: {stripped}")
+                continue
+            name, mux, start, length, order, sign, scale, offset, low, high, unit, _ = match.groups()
+            try:
+                signal = DbcSignal(name, int(start), int(length), order == "1", sign == "-",
+                                   float(scale), float(offset), float(low or 0), float(high or 0), unit,
+                                   is_multiplexer=mux == "M",
+                                   mux_value=int(mux[1:].rstrip("M")) if mux and mux.startswith("m") else None)
+            except ValueError as e:
+                logger.warning(f"[DBC] Skipping signal in {source or 'DBC'}: {current.name}.{name}: {e}")
+                continue
+            pending.append((current, signal))
+            by_key[(current_id, name)] = signal
+        elif not line[:1].isspace():
+            current = None   # Signals only follow their BO_ line
+    for raw_id, name, value_type in _VALTYPE_RE.findall(text):
+        signal = by_key.get((int(raw_id), name))
+        if signal is not None:
+            # A width that does not match the float type makes add_signal reject the signal
+            signal.float_format = _FLOAT_FORMATS.get((int(value_type), signal.length), "?")
+    for raw_id, name, pairs in _VALUES_RE.findall(text):
+        signal = by_key.get((int(raw_id), name))
+        if signal is not None:
+            signal.choices = {int(v): label for v, label in _VALUE_PAIR_RE.findall(pairs)}
+    for message, signal in pending:
+        try:
+            message.add_signal(signal)
+        except ValueError as e:
+            logger.warning(f"[DBC] Skipping signal in {source or 'DBC'}: {e}")
+    logger.info(f"[DBC] {len(messages)} messages, {len(pending)} signals from {source or 'text'}")
+    return DbcDatabase(messages.values(), source)
+
+def load_dbc(file_path: str) -> DbcDatabase:
+    """
+    Import a DBC file. Raises OSError when it cannot be read; signal lines
+    that do not parse or do not fit their message are logged and skipped.
+    """
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_dbc(f.read(), file_path)
@@ -0,0 +1,507 @@
+# utils/did_registry.py
+
+"""
+Description:
+Typed DID registry compiled from JSON DID sets (data/dids.json format).
+
+Every entry is compiled once into a DidSpec: a precomputed struct.Struct (or
+big-endian int reader for odd widths), the scale/offset/unit of its value and
+the number of decimals to print. Decoding a value is then one unpack and one
+multiply; decode_column decodes a whole column of same-DID payloads in a
+single struct call for the live-data store.
+
+DID files are compiled once into a binary cache (see load_did_set) keyed by
+the file's SHA-256: a sorted DID index and fixed-size records, so opening a
+set of any size is a file read, and a DidSpec is built only when its DID is
+first looked up. The base set and the manufacturer partitions in data/dids/
+are opened on their first lookup, so importing this module reads nothing;
+preload() opens them on a worker thread instead, so a first lookup from the
+GUI or reader thread does not have to compile a large set.
+
+DidRegistry swaps its table with one reference assignment, so readers on
+other threads see either the old or the new set, and bumps ``generation`` so
+text cached from the old set (CANFrame.decoded) is recomputed.
+"""
+
+# ----------------------------------------------------------------------------------
+# 1) Imports & Constants
+# ----------------------------------------------------------------------------------
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DID_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'dids.json')
+DEFAULT_PARTITION_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'dids')   # <manufacturer>.json
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.canai_pro_did_cache")
+CACHE_MAGIC = b"DIDC"
+CACHE_VERSION = 2   # 2: uint/int entries without a byte_count compile as 4 bytes
+CACHE_SUFFIX = ".didc"
+
+# Decoder name -> struct codes by byte count ('>' = big-endian, as on the wire)
+_STRUCT_CODES = {
+    "uint": {1: "B", 2: "H", 4: "I", 8: "Q"},
+    "int": {1: "b", 2: "h", 4: "i", 8: "q"},
+    "float": {4: "f", 8: "d"},
+}
+DEFAULT_INT_LENGTH = 4   # uint/int entries without a byte_count, as the original loader read them
+TEXT_DECODERS = ("ascii", "hex")
+NUMERIC_DECODERS = tuple(_STRUCT_CODES)
+
+def _hex(data) -> str:
+    return bytes(data).hex(' ').upper()
+
+def scale_decimals(number: float) -> int:
+    """Fraction digits needed to print multiples of ``number`` (0.1 -> 1, 0.25 -> 2)."""
+    exponent = Decimal(repr(float(number))).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+# ----------------------------------------------------------------------------------
+# 2) DidSpec Class
+# ----------------------------------------------------------------------------------
+@dataclass(frozen=True)
+class DidSpec:
+    """One compiled DID: decoder kind, value length and physical value = raw * scale + offset."""
+    did: int
+    name: str
+    decoder: str = "hex"
+    length: Optional[int] = None    # Data bytes; None = whatever the ECU sends
+    scale: float = 1.0
+    offset: float = 0.0
+    unit: str = ""
+    _struct: Optional[struct.Struct] = field(default=None, init=False, repr=False, compare=False)
+    _signed: bool = field(default=False, init=False, repr=False, compare=False)
+    _format: str = field(default="", init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.decoder in NUMERIC_DECODERS:
+            if not self.length:
+                raise ValueError(f"DID 0x{self.did:04X}: '{self.decoder}' needs a byte_count")
+            code = _STRUCT_CODES[self.decoder].get(self.length)
+            if code is None and (self.decoder == "float" or not 1 <= self.length <= 8):
+                raise ValueError(f"DID 0x{self.did:04X}: no {self.length}-byte '{self.decoder}'")
+            if code is not None:
+                object.__setattr__(self, "_struct", struct.Struct(">" + code))
+            object.__setattr__(self, "_signed", self.decoder == "int")
+            if self.decoder == "float":
+                fmt = "{:g}" if self.scale == 1 and self.offset == 0 else \
+                    f"{{:.{max(scale_decimals(self.scale), scale_decimals(self.offset), 1)}f}}"
+            elif self.scale == int(self.scale) and self.offset == int(self.offset):
+                fmt = "{:.0f}"
+            else:
+                fmt = f"{{:.{max(scale_decimals(self.scale), scale_decimals(self.offset))}f}}"
+            object.__setattr__(self, "_format", fmt)
+        elif self.decoder not in TEXT_DECODERS:
+            raise ValueError(f"DID 0x{self.did:04X}: unknown decoder '{self.decoder}'")
+        elif self.length is not None and self.length < 1:
+            raise ValueError(f"DID 0x{self.did:04X}: invalid length {self.length}")
+
+    @classmethod
+    def from_json(cls, did: int, info: dict) -> "DidSpec":
+        decoder = info.get("decoder", "ascii")
+        length = info.get("byte_count", info.get("expected_length"))
+        if length is None and decoder in ("uint", "int"):
+            length = DEFAULT_INT_LENGTH
+        return cls(did, info["name"], decoder, int(length) if length else None,
+                   float(info.get("scale", 1.0)), float(info.get("offset", 0.0)), info.get("unit", ""))
+
+    @property
+    def numeric(self) -> bool:
+        return self.decoder in NUMERIC_DECODERS
+
+    def check_length(self, data: bytes) -> bool:
+        """Enough bytes for the value (longer data is padding or the next DID)."""
+        return self.length is None or len(data) >= self.length
+
+    def value(self, data: bytes) -> float:
+        """Physical value. Raises ValueError for text DIDs and short data."""
+        if not self._format:
+            raise ValueError(f"{self.name} is not numeric")
+        if len(data) < self.length:
+            raise ValueError(f"{self.name}: {len(data)} bytes, expected {self.length}")
+        if self._struct is not None:
+            raw = self._struct.unpack_from(data)[0]
+        else:
+            raw = int.from_bytes(data[:self.length], "big", signed=self._signed)
+        return raw * self.scale + self.offset
+
+    def text(self, data: bytes, with_unit: bool = False) -> str:
+        """Display text of the value; with_unit appends the unit."""
+        if not self.check_length(data):
+            return f"Invalid ({len(data)} bytes, expected {self.length})"
+        if self.decoder == "ascii":
+            return ''.join(chr(b) if 32 <= b <= 126 else '.' for b in data[:self.length])
+        if self.decoder == "hex":
+            return _hex(data[:self.length])
+        text = self._format.format(self.value(bytes(data)))
+        return f"{text} {self.unit}" if with_unit and self.unit else text
+
+    def column(self, payloads: Sequence[bytes]) -> array:
+        """Physical values of many payloads of this DID, decoded in one pass."""
+        if not self._format:
+            raise ValueError(f"{self.name} is not numeric")
+        n, length = len(payloads), self.length
+        blob = b"".join(payloads)
+        if len(blob) != n * length:
+            raise ValueError(f"{self.name}: payloads must be {length} bytes each")
+        if self._struct is not None:
+            raw = struct.unpack(f">{n}{self._struct.format[1:]}", blob)
+        else:
+            signed = self._signed
+            raw = [int.from_bytes(blob[i:i + length], "big", signed=signed) for i in range(0, len(blob), length)]
+        scale, offset = self.scale, self.offset
+        if scale == 1 and offset == 0:
+            return array('d', raw)
+        return array('d', [r * scale + offset for r in raw])
+
+# ----------------------------------------------------------------------------------
+# 3) Loading
+# ----------------------------------------------------------------------------------
+def compile_did_set(raw_data: dict, source: str = "") -> Dict[int, DidSpec]:
+    """Compile a parsed DID JSON object; invalid entries are logged and skipped."""
+    if not isinstance(raw_data, dict):
+        raise ValueError("A DID set is a JSON object of DID entries")
+    specs: Dict[int, DidSpec] = {}
+    for did_hex, info in raw_data.items():
+        try:
+            did = int(did_hex, 16)
+            if not 0 <= did <= 0xFFFF:
+                raise ValueError("DIDs are 16-bit")
+            specs[did] = DidSpec.from_json(did, info)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"[DidRegistry] Skipping DID {did_hex} in {source or 'DID set'}: {e}")
+    return specs
+
+def load_did_config(file_path: str = DEFAULT_DID_FILE) -> Dict[int, DidSpec]:
+    """Compile a DID JSON file. Raises OSError / ValueError when it cannot be read."""
+    with open(file_path, "r") as f:
+        raw_data = json.load(f)
+    specs = compile_did_set(raw_data, file_path)
+    logger.info(f"Loaded DID config from {file_path} ({len(specs)} DIDs)")
+    return specs
+
+DEFAULT_DIDS = {
+    0xF190: DidSpec(0xF190, "VIN", "ascii", 17),
+    0xF124: DidSpec(0xF124, "ECU Serial Number", "ascii"),
+    0xF1A0: DidSpec(0xF1A0, "Odometer", "uint", 4, unit="km"),
+}
+
+# ----------------------------------------------------------------------------------
+# 4) Compiled Cache
+# ----------------------------------------------------------------------------------
+# File layout: header, sorted DID index (u16), fixed-size records in index
+# order, then the UTF-8 names and units the records point into.
+_HEADER = struct.Struct("<4sH32sI")       # Magic, version, SHA-256 of the source, DID count
+_RECORD = struct.Struct("<BHddIHIH")      # Decoder, length, scale, offset, name, unit (offset, size)
+_DECODER_CODES = ("hex", "ascii") + NUMERIC_DECODERS
+
+def _cache_file(file_path: str, digest: bytes, cache_dir: str) -> str:
+    """Cache name: source stem, source path hash and content hash."""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    where = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{stem}-{where}-{digest.hex()[:16]}{CACHE_SUFFIX}")
+
+def encode_did_cache(specs: Mapping[int, DidSpec], digest: bytes) -> bytes:
+    """Serialize compiled DIDs into the cache format."""
+    dids = array('H', sorted(specs))
+    records, strings = bytearray(), bytearray()
+    for did in dids:
+        spec = specs[did]
+        name, unit = spec.name.encode(), spec.unit.encode()
+        records += _RECORD.pack(_DECODER_CODES.index(spec.decoder), spec.length or 0, spec.scale, spec.offset,
+                                len(strings), len(name), len(strings) + len(name), len(unit))
+        strings += name + unit
+    if sys.byteorder == "big":
+        dids.byteswap()
+    return _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest, len(dids)) + dids.tobytes() + records + strings
+
+class CompiledDidSet(Mapping):
+    """DIDs of a compiled cache. A DidSpec is built on the first lookup of its DID."""
+
+    def __init__(self, blob: bytes, source: str = ""):
+        if len(blob) < _HEADER.size:
+            raise ValueError("Truncated DID cache")
+        magic, version, self.digest, count = _HEADER.unpack_from(blob)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            raise ValueError("Not a DID cache of this version")
+        self._dids = array('H')
+        self._dids.frombytes(blob[_HEADER.size:_HEADER.size + 2 * count])
+        if sys.byteorder == "big":
+            self._dids.byteswap()
+        self._records = _HEADER.size + 2 * count
+        self._strings = self._records + count * _RECORD.size
+        if len(self._dids) != count or len(blob) < self._strings:
+            raise ValueError("Truncated DID cache")
+        self._blob = blob
+        self._specs: Dict[int, DidSpec] = {}
+        self.source = source
+
+    def _build(self, did: int) -> Optional[DidSpec]:
+        dids = self._dids
+        i = bisect_left(dids, did)
+        if i == len(dids) or dids[i] != did:
+            return None
+        decoder, length, scale, offset, name_at, name_len, unit_at, unit_len = \
+            _RECORD.unpack_from(self._blob, self._records + i * _RECORD.size)
+        strings = self._strings
+        spec = DidSpec(did, self._blob[strings + name_at:strings + name_at + name_len].decode(),
+                       _DECODER_CODES[decoder], length or None, scale, offset,
+                       self._blob[strings + unit_at:strings + unit_at + unit_len].decode())
+        self._specs[did] = spec
+        return spec
+
+    def get(self, did: int, default=None) -> Optional[DidSpec]:
+        spec = self._specs.get(did)
+        if spec is None:
+            spec = self._build(did)
+        return default if spec is None else spec
+
+    def __getitem__(self, did: int) -> DidSpec:
+        spec = self.get(did)
+        if spec is None:
+            raise KeyError(did)
+        return spec
+
+    def __contains__(self, did) -> bool:
+        i = bisect_left(self._dids, did)
+        return i < len(self._dids) and self._dids[i] == did
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._dids)
+
+    def __len__(self) -> int:
+        return len(self._dids)
+
+def load_did_set(file_path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> CompiledDidSet:
+    """
+    The compiled set of a DID JSON file. The cache is keyed by the file's
+    SHA-256, so an edited file is compiled again (and its old cache removed).
+    Raises OSError / ValueError when the file cannot be read.
+    """
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).digest()
+    cache_file = _cache_file(file_path, digest, cache_dir)
+    try:
+        with open(cache_file, "rb") as f:
+            compiled = CompiledDidSet(f.read(), file_path)
+        if compiled.digest == digest:
+            return compiled
+    except (OSError, ValueError):
+        pass  # Not compiled yet, or unreadable: compile again
+    specs = compile_did_set(json.loads(raw), file_path)
+    blob = encode_did_cache(specs, digest)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        prefix = cache_file.rsplit("-", 1)[0] + "-"
+        for name in os.listdir(cache_dir):
+            old = os.path.join(cache_dir, name)
+            if old.startswith(prefix) and old.endswith(CACHE_SUFFIX) and old != cache_file:
+                os.remove(old)
+        with open(cache_file + ".tmp", "wb") as f:
+            f.write(blob)
+        os.replace(cache_file + ".tmp", cache_file)
+    except OSError as e:
+        logger.warning(f"[DidRegistry] Cannot write DID cache {cache_file}: {e}")
+    logger.info(f"Compiled DID config {file_path} ({len(specs)} DIDs)")
+    return CompiledDidSet(blob, file_path)
+
+class LazyDidSet(Mapping):
+    """A DID file's compiled set, loaded on its first lookup (``fallback`` if that fails)."""
+
+    def __init__(self, file_path: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 fallback: Optional[Mapping[int, DidSpec]] = None):
+        self.file_path = file_path
+        self.cache_dir = cache_dir
+        self.fallback = fallback if fallback is not None else {}
+        self._set: Optional[Mapping[int, DidSpec]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._set is not None
+
+    def _load(self) -> Mapping[int, DidSpec]:
+        try:
+            specs = load_did_set(self.file_path, self.cache_dir)
+        except Exception as e:   # Any failure: a lookup must never re-run (and re-raise) the load
+            logger.warning(f"Failed to load DID config from {self.file_path}: {e}. Using default.")
+            specs = self.fallback
+        self._set = specs   # Two threads loading at once both get a complete set
+        return specs
+
+    def get(self, did: int, default=None) -> Optional[DidSpec]:
+        specs = self._set
+        if specs is None:
+            specs = self._load()
+        return specs.get(did, default)
+
+    def __getitem__(self, did: int) -> DidSpec:
+        specs = self._set if self._set is not None else self._load()
+        return specs[did]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._set if self._set is not None else self._load())
+
+    def __len__(self) -> int:
+        return len(self._set if self._set is not None else self._load())
+
+# ----------------------------------------------------------------------------------
+# 5) DidRegistry Class
+# ----------------------------------------------------------------------------------
+class DidRegistry:
+    """
+    The active DID set: a base set plus, once selected, one manufacturer
+    partition (data/dids/<manufacturer>.json) whose DIDs take precedence.
+    Both load lazily from the compiled cache. Lookups are thread-safe;
+    swap and select from the GUI thread.
+    """
+
+    def __init__(self, specs: Optional[Mapping[int, DidSpec]] = None,
+                 partition_dir: str = DEFAULT_PARTITION_DIR, cache_dir: str = DEFAULT_CACHE_DIR):
+        base = specs if specs is not None else {}   # Not truthiness: that would load a LazyDidSet
+        self._state: Tuple[Mapping[int, DidSpec], Optional[Mapping[int, DidSpec]]] = (base, None)
+        self.generation = 0   # Bumped on every change; stamps text decoded from the registry
+        self.source = ""
+        self.manufacturer = ""
+        self.partition_dir = partition_dir
+        self.cache_dir = cache_dir
+        self._partitions: Dict[str, LazyDidSet] = {}
+
+    @classmethod
+    def from_file(cls, file_path: str = DEFAULT_DID_FILE, **kwargs) -> "DidRegistry":
+        """Registry of ``file_path`` (DEFAULT_DIDS if it cannot be loaded), read on first lookup."""
+        cache_dir = kwargs.get("cache_dir", DEFAULT_CACHE_DIR)
+        registry = cls(LazyDidSet(file_path, cache_dir, DEFAULT_DIDS), **kwargs)
+        registry.source = file_path
+        return registry
+
+    def swap(self, specs: Mapping[int, DidSpec], source: str = "") -> None:
+        """Replace the base set at once and invalidate text decoded from the old one."""
+        self._state = (specs, self._state[1])
+        self.source = source
+        self.generation += 1   # After the swap: text decoded meanwhile carries the old stamp
+
+    def load(self, file_path: str) -> int:
+        """Compile (or open the cache of) ``file_path`` and swap it in; unchanged if that fails."""
+        specs = load_did_set(file_path, self.cache_dir)
+        self.swap(specs, file_path)
+        return len(specs)
+
+    def manufacturers(self) -> List[str]:
+        """Partitions available in partition_dir (nothing is loaded)."""
+        try:
+            names = os.listdir(self.partition_dir)
+        except OSError:
+            return []
+        return sorted(os.path.splitext(n)[0] for n in names if n.endswith(".json"))
+
+    def select(self, manufacturer: str) -> None:
+        """Layer a manufacturer's partition over the base set ("" = base only)."""
+        if manufacturer == self.manufacturer:
+            return
+        partition = None
+        if manufacturer:
+            partition = self._partitions.get(manufacturer)
+            if partition is None:
+                path = os.path.join(self.partition_dir, f"{manufacturer}.json")
+                partition = self._partitions[manufacturer] = LazyDidSet(path, self.cache_dir)
+        self._state = (self._state[0], partition)
+        self.manufacturer = manufacturer
+        self.generation += 1
+
+    @property
+    def loaded(self) -> bool:
+        """False while the base set or the selected partition is still to be read."""
+        return all(getattr(specs, "loaded", True) for specs in self._state if specs is not None)
+
+    def preload(self, on_loaded: Optional[Callable[[], None]] = None) -> None:
+        """Load the active sets on a worker thread; ``on_loaded`` is called there when done."""
+        if self.loaded:
+            return
+        state = self._state
+
+        def load() -> None:
+            for specs in state:
+                if specs is not None:
+                    len(specs)   # A LazyDidSet loads on its first use
+            if on_loaded is not None:
+                on_loaded()
+
+        threading.Thread(target=load, name="DidPreload", daemon=True).start()
+
+    # ------------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------------
+    def get(self, did: int) -> Optional[DidSpec]:
+        base, partition = self._state
+        if partition is not None:
+            spec = partition.get(did)
+            if spec is not None:
+                return spec
+        return base.get(did)
+
+    def __contains__(self, did: int) -> bool:
+        return self.get(did) is not None
+
+    def _merged(self) -> Dict[int, DidSpec]:
+        base, partition = self._state
+        merged = dict(base.items())
+        if partition is not None:
+            merged.update(partition.items())
+        return merged
+
+    def __len__(self) -> int:
+        return len(self._merged())
+
+    def __iter__(self) -> Iterator[DidSpec]:
+        return iter(list(self._merged().values()))
+
+    def name(self, did: int) -> str:
+        spec = self.get(did)
+        return spec.name if spec is not None else f"0x{did:04X}"
+
+    def length(self, did: int) -> Optional[int]:
+        """Data bytes of a DID's value, if the registry knows it."""
+        spec = self.get(did)
+        return spec.length if spec is not None else None
+
+    def unit(self, did: int) -> str:
+        spec = self.get(did)
+        return spec.unit if spec is not None else ""
+
+    # ------------------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------------------
+    def decode(self, did: int, data: bytes, with_unit: bool = False) -> Tuple[str, str]:
+        """Name and value text of a DID (hex for unknown DIDs)."""
+        spec = self.get(did)
+        if spec is None:
+            return f"0x{did:04X}", _hex(data)
+        return spec.name, spec.text(data, with_unit)
+
+    def value(self, did: int, data: bytes) -> float:
+        """Physical value of a numeric DID. Raises KeyError / ValueError."""
+        return self[did].value(data)
+
+    def decode_column(self, did: int, payloads: Sequence[bytes]) -> array:
+        """Physical values of a column of payloads of one numeric DID."""
+        return self[did].column(payloads)
+
+    def __getitem__(self, did: int) -> DidSpec:
+        spec = self.get(did)
+        if spec is None:
+            raise KeyError(did)
+        return spec
+
+DID_REGISTRY = DidRegistry.from_file()   # Nothing is read until the first lookup
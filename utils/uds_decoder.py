@@ -2,127 +2,289 @@
 
 """
 Description:
-Provides UDS protocol decoding capabilities using DID configurations from JSON.
+Provides UDS protocol decoding capabilities; DID names and values come from the
+typed registry in utils/did_registry.py.
 """
 
 # ----------------------------------------------------------------------------------
 # 1) Imports & Configuration
 # ----------------------------------------------------------------------------------
-from typing import Optional, Dict, Callable, List, Tuple
-import json
-import os
+from typing import Optional, Dict, Callable, Iterable, List, Tuple
 import logging
 from backend.can_interface import CANFrame
+from backend.uds_client import NRC_DESCRIPTIONS
+from utils.did_registry import DID_REGISTRY
 
 logger = logging.getLogger(__name__)
 
-# Load DID configuration with fallback
-def load_did_config(file_path: str = os.path.join(os.path.dirname(__file__), '..', 'data', 'dids.json')) -> Dict[int, Tuple[str, Callable[[List[int]], str]]]:
-    """Load DID configuration from a JSON file with a fallback default."""
-    default_dids = {
-        0xF190: ("VIN", decode_ascii),
-        0xF124: ("ECU Serial Number", decode_ascii),
-        0xF1A0: ("Odometer", lambda d: decode_uint(d, 4)),
-    }
-    try:
-        with open(file_path, "r") as f:
-            raw_data = json.load(f)
-        did_lookup = {}
-        for did_hex, info in raw_data.items():
-            did = int(did_hex, 16)
-            decoder_name = info.get("decoder", "ascii")
-            if decoder_name == "uint":
-                byte_count = info.get("byte_count", 4)
-                decoder = lambda d, bc=byte_count: decode_uint(d, bc)
-            else:
-                decoder = DECODERS.get(decoder_name, lambda x: ' '.join(f"{b:02X}" for b in x))
-            did_lookup[did] = (info["name"], decoder)
-        logger.info(f"Loaded DID config from {file_path}")
-        return did_lookup
-    except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
-        logger.warning(f"Failed to load DID config from {file_path}: {e}. Using default.")
-        return default_dids
+def _hex(data) -> str:
+    """Bytes as 'AA BB CC' (one C-level call)."""
+    return bytes(data).hex(' ').upper()
 
 # ----------------------------------------------------------------------------------
-# 2) Decoder Functions
+# 2) Protocol Tables (ISO 14229-1)
 # ----------------------------------------------------------------------------------
-def decode_ascii(data: List[int]) -> str:
-    """Decode bytes as ASCII, replacing non-printable chars with '.'."""
-    return ''.join(chr(b) if 32 <= b <= 126 else '.' for b in data)
-
-def decode_uint(data: List[int], byte_count: int = 4) -> str:
-    """Decode bytes as an unsigned integer (big-endian)."""
-    if len(data) < byte_count:
-        return f"Invalid ({len(data)} bytes)"
-    value = 0
-    for b in data[:byte_count]:
-        value = (value << 8) | b
-    return str(value)
-
-# Mapping of decoder names to functions
-DECODERS: Dict[str, Callable[[List[int]], str]] = {
-    "ascii": decode_ascii,
-    "uint": lambda d: decode_uint(d, 4),  # Default to 4 bytes, overridden by JSON
+SERVICE_NAMES: Dict[int, str] = {
+    0x10: "DiagnosticSessionControl",
+    0x11: "ECUReset",
+    0x14: "ClearDiagnosticInformation",
+    0x19: "ReadDTCInformation",
+    0x22: "ReadDataByIdentifier",
+    0x23: "ReadMemoryByAddress",
+    0x24: "ReadScalingDataByIdentifier",
+    0x27: "SecurityAccess",
+    0x28: "CommunicationControl",
+    0x29: "Authentication",
+    0x2A: "ReadDataByPeriodicIdentifier",
+    0x2C: "DynamicallyDefineDataIdentifier",
+    0x2E: "WriteDataByIdentifier",
+    0x2F: "InputOutputControlByIdentifier",
+    0x31: "RoutineControl",
+    0x34: "RequestDownload",
+    0x35: "RequestUpload",
+    0x36: "TransferData",
+    0x37: "RequestTransferExit",
+    0x38: "RequestFileTransfer",
+    0x3D: "WriteMemoryByAddress",
+    0x3E: "TesterPresent",
+    0x83: "AccessTimingParameter",
+    0x84: "SecuredDataTransmission",
+    0x85: "ControlDTCSetting",
+    0x86: "ResponseOnEvent",
+    0x87: "LinkControl",
 }
 
-DID_LOOKUP = load_did_config()  # Initial load
+SUBFUNCTION_NAMES: Dict[int, Dict[int, str]] = {
+    0x10: {0x01: "Default", 0x02: "Programming", 0x03: "Extended", 0x04: "Safety System"},
+    0x11: {0x01: "Hard Reset", 0x02: "Key Off/On", 0x03: "Soft Reset",
+           0x04: "Enable Rapid Power Shutdown", 0x05: "Disable Rapid Power Shutdown"},
+    0x19: {0x01: "Number Of DTC By Status Mask", 0x02: "DTC By Status Mask",
+           0x03: "DTC Snapshot Identification", 0x04: "DTC Snapshot By DTC Number",
+           0x05: "DTC Stored Data By Record", 0x06: "DTC Ext Data By DTC Number",
+           0x07: "Number Of DTC By Severity", 0x08: "DTC By Severity", 0x09: "Severity Of DTC",
+           0x0A: "Supported DTC", 0x0B: "First Test Failed DTC", 0x0C: "First Confirmed DTC",
+           0x0D: "Most Recent Test Failed DTC", 0x0E: "Most Recent Confirmed DTC",
+           0x14: "DTC Fault Detection Counter", 0x15: "DTC With Permanent Status"},
+    # SecurityAccess: odd levels request a seed, even levels send the key
+    0x27: {level: f"{'Request Seed' if level & 1 else 'Send Key'} (Level {(level + 1) // 2})"
+           for level in range(0x01, 0x7F)},
+    0x28: {0x00: "Enable Rx And Tx", 0x01: "Enable Rx, Disable Tx", 0x02: "Disable Rx, Enable Tx",
+           0x03: "Disable Rx And Tx"},
+    0x2A: {0x01: "Slow Rate", 0x02: "Medium Rate", 0x03: "Fast Rate", 0x04: "Stop Sending"},
+    0x2C: {0x01: "Define By Identifier", 0x02: "Define By Memory Address", 0x03: "Clear"},
+    0x2F: {0x00: "Return Control To ECU", 0x01: "Reset To Default", 0x02: "Freeze Current State",
+           0x03: "Short Term Adjustment"},
+    0x31: {0x01: "Start", 0x02: "Stop", 0x03: "Request Results"},
+    0x3E: {0x00: "Zero Sub-Function"},
+    0x83: {0x01: "Read Extended Timing", 0x02: "Set To Defaults", 0x03: "Read Current Timing",
+           0x04: "Set Given Values"},
+    0x85: {0x01: "On", 0x02: "Off"},
+    0x87: {0x01: "Verify Fixed Baudrate", 0x02: "Verify Specific Baudrate", 0x03: "Transition Baudrate"},
+}
+
+# Sub-function byte printed as "Label: XX Name" (the suppress-positive bit is masked off)
+_SUBFUNCTION_LABELS = {
+    0x10: "Session", 0x11: "Reset Type", 0x19: "Sub-Function", 0x27: "Level", 0x28: "Control",
+    0x2A: "Mode", 0x2C: "Sub-Function", 0x3E: "Sub-Function", 0x83: "Sub-Function",
+    0x85: "Setting", 0x87: "Sub-Function",
+}
+_SUPPRESS_BIT_SERVICES = frozenset((0x10, 0x11, 0x19, 0x27, 0x28, 0x2C, 0x31, 0x3E, 0x83, 0x85, 0x87))
+
+# "XX" and "XX Name" for every sub-function byte, built once
+_SUBFUNCTION_TEXT: Dict[int, Tuple[str, ...]] = {
+    sid: tuple(f"{sf:02X} {names[sf]}" if sf in names else f"{sf:02X}" for sf in range(256))
+    for sid, names in {**{s: {} for s in _SUBFUNCTION_LABELS}, **SUBFUNCTION_NAMES}.items()
+}
+_NRC_TEXT: Tuple[str, ...] = tuple(NRC_DESCRIPTIONS.get(nrc, f"Unknown NRC: {nrc:02X}") for nrc in range(256))
+_SID_HEX: Tuple[str, ...] = tuple(f"{b:02X}" for b in range(256))
+_RESPONSE_NAMES: Dict[int, str] = {sid + 0x40: f"{name} Response" for sid, name in SERVICE_NAMES.items()}
 
-def _decode_did(data: List[int], start_idx: int = 1, include_payload: bool = False) -> str:
-    """Helper to decode a DID from frame data and optionally include payload."""
+# ----------------------------------------------------------------------------------
+# 3) Service Decoders (data = whole UDS message, SID first; length checked by caller)
+# ----------------------------------------------------------------------------------
+def _did_name(data: bytes, start: int) -> str:
+    return DID_REGISTRY.name((data[start] << 8) | data[start + 1])
+
+def _decode_did(data: bytes, start_idx: int = 1, include_payload: bool = False) -> str:
+    """DID at ``start_idx`` (registry name), with its decoded payload if asked."""
     if len(data) < start_idx + 2:
         return "Invalid DID"
-    did = (data[start_idx] << 8) | data[start_idx + 1]
-    did_info = DID_LOOKUP.get(did, (f"0x{did:04X}", lambda x: ' '.join(f"{b:02X}" for b in x)))
-    did_str = did_info[0]
     if include_payload and len(data) > start_idx + 2:
-        payload = did_info[1](data[start_idx + 2:])
-        return f"DID: {did_str}, Data: {payload}"
-    return f"DID: {did_str}"
-
-UDS_SERVICES: Dict[int, Tuple[str, Callable[[CANFrame], str]]] = {
-    0x10: ("DiagnosticSessionControl", lambda f: f"Session: {f.data[1]:02X}" if len(f.data) > 1 else ""),
-    0x11: ("ECUReset", lambda f: f"Reset Type: {f.data[1]:02X}" if len(f.data) > 1 else ""),
-    0x14: ("ClearDiagnosticInformation", lambda f: f"DTC: {(f.data[1] << 16) | (f.data[2] << 8) | f.data[3]:06X}" if len(f.data) >= 4 else ""),
-    0x19: ("ReadDTCInformation", lambda f: f"Sub-Function: {f.data[1]:02X}" if len(f.data) > 1 else ""),
-    0x22: ("ReadDataByIdentifier", lambda f: _decode_did(f.data) if len(f.data) >= 3 else ""),
-    0x27: ("SecurityAccess", lambda f: f"Level: {f.data[1]:02X}" if len(f.data) > 1 else ""),
-    0x2E: ("WriteDataByIdentifier", lambda f: _decode_did(f.data, include_payload=True) if len(f.data) >= 4 else ""),
-    0x31: ("RoutineControl", lambda f: f"Type: {f.data[1]:02X}, Routine: {(f.data[2] << 8) | f.data[3]:04X}" if len(f.data) >= 4 else ""),
-    0x36: ("TransferData", lambda f: f"Block: {f.data[1]:02X}, Data: {' '.join(f'{b:02X}' for b in f.data[2:])}" if len(f.data) >= 3 else ""),
-    0x3E: ("TesterPresent", lambda f: "TesterPresent"),
+        name, payload = DID_REGISTRY.decode((data[start_idx] << 8) | data[start_idx + 1], data[start_idx + 2:], True)
+        return f"DID: {name}, Data: {payload}"
+    return f"DID: {_did_name(data, start_idx)}"
+
+def _subfunction(sid: int, data: bytes) -> str:
+    sf = data[1] & 0x7F if sid in _SUPPRESS_BIT_SERVICES else data[1]
+    return f"{_SUBFUNCTION_LABELS[sid]}: {_SUBFUNCTION_TEXT[sid][sf]}"
+
+def _req_dtc_group(data: bytes) -> str:
+    return f"DTC: {(data[1] << 16) | (data[2] << 8) | data[3]:06X}" if len(data) >= 4 else ""
+
+def _req_read_did(data: bytes) -> str:
+    if len(data) < 3:
+        return ""
+    if len(data) == 3:
+        return _decode_did(data)
+    return "DIDs: " + ", ".join(_did_name(data, i) for i in range(1, len(data) - 1, 2))
+
+def _req_write_did(data: bytes) -> str:
+    return _decode_did(data, include_payload=True) if len(data) >= 4 else ""
+
+def _req_periodic(data: bytes) -> str:
+    return f"{_subfunction(0x2A, data)}, PDIDs: {_hex(data[2:])}" if len(data) > 2 else _subfunction(0x2A, data)
+
+def _req_dynamic_did(data: bytes) -> str:
+    text = _subfunction(0x2C, data)
+    return f"{text}, {_decode_did(data, 2)}" if len(data) >= 4 else text
+
+def _req_io_control(data: bytes) -> str:
+    if len(data) < 4:
+        return ""
+    return f"{_decode_did(data)}, {_SUBFUNCTION_TEXT[0x2F][data[3]]}"
+
+def _req_routine(data: bytes) -> str:
+    if len(data) < 4:
+        return ""
+    return f"Type: {_SUBFUNCTION_TEXT[0x31][data[1] & 0x7F]}, Routine: {(data[2] << 8) | data[3]:04X}"
+
+def _req_transfer(data: bytes) -> str:
+    return f"Block: {data[1]:02X}, Data: {_hex(data[2:])}" if len(data) >= 3 else ""
+
+def _req_memory(data: bytes) -> str:
+    return f"Data: {_hex(data[1:])}" if len(data) > 1 else ""
+
+_REQUEST_DECODERS: Dict[int, Callable[[bytes], str]] = {
+    0x14: _req_dtc_group,
+    0x22: _req_read_did,
+    0x24: _req_read_did,
+    0x2A: _req_periodic,
+    0x2C: _req_dynamic_did,
+    0x2E: _req_write_did,
+    0x2F: _req_io_control,
+    0x31: _req_routine,
+    0x36: _req_transfer,
 }
 
+def _resp_read_did(data: bytes) -> str:
+    if len(data) < 3:
+        return f"Data: {_hex(data[1:])}" if len(data) > 1 else ""
+    payload = DID_REGISTRY.decode((data[1] << 8) | data[2], data[3:], True)[1] if len(data) > 3 else "No Data"
+    return f"DID: {_did_name(data, 1)}, {payload}"
+
+def _resp_session(data: bytes) -> str:
+    text = _subfunction(0x10, data)
+    if len(data) >= 6:
+        text += f", P2: {(data[2] << 8) | data[3]} ms, P2*: {((data[4] << 8) | data[5]) * 10} ms"
+    return text
+
+def _resp_dtcs(data: bytes) -> str:
+    text = _subfunction(0x19, data)
+    if data[1] == 0x02 and len(data) >= 3:
+        text += f", {(len(data) - 3) // 4} DTCs"
+    return text
+
+def _resp_security(data: bytes) -> str:
+    text = _subfunction(0x27, data)
+    return f"{text}, Seed: {_hex(data[2:])}" if data[1] & 1 and len(data) > 2 else text
+
+def _resp_did_echo(data: bytes) -> str:
+    return _decode_did(data) if len(data) >= 3 else ""
+
+def _resp_generic(sid: int) -> Callable[[bytes], str]:
+    def decode(data: bytes) -> str:
+        text = _subfunction(sid, data)
+        return f"{text}, Data: {_hex(data[2:])}" if len(data) > 2 else text
+    return decode
+
+_RESPONSE_DECODERS: Dict[int, Callable[[bytes], str]] = {
+    sid: _resp_generic(sid) for sid in _SUBFUNCTION_LABELS if sid != 0x2A  # 6A carries no echo
+}
+_RESPONSE_DECODERS.update({
+    0x10: _resp_session,
+    0x19: _resp_dtcs,
+    0x22: _resp_read_did,
+    0x27: _resp_security,
+    0x2E: _resp_did_echo,
+    0x2F: _resp_did_echo,
+    0x31: _req_routine,
+})
+
+def _request_subfunction(sid: int) -> Callable[[bytes], str]:
+    def decode(data: bytes) -> str:
+        return _subfunction(sid, data)
+    return decode
+
+for _sid in _SUBFUNCTION_LABELS:
+    _REQUEST_DECODERS.setdefault(_sid, _request_subfunction(_sid))
+for _sid in (0x23, 0x34, 0x35, 0x3D):
+    _REQUEST_DECODERS[_sid] = _req_memory
+
+# ----------------------------------------------------------------------------------
+# 4) Entry Points
+# ----------------------------------------------------------------------------------
+def decode_message(data: bytes) -> Optional[str]:
+    """Decode one UDS message (SID first) into a human-readable string."""
+    if not data:
+        return None
+    sid = data[0]
+    if sid == 0x7F:
+        if len(data) < 3:
+            return None
+        return f"Negative Response → SID: {_SID_HEX[data[1]]}, {_NRC_TEXT[data[2]]}"
+    name = _RESPONSE_NAMES.get(sid)
+    if name is not None:
+        if len(data) == 1:
+            return name
+        decoder = _RESPONSE_DECODERS.get(sid - 0x40)
+        details = decoder(data) if decoder is not None else f"Data: {_hex(data[1:])}"
+        return f"{name} → {details}" if details else name
+    name = SERVICE_NAMES.get(sid)
+    if name is None:
+        return None
+    decoder = _REQUEST_DECODERS.get(sid)
+    details = decoder(data) if decoder is not None and len(data) > 1 else ""
+    return f"{name} → {details}" if details else name
+
 def decode_uds(frame: CANFrame) -> Optional[str]:
     """Decode a UDS frame into a human-readable string."""
-    if not frame.data or len(frame.data) < 1:
-        return None
-    sid = frame.data[0]
-    is_response = sid >= 0x40
-    if is_response:
-        request_sid = sid - 0x40
-        if request_sid in UDS_SERVICES:
-            name, _ = UDS_SERVICES[request_sid]
-            if request_sid == 0x22 and len(frame.data) >= 3:
-                did = (frame.data[1] << 8) | frame.data[2]
-                did_info = DID_LOOKUP.get(did, (f"0x{did:04X}", lambda x: ' '.join(f"{b:02X}" for b in x)))
-                payload = did_info[1](frame.data[3:]) if len(frame.data) > 3 else "No Data"
-                return f"{name} Response → DID: {did_info[0]}, {payload}"
-            if len(frame.data) > 1:
-                return f"{name} Response → Data: {' '.join(f'{b:02X}' for b in frame.data[1:])}"
-            return f"{name} Response"
-    if sid == 0x7F and len(frame.data) >= 3:
-        request_sid = frame.data[1]
-        nrc = frame.data[2]
-        nrc_desc = {
-            0x10: "General Reject",
-            0x11: "Service Not Supported",
-            0x12: "Sub-Function Not Supported",
-            0x22: "Conditions Not Correct",
-            0x31: "Request Out Of Range",
-        }.get(nrc, f"Unknown NRC: {nrc:02X}")
-        return f"Negative Response → SID: {request_sid:02X}, {nrc_desc}"
-    if sid in UDS_SERVICES:
-        name, decode_func = UDS_SERVICES[sid]
-        details = decode_func(frame)
-        return f"{name}{f' → {details}' if details else ''}"
-    return None
\ No newline at end of file
+    return decode_message(frame.payload)
+
+def decode_many(frames: Iterable[CANFrame]) -> List[Optional[str]]:
+    """decode_uds over a batch (e.g. a capture being exported)."""
+    decode = decode_message
+    return [decode(frame.payload) for frame in frames]
+
+def annotate_frames(frames: Iterable[CANFrame]) -> None:
+    """
+    Fill ``frame.decoded`` with the hex and UDS text of every CAN frame, so the
+    table never formats on repaint. Meant as an interface frame_annotator
+    (reader thread); frames of other buses are left alone. While the DID sets
+    are still loading (DidRegistry.preload) frames are left for frame_text, so
+    the reader thread never waits for a DID file to compile.
+    """
+    if not DID_REGISTRY.loaded:
+        return
+    generation = DID_REGISTRY.generation  # Read first: a registry swap during the loop leaves the text stale
+    decode = decode_message
+    for frame in frames:
+        if type(frame) is CANFrame:
+            payload = frame.payload
+            frame.decoded = (generation, payload.hex(' ').upper(), decode(payload) or "")
+
+def frame_text(frame: CANFrame) -> Tuple[str, str]:
+    """
+    Hex payload and UDS decode of a frame, from its cache when still current.
+    While the DID sets are loading the UDS text is empty and nothing is cached.
+    """
+    generation = DID_REGISTRY.generation
+    cached = getattr(frame, "decoded", None)
+    if cached is not None and cached[0] == generation:
+        return cached[1], cached[2]
+    payload = frame.payload
+    if not DID_REGISTRY.loaded:
+        return payload.hex(' ').upper(), ""
+    hex_text, uds_text = payload.hex(' ').upper(), decode_message(payload) or ""
+    if type(frame) is CANFrame:
+        frame.decoded = (generation, hex_text, uds_text)
+    return hex_text, uds_text